@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Count frames per delivered byte with immediate versus delayed and piggybacked ACKs.
+
+Usage:
+    python benchmarks/bench_acks.py [--latency 0.02] [--mtu 18] [--bytes 4096] [--rpcs 20] [--loss 0.0]
+
+Simulates a tiny carrier (an 18-byte payload leaves room for the 8-byte
+header in an AirTag's 26 bytes) with bench_tcp_window's DelayedChannel.
+"bulk" sends one message one way; "rpc" sends requests that are each
+answered with a reply.  Every frame costs the carrier the same whatever
+it carries, so frames per delivered KiB is the figure to compare.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bench_tcp_window import DelayedChannel  # noqa: E402
+from dao_cli.transport.header import PacketHeader  # noqa: E402
+from dao_cli.transport.tcp import TcpTransport  # noqa: E402
+from dao_cli.transport.constants import ACK_DELAY  # noqa: E402
+
+
+class CountingChannel(DelayedChannel):
+    """DelayedChannel that also counts standalone ACK frames."""
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.acks = 0
+
+    def send(self, payload: bytes) -> None:
+        header, _ = PacketHeader.decode(payload)
+        if header.is_ack and not header.is_syn and not header.is_fin:
+            self.acks += 1
+        super().send(payload)
+
+
+async def run(workload: str, ack_delay: float, args):
+    rng = random.Random(args.seed)
+    client_chan = CountingChannel(args.latency, args.loss, rng)
+    server_chan = CountingChannel(args.latency, args.loss, rng)
+    client_chan.peer, server_chan.peer = server_chan, client_chan
+    client, server = TcpTransport(ack_delay=ack_delay), TcpTransport(ack_delay=ack_delay)
+    client.MTU = server.MTU = args.mtu
+    inbox = {client: bytearray(), server: bytearray()}
+
+    async def pump():
+        while True:
+            inbox[client].extend(await client.recv(client_chan))
+            inbox[server].extend(await server.recv(server_chan))
+            await asyncio.sleep(0.0005)
+
+    async def expect(transport, size):
+        while len(inbox[transport]) < size:
+            await asyncio.sleep(0.0005)
+        del inbox[transport][:size]
+
+    delivered = 0
+    pump_task = asyncio.ensure_future(pump())
+    start = time.perf_counter()
+    try:
+        if workload == "bulk":
+            await client.send(os.urandom(args.bytes), client_chan)
+            await expect(server, args.bytes)
+            delivered = args.bytes
+        else:
+            for _ in range(args.rpcs):
+                await client.send(os.urandom(args.request), client_chan)
+                await expect(server, args.request)
+                await server.send(os.urandom(args.reply), server_chan)
+                await expect(client, args.reply)
+                delivered += args.request + args.reply
+        elapsed = time.perf_counter() - start
+    finally:
+        pump_task.cancel()
+        for transport in (client, server):
+            await transport.__aexit__(None, None, None)
+    frames = client_chan.frames + server_chan.frames
+    return elapsed, frames, client_chan.acks + server_chan.acks, delivered
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.02, help="one-way latency in seconds")
+    parser.add_argument("--mtu", type=int, default=18, help="payload bytes per frame")
+    parser.add_argument("--bytes", type=int, default=4096, help="bulk message size")
+    parser.add_argument("--rpcs", type=int, default=20, help="request/reply exchanges")
+    parser.add_argument("--request", type=int, default=12, help="request size")
+    parser.add_argument("--reply", type=int, default=48, help="reply size")
+    parser.add_argument("--loss", type=float, default=0.0, help="packet loss probability")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    print(f"{args.mtu}-byte payloads, {args.latency * 1000:.0f} ms one-way latency, {args.loss:.0%} loss")
+    print(f"{'workload':<8}  {'acks':<9}  {'seconds':>8}  {'frames':>6}  {'ack frames':>10}  {'frames/KiB':>10}")
+    for workload in ("bulk", "rpc"):
+        for name, ack_delay in (("immediate", 0.0), ("delayed", ACK_DELAY)):
+            elapsed, frames, acks, delivered = asyncio.run(run(workload, ack_delay, args))
+            print(f"{workload:<8}  {name:<9}  {elapsed:8.2f}  {frames:6d}  {acks:10d}  "
+                  f"{frames * 1024 / delivered:10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Compare per-payload sign/verify loops against the batch APIs.
+
+Usage:
+    python benchmarks/bench_batch_verify.py [--count N] [--keys K]
+
+Uses a throwaway in-memory Ed25519 key, so the local key store is never
+touched.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from dao_cli.crypto.adapter_pycacrypto import PycaCryptoAdapter  # noqa: E402
+
+
+def rate(count: int, fn) -> float:
+    """Run fn once and return operations per second."""
+    start = time.perf_counter()
+    fn()
+    return count / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--count", type=int, default=5000, help="payloads per run")
+    parser.add_argument("--keys", type=int, default=4, help="distinct signing keys")
+    args = parser.parse_args()
+
+    adapters = [PycaCryptoAdapter.from_private_key(Ed25519PrivateKey.generate()) for _ in range(args.keys)]
+    signer = adapters[0]
+    payloads = [{"project_id": f"p{i}", "tasks": [{"id": i, "status": "open"}]} for i in range(args.count)]
+
+    sign_loop = rate(args.count, lambda: [signer.sign(p) for p in payloads])
+    sign_batch = rate(args.count, lambda: signer.sign_many(payloads))
+
+    items = []
+    for i, payload in enumerate(payloads):
+        adapter = adapters[i % len(adapters)]
+        items.append((payload, adapter.sign(payload), adapter.public_key_b64()))
+
+    verify_loop = rate(args.count, lambda: [signer.verify(p, s, k) for p, s, k in items])
+    verify_batch = rate(args.count, lambda: signer.verify_many(items))
+
+    print(f"{args.count} payloads, {args.keys} keys")
+    print(f"sign    loop: {sign_loop:10.0f}/s   sign_many:   {sign_batch:10.0f}/s   ({sign_batch / sign_loop:.2f}x)")
+    print(f"verify  loop: {verify_loop:10.0f}/s   verify_many: {verify_batch:10.0f}/s   ({verify_batch / verify_loop:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
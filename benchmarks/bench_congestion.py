@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Compare TcpTransport with and without rate control on simulated carriers.
+
+Usage:
+    python benchmarks/bench_congestion.py [--media tm.airtag-rename,tm.bitcoin-mempool] [--bytes 400] [--scale 0.005]
+
+Each carrier is simulated from its transmission_medium_nodes.json profile
+with every time scaled by ``scale``: frames arrive after the medium's
+latency, are dropped at random with its expected loss, and frames sent
+inside its vendor rate limit are dropped too (counted as violations).
+Without rate control the sender bursts into the rate limit and halves its
+window on every random drop; with it, frames are paced and only loss
+above the medium's profile counts as congestion.
+"""
+
+import argparse
+import asyncio
+import dataclasses
+import logging
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from dao_cli.transport.base import TransportError  # noqa: E402
+from dao_cli.transport.medium import load_media  # noqa: E402
+from dao_cli.transport.tcp import TcpTransport  # noqa: E402
+
+
+class SimulatedMedium:
+    """Channel that delays, drops and rate-limits frames like its medium."""
+
+    def __init__(self, profile, rng: random.Random):
+        self.medium = profile
+        self.rng = rng
+        self.peer = None
+        self.inbox = []
+        self.frames = 0
+        self.violations = 0
+        self._last_send = float("-inf")
+
+    def send(self, payload: bytes) -> None:
+        self.frames += 1
+        now = time.monotonic()
+        # Small tolerance for timer jitter; the bucket refills at exactly the limit
+        limited = self.medium.min_interval_s and now - self._last_send < self.medium.min_interval_s * 0.9
+        self._last_send = now
+        if limited:
+            self.violations += 1
+            return
+        if self.rng.random() >= self.medium.expected_loss:
+            asyncio.get_running_loop().call_later(self.medium.typical_latency_s, self.peer.inbox.append, payload)
+
+    def receive(self):
+        return self.inbox.pop(0) if self.inbox else None
+
+
+def scaled(profile, scale: float):
+    return dataclasses.replace(
+        profile,
+        typical_latency_s=(profile.typical_latency_s or 0) * scale,
+        min_interval_s=profile.min_interval_s and profile.min_interval_s * scale,
+    )
+
+
+async def run_transfer(profile, size: int, rate_control: bool, seed: int):
+    rng = random.Random(seed)
+    client_chan, server_chan = SimulatedMedium(profile, rng), SimulatedMedium(profile, rng)
+    client_chan.peer, server_chan.peer = server_chan, client_chan
+    client, server = TcpTransport(rate_control=rate_control), TcpTransport(rate_control=rate_control)
+    if profile.max_payload_b:
+        client.MTU = server.MTU = max(profile.max_payload_b, 16)
+    data = os.urandom(size)
+    received = bytearray()
+
+    async def pump():
+        while True:
+            await client.recv(client_chan)
+            received.extend(await server.recv(server_chan))
+            await asyncio.sleep(0.0005)
+
+    pump_task = asyncio.ensure_future(pump())
+    start = time.perf_counter()
+    try:
+        await client.send(data, client_chan)
+    except TransportError:
+        pass  # retries exhausted; reported as a failed transfer
+    finally:
+        elapsed = time.perf_counter() - start
+        pump_task.cancel()
+        for transport in (client, server):
+            await transport.__aexit__(None, None, None)
+    ok = bytes(received) == data
+    return ok, elapsed, client_chan.frames + server_chan.frames, client_chan.violations + server_chan.violations
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--media", default="tm.airtag-rename,tm.bitcoin-mempool", help="comma-separated medium ids")
+    parser.add_argument("--bytes", type=int, default=400, help="message size")
+    parser.add_argument("--scale", type=float, default=0.005, help="simulated seconds per real second")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+    media = load_media()
+
+    print(f"{args.bytes} bytes, times scaled by {args.scale}")
+    print(f"{'medium':<20}  {'rate control':>12}  {'seconds':>8}  {'bytes/s':>9}  {'frames':>6}  {'violations':>10}")
+    for medium_id in args.media.split(","):
+        profile = scaled(media[medium_id], args.scale)
+        for rate_control in (False, True):
+            ok, elapsed, frames, violations = asyncio.run(
+                run_transfer(profile, args.bytes, rate_control, args.seed)
+            )
+            goodput = f"{args.bytes / elapsed:9.0f}" if ok else f"{'failed':>9}"
+            print(f"{medium_id:<20}  {'on' if rate_control else 'off':>12}  {elapsed:8.2f}  {goodput}  "
+                  f"{frames:6d}  {violations:10d}")
+
+
+if __name__ == "__main__":
+    main()
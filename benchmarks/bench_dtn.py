@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Measure BundleStore memory and speed at 100k bundles.
+
+Usage:
+    python benchmarks/bench_dtn.py [--bundles 100000] [--bytes 64]
+
+Stores ``bundles`` bundles of ``bytes`` payload each in a temporary
+directory and reports the time to store them, the Python heap the store's
+index takes per bundle (tracemalloc), the time to reopen the store by
+replaying its index log, and a forwarding scan over every bundle.  For
+comparison the same metadata is also held the way a JSON index would
+load it, as one dict per bundle.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from dao_cli.transport.dtn import Bundle, BundleStore, node_hash  # noqa: E402
+
+
+def traced(build):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return result, used
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--bundles", type=int, default=100000, help="bundles to store")
+    parser.add_argument("--bytes", type=int, default=64, help="payload bytes per bundle")
+    args = parser.parse_args()
+
+    now = int(time.time())
+    destination = node_hash("dest")
+    payload = os.urandom(args.bytes)
+    bundles = [Bundle(i + 1, destination, now, 86400, length=args.bytes) for i in range(args.bundles)]
+    quota = args.bundles * args.bytes
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = BundleStore(directory, quota)
+        start = time.perf_counter()
+        for bundle in bundles:
+            store.put(bundle, payload)
+        put_s = time.perf_counter() - start
+        store.close()
+
+        start = time.perf_counter()
+        BundleStore(directory, quota).close()
+        reopen_s = time.perf_counter() - start
+        store, store_bytes = traced(lambda: BundleStore(directory, quota))
+
+        start = time.perf_counter()
+        due = sum(1 for bundle in store if bundle.expires > now)
+        scan_s = time.perf_counter() - start
+        store.close()
+        on_disk = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+
+    records, dict_bytes = traced(lambda: {b.bundle_id + 0: {k: v + 0 for k, v in b._asdict().items()}
+                                          for b in bundles})
+    del records
+
+    n = args.bundles
+    print(f"{n} bundles of {args.bytes} bytes, {on_disk / 2**20:.1f} MiB on disk")
+    print(f"store:  {n / put_s:9.0f} bundles/s")
+    print(f"reopen: {reopen_s:9.2f} s")
+    print(f"scan:   {scan_s:9.2f} s for {due} live bundles")
+    print(f"memory: {store_bytes / n:9.1f} bytes/bundle in BundleStore, "
+          f"{dict_bytes / n:.1f} as a dict of per-bundle dicts")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Compare UdpTransport with FecTransport on a lossy one-way channel.
+
+Usage:
+    python benchmarks/bench_fec.py [--messages 200] [--bytes 1000] [--mtu 40] [--loss 0.1]
+
+Nothing is sent back, as on wifi-ssid or bitcoin-mempool, so a message
+is either rebuilt from what arrives or lost.  For each redundancy ratio
+the table shows the share of messages delivered and the frames sent per
+delivered KiB.  Encode and decode throughput of one full
+FEC_BLOCK_SHARDS block is printed first.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from dao_cli.transport.constants import FEC_BLOCK_SHARDS  # noqa: E402
+from dao_cli.transport.fec import FecTransport, ReedSolomon  # noqa: E402
+from dao_cli.transport.udp import UdpTransport  # noqa: E402
+
+
+class LossyChannel:
+    """One-way channel dropping each frame with probability ``loss``."""
+
+    def __init__(self, loss: float, rng: random.Random):
+        self.loss = loss
+        self.rng = rng
+        self.inbox = []
+        self.frames = 0
+
+    def send(self, payload: bytes) -> None:
+        self.frames += 1
+        if self.rng.random() >= self.loss:
+            self.inbox.append(payload)
+
+    def receive(self):
+        return self.inbox.pop(0) if self.inbox else None
+
+
+async def run(sender, receiver, args) -> tuple:
+    chan = LossyChannel(args.loss, random.Random(args.seed))
+    sender.MTU = receiver.MTU = args.mtu
+    delivered = 0
+    for _ in range(args.messages):
+        message = os.urandom(args.bytes)
+        await sender.send(message, chan)
+        while chan.inbox:
+            if await receiver.recv(chan) == message:
+                delivered += 1
+    return delivered, chan.frames
+
+
+def codec_throughput(symbol_size: int, ratio: float) -> tuple:
+    k = FEC_BLOCK_SHARDS
+    m = max(1, round(k * ratio))
+    code = ReedSolomon(k, m)
+    data = [os.urandom(symbol_size) for _ in range(k)]
+    start = time.perf_counter()
+    parity = code.encode(data)
+    encode = time.perf_counter() - start
+    shards = dict(enumerate(data + parity))
+    for index in random.Random(0).sample(range(k), m):
+        del shards[index]
+    start = time.perf_counter()
+    assert code.decode(shards) == data
+    decode = time.perf_counter() - start
+    size = k * symbol_size / 2**20
+    return k, m, size / encode, size / decode
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--messages", type=int, default=200, help="messages to send")
+    parser.add_argument("--bytes", type=int, default=1000, help="message size")
+    parser.add_argument("--mtu", type=int, default=40, help="payload bytes per frame")
+    parser.add_argument("--loss", type=float, default=0.1, help="frame loss probability")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    k, m, encode, decode = codec_throughput(248, 0.25)
+    print(f"codec: {k}+{m} shards of 248 bytes, encode {encode:.1f} MiB/s, "
+          f"decode ({m} data shards lost) {decode:.1f} MiB/s")
+
+    print(f"{args.messages} x {args.bytes}-byte messages, {args.mtu}-byte payloads, {args.loss:.0%} loss")
+    print(f"{'transport':<16}  {'delivered':>9}  {'frames':>6}  {'frames/KiB':>10}")
+    cases = [("udp", UdpTransport(), UdpTransport())]
+    for ratio in (0.1, 0.25, 0.5):
+        cases.append((f"fec {ratio:.2f}",
+                      FecTransport(redundancy_ratio=ratio), FecTransport(redundancy_ratio=ratio)))
+    for name, sender, receiver in cases:
+        delivered, frames = asyncio.run(run(sender, receiver, args))
+        per_kib = f"{frames * 1024 / (delivered * args.bytes):10.1f}" if delivered else f"{'-':>10}"
+        print(f"{name:<16}  {delivered / args.messages:9.1%}  {frames:6d}  {per_kib}")
+
+
+if __name__ == "__main__":
+    main()
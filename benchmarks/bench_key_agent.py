@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Measure key agent signing throughput as the number of clients grows.
+
+Usage:
+    python benchmarks/bench_key_agent.py [--count N] [--clients 1,2,4,8]
+
+Runs an agent around a fresh software key in-process and compares it with
+signing directly and with unlocking the encrypted key store once per
+process, which is what every dao.py invocation pays without the agent.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from dao_cli.crypto.adapter_agent import AgentCryptoAdapter  # noqa: E402
+from dao_cli.crypto.adapter_pycacrypto import PycaCryptoAdapter  # noqa: E402
+from dao_cli.crypto.agent import KeyAgent  # noqa: E402
+
+
+def unlock_time(key: Ed25519PrivateKey) -> float:
+    """Seconds to decrypt the key store, as a process without the agent does."""
+    pem = key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.BestAvailableEncryption(b"benchmark"),
+    )
+    start = time.perf_counter()
+    serialization.load_pem_private_key(pem, b"benchmark")
+    return time.perf_counter() - start
+
+
+def run_clients(path: str, clients: int, count: int) -> float:
+    """Sign ``count`` payloads split over ``clients`` connections; return signatures per second."""
+    adapters = [AgentCryptoAdapter(path) for _ in range(clients)]
+    per_client = count // clients
+
+    def work(index: int, adapter: AgentCryptoAdapter) -> None:
+        for n in range(per_client):
+            adapter.sign({"client": index, "n": n})
+
+    threads = [threading.Thread(target=work, args=item) for item in enumerate(adapters)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    for adapter in adapters:
+        adapter.close()
+    return per_client * clients / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--count", type=int, default=4000, help="signatures per run")
+    parser.add_argument("--clients", default="1,2,4,8,16", help="comma-separated client counts")
+    args = parser.parse_args()
+
+    key = Ed25519PrivateKey.generate()
+    backend = PycaCryptoAdapter.from_private_key(key)
+    payloads = [{"n": n} for n in range(args.count)]
+    start = time.perf_counter()
+    for payload in payloads:
+        backend.sign(payload)
+    direct = args.count / (time.perf_counter() - start)
+
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        agent = KeyAgent(backend, os.path.join(tmpdir, "agent.sock"))
+        asyncio.run_coroutine_threadsafe(agent.start(), loop).result()
+
+        print(f"key store unlock:          {unlock_time(key) * 1000:8.1f} ms per process")
+        print(f"direct signing:             {direct:8.0f}/s")
+        for clients in (int(c) for c in args.clients.split(",")):
+            requests, batches = agent.requests, agent.batches
+            rate = run_clients(agent.socket_path, clients, args.count)
+            mean_batch = (agent.requests - requests) / max(1, agent.batches - batches)
+            print(f"agent, {clients:2d} client(s):        {rate:8.0f}/s   mean batch {mean_batch:5.1f}")
+
+        asyncio.run_coroutine_threadsafe(agent.close(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+
+
+if __name__ == "__main__":
+    main()
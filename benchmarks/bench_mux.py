@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Measure concurrent senders on one MicroChannel with and without stream multiplexing.
+
+Usage:
+    python benchmarks/bench_mux.py [--latency 0.05] [--delta 8192] [--telemetry 10x100] [--loss 0.0]
+
+A delta and a series of telemetry batches are sent at the same time.
+"sequential" is what callers of TcpTransport do today: one connection,
+each send awaited in turn, so telemetry queues behind the delta.
+"mux" sends them as two streams of a MuxSession, telemetry at a higher
+priority.  Reported: time until everything is delivered, the mean and
+worst latency of a telemetry batch, and frames on the link.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bench_tcp_window import DelayedChannel  # noqa: E402
+from dao_cli.transport.mux import MuxSession  # noqa: E402
+from dao_cli.transport.tcp import TcpTransport  # noqa: E402
+
+DELTA_STREAM, TELEMETRY_STREAM = 1, 2
+
+
+async def run(mode: str, delta: bytes, batches, latency: float, loss: float, seed: int):
+    rng = random.Random(seed)
+    client_chan, server_chan = DelayedChannel(latency, loss, rng), DelayedChannel(latency, loss, rng)
+    client_chan.peer, server_chan.peer = server_chan, client_chan
+    client, server = TcpTransport(), TcpTransport()
+    latencies = []
+    start = time.perf_counter()
+
+    if mode == "mux":
+        client_session, server_session = MuxSession(client, client_chan), MuxSession(server, server_chan)
+        client_session.stream(TELEMETRY_STREAM, priority=0)
+
+        async def pump():
+            while True:
+                await client_session.recv()
+                await server_session.recv()
+                await asyncio.sleep(0.0005)
+
+        async def send_delta():
+            await client_session.send(DELTA_STREAM, delta)
+
+        async def send_telemetry():
+            for batch in batches:
+                queued = time.perf_counter()
+                await client_session.send(TELEMETRY_STREAM, batch)
+                latencies.append(time.perf_counter() - queued)
+    else:
+        client_session = server_session = None
+        lock = asyncio.Lock()  # one connection: sends take turns
+
+        async def pump():
+            while True:
+                await client.recv(client_chan)
+                await server.recv(server_chan)
+                await asyncio.sleep(0.0005)
+
+        async def send_delta():
+            async with lock:
+                await client.send(delta, client_chan)
+
+        async def send_telemetry():
+            for batch in batches:
+                queued = time.perf_counter()
+                async with lock:
+                    await client.send(batch, client_chan)
+                latencies.append(time.perf_counter() - queued)
+
+    pump_task = asyncio.ensure_future(pump())
+    try:
+        await asyncio.gather(send_delta(), send_telemetry())
+        elapsed = time.perf_counter() - start
+    finally:
+        pump_task.cancel()
+        for session in (client_session, server_session):
+            if session is not None:
+                await session.close()
+        for transport in (client, server):
+            await transport.__aexit__(None, None, None)
+    return elapsed, latencies, client_chan.frames + server_chan.frames
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.05, help="one-way latency in seconds")
+    parser.add_argument("--delta", type=int, default=8192, help="delta size in bytes")
+    parser.add_argument("--telemetry", default="10x100", help="telemetry batches, COUNTxBYTES")
+    parser.add_argument("--loss", type=float, default=0.0, help="packet loss probability")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    count, size = (int(n) for n in args.telemetry.split("x"))
+    delta = os.urandom(args.delta)
+    batches = [os.urandom(size) for _ in range(count)]
+    print(f"{args.delta}-byte delta + {count} x {size}-byte telemetry, "
+          f"{args.latency * 1000:.0f} ms one-way latency, {args.loss:.0%} loss")
+    print(f"{'mode':<10}  {'seconds':>8}  {'telemetry mean':>14}  {'worst':>6}  {'frames':>6}")
+    for mode in ("sequential", "mux"):
+        elapsed, latencies, frames = asyncio.run(run(mode, delta, batches, args.latency, args.loss, args.seed))
+        print(f"{mode:<10}  {elapsed:8.2f}  {statistics.mean(latencies):13.2f}s  "
+              f"{max(latencies):5.2f}s  {frames:6d}")
+
+
+if __name__ == "__main__":
+    main()
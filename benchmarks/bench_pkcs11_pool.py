@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Compare a session per signature against the pooled Pkcs11Adapter.
+
+Usage:
+    DAO_PKCS11_LIB_PATH=/usr/lib/softhsm/libsofthsm2.so \\
+    DAO_PKCS11_TOKEN_LABEL=dao DAO_PKCS11_KEY_LABEL=dao-key DAO_PKCS11_PIN=1234 \\
+    python benchmarks/bench_pkcs11_pool.py [--count N] [--threads T]
+
+Create the SoftHSM2 token first, e.g.:
+    softhsm2-util --init-token --free --label dao --pin 1234 --so-pin 0000
+The adapter generates the key pair on first use.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from pkcs11 import Attribute, ObjectClass
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from dao_cli.crypto.adapter_pkcs11 import Pkcs11Adapter  # noqa: E402
+
+
+def sign_unpooled(adapter: Pkcs11Adapter, payload) -> bytes:
+    """Sign the way the adapter did before pooling: open, log in, search, sign."""
+    message = json.dumps(payload, separators=(',', ':'), sort_keys=True).encode()
+    with adapter._token.open(user_pin=adapter._pin) as session:
+        priv_key = next(session.get_objects({
+            Attribute.CLASS: ObjectClass.PRIVATE_KEY,
+            Attribute.LABEL: adapter._key_label
+        }))
+        return priv_key.sign(message, mechanism=adapter._mechanism)
+
+
+def rate(count: int, threads: int, fn, payloads) -> float:
+    """Run fn over payloads on a thread pool and return signatures per second."""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(fn, payloads))
+    return count / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--count", type=int, default=500, help="signatures per run")
+    parser.add_argument("--threads", type=int, default=4, help="concurrent signers")
+    args = parser.parse_args()
+
+    adapter = Pkcs11Adapter(pool_size=args.threads)
+    payloads = [{"project_id": f"p{i}", "n": i} for i in range(args.count)]
+
+    # The unpooled path logs in per call, which fails while pooled sessions hold the login
+    unpooled = rate(args.count, 1, lambda p: sign_unpooled(adapter, p), payloads)
+    pooled_single = rate(args.count, 1, adapter.sign, payloads)
+    pooled = rate(args.count, args.threads, adapter.sign, payloads)
+    adapter.close()
+
+    print(f"{args.count} signatures, mechanism {adapter._mechanism.name}")
+    print(f"session per call (1 thread):  {unpooled:10.0f}/s")
+    print(f"pooled (1 thread):            {pooled_single:10.0f}/s   ({pooled_single / unpooled:.2f}x)")
+    print(f"pooled ({args.threads} threads):           {pooled:10.0f}/s   ({pooled / unpooled:.2f}x)")
+    print(f"sessions opened: {adapter._pool.opened}, checkouts reused: {adapter._pool.reused}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Compare in-place fragment reassembly with per-fragment concatenation.
+
+Usage:
+    python benchmarks/bench_reassembly.py [--bytes 65535] [--fragment 74] [--rounds 20]
+
+"in place" is Reassembler: one preallocated buffer per message, fragments
+copied in at their offsets.  "concatenate" keeps every fragment and
+rebuilds the message by sorting and joining on each arrival, as
+UdpTransport._try_reassemble does.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from dao_cli.transport.reassembly import Reassembler  # noqa: E402
+
+
+def in_place(data: bytes, fragments) -> bytes:
+    reassembler = Reassembler()
+    for offset, fragment in fragments:
+        message = reassembler.add(0, offset, fragment, len(data) if offset == 0 else None)
+    return message
+
+
+def concatenate(data: bytes, fragments) -> bytes:
+    stored = {}
+    for offset, fragment in fragments:
+        stored[offset] = fragment
+        result = bytearray()
+        for key in sorted(stored):
+            if key > len(result):
+                break
+            result.extend(stored[key])
+    return bytes(result)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--bytes", type=int, default=65535, help="message size")
+    parser.add_argument("--fragment", type=int, default=74, help="fragment payload size")
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    data = os.urandom(args.bytes)
+    fragments = [(offset, data[offset:offset + args.fragment]) for offset in range(0, len(data), args.fragment)]
+    print(f"{args.bytes} bytes in {len(fragments)} fragments, {args.rounds} rounds")
+    for name, fn in (("in place", in_place), ("concatenate", concatenate)):
+        start = time.perf_counter()
+        for _ in range(args.rounds):
+            assert fn(data, fragments) == data
+        elapsed = (time.perf_counter() - start) / args.rounds
+        print(f"{name:<12}  {elapsed * 1000:9.2f} ms/message")
+
+
+if __name__ == "__main__":
+    main()
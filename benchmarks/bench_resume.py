@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Measure the cost of a sender restart in mid-transfer with and without session resumption.
+
+Usage:
+    python benchmarks/bench_resume.py [--latency 0.02] [--mtu 40] [--bytes 4096] [--at 0.5] [--frame-s 10]
+
+The client sends one message and is restarted once ``at`` of it has been
+acknowledged.  "restart" is today's behaviour: the new process reconnects
+with a fresh handshake and sends the message again.  "resume" gives both
+sides a state_dir, so the restarted client resumes the session and sends
+only the rest.  Frames after the restart are what the restart cost.  The
+last column prices them at ``frame_s`` seconds per frame, like a
+rate-limited carrier.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bench_tcp_window import DelayedChannel  # noqa: E402
+from dao_cli.transport.tcp import TcpTransport  # noqa: E402
+
+
+async def run(mode: str, args, directory: str):
+    rng = random.Random(args.seed)
+    client_chan, server_chan = DelayedChannel(args.latency, 0.0, rng), DelayedChannel(args.latency, 0.0, rng)
+    client_chan.peer, server_chan.peer = server_chan, client_chan
+    client_dir = os.path.join(directory, mode, "client") if mode == "resume" else None
+    server_dir = os.path.join(directory, mode, "server") if mode == "resume" else None
+    transports = {"client": TcpTransport(state_dir=client_dir), "server": TcpTransport(state_dir=server_dir)}
+    for transport in transports.values():
+        transport.MTU = args.mtu
+    data = os.urandom(args.bytes)
+    received = []
+
+    async def pump():
+        while True:
+            await transports["client"].recv(client_chan)
+            message = await transports["server"].recv(server_chan)
+            if message:
+                received.append(message)
+            await asyncio.sleep(0.0005)
+
+    pump_task = asyncio.ensure_future(pump())
+    fragments = -(-args.bytes // (transports["client"].payload_size - 6))
+    try:
+        send = asyncio.ensure_future(transports["client"].send(data, client_chan))
+        while transports["server"]._received_acks.get(0, -1) < fragments * args.at:
+            await asyncio.sleep(0.0005)
+        send.cancel()
+        await asyncio.gather(send, return_exceptions=True)
+        await transports["client"].__aexit__(None, None, None)
+        frames_before = client_chan.frames + server_chan.frames
+
+        start = time.perf_counter()
+        transports["client"] = client = TcpTransport(state_dir=client_dir)
+        client.MTU = args.mtu
+        if mode == "resume":
+            await client.resume(client_chan)
+        else:
+            await client.send(data, client_chan)
+        while not received:
+            await asyncio.sleep(0.0005)
+        elapsed = time.perf_counter() - start
+    finally:
+        pump_task.cancel()
+        for transport in transports.values():
+            await transport.__aexit__(None, None, None)
+    assert received[-1] == data, "transfer corrupted"
+    return elapsed, client_chan.frames + server_chan.frames - frames_before
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.02, help="one-way latency in seconds")
+    parser.add_argument("--mtu", type=int, default=40, help="payload bytes per frame")
+    parser.add_argument("--bytes", type=int, default=4096, help="message size")
+    parser.add_argument("--at", type=float, default=0.5, help="share of the message acknowledged at the restart")
+    parser.add_argument("--frame-s", type=float, default=10.0, help="carrier seconds per frame")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    print(f"{args.bytes}-byte message, {args.mtu}-byte payloads, restart at {args.at:.0%} acknowledged")
+    print(f"{'mode':<8}  {'seconds':>8}  {'frames after restart':>20}  {'carrier time':>12}")
+    with tempfile.TemporaryDirectory() as directory:
+        for mode in ("restart", "resume"):
+            elapsed, frames = asyncio.run(run(mode, args, directory))
+            print(f"{mode:<8}  {elapsed:8.2f}  {frames:20d}  {frames * args.frame_s / 60:10.1f}min")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Measure TcpTransport throughput against window size on a simulated high-latency channel.
+
+Usage:
+    python benchmarks/bench_tcp_window.py [--latency 0.05] [--bytes 10240] [--windows 1,4,8,32] [--loss 0.0]
+
+Each packet reaches the peer ``latency`` seconds after it is sent (one
+way), optionally dropped with probability ``loss``.  Stop-and-wait (a
+window of 1) needs one round trip per packet; larger windows should scale
+throughput with window / RTT until the whole message fits in one window.
+The last column scales the measured time to the mempool carrier's 4 s
+latency.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from dao_cli.transport.tcp import TcpTransport  # noqa: E402
+
+MEMPOOL_LATENCY_S = 4.0
+
+
+class DelayedChannel:
+    """Channel whose packets arrive at the peer after a fixed delay."""
+
+    def __init__(self, latency: float, loss: float, rng: random.Random):
+        self.latency = latency
+        self.loss = loss
+        self.rng = rng
+        self.peer = None
+        self.inbox = []
+        self.frames = 0
+
+    def send(self, payload: bytes) -> None:
+        self.frames += 1
+        if self.rng.random() >= self.loss:
+            asyncio.get_running_loop().call_later(self.latency, self.peer.inbox.append, payload)
+
+    def receive(self):
+        return self.inbox.pop(0) if self.inbox else None
+
+
+async def run_transfer(size: int, window: int, latency: float, loss: float, seed: int):
+    rng = random.Random(seed)
+    client_chan, server_chan = DelayedChannel(latency, loss, rng), DelayedChannel(latency, loss, rng)
+    client_chan.peer, server_chan.peer = server_chan, client_chan
+    client, server = TcpTransport(window_size=window), TcpTransport()
+    data = os.urandom(size)
+    received = bytearray()
+
+    async def pump():
+        while True:
+            await client.recv(client_chan)
+            received.extend(await server.recv(server_chan))
+            await asyncio.sleep(0.0005)
+
+    pump_task = asyncio.ensure_future(pump())
+    start = time.perf_counter()
+    try:
+        await client.send(data, client_chan)
+        elapsed = time.perf_counter() - start
+    finally:
+        pump_task.cancel()
+        for transport in (client, server):
+            await transport.__aexit__(None, None, None)
+    assert bytes(received) == data, "transfer corrupted"
+    return elapsed, client_chan.frames + server_chan.frames
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.05, help="one-way latency in seconds")
+    parser.add_argument("--bytes", type=int, default=10240, help="message size")
+    parser.add_argument("--windows", default="1,4,8,32", help="comma-separated window sizes")
+    parser.add_argument("--loss", type=float, default=0.0, help="packet loss probability")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    print(f"{args.bytes} bytes, {args.latency * 1000:.0f} ms one-way latency, {args.loss:.0%} loss")
+    print(f"{'window':>6}  {'seconds':>8}  {'bytes/s':>9}  {'frames':>6}  {'at 4 s latency':>15}")
+    for window in (int(w) for w in args.windows.split(",")):
+        elapsed, frames = asyncio.run(run_transfer(args.bytes, window, args.latency, args.loss, args.seed))
+        scaled = elapsed * MEMPOOL_LATENCY_S / args.latency
+        print(f"{window:6d}  {elapsed:8.2f}  {args.bytes / elapsed:9.0f}  {frames:6d}  {scaled / 60:12.1f} min")
+
+
+if __name__ == "__main__":
+    main()
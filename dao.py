@@ -3,6 +3,7 @@
 # ⚠️ Autonomous DAO CLI - Stateless + Attributionless
 # Watermark: sha256('DAO_STACK_CLI_v0.1') = 9af2256c4a59dc87e68f76097d3fe51954e2bcba52c0b9a73bc2a8f6a2311ed7
 
+import atexit
 import json
 import uuid
 import os
@@ -10,12 +11,26 @@ import base64
 from datetime import datetime
 
 # Import the crypto adapter
-from dao_cli.crypto import get_adapter
+from dao_cli.crypto import get_adapter, VerificationCache
+from dao_cli.crypto.canonical import SCHEME_SHA256, Canonical, hash_message
+from dao_cli.crypto.constants import HASH_SIGN_MIN_BYTES
+from dao_cli.crypto.multisig import HolderKeyIndex, cosign, verify_threshold
+from dao_cli.crypto.revocation import RevocationError, RevocationIndex, fingerprint
+from dao_cli.delta import (
+    BundleError, DeltaLog, DeltaStreamError, DeltaStreamReader, HLCIndex, HybridLogicalClock,
+    build_bundle, decode_delta_hlc, extract_bundle, iter_delta_stream,
+    read_delta_stream, sort_deltas, verify_bundle
+)
 
 DATA_DIR = "dao_data"
 PROJECTS_FILE = os.path.join(DATA_DIR, "projects.json")
 CONTRIBUTORS_FILE = os.path.join(DATA_DIR, "contributors.json")
 EPOCH_LOG = os.path.join(DATA_DIR, "local_epoch_log.json")
+REVOKED_LINKS_FILE = os.path.join(DATA_DIR, "revoked_links.json")
+REVOCATIONS_FILE = os.path.join(DATA_DIR, "revocations.jsonl")
+VERIFY_CACHE_FILE = os.path.join(DATA_DIR, "verify_cache.json")
+HLC_STATE_FILE = os.path.join(DATA_DIR, "hlc_state.json")
+DELTA_LOG_FILE = os.path.join(DATA_DIR, "merged_deltas.json")
 os.makedirs(DATA_DIR, exist_ok=True)
 
 
@@ -36,9 +51,44 @@ def save_json(path, data):
 projects = load_json(PROJECTS_FILE)
 contributors = load_json(CONTRIBUTORS_FILE)
 
+# Machine-comparable ordering for epochs and deltas
+hlc_clock = HybridLogicalClock(HLC_STATE_FILE)
+delta_log = DeltaLog(DELTA_LOG_FILE)
+
 # Get the crypto adapter
 crypto_adapter = get_adapter()
 
+# Revoked signatures and keys; entries from the older revoked_links.json are carried over
+revocations = RevocationIndex(REVOCATIONS_FILE)
+revocations.import_legacy(REVOKED_LINKS_FILE)
+
+# Signatures that already verified are not re-checked; revoked ones are dropped
+verification_cache = VerificationCache(VERIFY_CACHE_FILE)
+verification_cache.track_revocations(revocations)
+atexit.register(verification_cache.save)
+
+
+def verify_payload(payload, signature, pubkey):
+    """Verify a signed payload, skipping public-key crypto for previously verified signatures.
+
+    Revoked signatures and signatures by revoked keys never verify.
+    """
+    if revocations.is_revoked(signature, pubkey):
+        return False
+    return verification_cache.verify(crypto_adapter, payload, signature, pubkey)
+
+
+def verify_payloads(items):
+    """Verify (payload, signature, pubkey) triples in one batch; revoked ones are invalid."""
+    results = [False] * len(items)
+    positions = [i for i, (_, signature, pubkey) in enumerate(items)
+                 if not revocations.is_revoked(signature, pubkey)]
+    checked = verification_cache.verify_many(crypto_adapter, [items[i] for i in positions])
+    for i, valid in zip(positions, checked):
+        results[i] = valid
+    return results
+
+
 # Helper function for signatures
 def sign_links(identities, multisig):
     """Create a cryptographic signature for linked identities."""
@@ -50,29 +100,148 @@ def sign_links(identities, multisig):
     return crypto_adapter.sign(payload)
 
 
+# Delta fields that are not covered by the signature
+UNSIGNED_DELTA_FIELDS = ("signature", "signature_scheme", "cosignatures")
+
+
 def sign_project_delta(delta):
-    """Sign a project delta with the user's cryptographic key."""
-    # Create a copy without the signature field
-    delta_copy = {k: v for k, v in delta.items() if k != "signature"}
+    """Sign a project delta with the user's cryptographic key.
+
+    Large deltas are signed hash-then-sign: the SHA-256 digest of the
+    canonical form is signed and "signature_scheme" records this.
+    """
+    # Include the public key for verification; it is part of the signed payload
+    delta["public_key"] = crypto_adapter.public_key_b64()
+    # Create a copy without the signature fields, canonicalized once
+    canonical = Canonical({k: v for k, v in delta.items() if k not in UNSIGNED_DELTA_FIELDS})
     # Sign the delta
-    signature = crypto_adapter.sign(delta_copy)
-    delta["signature"] = signature
-    delta["public_key"] = crypto_adapter.public_key_b64()  # Include the public key for verification
+    if len(canonical.bytes) >= HASH_SIGN_MIN_BYTES:
+        delta["signature_scheme"] = SCHEME_SHA256
+        delta["signature"] = crypto_adapter.sign_digest(canonical.digest)
+    else:
+        delta.pop("signature_scheme", None)
+        delta["signature"] = crypto_adapter.sign(canonical)
     return delta
 
 
 def verify_signature(delta, signature):
     """Verify a signature against a project delta."""
-    delta_copy = delta.copy()
-    if "signature" in delta_copy:
-        del delta_copy["signature"]
+    delta_copy = {k: v for k, v in delta.items() if k not in UNSIGNED_DELTA_FIELDS}
     
     # Get the public key from the delta or from an environment variable/config
     pubkey = delta.get("public_key")
     if not pubkey:
         raise ValueError("No public key found for signature verification")
     
-    return crypto_adapter.verify(delta_copy, signature, pubkey)
+    if delta.get("signature_scheme") == SCHEME_SHA256:
+        if revocations.is_revoked(signature, pubkey):
+            return False
+        digest = Canonical(delta_copy).digest
+        return verification_cache.verify_digest(crypto_adapter, digest, signature, pubkey)
+    return verify_payload(delta_copy, signature, pubkey)
+
+
+def delta_signed_message(delta):
+    """Return the message a delta's signature and cosignatures cover."""
+    canonical = Canonical({k: v for k, v in delta.items() if k not in UNSIGNED_DELTA_FIELDS})
+    if delta.get("signature_scheme") == SCHEME_SHA256:
+        return Canonical(None, hash_message(canonical.digest))
+    return canonical
+
+
+def signing_identity():
+    """Return the anon ID this node signs as, asking when several identities share its key."""
+    ids = HolderKeyIndex(contributors).holders_for_key(crypto_adapter.public_key_b64())
+    if len(ids) <= 1:
+        return ids[0] if ids else None
+    while True:
+        choice = input(f"Sign as which identity ({', '.join(ids)}): ").strip()
+        if choice in ids:
+            return choice
+        print("That identity does not use this node's key.")
+
+
+def delta_author(delta, index, pubkey):
+    """Find the identity that authored a delta signed with pubkey.
+
+    The author is named by the signed "author_anon_id" field; older deltas
+    without it are attributed by key when exactly one identity holds it.
+
+    Returns (author record or None, reason) where reason explains a failure.
+    """
+    author_id = delta.get("author_anon_id")
+    signers = index.holders_for_key(pubkey)
+    if author_id is not None:
+        author = index.record(author_id)
+        if (author is None and signers) or (author is not None and author.get("public_key") != pubkey):
+            return None, f"Delta author {author_id} did not sign it"
+        return author, ""
+    if len(signers) > 1:
+        return None, "Delta does not name its author and its key belongs to several identities"
+    return (index.record(signers[0]) if signers else None), ""
+
+
+def verify_delta_approvals(delta, public_key=None):
+    """Check the multisig approvals a delta's author requires.
+
+    Applies when the author's identity sets "multisig_threshold" or the delta
+    carries cosignatures; the threshold defaults to all holders. The author
+    counts as one approval if listed as a holder, and holders sharing a key
+    count once. Call after verify_signature().
+
+    public_key is the key the delta was signed with when it is not the
+    delta's own "public_key" field (bundle entries).
+
+    Returns (ok, reason) where reason explains a failure.
+    """
+    pubkey = public_key or delta.get("public_key")
+    cosignatures = delta.get("cosignatures", [])
+    index = HolderKeyIndex(contributors)
+    author, reason = delta_author(delta, index, pubkey)
+    if reason:
+        return False, reason
+    holders = author.get("multisig", []) if author else []
+    if not cosignatures and not (author and author.get("multisig_threshold")):
+        return True, ""
+    if not holders:
+        return False, "Delta carries cosignatures but its author has no multisig holders"
+    keys = [index.key(holder) for holder in holders if index.key(holder)]
+    if len(keys) != len(set(keys)):
+        return False, f"Multisig holders of {author['anon_id']} share public keys"
+    threshold = author.get("multisig_threshold") or len(holders)
+    result = verify_threshold(
+        delta_signed_message(delta), cosignatures, holders, threshold, index,
+        verify_payloads,
+        approved=[author["anon_id"]],
+    )
+    if not result:
+        return False, f"Only {len(result.approvals)} of {threshold} required multisig approvals are valid"
+    return True, ""
+
+
+def cosign_project_delta():
+    """Add this node's cosignature to a signed project delta file."""
+    file_path = input("Enter path to project delta .diff.json: ").strip()
+    if not os.path.exists(file_path):
+        print("Delta file not found.")
+        return
+    with open(file_path, "r") as f:
+        delta = json.load(f)
+    signature = delta.get("signature")
+    if not signature or not verify_signature(delta, signature):
+        print("Invalid or missing signature. Not co-signing.")
+        return
+
+    me = signing_identity()
+    if me is None:
+        print("No contributor identity uses this key. Create one first.")
+        return
+    cosignatures = [c for c in delta.get("cosignatures", []) if c.get("signer") != me]
+    cosignatures.append(cosign(crypto_adapter, delta_signed_message(delta), me))
+    delta["cosignatures"] = cosignatures
+    with open(file_path, "w") as f:
+        json.dump(delta, f, indent=2)
+    print(f"Co-signed as {me}; delta now carries {len(cosignatures)} cosignature(s).")
 
 
 def verify_link_signature(linked_ids, multisig, signature):
@@ -91,7 +260,73 @@ def verify_link_signature(linked_ids, multisig, signature):
     if not pubkey:
         raise ValueError("No public key found for signature verification")
     
-    return crypto_adapter.verify(payload, signature, pubkey)
+    return verify_payload(payload, signature, pubkey)
+
+
+def verify_contributor_links(records):
+    """Verify the link signatures of several contributors in one batch.
+
+    Returns one result per record; records without a public key or signature are invalid.
+    """
+    results = [False] * len(records)
+    items, positions = [], []
+    for i, c in enumerate(records):
+        if not c.get("public_key") or not c.get("link_signature"):
+            continue
+        payload = {
+            "identities": sorted(c.get("linked_identities", [])),
+            "multisig": sorted(c.get("multisig", [])),
+        }
+        items.append((payload, c["link_signature"], c["public_key"]))
+        positions.append(i)
+    for i, valid in zip(positions, verify_payloads(items)):
+        results[i] = valid
+    return results
+
+
+def export_revocation_delta():
+    """Write a signed delta of local revocations for other nodes."""
+    since = input(f"Start from revocation number (0-{len(revocations)}, default 0): ").strip()
+    since = int(since) if since.isdigit() else 0
+    delta = revocations.export_delta(crypto_adapter, since)
+    file_path = f"revocations_{since}_{delta['to']}.revocations.json"
+    with open(file_path, "w") as f:
+        json.dump(delta, f, indent=2)
+    print(f"Exported revocations {since}-{delta['to']} to {file_path}")
+
+
+def revocation_issuers():
+    """Map each contributor key to the fingerprints of other keys it may revoke.
+
+    A contributor may revoke its own key, and the keys of identities that
+    list it as a multisig holder.
+    """
+    index = HolderKeyIndex(contributors)
+    issuers = {c["public_key"]: set() for c in contributors if c.get("public_key")}
+    for c in contributors:
+        if not c.get("public_key"):
+            continue
+        for holder in c.get("multisig", []):
+            holder_key = index.key(holder)
+            if holder_key:
+                issuers[holder_key].add(fingerprint(c["public_key"]))
+    return issuers
+
+
+def import_revocation_delta():
+    """Apply a revocation delta exported by another node."""
+    file_path = input("Enter path to revocation delta: ").strip()
+    if not os.path.exists(file_path):
+        print("Revocation delta not found.")
+        return
+    with open(file_path, "r") as f:
+        delta = json.load(f)
+    try:
+        added = revocations.apply_delta(delta, verify_payload, revocation_issuers())
+    except RevocationError as e:
+        print(f"Rejected revocation delta: {e}")
+        return
+    print(f"Imported {added} new revocation(s).")
 
 
 def verify_device_access(identity, device_hash, context=None):
@@ -107,8 +342,8 @@ def verify_device_access(identity, device_hash, context=None):
     return False
 
 
-def generate_project_delta(project_id):
-    """Generate a signed project delta file for sharing project updates."""
+def record_epoch():
+    """Prompt for an epoch description, append it to the local epoch log and return it."""
     print("Describe this epoch using natural/local observations.")
     marker = input("Marker or event description (e.g., 'first frost', 'moon over trees'): ")
     signed_by = input("Pseudonym(s) signing this epoch (comma-separated): ").split(",")
@@ -116,43 +351,60 @@ def generate_project_delta(project_id):
     
     # Create log entry and save to epoch log
     log_entry = {"marker": marker.strip(), "location": location_hint.strip(), "signed_by": [s.strip() for s in signed_by if s.strip()]}
+    log_entry["hlc"] = hlc_clock.now().encode()
     epoch_log = load_json(EPOCH_LOG)
     epoch_log.append(log_entry)
     save_json(EPOCH_LOG, epoch_log)
-    
+    return dict(log_entry)
+
+
+def delta_task(task):
+    """Project a task onto the fields shared in a delta."""
+    return {
+        "id": task["id"],
+        "title": task["title"],
+        "status": task["status"],
+        "claimed_by": task.get("claimed_by"),
+        "submitted_by": task.get("submitted_by"),
+        "bounty": task.get("bounty"),
+        "tags": task.get("tags", []),
+        "depends_on": task.get("depends_on", []),
+        "priority": task.get("priority", "")
+    }
+
+
+def delta_metadata(project):
+    """Project-level fields shared in a delta."""
+    return {
+        "title": project["title"],
+        "summary": project["summary"],
+        "tags": project["tags"],
+        "status": project["status"]
+    }
+
+
+def build_project_delta(project, epoch, author=None):
+    """Build an unsigned delta covering every task of a project."""
     delta = {
-        "project_id": project_id,
-        "epoch": {
-            "marker": marker.strip(),
-            "location": location_hint.strip(),
-            "signed_by": [s.strip() for s in signed_by if s.strip()]
-        },
-        "updated_tasks": [],
+        "project_id": project["id"],
+        "epoch": epoch,
+        "updated_tasks": [delta_task(task) for task in project["tasks"]],
         "new_tasks": [],
         "status_changes": [],
-        "metadata": {}
+        "metadata": delta_metadata(project)
     }
+    if author:
+        delta["author_anon_id"] = author
+    return delta
+
+
+def generate_project_delta(project_id):
+    """Generate a signed project delta file for sharing project updates."""
+    epoch = record_epoch()
     
     for project in projects:
         if project["id"] == project_id:
-            for task in project["tasks"]:
-                delta["updated_tasks"].append({
-                    "id": task["id"],
-                    "title": task["title"],
-                    "status": task["status"],
-                    "claimed_by": task.get("claimed_by"),
-                    "submitted_by": task.get("submitted_by"),
-                    "bounty": task.get("bounty"),
-                    "tags": task.get("tags", []),
-                    "depends_on": task.get("depends_on", []),
-                    "priority": task.get("priority", "")
-                })
-            delta["metadata"] = {
-                "title": project["title"],
-                "summary": project["summary"],
-                "tags": project["tags"],
-                "status": project["status"]
-            }
+            delta = build_project_delta(project, epoch, signing_identity())
             file_path = os.path.join(DATA_DIR, f"project_delta_{project_id}.diff.json")
             with open(file_path, "w") as f:
                 signed = sign_project_delta(delta)
@@ -162,6 +414,48 @@ def generate_project_delta(project_id):
     print("Project not found.")
 
 
+def generate_delta_bundle():
+    """Generate one signed bundle holding the deltas of several projects."""
+    ids = [i.strip() for i in input("Project IDs to bundle (comma-separated, blank for all): ").split(",") if i.strip()]
+    selected = [p for p in projects if not ids or p["id"] in ids]
+    missing = set(ids) - {p["id"] for p in selected}
+    if missing:
+        print(f"Projects not found: {', '.join(sorted(missing))}")
+        return
+    if not selected:
+        print("No projects to bundle.")
+        return
+    epoch = record_epoch()
+    author = signing_identity()
+    bundle = build_bundle([build_project_delta(p, epoch, author) for p in selected], crypto_adapter)
+    file_path = os.path.join(DATA_DIR, f"project_bundle_{bundle['merkle_root'][:12]}.bundle.json")
+    with open(file_path, "w") as f:
+        json.dump(bundle, f, indent=2)
+    print(f"Bundle of {len(selected)} project deltas written to {file_path}")
+
+
+def generate_project_delta_stream(project_id):
+    """Generate a signed, streamable project delta (.diff.jsonl) for large projects."""
+    project = next((p for p in projects if p["id"] == project_id), None)
+    if not project:
+        print("Project not found.")
+        return
+    header = {
+        "project_id": project_id,
+        "epoch": record_epoch(),
+        "metadata": delta_metadata(project)
+    }
+    author = signing_identity()
+    if author:
+        header["author_anon_id"] = author
+    tasks = [delta_task(task) for task in project["tasks"]]
+    file_path = os.path.join(DATA_DIR, f"project_delta_{project_id}.diff.jsonl")
+    with open(file_path, "wb") as f:
+        for line in iter_delta_stream(header, tasks, crypto_adapter):
+            f.write(line)
+    print(f"Streamed delta file written to {file_path}")
+
+
 def create_identity():
     anon_id = input("Choose a pseudonym ID: ")
     skills = input("Enter skills (comma-separated): ").split(',')
@@ -177,6 +471,17 @@ def create_identity():
     # Generate signature for linked identities using the crypto adapter
     clean_linked_ids = [lid.strip() for lid in linked_identities if lid.strip()]
     clean_multisig = [m.strip() for m in multisig if m.strip()]
+    index = HolderKeyIndex(contributors)
+    holder_keys = [crypto_adapter.public_key_b64() if m == anon_id.strip() else index.key(m) for m in clean_multisig]
+    holder_keys = [k for k in holder_keys if k]
+    if len(holder_keys) != len(set(holder_keys)):
+        print("Some multisig holders share a public key; each holder must approve with its own key.")
+        return
+    multisig_threshold = 0
+    if clean_multisig:
+        required = input(f"Approvals required from holders (1-{len(clean_multisig)}, blank for all): ").strip()
+        multisig_threshold = int(required) if required.isdigit() else len(clean_multisig)
+        multisig_threshold = max(1, min(multisig_threshold, len(clean_multisig)))
     signature = sign_links(clean_linked_ids, clean_multisig)
 
     responsibilities = input("List responsibilities (comma-separated): ").split(',')
@@ -207,6 +512,7 @@ def create_identity():
         "max_parallel": 1,
         "linked_identities": clean_linked_ids,
         "multisig": clean_multisig,
+        "multisig_threshold": multisig_threshold,
         "link_signature": signature,
         "public_key": crypto_adapter.public_key_b64(),  # Store the public key for later verification
         "responsibilities": [r.strip() for r in responsibilities if r.strip()],
@@ -223,6 +529,51 @@ def create_identity():
     print(f"Created new identity: {identity['anon_id']}")
 
 
+def merge_task_update(project, task_map, updated):
+    """Merge a single task update from a delta into a project."""
+    if updated["id"] in task_map:
+        task_map[updated["id"]].update(updated)
+    else:
+        project["tasks"].append(updated)
+        task_map[updated["id"]] = updated
+
+
+def merge_metadata(project, metadata):
+    """Merge project-level fields from a delta into a project."""
+    for field in ["title", "summary", "tags", "status"]:
+        if field in metadata:
+            project[field] = metadata[field]
+
+
+def accept_delta(delta):
+    """Check a verified delta against the merge log and advance the local clock past it."""
+    try:
+        hlc = decode_delta_hlc(delta)
+        if delta_log.is_stale(delta):
+            print(f"Skipping stale or duplicate delta for project {delta.get('project_id')} (HLC {hlc}).")
+            return False
+        if hlc:
+            hlc_clock.update(hlc)
+    except ValueError as e:
+        print(f"{e}. Skipping delta for project {delta.get('project_id')}.")
+        return False
+    return True
+
+
+def merge_delta(delta):
+    """Merge a verified delta into its project. Returns False if the project is unknown."""
+    project_id = delta.get("project_id")
+    for project in projects:
+        if project["id"] == project_id:
+            task_map = {task["id"]: task for task in project["tasks"]}
+            for updated in delta.get("updated_tasks", []):
+                merge_task_update(project, task_map, updated)
+            merge_metadata(project, delta.get("metadata", {}))
+            delta_log.record(delta)
+            return True
+    return False
+
+
 def import_project_delta():
     file_path = input("Enter path to project delta .diff.json: ").strip()
     if not os.path.exists(file_path):
@@ -235,26 +586,123 @@ def import_project_delta():
     if not signature or not verify_signature(delta, signature):
         print("Invalid or missing signature. Aborting merge.")
         return
+    approved, reason = verify_delta_approvals(delta)
+    if not approved:
+        print(f"{reason}. Aborting merge.")
+        return
+    if not accept_delta(delta):
+        return
 
     project_id = delta.get("project_id")
-    found = False
-    for project in projects:
-        if project["id"] == project_id:
-            found = True
-            task_map = {task["id"]: task for task in project["tasks"]}
-            for updated in delta.get("updated_tasks", []):
-                if updated["id"] in task_map:
-                    task_map[updated["id"]].update(updated)
-                else:
-                    project["tasks"].append(updated)
-            for field in ["title", "summary", "tags", "status"]:
-                if field in delta.get("metadata", {}):
-                    project[field] = delta["metadata"][field]
-            save_json(PROJECTS_FILE, projects)
-            print(f"Delta merged into project {project_id}.")
-            return
-    if not found:
+    if merge_delta(delta):
+        save_json(PROJECTS_FILE, projects)
+        delta_log.save()
+        print(f"Delta merged into project {project_id}.")
+    else:
+        print("Project ID not found in current data.")
+
+
+def import_delta_bundle():
+    """Verify a delta bundle and merge all or some of its projects."""
+    file_path = input("Enter path to delta bundle .bundle.json: ").strip()
+    if not os.path.exists(file_path):
+        print("Bundle file not found.")
+        return
+    with open(file_path, "r") as f:
+        bundle = json.load(f)
+
+    ids = [i.strip() for i in input("Project IDs to merge (comma-separated, blank for all): ").split(",") if i.strip()]
+    try:
+        deltas = verify_bundle(bundle, verify_payload, project_ids=ids or None)
+    except BundleError as e:
+        print(f"{e}. Aborting merge.")
+        return
+
+    merged, unknown = [], []
+    for d in sort_deltas(deltas):
+        approved, reason = verify_delta_approvals(d, bundle["public_key"])
+        if not approved:
+            print(f"  Skipped project {d['project_id']}: {reason}")
+            continue
+        if accept_delta(d):
+            (merged if merge_delta(d) else unknown).append(d["project_id"])
+    save_json(PROJECTS_FILE, projects)
+    delta_log.save()
+    print(f"Merged {len(merged)} of {len(deltas)} verified project deltas.")
+    for project_id in unknown:
+        print(f"  Skipped unknown project {project_id}")
+
+
+def forward_delta_bundle():
+    """Write a verifiable sub-bundle holding only some projects of a bundle."""
+    file_path = input("Enter path to delta bundle .bundle.json: ").strip()
+    if not os.path.exists(file_path):
+        print("Bundle file not found.")
+        return
+    with open(file_path, "r") as f:
+        bundle = json.load(f)
+    ids = [i.strip() for i in input("Project IDs to forward (comma-separated): ").split(",") if i.strip()]
+    try:
+        subset = extract_bundle(bundle, ids)
+    except BundleError as e:
+        print(f"{e}.")
+        return
+    out_path = os.path.join(DATA_DIR, f"project_bundle_{bundle['merkle_root'][:12]}_subset.bundle.json")
+    with open(out_path, "w") as f:
+        json.dump(subset, f, indent=2)
+    print(f"Sub-bundle with {len(subset['entries'])} project deltas written to {out_path}")
+
+
+def stream_target_project(header):
+    """Find the project a verified stream header applies to, or None if it should not be merged."""
+    project = next((p for p in projects if p["id"] == header.get("project_id")), None)
+    if project is None:
         print("Project ID not found in current data.")
+        return None
+    approved, reason = verify_delta_approvals(header)
+    if not approved:
+        print(f"{reason}. Aborting merge.")
+        return None
+    if not accept_delta(header):
+        return None
+    return project
+
+
+def import_project_delta_stream():
+    """Merge a streamed delta (.diff.jsonl) one verified task at a time."""
+    file_path = input("Enter path to project delta .diff.jsonl: ").strip()
+    if not os.path.exists(file_path):
+        print("Delta file not found.")
+        return
+
+    reader = DeltaStreamReader(verify_payload)
+    project = None
+    task_map = None
+    merged = 0
+    try:
+        with open(file_path, "rb") as f:
+            for updated in read_delta_stream(f, reader):
+                if project is None:
+                    project = stream_target_project(reader.header)
+                    if project is None:
+                        return
+                    task_map = {task["id"]: task for task in project["tasks"]}
+                merge_task_update(project, task_map, updated)
+                merged += 1
+    except DeltaStreamError as e:
+        # Nothing has been saved yet, so the on-disk projects are untouched
+        print(f"{e}. Aborting merge.")
+        return
+
+    if project is None:
+        project = stream_target_project(reader.header)
+        if project is None:
+            return
+    merge_metadata(project, reader.header.get("metadata", {}))
+    delta_log.record(reader.header)
+    save_json(PROJECTS_FILE, projects)
+    delta_log.save()
+    print(f"Streamed delta merged into project {project['id']} ({merged} tasks).")
 
 
 def add_task():
@@ -821,6 +1269,14 @@ if __name__ == "__main__":
     print("27. Verify Device Ownership")
     print("28. Rotate Device Nonce")
     print("29. View Device Rotation Log")
+    print("30. Export Streamed Project Delta (.diff.jsonl)")
+    print("31. Import Streamed Project Delta (.diff.jsonl)")
+    print("32. Export Multi-Project Delta Bundle")
+    print("33. Import Multi-Project Delta Bundle")
+    print("34. Extract Sub-Bundle for Forwarding")
+    print("35. Co-sign Project Delta (.diff.json)")
+    print("36. Export Revocation Delta")
+    print("37. Import Revocation Delta")
     choice = input("Choose an option: ")
 
     if choice == "1":
@@ -864,9 +1320,13 @@ if __name__ == "__main__":
         import_project_delta()
     elif choice == "20":
         epoch_log = load_json(EPOCH_LOG)
+        since = input("Only show entries after HLC (blank for all): ").strip() or None
+        epoch_index = HLCIndex([(entry.get("hlc", ""), entry) for entry in epoch_log])
         print("\nLocal Epoch Log:")
-        for i, entry in enumerate(epoch_log):
+        for i, (hlc, entry) in enumerate(epoch_index.since(since)):
             print(f"[{i+1}] Marker: {entry.get('marker')}, Location: {entry.get('location')}, Signed by: {', '.join(entry.get('signed_by', []))}")
+            if hlc:
+                print(f"     HLC: {hlc}")
     elif choice == "21":
         keyword = input("Enter input or resource keyword to filter by: ").lower()
         for project in projects:
@@ -888,25 +1348,22 @@ if __name__ == "__main__":
             print(f"  Resources: {', '.join(c.get('resources', []))}")
             print(f"  Availability: {c.get('availability', '?')}\n")
     elif choice == "24":
-        for c in contributors:
-            valid = verify_link_signature(c.get("linked_identities", []), c.get("multisig", []), c.get("link_signature", ""))
+        for c, valid in zip(contributors, verify_contributor_links(contributors)):
             status = "✅ valid" if valid else "❌ invalid"
             print(f"{c['anon_id']}: link signature {status}")
     elif choice == "25":
         target_id = input("Enter the anon ID to rotate or revoke link signature: ")
         for c in contributors:
             if c["anon_id"] == target_id:
-                action = input("Type 'revoke' to clear links or 'rotate' to regenerate the signature: ").strip().lower()
-                if action == "revoke":
-                    revoked_proof = {
-                        "anon_id": c["anon_id"],
-                        "revoked_link_signature": c.get("link_signature", ""),
-                        "revoked_at": datetime.utcnow().isoformat()
-                    }
-                    revoke_log_path = os.path.join(DATA_DIR, "revoked_links.json")
-                    revoked_log = load_json(revoke_log_path)
-                    revoked_log.append(revoked_proof)
-                    save_json(revoke_log_path, revoked_log)
+                action = input(
+                    "Type 'revoke' to clear links, 'revoke-key' to also revoke the public key, "
+                    "or 'rotate' to regenerate the signature: "
+                ).strip().lower()
+                if action in ("revoke", "revoke-key"):
+                    if c.get("link_signature"):
+                        revocations.revoke_signature(c["link_signature"], c.get("public_key"), anon_id=c["anon_id"])
+                    if action == "revoke-key" and c.get("public_key"):
+                        revocations.revoke_key(c["public_key"], anon_id=c["anon_id"])
 
                     c["linked_identities"] = []
                     c["multisig"] = []
@@ -923,11 +1380,11 @@ if __name__ == "__main__":
         else:
             print("Anon ID not found.")
     elif choice == "26":
-        revoke_log_path = os.path.join(DATA_DIR, "revoked_links.json")
-        revoked_log = load_json(revoke_log_path)
+        revocations.refresh()
         print("\nRevoked Identity Links:")
-        for entry in revoked_log:
-            print(f"- {entry['anon_id']} revoked {entry['revoked_link_signature'][:12]}... at {entry['revoked_at']}")
+        for entry in revocations.entries:
+            owner = entry.get("anon_id") or f"from {entry.get('issuer', '?')[:12]}..."
+            print(f"- {owner} revoked {entry['kind']} {entry['fingerprint'][:12]}... at {entry['revoked_at']}")
     elif choice == "27":
         serial = input("Enter device serial: ").strip()
         nonce = input("Enter known nonce: ").strip()
@@ -991,5 +1448,22 @@ if __name__ == "__main__":
                     print()
         else:
             print("No device rotations recorded.")
+    elif choice == "30":
+        project_id = input("Enter project ID to export streamed delta: ")
+        generate_project_delta_stream(project_id)
+    elif choice == "31":
+        import_project_delta_stream()
+    elif choice == "32":
+        generate_delta_bundle()
+    elif choice == "33":
+        import_delta_bundle()
+    elif choice == "34":
+        forward_delta_bundle()
+    elif choice == "35":
+        cosign_project_delta()
+    elif choice == "36":
+        export_revocation_delta()
+    elif choice == "37":
+        import_revocation_delta()
     else:
         print("Invalid choice.")
@@ -0,0 +1,20 @@
+"""
+Micro-channel carriers and their frame encryption.
+
+This package provides the MicroChannel abstraction over low-bandwidth
+metadata carriers and the per-session AEAD keys negotiated for them.
+"""
+
+from .backchannel_encode import MicroChannel, Packet, open_channel
+from .session_keys import FrameCipher, SessionError, SessionHandshake, SessionKeys, preferred_cipher
+
+__all__ = [
+    'MicroChannel',
+    'Packet',
+    'open_channel',
+    'FrameCipher',
+    'SessionError',
+    'SessionHandshake',
+    'SessionKeys',
+    'preferred_cipher',
+]
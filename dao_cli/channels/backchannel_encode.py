@@ -11,6 +11,16 @@ API needed to write / read the metadata.
 
 ▸ Security: every packet is AES‑GCM encrypted and CRC‑checked before emit.
 ▸ Integrity: sequence numbers and channel IDs stop replay / mixing.
+▸ Sessions: install_session() switches to per-session keys negotiated by the
+  transport handshake (see session_keys.py).
+▸ Static-key mode: send counters are reserved COUNTER_BLOCK frames at a
+  time in a counter file (fsynced before use), so a restarted sender, or
+  another channel on the same key and host, continues past every nonce that
+  may have been used under the channel key.  The receiver resyncs over the
+  skipped counters like over lost frames.  The receive counter is kept in
+  memory only: replays are rejected while the receiver stays up, not across
+  its restart.  TcpTransport negotiates sessions by default, leaving the
+  channel key to the handshake frames.
 ▸ Bandwidth: default MTU = 26 payload bytes per frame (fits AirTag rename).
 
 Dependencies:
@@ -24,17 +34,21 @@ Bluetooth stacks present.
 from __future__ import annotations
 
 import base64
+import hashlib
 import json
+import os
 import secrets
 import time
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Generator, Optional, Tuple
+from typing import Generator, Optional, Tuple, Union
 
-from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.exceptions import InvalidTag
 import crcmod
 
+from .session_keys import FrameCipher, SessionKeys, static_cipher
+
 # ---------------------------------------------------------------------------
 # Packet codec helpers
 # ---------------------------------------------------------------------------
@@ -45,6 +59,15 @@ HEADER_EMOJI = "\U0001F6C8"  # 🛈 – 3‑byte UTF‑8 info symbol (safe in Ap
 MAX_FIELD_CHARS = 32          # smallest carrier constraint (AirTag rename)
 PAYLOAD_BYTES = 26            # 32 - len(header+seq) - b64 inflation
 AES_KEY_BYTES = 32
+SEQ_WIRE_MODULUS = 100        # only two decimal digits of the sequence are sent
+SEQ_RECOVERY_WINDOWS = 3      # wraps of lost frames tolerated when resyncing
+COUNTER_BLOCK = 32            # static-key frames reserved per counter file write
+COUNTER_DIR = Path.home() / ".dao_keys"
+
+
+def default_counter_path(secret_key: bytes) -> Path:
+    """Return the counter file of a channel key: one per key, shared by its channels on this host."""
+    return COUNTER_DIR / f"microchannel-{hashlib.sha256(secret_key).hexdigest()[:16]}.counter"
 
 
 def b64u(data: bytes) -> str:
@@ -57,32 +80,49 @@ def b64u_dec(txt: str) -> bytes:
 
 @dataclass
 class Packet:
-    seq: int
+    seq: int        # full frame counter; the wire carries seq % SEQ_WIRE_MODULUS
     payload: bytes  # plaintext payload (≤ PAYLOAD_BYTES)
 
-    def encode(self, key: bytes) -> str:
+    def encode(self, key: Union[bytes, FrameCipher]) -> str:
         """Return wire‑format string suitable for carrier field."""
         if len(self.payload) > PAYLOAD_BYTES:
             raise ValueError("payload too large for single packet")
-        aes = AESGCM(key)
-        nonce = self.seq.to_bytes(12, "big")  # 96‑bit nonce from seq
-        cipher = aes.encrypt(nonce, self.payload, b"")
-        frame = cipher + CRC16(self.payload).to_bytes(2, "big")
-        return f"{HEADER_EMOJI}{self.seq:02d}" + b64u(frame)
+        cipher = key if isinstance(key, FrameCipher) else static_cipher(key)
+        # The nonce is the full counter, so it does not repeat when the wire digits wrap
+        frame = cipher.seal(self.seq, self.payload) + CRC16(self.payload).to_bytes(2, "big")
+        return f"{HEADER_EMOJI}{self.seq % SEQ_WIRE_MODULUS:02d}" + b64u(frame)
 
     @staticmethod
-    def decode(raw: str, key: bytes) -> "Packet":
+    def decode(raw: str, key: Union[bytes, FrameCipher], next_seq: Optional[int] = None) -> "Packet":
+        """
+        Parse and decrypt a wire frame.
+
+        ``next_seq`` is the counter the receiver expects next.  The full
+        counter is recovered as the first value from there on whose low
+        digits match the wire digits, allowing for up to
+        SEQ_RECOVERY_WINDOWS wraps of lost frames.  Without it the wire
+        digits are taken as the counter.
+        """
         if not raw.startswith(HEADER_EMOJI):
             raise ValueError("bad header")
-        seq = int(raw[len(HEADER_EMOJI): len(HEADER_EMOJI) + 2])
+        wire_seq = int(raw[len(HEADER_EMOJI): len(HEADER_EMOJI) + 2])
         body = b64u_dec(raw[len(HEADER_EMOJI) + 2:])
-        cipher, crc = body[:-2], int.from_bytes(body[-2:], "big")
-        aes = AESGCM(key)
-        nonce = seq.to_bytes(12, "big")
-        payload = aes.decrypt(nonce, cipher, b"")
-        if CRC16(payload) != crc:
-            raise ValueError("CRC mismatch")
-        return Packet(seq, payload)
+        cipher_text, crc = body[:-2], int.from_bytes(body[-2:], "big")
+        cipher = key if isinstance(key, FrameCipher) else static_cipher(key)
+        if next_seq is None:
+            candidates = [wire_seq]
+        else:
+            first = next_seq + (wire_seq - next_seq) % SEQ_WIRE_MODULUS
+            candidates = [first + i * SEQ_WIRE_MODULUS for i in range(SEQ_RECOVERY_WINDOWS)]
+        for seq in candidates:
+            try:
+                payload = cipher.open(seq, cipher_text)
+            except InvalidTag:
+                continue
+            if CRC16(payload) != crc:
+                raise ValueError("CRC mismatch")
+            return Packet(seq, payload)
+        raise ValueError("frame failed authentication")
 
 # ---------------------------------------------------------------------------
 # Abstract transport
@@ -91,30 +131,105 @@ class Packet:
 class MicroChannel(ABC):
     """Abstract base class for a single metadata carrier."""
 
-    def __init__(self, secret_key: bytes):
+    # Transmission-medium node id; the transport paces frames from its metadata
+    medium: Optional[str] = None
+
+    def __init__(self, secret_key: bytes, counter_path: Optional[Union[str, Path]] = None):
+        """
+        Args:
+            secret_key: 32-byte channel key
+            counter_path: File reserving static-key send counters across
+                restarts (default: default_counter_path(secret_key))
+        """
         if len(secret_key) != AES_KEY_BYTES:
             raise ValueError("AES‑GCM key must be 32 bytes")
         self.key = secret_key
-        self.last_tx_seq: int = -1
+        self.counter_path = Path(counter_path) if counter_path else default_counter_path(secret_key)
+        self._tx_reserved = self._load_counter()
+        self.last_tx_seq: int = self._tx_reserved - 1
         self.last_rx_seq: int = -1
+        self.session: Optional[SessionKeys] = None
+        self._static_rx_seq: int = -1
+
+    # -- static-key send counter ---------------------------------------------
+    def _load_counter(self) -> int:
+        """Return the first static-key counter no earlier process may have used."""
+        try:
+            return int(self.counter_path.read_text())
+        except FileNotFoundError:
+            return 0
+
+    def _next_static_seq(self) -> int:
+        """Return the next static-key counter, reserving a block in the counter file before it is used."""
+        seq = self.last_tx_seq + 1
+        if seq < self._tx_reserved:
+            return seq
+        # Another channel with this key may have reserved counters since we loaded the file
+        seq = max(seq, self._load_counter())
+        reserved = seq + COUNTER_BLOCK
+        self.counter_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.counter_path.with_name(self.counter_path.name + ".tmp")
+        with open(tmp_path, "w") as f:
+            f.write(str(reserved))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.counter_path)
+        if os.name == "posix":
+            fd = os.open(self.counter_path.parent, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+        self._tx_reserved = reserved
+        return seq
+
+    # -- session keys --------------------------------------------------------
+    def install_session(self, keys: SessionKeys) -> None:
+        """Encrypt all further frames with per‑session keys; counters restart."""
+        if self.session is None:
+            self._static_rx_seq = self.last_rx_seq
+        self.session = keys
+        self.last_tx_seq = -1
+        self.last_rx_seq = -1
 
     # -- high‑level API ------------------------------------------------------
     def send(self, payload: bytes) -> None:
-        self.last_tx_seq = (self.last_tx_seq + 1) % 100
+        self.last_tx_seq = self._next_static_seq() if self.session is None else self.last_tx_seq + 1
         pkt = Packet(self.last_tx_seq, payload)
-        self._write_raw(pkt.encode(self.key))
+        self._write_raw(pkt.encode(self.session.tx if self.session else self.key))
 
     def receive(self) -> Optional[bytes]:
         raw = self._read_raw()
         if raw is None:
             return None
+        if self.session is not None:
+            try:
+                pkt = Packet.decode(raw, self.session.rx, self.last_rx_seq + 1)
+            except Exception:
+                # Handshake frames the peer retransmits still use the channel key
+                return self._receive_static(raw)
+        else:
+            pkt = self._decode_static(raw, self.last_rx_seq)
+            if pkt is None:
+                return None
+        # Repeated frames decrypt only under a counter at or behind
+        # last_rx_seq, which is never tried, so they are dropped above
+        self.last_rx_seq = pkt.seq
+        return pkt.payload
+
+    def _decode_static(self, raw: str, last_seq: int) -> Optional[Packet]:
+        # Only counters after last_seq are tried, so captured older frames
+        # (and a restarted sender reusing nonces) fail authentication
         try:
-            pkt = Packet.decode(raw, self.key)
+            return Packet.decode(raw, self.key, last_seq + 1)
         except Exception:
             return None
-        if pkt.seq == self.last_rx_seq:
-            return None  # duplicate
-        self.last_rx_seq = pkt.seq
+
+    def _receive_static(self, raw: str) -> Optional[bytes]:
+        pkt = self._decode_static(raw, self._static_rx_seq)
+        if pkt is None:
+            return None
+        self._static_rx_seq = pkt.seq
         return pkt.payload
 
     # -- vendor‑specific I/O -------------------------------------------------
@@ -132,13 +247,16 @@ class MicroChannel(ABC):
 class AirTagRenameChannel(MicroChannel):
     """AirTag / Find My accessory rename carrier (owner account only)."""
 
-    def __init__(self, device_id: str, icloud_session, secret_key: bytes):
-        super().__init__(secret_key)
+    medium = "tm.airtag-rename"
+
+    def __init__(self, device_id: str, icloud_session, secret_key: bytes,
+                 counter_path: Optional[Union[str, Path]] = None):
+        super().__init__(secret_key, counter_path)
         self.device_id = device_id
         self.api = icloud_session  # e.g., pyicloud.PyiCloudService
     
     def _write_raw(self, frame: str) -> None:
-        # TODO: call private endpoint once per >10 s
+        # Private endpoint allows one rename per >10 s; TcpTransport paces to it
         self.api.devices[self.device_id].set_display_name(frame)
 
     def _read_raw(self) -> Optional[str]:
@@ -148,8 +266,11 @@ class AirTagRenameChannel(MicroChannel):
 class WifiSSIDChannel(MicroChannel):
     """Uses an Access Point SSID broadcast as payload (hostapd control)."""
 
-    def __init__(self, hostapd_cli_path: str = "/usr/bin/hostapd_cli", *, secret_key: bytes):
-        super().__init__(secret_key)
+    medium = "tm.wifi-ssid"
+
+    def __init__(self, hostapd_cli_path: str = "/usr/bin/hostapd_cli", *, secret_key: bytes,
+                 counter_path: Optional[Union[str, Path]] = None):
+        super().__init__(secret_key, counter_path)
         self.cli = hostapd_cli_path
         self._cache: Optional[str] = None
 
@@ -0,0 +1,232 @@
+"""
+Per-session AEAD keys for micro-channel frames.
+
+Encrypting every frame under the long-term channel key makes nonce reuse
+a matter of time: the key never changes, while counters restart with every
+process.  A session instead runs an X25519 exchange inside the transport's
+SYN / SYN-ACK, and HKDF-SHA256 turns the shared secret into one key per
+direction.  The static channel key is the HKDF salt, so only holders of the
+channel key arrive at the session keys.
+
+Each direction has its own key, so both sides can count frames from zero.
+The nonce is that 64-bit frame counter, which never wraps within a session.
+
+Cipher contexts are created once per key and reused for every frame.  Two
+AEADs are supported: AES-256-GCM, and ChaCha20-Poly1305 for nodes whose
+CPU has no AES instructions (common on small ARM boards), where it is
+several times faster.  Each side announces its preference in its hello and
+AES-GCM is used only if both prefer it.
+
+Requires the cryptography package, as the rest of the channel code does.
+"""
+
+from __future__ import annotations
+
+import functools
+import os
+import platform
+import struct
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric.x25519 import X25519PrivateKey, X25519PublicKey
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM, ChaCha20Poly1305
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+
+# Environment override for the preferred cipher (one of CIPHERS)
+DAO_SESSION_CIPHER = "DAO_SESSION_CIPHER"
+
+CIPHER_AES_GCM = "aes-256-gcm"
+CIPHER_CHACHA20 = "chacha20-poly1305"
+
+# Wire identifiers used in the hello
+CIPHERS = {CIPHER_AES_GCM: 1, CIPHER_CHACHA20: 2}
+_CIPHER_NAMES = {ident: name for name, ident in CIPHERS.items()}
+_AEADS = {CIPHER_AES_GCM: AESGCM, CIPHER_CHACHA20: ChaCha20Poly1305}
+
+SESSION_VERSION = 1
+KEY_BYTES = 32
+HELLO_BYTES = 2 + KEY_BYTES  # version, cipher id, X25519 public key
+HKDF_INFO = b"dao-microchannel-session/1"
+
+# Frame counters are 64 bits; the remaining 4 nonce bytes are zero
+MAX_FRAME_COUNTER = 2 ** 64 - 1
+
+
+class SessionError(Exception):
+    """Raised for malformed hellos and exhausted frame counters."""
+    pass
+
+
+def has_aes_acceleration() -> bool:
+    """
+    Check whether the CPU has AES instructions (AES-NI or the ARMv8 crypto extension).
+
+    Reads /proc/cpuinfo where available; elsewhere assumes x86-64 and 64-bit
+    ARM desktops have them.
+    """
+    try:
+        with open("/proc/cpuinfo") as cpuinfo:
+            for line in cpuinfo:
+                name, _, value = line.partition(":")
+                if name.strip().lower() in ("flags", "features"):
+                    return "aes" in value.split()
+        return False
+    except OSError:
+        return platform.machine().lower() in ("x86_64", "amd64", "arm64")
+
+
+@functools.lru_cache(maxsize=None)
+def preferred_cipher() -> str:
+    """Return DAO_SESSION_CIPHER if set, else the fastest AEAD for this CPU."""
+    override = os.environ.get(DAO_SESSION_CIPHER)
+    if override:
+        if override not in CIPHERS:
+            raise ValueError(f"Unknown {DAO_SESSION_CIPHER} {override!r}; choose one of {', '.join(CIPHERS)}")
+        return override
+    return CIPHER_AES_GCM if has_aes_acceleration() else CIPHER_CHACHA20
+
+
+class FrameCipher:
+    """
+    One AEAD key with its cipher context, sealing frames by counter.
+
+    The nonce is the counter as a 96-bit big-endian integer, the same layout
+    the static-key packets have always used.
+    """
+
+    __slots__ = ("cipher", "_aead")
+
+    def __init__(self, key: bytes, cipher: str = CIPHER_AES_GCM):
+        """
+        Create the cipher context.
+
+        Args:
+            key: 32-byte AEAD key
+            cipher: CIPHER_AES_GCM or CIPHER_CHACHA20
+        """
+        if len(key) != KEY_BYTES:
+            raise ValueError(f"AEAD key must be {KEY_BYTES} bytes")
+        self.cipher = cipher
+        self._aead = _AEADS[cipher](key)
+
+    @staticmethod
+    def _nonce(counter: int) -> bytes:
+        if not 0 <= counter <= MAX_FRAME_COUNTER:
+            raise SessionError("Frame counter exhausted; start a new session")
+        return struct.pack(">IQ", 0, counter)
+
+    def seal(self, counter: int, plaintext: bytes, aad: bytes = b"") -> bytes:
+        """Encrypt and authenticate one frame."""
+        return self._aead.encrypt(self._nonce(counter), plaintext, aad)
+
+    def open(self, counter: int, ciphertext: bytes, aad: bytes = b"") -> bytes:
+        """
+        Decrypt one frame.
+
+        Raises:
+            cryptography.exceptions.InvalidTag: If the frame fails authentication
+        """
+        return self._aead.decrypt(self._nonce(counter), ciphertext, aad)
+
+
+@functools.lru_cache(maxsize=16)
+def static_cipher(key: bytes) -> FrameCipher:
+    """Return the cached AES-GCM context for a long-term channel key."""
+    return FrameCipher(key, CIPHER_AES_GCM)
+
+
+@dataclass(frozen=True)
+class SessionKeys:
+    """Directional ciphers for one session."""
+
+    cipher: str
+    tx: FrameCipher
+    rx: FrameCipher
+
+
+class SessionHandshake:
+    """
+    One side of a session key exchange.
+
+    Both sides send hello() to each other (the initiator in its SYN, the
+    responder in its SYN-ACK) and call derive() with the peer's hello::
+
+        a = SessionHandshake(key, initiator=True)
+        b = SessionHandshake(key, initiator=False)
+        keys_b = b.derive(a.hello())
+        keys_a = a.derive(b.hello())
+    """
+
+    def __init__(self, static_key: bytes, initiator: bool, cipher: Optional[str] = None):
+        """
+        Generate an ephemeral key pair.
+
+        Args:
+            static_key: The long-term channel key, used as HKDF salt
+            initiator: True on the side that sends the SYN
+            cipher: Preferred AEAD (default: preferred_cipher())
+        """
+        self._static_key = static_key
+        self.initiator = initiator
+        self.cipher = cipher or preferred_cipher()
+        self._private = X25519PrivateKey.generate()
+        self._public = self._private.public_key().public_bytes(
+            encoding=serialization.Encoding.Raw,
+            format=serialization.PublicFormat.Raw
+        )
+
+    def hello(self) -> bytes:
+        """Return this side's hello: version, preferred cipher and ephemeral public key."""
+        return bytes((SESSION_VERSION, CIPHERS[self.cipher])) + self._public
+
+    @staticmethod
+    def parse_hello(hello: bytes) -> Tuple[str, bytes]:
+        """
+        Split a hello into (preferred cipher, public key).
+
+        Raises:
+            SessionError: If the hello is malformed or from an unknown version
+        """
+        if len(hello) != HELLO_BYTES:
+            raise SessionError(f"Session hello must be {HELLO_BYTES} bytes, got {len(hello)}")
+        if hello[0] != SESSION_VERSION:
+            raise SessionError(f"Unsupported session version {hello[0]}")
+        cipher = _CIPHER_NAMES.get(hello[1])
+        if cipher is None:
+            raise SessionError(f"Unknown session cipher id {hello[1]}")
+        return cipher, hello[2:]
+
+    def derive(self, peer_hello: bytes) -> SessionKeys:
+        """
+        Complete the exchange with the peer's hello.
+
+        Returns:
+            The session's ciphers, tx for frames this side sends
+
+        Raises:
+            SessionError: If the hello is malformed
+        """
+        peer_cipher, peer_public = self.parse_hello(peer_hello)
+        try:
+            shared = self._private.exchange(X25519PublicKey.from_public_bytes(peer_public))
+        except ValueError as e:
+            # All-zero shared secret from a low-order point
+            raise SessionError(f"Invalid session public key: {e}") from None
+        cipher = CIPHER_AES_GCM if self.cipher == peer_cipher == CIPHER_AES_GCM else CIPHER_CHACHA20
+
+        initiator_public, responder_public = (
+            (self._public, peer_public) if self.initiator else (peer_public, self._public)
+        )
+        material = HKDF(
+            algorithm=hashes.SHA256(),
+            length=2 * KEY_BYTES,
+            salt=self._static_key,
+            info=HKDF_INFO + initiator_public + responder_public + bytes((CIPHERS[cipher],)),
+        ).derive(shared)
+        forward = FrameCipher(material[:KEY_BYTES], cipher)
+        backward = FrameCipher(material[KEY_BYTES:], cipher)
+        if self.initiator:
+            return SessionKeys(cipher, tx=forward, rx=backward)
+        return SessionKeys(cipher, tx=backward, rx=forward)
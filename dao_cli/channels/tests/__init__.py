@@ -0,0 +1,3 @@
+"""
+Unit tests for micro-channel carriers and session keys.
+"""
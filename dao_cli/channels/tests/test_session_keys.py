@@ -0,0 +1,213 @@
+"""
+Unit tests for session key negotiation and micro-channel frame encryption.
+"""
+
+import os
+import secrets
+import tempfile
+import unittest
+from typing import List, Optional
+from unittest import mock
+
+from cryptography.exceptions import InvalidTag
+
+from dao_cli.channels import session_keys
+from dao_cli.channels.backchannel_encode import COUNTER_BLOCK, MicroChannel, Packet, SEQ_WIRE_MODULUS
+from dao_cli.channels.session_keys import (
+    CIPHER_AES_GCM,
+    CIPHER_CHACHA20,
+    DAO_SESSION_CIPHER,
+    SessionError,
+    SessionHandshake,
+)
+
+
+# Counter files of the test channels, instead of ~/.dao_keys
+COUNTERS = tempfile.TemporaryDirectory()
+
+
+class LoopbackChannel(MicroChannel):
+    """MicroChannel whose carrier field is a list the peer reads from."""
+
+    def __init__(self, key: bytes, name: str = "a"):
+        super().__init__(key, os.path.join(COUNTERS.name, f"{key.hex()[:16]}-{name}.counter"))
+        self.peer: Optional["LoopbackChannel"] = None
+        self.inbox: List[str] = []
+
+    def _write_raw(self, frame: str) -> None:
+        self.peer.inbox.append(frame)
+
+    def _read_raw(self) -> Optional[str]:
+        return self.inbox.pop(0) if self.inbox else None
+
+
+def channel_pair(key: bytes):
+    a, b = LoopbackChannel(key, "a"), LoopbackChannel(key, "b")
+    a.peer, b.peer = b, a
+    return a, b
+
+
+def negotiate(key: bytes, initiator_cipher: str = CIPHER_AES_GCM, responder_cipher: str = CIPHER_AES_GCM):
+    initiator = SessionHandshake(key, initiator=True, cipher=initiator_cipher)
+    responder = SessionHandshake(key, initiator=False, cipher=responder_cipher)
+    responder_keys = responder.derive(initiator.hello())
+    return initiator.derive(responder.hello()), responder_keys
+
+
+class TestSessionHandshake(unittest.TestCase):
+    """Tests for SessionHandshake and FrameCipher."""
+
+    def setUp(self):
+        self.key = secrets.token_bytes(32)
+
+    def test_directional_keys(self):
+        """Test that each side opens what the other seals, in both directions."""
+        a, b = negotiate(self.key)
+        self.assertEqual(b.rx.open(0, a.tx.seal(0, b"ping")), b"ping")
+        self.assertEqual(a.rx.open(0, b.tx.seal(0, b"pong")), b"pong")
+        # Directions use different keys, so equal counters never share a nonce under one key
+        self.assertNotEqual(a.tx.seal(0, b"same"), b.tx.seal(0, b"same"))
+
+    def test_cipher_negotiation(self):
+        """Test that AES-GCM is chosen only when both sides prefer it."""
+        self.assertEqual(negotiate(self.key)[0].cipher, CIPHER_AES_GCM)
+        a, b = negotiate(self.key, CIPHER_AES_GCM, CIPHER_CHACHA20)
+        self.assertEqual((a.cipher, b.cipher), (CIPHER_CHACHA20, CIPHER_CHACHA20))
+        self.assertEqual(b.rx.open(7, a.tx.seal(7, b"data")), b"data")
+
+    def test_static_key_binds_session(self):
+        """Test that a peer with a different channel key derives different session keys."""
+        initiator = SessionHandshake(self.key, initiator=True)
+        responder = SessionHandshake(secrets.token_bytes(32), initiator=False)
+        responder_keys = responder.derive(initiator.hello())
+        initiator_keys = initiator.derive(responder.hello())
+        with self.assertRaises(InvalidTag):
+            responder_keys.rx.open(0, initiator_keys.tx.seal(0, b"secret"))
+
+    def test_malformed_hello(self):
+        """Test that truncated or unknown hellos are rejected."""
+        handshake = SessionHandshake(self.key, initiator=False)
+        hello = SessionHandshake(self.key, initiator=True).hello()
+        for bad in (hello[:-1], b"\x09" + hello[1:], hello[:1] + b"\x7f" + hello[2:]):
+            with self.assertRaises(SessionError):
+                handshake.derive(bad)
+
+    def test_counter_limit(self):
+        """Test that the 64-bit frame counter cannot wrap."""
+        keys, _ = negotiate(self.key)
+        keys.tx.seal(2 ** 64 - 1, b"last")
+        with self.assertRaises(SessionError):
+            keys.tx.seal(2 ** 64, b"wrapped")
+
+    def test_preferred_cipher_override(self):
+        """Test DAO_SESSION_CIPHER and the AES detection fallback."""
+        session_keys.preferred_cipher.cache_clear()
+        self.addCleanup(session_keys.preferred_cipher.cache_clear)
+        with mock.patch.dict(os.environ, {DAO_SESSION_CIPHER: CIPHER_CHACHA20}):
+            self.assertEqual(session_keys.preferred_cipher(), CIPHER_CHACHA20)
+        session_keys.preferred_cipher.cache_clear()
+        with mock.patch.dict(os.environ, {DAO_SESSION_CIPHER: ""}), \
+                mock.patch.object(session_keys, "has_aes_acceleration", return_value=False):
+            self.assertEqual(session_keys.preferred_cipher(), CIPHER_CHACHA20)
+
+
+class TestMicroChannelFrames(unittest.TestCase):
+    """Tests for extended sequence numbers and session use in MicroChannel."""
+
+    def setUp(self):
+        self.key = secrets.token_bytes(32)
+
+    def test_no_nonce_reuse_after_wire_wrap(self):
+        """Test that frames 100 apart share wire digits but not ciphertext."""
+        first = Packet(5, b"payload").encode(self.key)
+        wrapped = Packet(5 + SEQ_WIRE_MODULUS, b"payload").encode(self.key)
+        self.assertEqual(first[:3], wrapped[:3])
+        self.assertNotEqual(first, wrapped)
+        self.assertEqual(Packet.decode(wrapped, self.key, next_seq=100).seq, 105)
+
+    def test_stream_across_wraps_with_loss(self):
+        """Test that the receiver tracks the full counter through wraps and gaps."""
+        a, b = channel_pair(self.key)
+        received = []
+        for n in range(350):
+            a.send(n.to_bytes(2, "big"))
+            if 120 <= n < 250:
+                b.inbox.clear()  # carrier overwritten before the receiver polled
+                continue
+            received.append(b.receive())
+        self.assertEqual(received, [n.to_bytes(2, "big") for n in list(range(120)) + list(range(250, 350))])
+        self.assertEqual(b.last_rx_seq, 349)
+
+    def test_duplicates_dropped(self):
+        """Test that a repeated frame is not delivered twice."""
+        a, b = channel_pair(self.key)
+        a.send(b"once")
+        frame = b.inbox[0]
+        self.assertEqual(b.receive(), b"once")
+        b.inbox.append(frame)
+        self.assertIsNone(b.receive())
+
+    def test_old_frames_replayed(self):
+        """Test that captured older frames are rejected."""
+        a, b = channel_pair(self.key)
+        captured = []
+        for n in range(30):
+            a.send(bytes([n]))
+            captured.append(b.inbox[0])
+            b.receive()
+        for frame in captured[:-1]:
+            b.inbox.append(frame)
+            self.assertIsNone(b.receive())
+        self.assertEqual(b.last_rx_seq, 29)
+
+    def test_restarted_sender_skips_used_counters(self):
+        """Test that a restarted sender never reuses a static-key counter and is still understood."""
+        a, b = channel_pair(self.key)
+        for n in range(40):
+            a.send(bytes([n]))
+            self.assertEqual(b.receive(), bytes([n]))
+        self.assertEqual(a.last_tx_seq, 39)
+
+        restarted = LoopbackChannel(self.key, "a")
+        restarted.peer = b
+        restarted.send(b"again")
+        self.assertEqual(b.receive(), b"again")
+        self.assertEqual(b.last_rx_seq, 2 * COUNTER_BLOCK)
+
+    def test_counter_reserved_per_block(self):
+        """Test that the counter file is written once per block, ahead of the counters used."""
+        a, _ = channel_pair(self.key)
+        writes = []
+        replace = os.replace
+        with mock.patch("os.replace", side_effect=lambda src, dst: (writes.append(dst), replace(src, dst))):
+            for n in range(COUNTER_BLOCK + 1):
+                a.send(b"x")
+        self.assertEqual(len(writes), 2)
+        with open(a.counter_path) as f:
+            self.assertEqual(int(f.read()), 2 * COUNTER_BLOCK)
+
+    def test_session_frames(self):
+        """Test that installed sessions encrypt with session keys and still accept handshake retransmits."""
+        a, b = channel_pair(self.key)
+        a.send(b"syn")
+        self.assertEqual(b.receive(), b"syn")
+        keys_a, keys_b = negotiate(self.key)
+        a.install_session(keys_a)
+        b.install_session(keys_b)
+
+        a.send(b"data")
+        frame = b.inbox[0]
+        self.assertEqual(Packet.decode(frame, keys_b.rx, 0).payload, b"data")
+        with self.assertRaises(ValueError):
+            Packet.decode(frame, self.key, 0)
+        self.assertEqual(b.receive(), b"data")
+
+        # A frame under the channel key (e.g. a retransmitted SYN) is still readable
+        b.inbox.append(Packet(1, b"syn again").encode(self.key))
+        self.assertEqual(b.receive(), b"syn again")
+        a.send(b"more")
+        self.assertEqual(b.receive(), b"more")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,9 +4,9 @@ DAO crypto module selector.
 This module selects and initializes the appropriate crypto backend
 based on environment variables and user preferences.
 """
+import asyncio
 import os
-import subprocess
-import sys
+import threading
 from typing import Optional
 
 from .constants import (
@@ -14,30 +14,36 @@ from .constants import (
     DAO_CRYPTO_BACKEND,
     BACKEND_SOFTWARE,
     BACKEND_PKCS11,
+    BACKEND_AGENT,
 )
+from .adapter_async import AsyncCryptoAdapter
 from .adapter_base import CryptoAdapter
+from .canonical import Canonical, canonical_bytes, jcs_bytes
+from .key_cache import PublicKeyCache
+from .multisig import HolderKeyIndex, verify_threshold
+from .revocation import RevocationIndex
+from .verify_cache import VerificationCache
 
 # Global adapter instance
 _adapter: Optional[CryptoAdapter] = None
+_adapter_lock = threading.Lock()
 
 
 def _check_fips_mode() -> bool:
     """
-    Check if OpenSSL is running in FIPS mode.
+    Check if the OpenSSL linked into pyca/cryptography is running in FIPS mode.
+    
+    The check runs in-process against the library that actually performs
+    the software signatures, rather than the openssl command-line tool.
     
     Returns:
         True if OpenSSL is in FIPS mode, False otherwise
     """
     try:
-        result = subprocess.run(
-            ['openssl', 'version', '-f'],
-            capture_output=True,
-            text=True,
-            check=False
-        )
-        return 'FIPS' in result.stdout
-    except Exception:
+        from cryptography.hazmat.backends.openssl.backend import backend
+    except ImportError:
         return False
+    return bool(getattr(backend, '_fips_enabled', False))
 
 
 def _is_fips_required() -> bool:
@@ -54,6 +60,9 @@ def get_adapter() -> CryptoAdapter:
     """
     Get or create the crypto adapter based on environment settings.
     
+    The software backend defers decrypting the private key until the first
+    signature, so callers that only verify never prompt for a passphrase.
+    
     Returns:
         A configured CryptoAdapter instance
     
@@ -64,32 +73,64 @@ def get_adapter() -> CryptoAdapter:
     global _adapter
     if _adapter is not None:
         return _adapter
+    with _adapter_lock:
+        if _adapter is None:
+            _adapter = _create_adapter()
+    return _adapter
+
+
+def _create_adapter(backend: Optional[str] = None) -> CryptoAdapter:
+    """
+    Create the adapter for a backend.
     
+    Args:
+        backend: Backend name (default: DAO_CRYPTO_BACKEND, else software)
+    """
     # Check FIPS requirements
-    fips_required = _is_fips_required()
-    fips_available = _check_fips_mode()
-    
-    if fips_required and not fips_available:
+    if _is_fips_required() and not _check_fips_mode():
         raise RuntimeError(
             "FIPS mode is required (DAO_FIPS_ONLY=1) but OpenSSL is not in FIPS mode. "
             "See FIPS.md for instructions on enabling FIPS mode."
         )
     
     # Determine which backend to use
-    backend = os.environ.get(DAO_CRYPTO_BACKEND, BACKEND_SOFTWARE).lower()
+    if backend is None:
+        backend = os.environ.get(DAO_CRYPTO_BACKEND, BACKEND_SOFTWARE)
+    backend = backend.lower()
     
     if backend == BACKEND_SOFTWARE:
         from .adapter_pycacrypto import PycaCryptoAdapter
-        _adapter = PycaCryptoAdapter()
+        adapter = PycaCryptoAdapter()
         print("Using software crypto backend (pyca/cryptography)")
     elif backend == BACKEND_PKCS11:
         from .adapter_pkcs11 import Pkcs11Adapter
-        _adapter = Pkcs11Adapter()
-        print(f"Using hardware crypto backend (PKCS#11) with mechanism {_adapter._mechanism.name}")
+        adapter = Pkcs11Adapter()
+        print(f"Using hardware crypto backend (PKCS#11) with mechanism {adapter._mechanism.name}")
+    elif backend == BACKEND_AGENT:
+        from .adapter_agent import AgentCryptoAdapter
+        adapter = AgentCryptoAdapter()
+        print(f"Using key agent at {adapter.socket_path}")
     else:
-        raise ValueError(f"Unknown backend: {backend}. Choose '{BACKEND_SOFTWARE}' or '{BACKEND_PKCS11}'")
+        raise ValueError(
+            f"Unknown backend: {backend}. Choose '{BACKEND_SOFTWARE}', '{BACKEND_PKCS11}' or '{BACKEND_AGENT}'"
+        )
     
-    return _adapter
+    return adapter
+
+
+async def get_adapter_async() -> CryptoAdapter:
+    """
+    Get or create the crypto adapter without blocking the event loop.
+    
+    Backend setup (opening a PKCS#11 token, reading key files) runs in the
+    default executor.
+    
+    Returns:
+        A configured CryptoAdapter instance
+    """
+    if _adapter is not None:
+        return _adapter
+    return await asyncio.get_running_loop().run_in_executor(None, get_adapter)
 
 
-__all__ = ['get_adapter']
\ No newline at end of file
+__all__ = ['get_adapter', 'get_adapter_async', 'AsyncCryptoAdapter', 'Canonical', 'canonical_bytes', 'jcs_bytes', 'PublicKeyCache', 'VerificationCache', 'HolderKeyIndex', 'verify_threshold', 'RevocationIndex']
\ No newline at end of file
@@ -0,0 +1,249 @@
+"""
+CryptoAdapter that forwards every operation to a running key agent.
+
+See agent.py for the protocol.  One connection is shared by all threads of
+the client process; requests are tagged with ids and may be answered out of
+order, so concurrent callers and batch calls keep many requests in flight on
+the same socket.
+"""
+
+import base64
+import itertools
+import json
+import socket
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Any, Dict, List, Optional, Sequence
+
+from .adapter_base import B64, CryptoAdapter, VerifyItem
+from .agent import OP_PUBLIC_KEY, OP_SIGN, OP_VERIFY, AgentError, agent_socket_path, encode_line
+from .canonical import Payload, as_canonical, hash_message
+from .constants import AGENT_TIMEOUT
+
+
+class _Connection:
+    """One socket to the agent and the requests waiting for an answer on it."""
+
+    def __init__(self, path: str):
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            self._sock.connect(path)
+        except OSError as e:
+            self._sock.close()
+            raise AgentError(
+                f"No key agent at {path} ({e.strerror or e}). Start one with 'python -m dao_cli.crypto.agent'"
+            ) from None
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, Future] = {}
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self.closed = False
+        threading.Thread(target=self._read, name="dao-agent-client", daemon=True).start()
+
+    def send(self, requests: Sequence[Dict[str, Any]]) -> List[Future]:
+        """Write requests in one go and return a future per request."""
+        futures = []
+        lines = []
+        with self._lock:
+            if self.closed:
+                raise AgentError("Connection to the key agent was lost")
+            for request in requests:
+                request_id = next(self._ids)
+                future: Future = Future()
+                self._pending[request_id] = future
+                futures.append(future)
+                lines.append(encode_line({"id": request_id, **request}))
+        # Writing under a separate lock lets the reader keep draining answers meanwhile
+        try:
+            with self._write_lock:
+                self._sock.sendall(b"".join(lines))
+        except OSError as e:
+            with self._lock:
+                self._fail(f"Connection to the key agent was lost: {e}")
+            raise AgentError(f"Connection to the key agent was lost: {e}") from None
+        return futures
+
+    def _read(self) -> None:
+        """Route responses to their futures until the agent hangs up."""
+        reason = "Key agent closed the connection"
+        try:
+            for line in self._sock.makefile("rb"):
+                response = json.loads(line)
+                with self._lock:
+                    future = self._pending.pop(response.get("id"), None)
+                if future is None:
+                    continue
+                if "error" in response:
+                    future.set_exception(AgentError(response["error"]))
+                else:
+                    future.set_result(response.get("result"))
+        except (OSError, ValueError) as e:
+            reason = f"Connection to the key agent was lost: {e}"
+        with self._lock:
+            self._fail(reason)
+
+    def _fail(self, reason: str) -> None:
+        """Mark the connection dead and fail everything in flight. Caller holds the lock."""
+        self.closed = True
+        for future in self._pending.values():
+            future.set_exception(AgentError(reason))
+        self._pending.clear()
+        self._sock.close()
+
+    def close(self) -> None:
+        with self._lock:
+            if not self.closed:
+                self._sock.shutdown(socket.SHUT_RDWR)
+
+
+class AgentCryptoAdapter(CryptoAdapter):
+    """
+    Client side of the key agent.
+
+    The connection is opened (and the public key fetched) when the adapter
+    is created, so a missing agent is reported immediately.  A lost
+    connection fails the requests in flight and is re-established on the
+    next call.
+    """
+
+    def __init__(self, socket_path: Optional[str] = None, timeout: float = AGENT_TIMEOUT):
+        """
+        Connect to the agent.
+
+        Args:
+            socket_path: Agent socket (default: DAO_AGENT_SOCKET or DEFAULT_AGENT_SOCKET)
+            timeout: Seconds to wait for any single answer
+
+        Raises:
+            AgentError: If no agent is listening on the socket
+        """
+        self.socket_path = agent_socket_path(socket_path)
+        self.timeout = timeout
+        self._conn: Optional[_Connection] = None
+        self._conn_lock = threading.Lock()
+        self._pub_b64: B64 = self._call([{"op": OP_PUBLIC_KEY}])[0]
+
+    def close(self) -> None:
+        """Close the connection to the agent."""
+        with self._conn_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _connection(self) -> _Connection:
+        with self._conn_lock:
+            if self._conn is None or self._conn.closed:
+                self._conn = _Connection(self.socket_path)
+            return self._conn
+
+    def _call(self, requests: Sequence[Dict[str, Any]]) -> List[Any]:
+        """
+        Send requests and wait for all of their results.
+
+        Raises:
+            AgentError: If the agent is unreachable, rejects a request or does not answer in time
+        """
+        if not requests:
+            return []
+        futures = self._connection().send(requests)
+        try:
+            return [future.result(timeout=self.timeout) for future in futures]
+        except FutureTimeoutError:
+            raise AgentError(f"Key agent did not answer within {self.timeout}s") from None
+
+    @staticmethod
+    def _sign_request(message: bytes) -> Dict[str, Any]:
+        return {"op": OP_SIGN, "message": base64.b64encode(message).decode()}
+
+    @staticmethod
+    def _verify_request(message: bytes, signature: B64, pubkey: B64) -> Dict[str, Any]:
+        return {"op": OP_VERIFY, "message": base64.b64encode(message).decode(),
+                "signature": signature, "pubkey": pubkey}
+
+    def sign(self, payload: Payload) -> B64:
+        """
+        Sign a JSON payload with the agent's key.
+
+        Args:
+            payload: The dictionary to sign
+
+        Returns:
+            Base64-encoded signature
+        """
+        return self._call([self._sign_request(as_canonical(payload).bytes)])[0]
+
+    def verify(self, payload: Payload, signature: B64, pubkey: B64) -> bool:
+        """
+        Verify a signature using the agent's backend.
+
+        Args:
+            payload: The dictionary that was signed
+            signature: Base64-encoded signature
+            pubkey: Base64-encoded public key
+
+        Returns:
+            True if signature is valid, False otherwise
+        """
+        return bool(self._call([self._verify_request(as_canonical(payload).bytes, signature, pubkey)])[0])
+
+    def sign_many(self, payloads: Sequence[Payload]) -> List[B64]:
+        """
+        Sign several payloads, sent to the agent in a single write.
+
+        Args:
+            payloads: Dictionaries to sign
+
+        Returns:
+            Base64-encoded signatures, in the same order as ``payloads``
+        """
+        return self._call([self._sign_request(as_canonical(payload).bytes) for payload in payloads])
+
+    def verify_many(self, items: Sequence[VerifyItem]) -> List[bool]:
+        """
+        Verify several signatures, sent to the agent in a single write.
+
+        Args:
+            items: (payload, signature, pubkey) triples
+
+        Returns:
+            One result per item, True if that signature is valid
+        """
+        return [bool(valid) for valid in self._call([
+            self._verify_request(as_canonical(payload).bytes, signature, pubkey)
+            for payload, signature, pubkey in items
+        ])]
+
+    def sign_digest(self, digest: bytes) -> B64:
+        """
+        Sign a SHA-256 payload digest (hash-then-sign).
+
+        Args:
+            digest: 32-byte SHA-256 digest of the canonical payload
+
+        Returns:
+            Base64-encoded signature
+        """
+        return self._call([self._sign_request(hash_message(digest))])[0]
+
+    def verify_digest(self, digest: bytes, signature: B64, pubkey: B64) -> bool:
+        """
+        Verify a hash-then-sign signature.
+
+        Args:
+            digest: 32-byte SHA-256 digest of the canonical payload
+            signature: Base64-encoded signature
+            pubkey: Base64-encoded public key
+
+        Returns:
+            True if signature is valid, False otherwise
+        """
+        return bool(self._call([self._verify_request(hash_message(digest), signature, pubkey)])[0])
+
+    def public_key_b64(self) -> B64:
+        """
+        Get the agent's public key, fetched once at connection time.
+
+        Returns:
+            Base64-encoded public key
+        """
+        return self._pub_b64
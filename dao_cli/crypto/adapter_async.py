@@ -0,0 +1,132 @@
+"""
+Asyncio front end for a CryptoAdapter.
+
+Adapter calls are synchronous and a PKCS#11 signature can block for tens of
+milliseconds, which stalls every transport sharing the event loop.
+AsyncCryptoAdapter runs them on a small dedicated thread pool instead.
+
+At most ``max_pending`` operations are admitted at a time; further callers
+wait in the event loop until a slot frees up, so a fast producer cannot
+queue an unbounded amount of signing work behind a slow token.
+"""
+
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Iterable, List, Optional, Sequence, TypeVar
+
+from .adapter_base import B64, CryptoAdapter, VerifyItem
+from .canonical import Payload
+from .constants import ASYNC_CRYPTO_MAX_PENDING, ASYNC_CRYPTO_WORKERS
+
+T = TypeVar("T")
+
+
+class AsyncCryptoAdapter:
+    """
+    Coroutine wrapper around a CryptoAdapter with bounded concurrency.
+
+    Can be used as an async context manager, which shuts the executor down
+    on exit.
+    """
+
+    def __init__(self, adapter: CryptoAdapter, max_workers: int = ASYNC_CRYPTO_WORKERS,
+                 max_pending: int = ASYNC_CRYPTO_MAX_PENDING):
+        """
+        Initialize the wrapper.
+
+        Args:
+            adapter: The synchronous adapter doing the work
+            max_workers: Threads running adapter calls
+            max_pending: Operations admitted (running or queued) before callers wait
+        """
+        if max_pending < 1:
+            raise ValueError("max_pending must be at least 1")
+        self.adapter = adapter
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="dao-async-crypto")
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._slots_loop: Optional[asyncio.AbstractEventLoop] = None
+        self.pending = 0
+
+    async def __aenter__(self) -> "AsyncCryptoAdapter":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Shut down the executor once queued operations finish."""
+        self._executor.shutdown(wait=False)
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        # Semaphores belong to one event loop; make a fresh one if the loop changed
+        loop = asyncio.get_running_loop()
+        if self._slots is None or self._slots_loop is not loop:
+            self._slots = asyncio.Semaphore(self.max_pending)
+            self._slots_loop = loop
+        return self._slots
+
+    async def _run(self, fn: Callable[..., T], *args) -> T:
+        """Run ``fn(*args)`` on the executor once a slot is free."""
+        async with self._semaphore():
+            self.pending += 1
+            try:
+                return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+            finally:
+                self.pending -= 1
+
+    async def sign(self, payload: Payload) -> B64:
+        """Sign a payload; see CryptoAdapter.sign."""
+        return await self._run(self.adapter.sign, payload)
+
+    async def verify(self, payload: Payload, signature: B64, pubkey: B64) -> bool:
+        """Verify a signature; see CryptoAdapter.verify."""
+        return await self._run(self.adapter.verify, payload, signature, pubkey)
+
+    async def sign_many(self, payloads: Sequence[Payload]) -> List[B64]:
+        """Sign a batch as one operation; see CryptoAdapter.sign_many."""
+        return await self._run(self.adapter.sign_many, payloads)
+
+    async def verify_many(self, items: Sequence[VerifyItem]) -> List[bool]:
+        """Verify a batch as one operation; see CryptoAdapter.verify_many."""
+        return await self._run(self.adapter.verify_many, items)
+
+    async def sign_digest(self, digest: bytes) -> B64:
+        """Sign a payload digest; see CryptoAdapter.sign_digest."""
+        return await self._run(self.adapter.sign_digest, digest)
+
+    async def verify_digest(self, digest: bytes, signature: B64, pubkey: B64) -> bool:
+        """Verify a digest signature; see CryptoAdapter.verify_digest."""
+        return await self._run(self.adapter.verify_digest, digest, signature, pubkey)
+
+    async def public_key_b64(self) -> B64:
+        """Return the adapter's public key (a token round trip on first use for PKCS#11)."""
+        return await self._run(self.adapter.public_key_b64)
+
+    async def sign_iter(self, payloads: Iterable[Payload], window: Optional[int] = None) -> AsyncIterator[B64]:
+        """
+        Sign payloads with up to ``window`` signatures in flight, yielding them in order.
+
+        The consumer can transmit each signature while later ones are still
+        being computed.
+
+        Args:
+            payloads: Payloads to sign, consumed lazily
+            window: Signatures computed ahead of the consumer (default: max_pending)
+
+        Yields:
+            B64: Signatures, in the same order as ``payloads``
+        """
+        window = window or self.max_pending
+        in_flight: "deque[asyncio.Task]" = deque()
+        try:
+            for payload in payloads:
+                in_flight.append(asyncio.ensure_future(self.sign(payload)))
+                if len(in_flight) >= window:
+                    yield await in_flight.popleft()
+            while in_flight:
+                yield await in_flight.popleft()
+        finally:
+            for task in in_flight:
+                task.cancel()
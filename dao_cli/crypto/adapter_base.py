@@ -3,11 +3,16 @@ Abstract base class for cryptographic adapters.
 """
 
 from abc import ABC, abstractmethod
-from typing import Dict, Any, TypeAlias
+from typing import List, Sequence, Tuple, TypeAlias
+
+from .canonical import Payload
 
 # Type alias for base64-encoded strings
 B64: TypeAlias = str
 
+# A (payload, signature, public key) triple to verify
+VerifyItem: TypeAlias = Tuple[Payload, B64, B64]
+
 
 class CryptoAdapter(ABC):
     """
@@ -17,12 +22,13 @@ class CryptoAdapter(ABC):
     """
 
     @abstractmethod
-    def sign(self, payload: Dict[str, Any]) -> B64:
+    def sign(self, payload: Payload) -> B64:
         """
         Sign a JSON payload and return the base64-encoded signature.
 
         Args:
-            payload: A dictionary that will be canonicalized before signing
+            payload: A dictionary that will be canonicalized before signing,
+                or a Canonical whose encoding is reused
 
         Returns:
             Base64-encoded signature
@@ -30,12 +36,12 @@ class CryptoAdapter(ABC):
         pass
 
     @abstractmethod
-    def verify(self, payload: Dict[str, Any], signature: B64, pubkey: B64) -> bool:
+    def verify(self, payload: Payload, signature: B64, pubkey: B64) -> bool:
         """
         Verify a signature against a JSON payload using a public key.
 
         Args:
-            payload: The dictionary that was signed
+            payload: The dictionary (or Canonical) that was signed
             signature: Base64-encoded signature
             pubkey: Base64-encoded public key
 
@@ -52,4 +58,66 @@ class CryptoAdapter(ABC):
         Returns:
             Base64-encoded public key
         """
-        pass
\ No newline at end of file
+        pass
+
+    def sign_many(self, payloads: Sequence[Payload]) -> List[B64]:
+        """
+        Sign several JSON payloads.
+
+        The default implementation signs one payload at a time; backends
+        override it to amortize per-call setup across the batch.
+
+        Args:
+            payloads: Dictionaries to sign
+
+        Returns:
+            Base64-encoded signatures, in the same order as ``payloads``
+        """
+        return [self.sign(payload) for payload in payloads]
+
+    def verify_many(self, items: Sequence[VerifyItem]) -> List[bool]:
+        """
+        Verify several signatures.
+
+        The default implementation verifies one item at a time; backends
+        override it to amortize per-call setup across the batch.
+
+        Args:
+            items: (payload, signature, pubkey) triples
+
+        Returns:
+            One result per item, True if that signature is valid
+        """
+        return [self.verify(payload, signature, pubkey) for payload, signature, pubkey in items]
+
+    @abstractmethod
+    def sign_digest(self, digest: bytes) -> B64:
+        """
+        Sign a SHA-256 digest of a canonical payload (hash-then-sign).
+
+        The signed message is canonical.HASH_SIGN_PREFIX followed by the
+        digest, so large payloads are hashed once and never passed to the
+        signing backend.
+
+        Args:
+            digest: 32-byte SHA-256 digest, e.g. Canonical.digest
+
+        Returns:
+            Base64-encoded signature
+        """
+        pass
+
+    @abstractmethod
+    def verify_digest(self, digest: bytes, signature: B64, pubkey: B64) -> bool:
+        """
+        Verify a hash-then-sign signature produced by sign_digest().
+
+        Args:
+            digest: 32-byte SHA-256 digest of the canonical payload
+            signature: Base64-encoded signature
+            pubkey: Base64-encoded public key
+
+        Returns:
+            True if the signature is valid, False otherwise
+        """
+        pass
@@ -2,18 +2,21 @@
 Implementation of CryptoAdapter using python-pkcs11 for hardware key storage.
 """
 import os
-import json
 import base64
 import pkcs11
-from pkcs11 import ObjectClass, KeyType, Mechanism
+from pkcs11 import Attribute, ObjectClass, KeyType, Mechanism
 from pkcs11.util.ec import encode_named_curve_parameters
-from typing import Dict, Any, Optional, cast
-from .adapter_base import CryptoAdapter, B64
+from typing import Dict, Any, List, Optional, Sequence, cast
+from .adapter_base import CryptoAdapter, B64, VerifyItem
+from .canonical import Payload, as_canonical, hash_message
+from .pkcs11_pool import SESSION_LOST_ERRORS, Pkcs11SessionPool, PooledSession
 from .constants import (
     PKCS11_TOKEN_LABEL, 
     PKCS11_KEY_LABEL, 
     PKCS11_PIN, 
     PKCS11_LIB_PATH,
+    PKCS11_POOL_SIZE,
+    DEFAULT_PKCS11_POOL_SIZE,
     ALG_ED25519,
     ALG_ECDSA
 )
@@ -26,14 +29,17 @@ class Pkcs11Adapter(CryptoAdapter):
     This adapter handles Ed25519 or ECDSA (secp256r1) signatures using 
     hardware security modules via the PKCS#11 interface.
     
-    Private keys never leave the hardware device.
+    Private keys never leave the hardware device. Operations run on a pool
+    of logged-in sessions (see pkcs11_pool.py) instead of opening a session
+    per call.
     """
     
     def __init__(self, 
                 token_label: Optional[str] = None, 
                 key_label: Optional[str] = None,
                 pin: Optional[str] = None,
-                lib_path: Optional[str] = None):
+                lib_path: Optional[str] = None,
+                pool_size: Optional[int] = None):
         """
         Initialize with optional PKCS#11 parameters.
         
@@ -42,6 +48,7 @@ class Pkcs11Adapter(CryptoAdapter):
             key_label: Label of the key to use for signing
             pin: PIN to access the token
             lib_path: Path to the PKCS#11 library
+            pool_size: Maximum number of pooled sessions
         """
         # Get parameters from args or environment variables
         self._token_label = token_label or os.environ.get(PKCS11_TOKEN_LABEL)
@@ -68,15 +75,15 @@ class Pkcs11Adapter(CryptoAdapter):
             try:
                 # Find the private key first
                 priv_key = next(session.get_objects({
-                    ObjectClass.PRIVATE_KEY, 
-                    'label': self._key_label
+                    Attribute.CLASS: ObjectClass.PRIVATE_KEY,
+                    Attribute.LABEL: self._key_label
                 }))
                 
                 # Check key type to determine mechanism
-                if priv_key[KeyType.EC]:
+                if priv_key.key_type == KeyType.EC:
                     self._mechanism = Mechanism.ECDSA
                     self._alg = ALG_ECDSA
-                elif hasattr(Mechanism, 'EDDSA') and priv_key[KeyType.EC_EDWARDS]:
+                elif hasattr(Mechanism, 'EDDSA') and priv_key.key_type == KeyType.EC_EDWARDS:
                     self._mechanism = Mechanism.EDDSA
                     self._alg = ALG_ED25519
                 else:
@@ -84,14 +91,24 @@ class Pkcs11Adapter(CryptoAdapter):
                 
                 # Get the public key for verification and export
                 self._pub_key = next(session.get_objects({
-                    ObjectClass.PUBLIC_KEY,
-                    'label': self._key_label
+                    Attribute.CLASS: ObjectClass.PUBLIC_KEY,
+                    Attribute.LABEL: self._key_label
                 }))
                 
             except StopIteration:
                 # No existing key pair, need to generate one
                 self._generate_keypair(session)
         
+        self._pool = Pkcs11SessionPool(
+            self._token, self._pin, self._key_label,
+            size=pool_size or int(os.environ.get(PKCS11_POOL_SIZE, DEFAULT_PKCS11_POOL_SIZE))
+        )
+        self._pub_b64: Optional[B64] = None
+    
+    def close(self) -> None:
+        """Close the pooled sessions."""
+        self._pool.close()
+        
     def _generate_keypair(self, session):
         """
         Generate a new key pair on the token.
@@ -156,7 +173,7 @@ class Pkcs11Adapter(CryptoAdapter):
             self._pub_key = public
             print(f"Generated new ECDSA (secp256r1) key pair on token {self._token_label}")
     
-    def sign(self, payload: Dict[str, Any]) -> B64:
+    def sign(self, payload: Payload) -> B64:
         """
         Sign a JSON payload using the hardware-stored key.
         
@@ -167,22 +184,36 @@ class Pkcs11Adapter(CryptoAdapter):
             Base64-encoded signature
         """
         # Canonicalize the JSON payload
-        message = json.dumps(payload, separators=(',', ':'), sort_keys=True).encode()
+        message = as_canonical(payload).bytes
         
-        with self._token.open(user_pin=self._pin) as session:
-            # Get the private key
-            priv_key = next(session.get_objects({
-                ObjectClass.PRIVATE_KEY,
-                'label': self._key_label
-            }))
-            
-            # Sign the message with the appropriate mechanism
-            signature = priv_key.sign(message, mechanism=self._mechanism)
-            
-            # Return base64 encoded signature
-            return base64.b64encode(signature).decode()
+        def sign_with(pooled: PooledSession) -> bytes:
+            # Sign the message with the cached private key handle
+            return pooled.key(ObjectClass.PRIVATE_KEY).sign(message, mechanism=self._mechanism)
+        
+        # Return base64 encoded signature
+        return base64.b64encode(self._pool.run(sign_with)).decode()
+    
+    def sign_many(self, payloads: Sequence[Payload]) -> List[B64]:
+        """
+        Sign several JSON payloads on a single pooled session.
+
+        Args:
+            payloads: Dictionaries to sign
+
+        Returns:
+            Base64-encoded signatures, in the same order as ``payloads``
+        """
+        if not payloads:
+            return []
+        messages = [as_canonical(p).bytes for p in payloads]
+        
+        def sign_all(pooled: PooledSession) -> List[bytes]:
+            priv_key = pooled.key(ObjectClass.PRIVATE_KEY)
+            return [priv_key.sign(message, mechanism=self._mechanism) for message in messages]
+        
+        return [base64.b64encode(sig).decode() for sig in self._pool.run(sign_all)]
     
-    def verify(self, payload: Dict[str, Any], signature: B64, pubkey: B64) -> bool:
+    def verify(self, payload: Payload, signature: B64, pubkey: B64) -> bool:
         """
         Verify a signature using a public key.
         
@@ -198,22 +229,86 @@ class Pkcs11Adapter(CryptoAdapter):
             # For verification, we use the local token's public key to verify
             # This is more efficient than extracting the public key from the provided pubkey
             # Canonicalize the JSON payload
-            message = json.dumps(payload, separators=(',', ':'), sort_keys=True).encode()
+            message = as_canonical(payload).bytes
             
             # Decode the signature from base64
             sig_bytes = base64.b64decode(signature)
             
-            with self._token.open(user_pin=self._pin) as session:
-                # Get the public key
-                pub_key = next(session.get_objects({
-                    ObjectClass.PUBLIC_KEY,
-                    'label': self._key_label
-                }))
-                
-                # Verify the signature with the appropriate mechanism
-                pub_key.verify(message, sig_bytes, mechanism=self._mechanism)
-                
-                return True
+            def verify_with(pooled: PooledSession) -> bool:
+                # Verify the signature with the cached public key handle
+                return pooled.key(ObjectClass.PUBLIC_KEY).verify(message, sig_bytes, mechanism=self._mechanism)
+            
+            return bool(self._pool.run(verify_with))
+        except Exception as e:
+            print(f"Verification failed: {e}")
+            return False
+    
+    def verify_many(self, items: Sequence[VerifyItem]) -> List[bool]:
+        """
+        Verify several signatures on a single pooled session.
+
+        Like verify(), this checks against the token's own public key.
+
+        Args:
+            items: (payload, signature, pubkey) triples
+
+        Returns:
+            One result per item, True if that signature is valid
+        """
+        if not items:
+            return []
+        messages = [as_canonical(p).bytes for p, _, _ in items]
+        
+        def verify_all(pooled: PooledSession) -> List[bool]:
+            pub_key = pooled.key(ObjectClass.PUBLIC_KEY)
+            results = []
+            for message, (_, signature, _) in zip(messages, items):
+                try:
+                    results.append(bool(pub_key.verify(message, base64.b64decode(signature), mechanism=self._mechanism)))
+                except SESSION_LOST_ERRORS:
+                    raise
+                except Exception:
+                    results.append(False)
+            return results
+        
+        try:
+            return self._pool.run(verify_all)
+        except Exception as e:
+            print(f"Verification failed: {e}")
+            return [False] * len(items)
+    
+    def sign_digest(self, digest: bytes) -> B64:
+        """
+        Sign a SHA-256 payload digest (hash-then-sign) on the token.
+        
+        Args:
+            digest: 32-byte SHA-256 digest of the canonical payload
+            
+        Returns:
+            Base64-encoded signature
+        """
+        message = hash_message(digest)
+        signature = self._pool.run(
+            lambda pooled: pooled.key(ObjectClass.PRIVATE_KEY).sign(message, mechanism=self._mechanism))
+        return base64.b64encode(signature).decode()
+    
+    def verify_digest(self, digest: bytes, signature: B64, pubkey: B64) -> bool:
+        """
+        Verify a hash-then-sign signature against the token's public key.
+        
+        Args:
+            digest: 32-byte SHA-256 digest of the canonical payload
+            signature: Base64-encoded signature
+            pubkey: Base64-encoded public key
+            
+        Returns:
+            True if signature is valid, False otherwise
+        """
+        try:
+            message = hash_message(digest)
+            sig_bytes = base64.b64decode(signature)
+            return bool(self._pool.run(
+                lambda pooled: pooled.key(ObjectClass.PUBLIC_KEY).verify(message, sig_bytes, mechanism=self._mechanism)))
         except Exception as e:
             print(f"Verification failed: {e}")
             return False
@@ -225,14 +320,8 @@ class Pkcs11Adapter(CryptoAdapter):
         Returns:
             Base64-encoded public key
         """
-        with self._token.open(user_pin=self._pin) as session:
-            # Get the public key
-            pub_key = next(session.get_objects({
-                ObjectClass.PUBLIC_KEY,
-                'label': self._key_label
-            }))
-            
-            # Export the public key in DER format
-            pub_data = pub_key[pkcs11.KeyAttribute.VALUE]
-            
-            return base64.b64encode(pub_data).decode()
\ No newline at end of file
+        if self._pub_b64 is None:
+            # Export the public key point (DER-encoded) once; it never changes
+            pub_data = self._pool.run(lambda pooled: pooled.key(ObjectClass.PUBLIC_KEY)[Attribute.EC_POINT])
+            self._pub_b64 = base64.b64encode(pub_data).decode()
+        return self._pub_b64
@@ -10,13 +10,35 @@ from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives.kdf.scrypt import Scrypt
 import os
 import base64
-import json
+import hashlib
 import pathlib
 import getpass
-from typing import Dict, Any, Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence
 
-from .adapter_base import CryptoAdapter, B64
-from .constants import DEFAULT_ED25519_PRIV_PEM, DEFAULT_ED25519_PUB_PEM
+from .adapter_base import CryptoAdapter, B64, VerifyItem
+from .canonical import Payload, as_canonical, hash_message
+from .key_cache import PublicKeyCache
+from .unlock_cache import KeyringUnlockCache
+from .constants import (
+    DAO_KEY_PASSPHRASE,
+    DEFAULT_ED25519_PRIV_PEM,
+    BATCH_WORKERS,
+    BATCH_MIN_PARALLEL,
+)
+
+
+def _raw_public_bytes(public_key: Ed25519PublicKey) -> bytes:
+    return public_key.public_bytes(
+        encoding=serialization.Encoding.Raw,
+        format=serialization.PublicFormat.Raw
+    )
+
+
+def _load_public_key(pubkey: B64) -> Ed25519PublicKey:
+    """Parse a base64-encoded raw Ed25519 public key."""
+    return Ed25519PublicKey.from_public_bytes(base64.b64decode(pubkey))
 
 
 class PycaCryptoAdapter(CryptoAdapter):
@@ -28,77 +50,184 @@ class PycaCryptoAdapter(CryptoAdapter):
     
     Keys are stored in PEM format, with private keys encrypted using
     scrypt and AES-256-GCM via Fernet.
+    
+    An existing private key is only decrypted on first use by a signing
+    method (or an explicit unlock()); verification and public_key_b64()
+    work from the public key file alone. The passphrase comes from
+    DAO_KEY_PASSPHRASE when set, otherwise from a prompt, and the unlocked
+    key is cached in the kernel keyring (see unlock_cache.py).
     """
     
-    def __init__(self, key_path: Optional[str] = None):
+    def __init__(self, key_path: Optional[str] = None, unlock_cache: Optional[KeyringUnlockCache] = None):
         """
         Initialize with an optional key path.
         
         Args:
             key_path: Path to the private key file. If None, defaults to ~/.dao_keys/ed25519/priv.pem
+            unlock_cache: Cache for the unlocked key (default: the user-session keyring)
         """
         if key_path is None:
             key_path = DEFAULT_ED25519_PRIV_PEM
             
-        key_path = pathlib.Path(os.path.expanduser(key_path))
-        self._load_or_create(key_path)
+        self._key_path: Optional[pathlib.Path] = pathlib.Path(os.path.expanduser(key_path))
+        self._unlock_cache = unlock_cache if unlock_cache is not None else KeyringUnlockCache()
+        self._unlock_lock = threading.Lock()
+        self._priv: Optional[Ed25519PrivateKey] = None
+        self._pub: Optional[Ed25519PublicKey] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.key_cache = PublicKeyCache(_load_public_key)
+        
+        pub_path = self._key_path.with_name("pub.pem")
+        if not self._key_path.exists():
+            self._create(self._key_path, pub_path)
+        elif pub_path.exists():
+            self._set_public_key(serialization.load_pem_public_key(pub_path.read_bytes()))
+        else:
+            # No public key file to work from, so the key has to be unlocked now
+            self.unlock()
     
-    def _load_or_create(self, key_path: pathlib.Path) -> None:
+    @classmethod
+    def from_private_key(cls, private_key: Ed25519PrivateKey) -> "PycaCryptoAdapter":
         """
-        Load an existing key or create a new one if it doesn't exist.
+        Create an adapter around an already loaded private key.
         
         Args:
-            key_path: Path to the key file
+            private_key: The Ed25519 private key to sign with
+            
+        Returns:
+            An adapter that never touches the key store
         """
-        if key_path.exists():
-            # Load existing key
-            password = getpass.getpass("Key passphrase: ").encode()
+        adapter = cls.__new__(cls)
+        adapter._key_path = None
+        adapter._unlock_cache = KeyringUnlockCache(ttl=0)
+        adapter._unlock_lock = threading.Lock()
+        adapter._executor = None
+        adapter.key_cache = PublicKeyCache(_load_public_key)
+        adapter._priv = private_key
+        adapter._set_public_key(private_key.public_key())
+        return adapter
+    
+    @property
+    def unlocked(self) -> bool:
+        """Whether the private key has been decrypted."""
+        return self._priv is not None
+    
+    def _cache_name(self) -> str:
+        """Keyring description for this key store."""
+        digest = hashlib.sha256(str(self._key_path.resolve()).encode()).hexdigest()[:16]
+        return f"dao-ed25519:{digest}"
+    
+    def unlock(self) -> None:
+        """
+        Decrypt the private key if that has not happened yet.
+        
+        The key is taken from the unlock cache when possible; otherwise the
+        PEM file is decrypted and the result cached.
+        
+        Raises:
+            ValueError: If the key cannot be decrypted or does not match the public key
+        """
+        with self._unlock_lock:
+            if self._priv is not None:
+                return
+            
+            cached = self._unlock_cache.get(self._cache_name())
+            if cached is not None:
+                try:
+                    priv = Ed25519PrivateKey.from_private_bytes(cached)
+                except ValueError:
+                    priv = None
+                if priv is not None and self._matches_public_key(priv):
+                    self._priv = priv
+                    return
+                self._unlock_cache.clear(self._cache_name())
+            
+            password = os.environ.get(DAO_KEY_PASSPHRASE)
+            if password is None:
+                password = getpass.getpass("Key passphrase: ")
             
             try:
-                self._priv = serialization.load_pem_private_key(
-                    key_path.read_bytes(),
-                    password
+                priv = serialization.load_pem_private_key(
+                    self._key_path.read_bytes(),
+                    password.encode()
                 )
             except Exception as e:
                 raise ValueError(f"Failed to load private key: {e}")
-        else:
-            # Create new key
-            key_path.parent.mkdir(parents=True, exist_ok=True)
-            self._priv = Ed25519PrivateKey.generate()
-            
-            # Get passphrase for encryption
-            while True:
-                password = getpass.getpass("New key passphrase: ").encode()
-                confirm = getpass.getpass("Confirm passphrase: ").encode()
-                if password == confirm:
-                    break
-                print("Passphrases don't match. Try again.")
-            
-            # Save private key in encrypted PEM format
-            encrypted_pem = self._priv.private_bytes(
-                encoding=serialization.Encoding.PEM,
-                format=serialization.PrivateFormat.PKCS8,
-                encryption_algorithm=serialization.BestAvailableEncryption(password)
-            )
-            
-            key_path.write_bytes(encrypted_pem)
             
-            # Also save public key for convenience
-            pub_path = pathlib.Path(os.path.expanduser(DEFAULT_ED25519_PUB_PEM))
-            pub_path.parent.mkdir(parents=True, exist_ok=True)
-            
-            pub_pem = self._priv.public_key().public_bytes(
-                encoding=serialization.Encoding.PEM,
-                format=serialization.PublicFormat.SubjectPublicKeyInfo
-            )
-            
-            pub_path.write_bytes(pub_pem)
-            print(f"Key pair generated. Public key saved to {pub_path}")
-            
-        # Extract public key from private key
-        self._pub = self._priv.public_key()
+            if not self._matches_public_key(priv):
+                raise ValueError(f"Private key {self._key_path} does not match its public key file")
+            self._priv = priv
+            self._cache_unlocked()
+    
+    def _cache_unlocked(self) -> None:
+        """Park the unlocked private key in the unlock cache."""
+        self._unlock_cache.put(self._cache_name(), self._priv.private_bytes(
+            encoding=serialization.Encoding.Raw,
+            format=serialization.PrivateFormat.Raw,
+            encryption_algorithm=serialization.NoEncryption()
+        ))
+    
+    def _matches_public_key(self, priv: Ed25519PrivateKey) -> bool:
+        """Check a decrypted key against the public key, adopting it if none is loaded yet."""
+        if self._pub is None:
+            self._set_public_key(priv.public_key())
+            return True
+        return _raw_public_bytes(priv.public_key()) == _raw_public_bytes(self._pub)
+    
+    def _private_key(self) -> Ed25519PrivateKey:
+        """Return the private key, unlocking it on first use."""
+        if self._priv is None:
+            self.unlock()
+        return self._priv
+    
+    def _create(self, key_path: pathlib.Path, pub_path: pathlib.Path) -> None:
+        """
+        Create a new key pair and store it.
+        
+        Args:
+            key_path: Path for the encrypted private key
+            pub_path: Path for the public key
+        """
+        key_path.parent.mkdir(parents=True, exist_ok=True)
+        self._priv = Ed25519PrivateKey.generate()
+        
+        # Get passphrase for encryption
+        password = os.environ.get(DAO_KEY_PASSPHRASE, "").encode()
+        while not password:
+            password = getpass.getpass("New key passphrase: ").encode()
+            confirm = getpass.getpass("Confirm passphrase: ").encode()
+            if password == confirm:
+                break
+            print("Passphrases don't match. Try again.")
+            password = b""
+        
+        # Save private key in encrypted PEM format
+        encrypted_pem = self._priv.private_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PrivateFormat.PKCS8,
+            encryption_algorithm=serialization.BestAvailableEncryption(password)
+        )
+        
+        key_path.write_bytes(encrypted_pem)
+        
+        # Also save public key, which lets later runs verify without unlocking
+        pub_pem = self._priv.public_key().public_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PublicFormat.SubjectPublicKeyInfo
+        )
+        
+        pub_path.write_bytes(pub_pem)
+        print(f"Key pair generated. Public key saved to {pub_path}")
+        self._set_public_key(self._priv.public_key())
+        self._cache_unlocked()
     
-    def sign(self, payload: Dict[str, Any]) -> B64:
+    def _set_public_key(self, public_key: Ed25519PublicKey) -> None:
+        """Memoize the public key encoding and seed the key cache with it."""
+        self._pub = public_key
+        self._pub_b64 = base64.b64encode(_raw_public_bytes(public_key)).decode()
+        self.key_cache.put(self._pub_b64, self._pub)
+    
+    def sign(self, payload: Payload) -> B64:
         """
         Sign a JSON payload using Ed25519.
         
@@ -109,15 +238,15 @@ class PycaCryptoAdapter(CryptoAdapter):
             Base64-encoded signature
         """
         # Canonicalize the JSON payload
-        message = json.dumps(payload, separators=(',', ':'), sort_keys=True).encode()
+        message = as_canonical(payload).bytes
         
         # Sign the message
-        signature = self._priv.sign(message)
+        signature = self._private_key().sign(message)
         
         # Return base64 encoded signature
         return base64.b64encode(signature).decode()
     
-    def verify(self, payload: Dict[str, Any], signature: B64, pubkey: B64) -> bool:
+    def verify(self, payload: Payload, signature: B64, pubkey: B64) -> bool:
         """
         Verify a signature using Ed25519.
         
@@ -131,14 +260,13 @@ class PycaCryptoAdapter(CryptoAdapter):
         """
         try:
             # Canonicalize the JSON payload
-            message = json.dumps(payload, separators=(',', ':'), sort_keys=True).encode()
+            message = as_canonical(payload).bytes
             
-            # Decode the signature and public key from base64
+            # Decode the signature from base64
             sig_bytes = base64.b64decode(signature)
-            pub_bytes = base64.b64decode(pubkey)
             
-            # Create a public key object
-            public_key = Ed25519PublicKey.from_public_bytes(pub_bytes)
+            # Look up (or parse and cache) the public key object
+            public_key = self.key_cache.get(pubkey)
             
             # Verify the signature
             public_key.verify(sig_bytes, message)
@@ -147,6 +275,36 @@ class PycaCryptoAdapter(CryptoAdapter):
         except Exception:
             return False
     
+    def sign_digest(self, digest: bytes) -> B64:
+        """
+        Sign a SHA-256 payload digest (hash-then-sign).
+        
+        Args:
+            digest: 32-byte SHA-256 digest of the canonical payload
+            
+        Returns:
+            Base64-encoded signature
+        """
+        return base64.b64encode(self._private_key().sign(hash_message(digest))).decode()
+    
+    def verify_digest(self, digest: bytes, signature: B64, pubkey: B64) -> bool:
+        """
+        Verify a hash-then-sign signature.
+        
+        Args:
+            digest: 32-byte SHA-256 digest of the canonical payload
+            signature: Base64-encoded signature
+            pubkey: Base64-encoded public key
+            
+        Returns:
+            True if signature is valid, False otherwise
+        """
+        try:
+            self.key_cache.get(pubkey).verify(base64.b64decode(signature), hash_message(digest))
+            return True
+        except Exception:
+            return False
+    
     def public_key_b64(self) -> B64:
         """
         Get the base64-encoded public key in raw format.
@@ -154,9 +312,74 @@ class PycaCryptoAdapter(CryptoAdapter):
         Returns:
             Base64-encoded public key
         """
-        raw_pub = self._pub.public_bytes(
-            encoding=serialization.Encoding.Raw,
-            format=serialization.PublicFormat.Raw
-        )
+        return self._pub_b64
+    
+    def _map_batch(self, fn, items: Sequence) -> List:
+        """
+        Apply ``fn`` to every item, spreading large batches over a thread pool.
+        
+        The Ed25519 operations release the GIL, so slices of the batch run
+        in parallel. Small batches are processed inline.
+        """
+        if len(items) < BATCH_MIN_PARALLEL or BATCH_WORKERS <= 1:
+            return [fn(item) for item in items]
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=BATCH_WORKERS, thread_name_prefix="dao-crypto")
+        
+        # One task per worker keeps scheduling overhead independent of batch size
+        step = -(-len(items) // BATCH_WORKERS)
+        slices = [items[i:i + step] for i in range(0, len(items), step)]
+        results: List = []
+        for part in self._executor.map(lambda chunk: [fn(item) for item in chunk], slices):
+            results.extend(part)
+        return results
+    
+    def sign_many(self, payloads: Sequence[Payload]) -> List[B64]:
+        """
+        Sign several JSON payloads in parallel.
+        
+        Args:
+            payloads: Dictionaries to sign
+            
+        Returns:
+            Base64-encoded signatures, in the same order as ``payloads``
+        """
+        if payloads:
+            # Unlock (and prompt, if needed) on this thread rather than in a worker
+            self._private_key()
+        return self._map_batch(self.sign, payloads)
+    
+    def verify_many(self, items: Sequence[VerifyItem]) -> List[bool]:
+        """
+        Verify several signatures in parallel.
+        
+        Each distinct public key is looked up in the key cache once for the
+        whole batch rather than once per signature.
+        
+        Args:
+            items: (payload, signature, pubkey) triples
+            
+        Returns:
+            One result per item, True if that signature is valid
+        """
+        keys: Dict[B64, Optional[Ed25519PublicKey]] = {}
+        for _, _, pubkey in items:
+            if pubkey not in keys:
+                try:
+                    keys[pubkey] = self.key_cache.get(pubkey)
+                except Exception:
+                    keys[pubkey] = None
+        
+        def verify_one(item: VerifyItem) -> bool:
+            payload, signature, pubkey = item
+            public_key = keys[pubkey]
+            if public_key is None:
+                return False
+            try:
+                message = as_canonical(payload).bytes
+                public_key.verify(base64.b64decode(signature), message)
+                return True
+            except Exception:
+                return False
         
-        return base64.b64encode(raw_pub).decode()
\ No newline at end of file
+        return self._map_batch(verify_one, items)
@@ -0,0 +1,311 @@
+"""
+Local signing agent holding an unlocked key for many client processes.
+
+The agent unlocks the configured backend once and serves signatures over a
+Unix socket, much like ssh-agent.  Clients select it with
+DAO_CRYPTO_BACKEND=agent (see adapter_agent.py) and never see the private
+key or the passphrase.
+
+Protocol: one JSON object per line in each direction.  Requests carry an
+``id`` chosen by the client, which the matching response echoes; responses
+on one connection may arrive out of order.
+
+    {"id": 1, "op": "sign", "message": "<base64 message>"}
+    {"id": 2, "op": "verify", "message": "...", "signature": "...", "pubkey": "..."}
+    {"id": 3, "op": "public_key"}
+
+    {"id": 1, "result": "<base64 signature>"}
+    {"id": 2, "result": true}
+    {"id": 4, "error": "description"}
+
+Messages are the exact bytes to sign, i.e. the canonical encoding of a
+payload, or HASH_SIGN_PREFIX + digest for hash-then-sign.
+
+Requests from all connections share one queue.  A worker takes everything
+queued (up to ``batch_max``) and hands it to the backend as a single
+sign_many()/verify_many() call, so under load the per-call overhead of the
+backend is paid per batch rather than per signature, and an idle agent
+answers a lone request without waiting for a batch to fill.
+
+The socket is created with mode 0600 and connections from other users are
+rejected, which is the same trust boundary as the key file itself.
+
+Run it in the foreground with ``python -m dao_cli.crypto.agent``.
+"""
+
+import argparse
+import asyncio
+import base64
+import binascii
+import json
+import os
+import socket
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from .adapter_base import CryptoAdapter
+from .canonical import Canonical
+from .constants import (
+    AGENT_BATCH_MAX,
+    AGENT_MAX_LINE,
+    AGENT_WORKERS,
+    BACKEND_AGENT,
+    BACKEND_SOFTWARE,
+    DAO_AGENT_SOCKET,
+    DAO_CRYPTO_BACKEND,
+    DEFAULT_AGENT_SOCKET,
+)
+
+OP_SIGN = "sign"
+OP_VERIFY = "verify"
+OP_PUBLIC_KEY = "public_key"
+
+
+class AgentError(RuntimeError):
+    """Raised when the key agent cannot be reached or rejects a request."""
+    pass
+
+
+def agent_socket_path(path: Optional[str] = None) -> str:
+    """
+    Resolve the agent socket path.
+
+    Args:
+        path: Explicit path; defaults to DAO_AGENT_SOCKET or DEFAULT_AGENT_SOCKET
+
+    Returns:
+        The expanded socket path
+    """
+    return os.path.expanduser(path or os.environ.get(DAO_AGENT_SOCKET) or DEFAULT_AGENT_SOCKET)
+
+
+def encode_line(message: Dict[str, Any]) -> bytes:
+    """Encode one protocol message as a line."""
+    return json.dumps(message, separators=(',', ':')).encode() + b"\n"
+
+
+def _peer_uid(writer: asyncio.StreamWriter) -> Optional[int]:
+    """Return the uid of the connected process, where the platform reports it."""
+    sock = writer.get_extra_info("socket")
+    if sock is None or not hasattr(socket, "SO_PEERCRED"):
+        return None
+    creds = sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i"))
+    return struct.unpack("3i", creds)[1]
+
+
+# A queued request: (op, args, connection writer, request id)
+_Request = Tuple[str, tuple, asyncio.StreamWriter, Any]
+
+
+class KeyAgent:
+    """
+    Unix socket server answering sign and verify requests in batches.
+
+    The counters ``requests`` and ``batches`` show how well requests are
+    being coalesced.
+    """
+
+    def __init__(self, adapter: CryptoAdapter, socket_path: Optional[str] = None,
+                 batch_max: int = AGENT_BATCH_MAX, workers: int = AGENT_WORKERS):
+        """
+        Initialize the agent.
+
+        Args:
+            adapter: Unlocked backend that performs the signatures
+            socket_path: Where to listen (default: see agent_socket_path())
+            batch_max: Most requests handed to the backend in one call
+            workers: Batches processed concurrently
+        """
+        self.adapter = adapter
+        self.socket_path = agent_socket_path(socket_path)
+        self.batch_max = batch_max
+        self.workers = workers
+        self.requests = 0
+        self.batches = 0
+        self._public_key = adapter.public_key_b64()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="dao-agent")
+        self._queue: Optional["asyncio.Queue[_Request]"] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._clients: Set[asyncio.StreamWriter] = set()
+
+    async def start(self) -> None:
+        """
+        Bind the socket and start serving.
+
+        Raises:
+            AgentError: If another agent is already listening on the socket
+        """
+        directory = os.path.dirname(self.socket_path)
+        if directory:
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+        if os.path.exists(self.socket_path):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(self.socket_path)
+            except OSError:
+                # Left behind by an agent that did not shut down cleanly
+                os.unlink(self.socket_path)
+            else:
+                raise AgentError(f"A key agent is already listening on {self.socket_path}")
+            finally:
+                probe.close()
+
+        self._queue = asyncio.Queue()
+        old_umask = os.umask(0o177)
+        try:
+            self._server = await asyncio.start_unix_server(self._handle, path=self.socket_path, limit=AGENT_MAX_LINE)
+        finally:
+            os.umask(old_umask)
+        self._dispatcher = asyncio.ensure_future(self._dispatch())
+
+    async def serve_forever(self) -> None:
+        """Start the agent if needed and serve until cancelled."""
+        if self._server is None:
+            await self.start()
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.close()
+
+    async def close(self) -> None:
+        """Stop accepting requests, remove the socket and shut the workers down."""
+        if self._server is not None:
+            self._server.close()
+            for writer in list(self._clients):
+                writer.close()
+            await self._server.wait_closed()
+            self._server = None
+            try:
+                os.unlink(self.socket_path)
+            except FileNotFoundError:
+                pass
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            self._dispatcher = None
+        self._executor.shutdown(wait=False)
+
+    async def __aenter__(self) -> "KeyAgent":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    def _respond(self, writer: asyncio.StreamWriter, request_id: Any, result: Any = None,
+                 error: Optional[str] = None) -> None:
+        if writer.is_closing():
+            return
+        message = {"id": request_id, "error": error} if error is not None else {"id": request_id, "result": result}
+        writer.write(encode_line(message))
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Read requests from one client and queue them."""
+        uid = _peer_uid(writer)
+        if uid is not None and uid != os.getuid():
+            writer.close()
+            return
+        self._clients.add(writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                self._accept(line, writer)
+                # Stop reading from a client that is not collecting its responses
+                await writer.drain()
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+            pass
+        finally:
+            self._clients.discard(writer)
+            writer.close()
+
+    def _accept(self, line: bytes, writer: asyncio.StreamWriter) -> None:
+        """Parse one request line and queue it, or answer it directly."""
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get("id")
+            op = request["op"]
+            if op == OP_PUBLIC_KEY:
+                self._respond(writer, request_id, self._public_key)
+                return
+            message = base64.b64decode(request["message"], validate=True)
+            if op == OP_SIGN:
+                args: tuple = (message,)
+            elif op == OP_VERIFY:
+                args = (message, request["signature"], request["pubkey"])
+            else:
+                raise ValueError(f"unknown op {op!r}")
+        except (ValueError, KeyError, TypeError, AttributeError, binascii.Error) as e:
+            self._respond(writer, request_id, error=f"bad request: {e}")
+            return
+        self.requests += 1
+        self._queue.put_nowait((op, args, writer, request_id))
+
+    async def _dispatch(self) -> None:
+        """Collect queued requests into batches, up to ``workers`` batches at a time."""
+        slots = asyncio.Semaphore(self.workers)
+        while True:
+            # Wait for a free worker first, so requests pile up into a bigger batch meanwhile
+            await slots.acquire()
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_max and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            self.batches += 1
+            task = asyncio.ensure_future(self._run_batch(batch))
+            task.add_done_callback(lambda _: slots.release())
+
+    async def _run_batch(self, batch: List[_Request]) -> None:
+        """Run one batch on the backend and answer every request in it."""
+        signs = [request for request in batch if request[0] == OP_SIGN]
+        verifies = [request for request in batch if request[0] == OP_VERIFY]
+        loop = asyncio.get_running_loop()
+        if signs:
+            payloads = [Canonical(None, args[0]) for _, args, _, _ in signs]
+            await self._answer(signs, loop.run_in_executor(self._executor, self.adapter.sign_many, payloads))
+        if verifies:
+            items = [(Canonical(None, message), signature, pubkey) for _, (message, signature, pubkey), _, _ in verifies]
+            await self._answer(verifies, loop.run_in_executor(self._executor, self.adapter.verify_many, items))
+
+    async def _answer(self, requests: List[_Request], pending: "asyncio.Future[List[Any]]") -> None:
+        try:
+            results = await pending
+        except Exception as e:
+            for _, _, writer, request_id in requests:
+                self._respond(writer, request_id, error=f"{type(e).__name__}: {e}")
+            return
+        for (_, _, writer, request_id), result in zip(requests, results):
+            self._respond(writer, request_id, result)
+
+
+def main() -> None:
+    """Unlock a backend and serve it until interrupted."""
+    parser = argparse.ArgumentParser(description="DAO signing key agent")
+    parser.add_argument("--socket", help=f"socket path (default: ${DAO_AGENT_SOCKET} or {DEFAULT_AGENT_SOCKET})")
+    parser.add_argument("--backend", default=BACKEND_SOFTWARE, help="backend holding the key (default: %(default)s)")
+    parser.add_argument("--batch-max", type=int, default=AGENT_BATCH_MAX, help="largest batch passed to the backend")
+    parser.add_argument("--workers", type=int, default=AGENT_WORKERS, help="batches processed concurrently")
+    args = parser.parse_args()
+    if args.backend == BACKEND_AGENT:
+        parser.error("the agent cannot use itself as its backend")
+
+    from . import _create_adapter
+    adapter = _create_adapter(args.backend)
+    # Prompt for the passphrase now, in the foreground, rather than on the first request
+    unlock = getattr(adapter, "unlock", None)
+    if unlock is not None:
+        unlock()
+
+    agent = KeyAgent(adapter, args.socket, batch_max=args.batch_max, workers=args.workers)
+    print(f"DAO key agent listening on {agent.socket_path}")
+    print(f"export {DAO_CRYPTO_BACKEND}={BACKEND_AGENT} {DAO_AGENT_SOCKET}={agent.socket_path}")
+    try:
+        asyncio.run(agent.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""
+Canonical JSON encoding for signed payloads.
+
+Two encodings are provided:
+
+- canonical_bytes() reproduces the encoding every signature in the DAO has
+  used so far, ``json.dumps(payload, separators=(',', ':'), sort_keys=True)``
+  (ASCII-only, Python float formatting).  When orjson is installed it
+  serializes with orjson and falls back to json.dumps whenever the two could
+  differ: output containing non-ASCII or DEL bytes, numbers in exponent
+  form, or a null that may stand for NaN or Infinity (orjson writes them as
+  null, json.dumps as NaN and Infinity).  Payloads should not contain
+  non-finite floats: JSON cannot represent them and jcs_bytes() rejects them.
+
+- jcs_bytes() implements the JSON Canonicalization Scheme (RFC 8785): UTF-8
+  output, minimal string escaping, ECMAScript number formatting and keys
+  sorted by UTF-16 code units.  For ASCII payloads without floats the two
+  encodings are byte-identical.
+
+Canonical wraps a payload and computes its encoding and SHA-256 digest at
+most once, so signing, verifying and caching the same payload share the
+work.  Hash-then-sign signatures cover HASH_SIGN_PREFIX + digest instead of
+the full encoding; the prefix keeps them from ever being valid as a
+signature over a JSON document.
+"""
+
+import hashlib
+import json
+import math
+import re
+from typing import Any, Dict, Optional, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Domain separation for hash-then-sign: signed message is prefix + SHA-256 digest
+HASH_SIGN_PREFIX = b"dao-sha256-sign/1\x00"
+
+# Value of a payload's "signature_scheme" field when it was signed hash-then-sign
+SCHEME_SHA256 = "sha256"
+
+# Bytes that json.dumps would have escaped, and numbers orjson formats differently
+_NON_ASCII = re.compile(rb"[\x7f-\xff]")
+_EXPONENT = re.compile(rb"[0-9][eE]")
+
+# Largest integer an IEEE double (and therefore JCS) represents exactly
+_MAX_SAFE_INT = 2 ** 53
+
+_JCS_ESCAPES = {'"': '\\"', '\\': '\\\\', '\b': '\\b', '\f': '\\f', '\n': '\\n', '\r': '\\r', '\t': '\\t'}
+_JCS_NEEDS_ESCAPE = re.compile(r'["\\\x00-\x1f]')
+
+
+def _legacy_dumps(payload: Any) -> bytes:
+    return json.dumps(payload, separators=(',', ':'), sort_keys=True).encode()
+
+
+def _has_non_finite(value: Any) -> bool:
+    """Return True if a payload contains NaN or Infinity anywhere."""
+    if isinstance(value, float):
+        return not math.isfinite(value)
+    if isinstance(value, dict):
+        return any(_has_non_finite(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return any(_has_non_finite(item) for item in value)
+    return False
+
+
+def canonical_bytes(payload: Any) -> bytes:
+    """
+    Encode a payload exactly as the adapters always have for signing.
+
+    Args:
+        payload: JSON-compatible value, usually a dictionary
+
+    Returns:
+        The canonical encoding, identical to the json.dumps form
+    """
+    if orjson is not None:
+        try:
+            data = orjson.dumps(payload, option=orjson.OPT_SORT_KEYS)
+        except TypeError:
+            # Non-string keys, integers beyond 64 bits, unsupported types
+            return _legacy_dumps(payload)
+        if not _NON_ASCII.search(data) and not _EXPONENT.search(data) and \
+                (b"null" not in data or not _has_non_finite(payload)):
+            return data
+    return _legacy_dumps(payload)
+
+
+def _jcs_string(value: str) -> str:
+    return '"' + _JCS_NEEDS_ESCAPE.sub(
+        lambda m: _JCS_ESCAPES.get(m.group(), f"\\u{ord(m.group()):04x}"), value) + '"'
+
+
+def _jcs_number(value: Union[int, float]) -> str:
+    """Format a number as ECMAScript Number.prototype.toString does."""
+    if isinstance(value, int):
+        if abs(value) > _MAX_SAFE_INT:
+            raise ValueError(f"Integer {value} cannot be represented exactly in JCS")
+        return str(value)
+    if not math.isfinite(value):
+        raise ValueError("NaN and Infinity cannot be canonicalized")
+    if value == 0:
+        return "0"
+    sign = "-" if value < 0 else ""
+    # repr() yields the shortest round-tripping digits, as ECMAScript requires
+    mantissa, _, exp = repr(abs(value)).partition("e")
+    int_part, _, frac_part = mantissa.partition(".")
+    digits = int_part + frac_part
+    # value = 0.<digits> * 10**n once leading and trailing zeros are dropped
+    n = len(int_part) + int(exp or 0)
+    stripped = digits.lstrip("0")
+    n -= len(digits) - len(stripped)
+    digits = stripped.rstrip("0")
+    k = len(digits)
+    if k <= n <= 21:
+        text = digits + "0" * (n - k)
+    elif 0 < n <= 21:
+        text = digits[:n] + "." + digits[n:]
+    elif -6 < n <= 0:
+        text = "0." + "0" * (-n) + digits
+    else:
+        e = n - 1
+        text = digits[0] + ("." + digits[1:] if k > 1 else "") + "e" + ("+" if e > 0 else "-") + str(abs(e))
+    return sign + text
+
+
+def _jcs_key(key: str) -> bytes:
+    # Big-endian UTF-16 bytes compare in UTF-16 code unit order
+    return key.encode("utf-16-be", "surrogatepass")
+
+
+def _jcs(value: Any, out: list) -> None:
+    if value is None:
+        out.append("null")
+    elif value is True:
+        out.append("true")
+    elif value is False:
+        out.append("false")
+    elif isinstance(value, str):
+        out.append(_jcs_string(value))
+    elif isinstance(value, (int, float)):
+        out.append(_jcs_number(value))
+    elif isinstance(value, dict):
+        for key in value:
+            if not isinstance(key, str):
+                raise TypeError(f"JCS object keys must be strings, not {type(key).__name__}")
+        out.append("{")
+        for i, key in enumerate(sorted(value, key=_jcs_key)):
+            if i:
+                out.append(",")
+            out.append(_jcs_string(key))
+            out.append(":")
+            _jcs(value[key], out)
+        out.append("}")
+    elif isinstance(value, (list, tuple)):
+        out.append("[")
+        for i, item in enumerate(value):
+            if i:
+                out.append(",")
+            _jcs(item, out)
+        out.append("]")
+    else:
+        raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def jcs_bytes(payload: Any) -> bytes:
+    """
+    Encode a payload with the JSON Canonicalization Scheme (RFC 8785).
+
+    Raises:
+        ValueError: For NaN, Infinity or integers beyond 2**53
+        TypeError: For non-string object keys or non-JSON types
+    """
+    out: list = []
+    _jcs(payload, out)
+    return "".join(out).encode("utf-8")
+
+
+def hash_message(digest: bytes) -> bytes:
+    """Return the message actually signed in hash-then-sign mode."""
+    return HASH_SIGN_PREFIX + digest
+
+
+class Canonical:
+    """
+    A payload with its canonical encoding and digest computed on demand, once.
+
+    The wrapped payload must not be mutated after the encoding is first
+    used.  Adapters accept a Canonical anywhere they accept a dictionary.
+    """
+
+    __slots__ = ("payload", "_bytes", "_digest")
+
+    def __init__(self, payload: Dict[str, Any], data: Optional[bytes] = None):
+        """
+        Wrap a payload.
+
+        Args:
+            payload: The dictionary to sign or verify
+            data: Its canonical encoding, if already known
+        """
+        self.payload = payload
+        self._bytes = data
+        self._digest: Optional[bytes] = None
+
+    @property
+    def bytes(self) -> bytes:
+        """Canonical encoding (legacy form, see canonical_bytes())."""
+        if self._bytes is None:
+            self._bytes = canonical_bytes(self.payload)
+        return self._bytes
+
+    @property
+    def digest(self) -> bytes:
+        """SHA-256 digest of the canonical encoding."""
+        if self._digest is None:
+            self._digest = hashlib.sha256(self.bytes).digest()
+        return self._digest
+
+    @property
+    def hexdigest(self) -> str:
+        """Hex form of digest."""
+        return self.digest.hex()
+
+
+Payload = Union[Dict[str, Any], Canonical]
+
+
+def as_canonical(payload: Payload) -> Canonical:
+    """Wrap a dictionary in a Canonical, passing an existing Canonical through."""
+    return payload if isinstance(payload, Canonical) else Canonical(payload)
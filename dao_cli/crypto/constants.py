@@ -2,6 +2,8 @@
 Constants for the DAO crypto modules.
 """
 
+import os
+
 # Environment variable to enforce FIPS compliance
 DAO_FIPS_ONLY = "DAO_FIPS_ONLY"
 
@@ -25,4 +27,42 @@ PKCS11_LIB_PATH = "DAO_PKCS11_LIB_PATH"
 # Default paths
 DEFAULT_KEY_DIR = "~/.dao_keys"
 DEFAULT_ED25519_PRIV_PEM = "~/.dao_keys/ed25519/priv.pem"
-DEFAULT_ED25519_PUB_PEM = "~/.dao_keys/ed25519/pub.pem"
\ No newline at end of file
+DEFAULT_ED25519_PUB_PEM = "~/.dao_keys/ed25519/pub.pem"
+
+# Maximum number of verified signatures kept by the verification cache
+DEFAULT_VERIFY_CACHE_SIZE = 2048
+
+# Batch signing/verification: worker threads and smallest batch worth spreading
+BATCH_WORKERS = min(8, os.cpu_count() or 1)
+BATCH_MIN_PARALLEL = 64
+
+# PKCS#11 session pool: maximum open sessions and checkout timeout in seconds
+PKCS11_POOL_SIZE = "DAO_PKCS11_POOL_SIZE"
+DEFAULT_PKCS11_POOL_SIZE = 4
+PKCS11_POOL_TIMEOUT = 30.0
+
+# Maximum number of parsed public-key objects kept per adapter
+DEFAULT_PUBLIC_KEY_CACHE_SIZE = 256
+
+# Payloads whose canonical encoding reaches this size are signed hash-then-sign
+HASH_SIGN_MIN_BYTES = 64 * 1024
+
+# Passphrase for the software key store, for headless runs
+DAO_KEY_PASSPHRASE = "DAO_KEY_PASSPHRASE"
+
+# Seconds an unlocked private key stays in the kernel keyring (0 disables)
+DAO_UNLOCK_CACHE_TTL = "DAO_UNLOCK_CACHE_TTL"
+DEFAULT_UNLOCK_CACHE_TTL = 600
+
+# AsyncCryptoAdapter: executor threads and operations admitted before callers wait
+ASYNC_CRYPTO_WORKERS = min(4, os.cpu_count() or 1)
+ASYNC_CRYPTO_MAX_PENDING = 64
+
+# Key agent: client backend name, socket location, batching and client timeout
+BACKEND_AGENT = "agent"
+DAO_AGENT_SOCKET = "DAO_AGENT_SOCKET"
+DEFAULT_AGENT_SOCKET = "~/.dao_keys/agent.sock"
+AGENT_BATCH_MAX = 256
+AGENT_WORKERS = 2
+AGENT_TIMEOUT = 30.0
+AGENT_MAX_LINE = 32 * 1024 * 1024
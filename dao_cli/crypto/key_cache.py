@@ -0,0 +1,81 @@
+"""
+Bounded LRU cache of parsed public-key objects.
+
+Link signatures and deltas are verified against a handful of contributor
+keys over and over.  Decoding the base64 string and constructing a key
+object for every verification costs more than it should, so adapters keep
+the parsed objects here, keyed by the base64 string they were parsed from.
+
+Only keys that parse are cached; a malformed key raises every time.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict
+
+from .adapter_base import B64
+from .constants import DEFAULT_PUBLIC_KEY_CACHE_SIZE
+
+
+class PublicKeyCache:
+    """
+    Thread-safe LRU map from base64 public keys to parsed key objects.
+
+    The hits and misses counters are meant for sizing ``max_entries``.
+    """
+
+    def __init__(self, loader: Callable[[B64], Any], max_entries: int = DEFAULT_PUBLIC_KEY_CACHE_SIZE):
+        """
+        Initialize the cache.
+
+        Args:
+            loader: Parses a base64 public key, raising on malformed input
+            max_entries: Maximum number of parsed keys to keep
+        """
+        self._loader = loader
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._keys: "OrderedDict[B64, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def get(self, pubkey: B64) -> Any:
+        """
+        Return the parsed key for ``pubkey``, parsing it on a miss.
+
+        Raises:
+            Whatever the loader raises for a malformed key
+        """
+        with self._lock:
+            key = self._keys.get(pubkey)
+            if key is not None:
+                self._keys.move_to_end(pubkey)
+                self.hits += 1
+                return key
+            self.misses += 1
+
+        key = self._loader(pubkey)
+        self.put(pubkey, key)
+        return key
+
+    def put(self, pubkey: B64, key: Any) -> None:
+        """Add an already parsed key, e.g. the adapter's own."""
+        with self._lock:
+            self._keys[pubkey] = key
+            self._keys.move_to_end(pubkey)
+            while len(self._keys) > self.max_entries:
+                self._keys.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop every cached key and reset the counters."""
+        with self._lock:
+            self._keys.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Return the counters and current size."""
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._keys)}
@@ -0,0 +1,195 @@
+"""
+Threshold (k-of-n) verification of multi-signed payloads.
+
+An identity's ``multisig`` field lists the holders whose approval its
+payloads need.  Each holder approves by attaching a cosignature over the
+same signed message as the primary signature::
+
+    {"signer": "<holder id>", "public_key": "<base64>", "signature": "<base64>"}
+
+Holder public keys come from a HolderKeyIndex built once from the
+contributor records, never from the cosignature itself: a cosignature
+whose embedded key differs from the indexed one is ignored.  Approvals are
+counted per distinct public key, so several holder ids backed by one key
+(e.g. identities created on the same node) approve only once.
+
+verify_threshold() checks cosignatures in batches sized to the number of
+approvals still missing, so when every cosignature is valid exactly k
+signatures are verified in one call, and it stops as soon as the threshold
+is reached or can no longer be reached.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+from .adapter_base import B64, CryptoAdapter, VerifyItem
+from .canonical import Payload
+
+# verify_many-style callable, e.g. adapter.verify_many or a VerificationCache bound to an adapter
+BatchVerifier = Callable[[Sequence[VerifyItem]], List[bool]]
+
+
+class HolderKeyIndex:
+    """Lookup of holder public keys and records by holder id, and of holders by public key."""
+
+    def __init__(self, records: Iterable[Dict[str, Any]] = (), id_field: str = "anon_id",
+                 key_field: str = "public_key"):
+        """
+        Build the index.
+
+        Args:
+            records: Contributor records carrying an id and a public key
+            id_field: Record field holding the holder id
+            key_field: Record field holding the base64 public key
+        """
+        self._keys: Dict[str, B64] = {}
+        self._records: Dict[str, Dict[str, Any]] = {}
+        self._holders: Dict[B64, List[str]] = {}
+        self._id_field = id_field
+        self._key_field = key_field
+        for record in records:
+            self.add(record)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add(self, record: Dict[str, Any]) -> None:
+        """Index one record; records without an id or public key are skipped."""
+        holder, pubkey = record.get(self._id_field), record.get(self._key_field)
+        if holder and pubkey:
+            previous = self._keys.get(holder)
+            if previous is not None:
+                self._holders[previous].remove(holder)
+            self._keys[holder] = pubkey
+            self._records[holder] = record
+            self._holders.setdefault(pubkey, []).append(holder)
+
+    def key(self, holder: str) -> Optional[B64]:
+        """Return the public key of a holder, or None if unknown."""
+        return self._keys.get(holder)
+
+    def record(self, holder: str) -> Optional[Dict[str, Any]]:
+        """Return the record of a holder, or None if unknown."""
+        return self._records.get(holder)
+
+    def holders_for_key(self, pubkey: B64) -> List[str]:
+        """Return the ids of every holder whose public key is ``pubkey``, in index order."""
+        return list(self._holders.get(pubkey, ()))
+
+    def record_for_key(self, pubkey: B64) -> Optional[Dict[str, Any]]:
+        """
+        Return the record whose public key is ``pubkey``.
+
+        Returns:
+            The record, or None if no holder or more than one holder has the key
+        """
+        holders = self._holders.get(pubkey, ())
+        return self._records[holders[0]] if len(holders) == 1 else None
+
+
+@dataclass
+class MultisigResult:
+    """
+    Outcome of a threshold check.
+
+    Attributes:
+        threshold: Approvals required
+        approvals: Holders whose approval counted, one per distinct key, in the order it was established
+        checked: Cosignatures that went through signature verification
+    """
+    threshold: int
+    approvals: List[str] = field(default_factory=list)
+    checked: int = 0
+
+    @property
+    def satisfied(self) -> bool:
+        """Whether the threshold was reached."""
+        return len(self.approvals) >= self.threshold
+
+    def __bool__(self) -> bool:
+        return self.satisfied
+
+
+def cosign(adapter: CryptoAdapter, message: Payload, signer: str) -> Dict[str, str]:
+    """
+    Produce a cosignature record.
+
+    Args:
+        adapter: The signer's adapter
+        message: The payload the primary signature covers
+        signer: The signer's holder id
+
+    Returns:
+        A cosignature record to append to the payload's cosignatures
+    """
+    return {"signer": signer, "public_key": adapter.public_key_b64(), "signature": adapter.sign(message)}
+
+
+def verify_threshold(message: Payload, cosignatures: Iterable[Dict[str, Any]], holders: Iterable[str],
+                     threshold: int, index: HolderKeyIndex, verify_many: BatchVerifier,
+                     approved: Iterable[str] = ()) -> MultisigResult:
+    """
+    Check that at least ``threshold`` distinct holder keys signed ``message``.
+
+    Holders sharing a public key approve once between them: a cosignature
+    counts only if no approval under the same key has been counted yet.
+
+    Args:
+        message: The payload every cosignature covers
+        cosignatures: Cosignature records (see module docstring)
+        holders: Ids of the holders allowed to approve
+        threshold: Approvals required
+        index: Where holder public keys are looked up
+        verify_many: Batch verifier for the cosignatures
+        approved: Holders already known to approve, e.g. the author whose
+            primary signature was verified; they need no cosignature, and
+            cosignatures under their keys add nothing
+
+    Returns:
+        The result; truthy when the threshold is reached
+
+    Raises:
+        ValueError: If threshold is not positive
+    """
+    if threshold < 1:
+        raise ValueError(f"Multisig threshold must be positive, got {threshold}")
+    holder_set = set(holders)
+    result = MultisigResult(threshold)
+    approved_keys = set()
+    for holder in approved:
+        pubkey = index.key(holder)
+        if holder in holder_set and pubkey is not None and pubkey not in approved_keys:
+            approved_keys.add(pubkey)
+            result.approvals.append(holder)
+
+    # Cheap eligibility checks first: known holder, indexed key, matching embedded key
+    pending = []
+    for cosignature in cosignatures:
+        signer, signature = cosignature.get("signer"), cosignature.get("signature")
+        if signer not in holder_set or not signature:
+            continue
+        pubkey = index.key(signer)
+        if pubkey is None or pubkey in approved_keys or cosignature.get("public_key", pubkey) != pubkey:
+            continue
+        pending.append((signer, signature, pubkey))
+
+    while not result.satisfied:
+        needed = threshold - len(result.approvals)
+        pending = [candidate for candidate in pending if candidate[2] not in approved_keys]
+        if len({pubkey for _, _, pubkey in pending}) < needed:
+            break  # not enough distinct keys left to reach the threshold
+        batch, rest, batch_keys = [], [], set()
+        for candidate in pending:
+            if len(batch) < needed and candidate[2] not in batch_keys:
+                batch.append(candidate)
+                batch_keys.add(candidate[2])
+            else:
+                rest.append(candidate)
+        results = verify_many([(message, signature, pubkey) for _, signature, pubkey in batch])
+        result.checked += len(batch)
+        for (signer, _, pubkey), valid in zip(batch, results):
+            if valid:
+                approved_keys.add(pubkey)
+                result.approvals.append(signer)
+        pending = rest
+    return result
@@ -0,0 +1,249 @@
+"""
+Pool of logged-in PKCS#11 sessions with cached key handles.
+
+Opening a session, logging in and searching for the key object by label
+costs far more than a signature on most HSMs.  The pool keeps a few warm
+sessions around, each with its key objects already looked up, and hands
+them out to one thread at a time.
+
+PKCS#11 login state is shared by every session an application has open on
+a token, and closing the session that logged in logs all of them out.  The
+pool therefore logs in on the first session only; later sessions inherit
+the login.  When the token reports a lost session or a missing login (token
+reset, HSM failover, device removed) the whole pool is discarded and the
+operation is retried once on freshly logged-in sessions.
+
+A session checked out across a reset may still hold a live login that the
+new sessions then find already in place.  When it is returned it is moved
+into the new generation as its login holder rather than closed, since
+closing it would log out the sessions that rely on it.
+"""
+
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, TypeVar
+
+from pkcs11 import Attribute, ObjectClass
+from pkcs11.exceptions import (
+    DeviceRemoved,
+    SessionClosed,
+    SessionHandleInvalid,
+    TokenNotPresent,
+    UserAlreadyLoggedIn,
+    UserNotLoggedIn,
+)
+
+from .constants import DEFAULT_PKCS11_POOL_SIZE, PKCS11_POOL_TIMEOUT
+
+T = TypeVar("T")
+
+# Errors after which a session (and the login it relied on) is unusable
+SESSION_LOST_ERRORS = (SessionHandleInvalid, SessionClosed, UserNotLoggedIn, DeviceRemoved, TokenNotPresent)
+
+
+class PoolExhausted(RuntimeError):
+    """Raised when no session becomes available within the checkout timeout."""
+    pass
+
+
+class PooledSession:
+    """An open session plus the key objects already found on it."""
+
+    def __init__(self, session, key_label: str, generation: int, logged_in: bool):
+        self.session = session
+        self.generation = generation
+        self.logged_in = logged_in
+        self._key_label = key_label
+        self._keys: Dict[ObjectClass, Any] = {}
+
+    def key(self, object_class: ObjectClass):
+        """
+        Return the key object of the given class, searching the token only once.
+
+        Args:
+            object_class: ObjectClass.PRIVATE_KEY or ObjectClass.PUBLIC_KEY
+
+        Raises:
+            StopIteration: If the token holds no such key with the pool's label
+        """
+        if object_class not in self._keys:
+            self._keys[object_class] = next(self.session.get_objects({
+                Attribute.CLASS: object_class,
+                Attribute.LABEL: self._key_label
+            }))
+        return self._keys[object_class]
+
+
+class Pkcs11SessionPool:
+    """
+    Thread-safe pool of sessions on one token.
+
+    Sessions are opened lazily, up to ``size`` of them; checkout blocks
+    while all of them are in use.
+    """
+
+    def __init__(self, token, pin: str, key_label: str,
+                 size: int = DEFAULT_PKCS11_POOL_SIZE, timeout: float = PKCS11_POOL_TIMEOUT):
+        """
+        Initialize the pool.
+
+        Args:
+            token: python-pkcs11 Token to open sessions on
+            pin: User PIN used to log in
+            key_label: Label of the key pair used by the adapter
+            size: Maximum number of open sessions
+            timeout: Seconds to wait for a free session before raising PoolExhausted
+        """
+        if size < 1:
+            raise ValueError("size must be at least 1")
+        self._token = token
+        self._pin = pin
+        self._key_label = key_label
+        self.size = size
+        self.timeout = timeout
+        self._idle: "queue.LifoQueue[PooledSession]" = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._open = 0
+        self._generation = 0
+        self._login: Optional[PooledSession] = None
+        self._borrowed_login = False
+        self.opened = 0
+        self.reused = 0
+        self.resets = 0
+
+    def _new_session(self) -> PooledSession:
+        """Open a session, logging in only if no open session holds the login. Caller holds the lock."""
+        logged_in = self._login is None
+        if logged_in:
+            try:
+                session = self._token.open(user_pin=self._pin)
+            except UserAlreadyLoggedIn:
+                # A session checked out from before a reset still holds the login
+                session = self._token.open()
+                logged_in = False
+                self._borrowed_login = True
+        else:
+            session = self._token.open()
+        pooled = PooledSession(session, self._key_label, self._generation, logged_in)
+        if logged_in:
+            self._login = pooled
+        self._open += 1
+        self.opened += 1
+        return pooled
+
+    def _acquire(self) -> PooledSession:
+        try:
+            pooled = self._idle.get_nowait()
+            self.reused += 1
+            return pooled
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._open < self.size:
+                return self._new_session()
+        try:
+            pooled = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise PoolExhausted(f"No PKCS#11 session free after {self.timeout:.0f}s") from None
+        self.reused += 1
+        return pooled
+
+    def _release(self, pooled: PooledSession) -> None:
+        with self._lock:
+            if pooled.generation != self._generation and pooled.logged_in and self._borrowed_login:
+                # Current sessions rely on this session's login: adopt it instead of logging them out
+                pooled.generation = self._generation
+                self._login = pooled
+                self._borrowed_login = False
+            if pooled.generation == self._generation:
+                self._idle.put(pooled)
+                return
+            self._open -= 1
+        self._close_quietly(pooled)
+
+    @contextmanager
+    def session(self) -> Iterator[PooledSession]:
+        """
+        Check out a session for the duration of a ``with`` block.
+
+        A session that fails with a session-loss error resets the pool and
+        is not returned to it; the error propagates to the caller.
+        """
+        pooled = self._acquire()
+        try:
+            yield pooled
+        except SESSION_LOST_ERRORS:
+            self.reset()
+            with self._lock:
+                self._open -= 1
+            self._close_quietly(pooled)
+            raise
+        except BaseException:
+            self._release(pooled)
+            raise
+        self._release(pooled)
+
+    def run(self, fn: Callable[[PooledSession], T]) -> T:
+        """
+        Call ``fn`` with a checked-out session, retrying once after a session loss.
+
+        Args:
+            fn: Operation to perform; it may run twice, so it must not have side effects
+                outside the token
+
+        Returns:
+            Whatever ``fn`` returns
+        """
+        try:
+            with self.session() as pooled:
+                return fn(pooled)
+        except SESSION_LOST_ERRORS:
+            with self.session() as pooled:
+                return fn(pooled)
+
+    def reset(self) -> None:
+        """
+        Discard every idle session and log in again on the next checkout.
+
+        Idle sessions are closed before the lock is released, so no session
+        of the new generation can come to rely on a login that is about to
+        be closed.
+        """
+        with self._lock:
+            self._generation += 1
+            self._login = None
+            self._borrowed_login = False
+            self.resets += 1
+            stale: List[PooledSession] = []
+            while True:
+                try:
+                    stale.append(self._idle.get_nowait())
+                except queue.Empty:
+                    break
+            self._open -= len(stale)
+            for pooled in sorted(stale, key=lambda p: p.logged_in):
+                self._close_quietly(pooled)
+
+    def close(self) -> None:
+        """Close all idle sessions, closing the logged-in session last."""
+        with self._lock:
+            sessions: List[PooledSession] = []
+            while True:
+                try:
+                    sessions.append(self._idle.get_nowait())
+                except queue.Empty:
+                    break
+            self._open -= len(sessions)
+            self._generation += 1
+            self._login = None
+            self._borrowed_login = False
+        for pooled in sorted(sessions, key=lambda p: p.logged_in):
+            self._close_quietly(pooled)
+
+    @staticmethod
+    def _close_quietly(pooled: PooledSession) -> None:
+        try:
+            pooled.session.close()
+        except Exception:
+            pass
@@ -0,0 +1,311 @@
+"""
+Revocation index for link signatures and public keys.
+
+Revocations are kept as fingerprints (truncated SHA-256 of the base64
+value) in two in-memory sets, so checking a signature or key during
+verification is a hash lookup regardless of how many revocations exist.
+A signature revocation is scoped to the key that made the signature and
+kept as a (key fingerprint, signature fingerprint) pair.  Only entries
+revoked locally without a key (e.g. imported from revoked_links.json)
+match the signature under any key.
+
+On disk the index is an append-only JSON-lines log, one revocation per
+line, numbered by position.  Appending never rewrites earlier lines, a
+line cut short by a crash is skipped on load, and refresh() picks up lines
+other processes appended since the last read.
+
+Revocations travel between nodes as compact signed deltas holding every
+entry from a given log position on, with fingerprints packed as raw bytes::
+
+    {
+        "type": "revocation_delta",
+        "format": "dao-revocations/2",
+        "from": 0, "to": N,
+        "signatures": "<b64 of 16-byte key fingerprint, signature fingerprint pairs>",
+        "keys": "<b64 of 16-byte fingerprints>",
+        "public_key": "<b64>",
+        "signature": "<b64>"
+    }
+
+A delta is only applied if its issuer key is known to the receiver, and
+each key it revokes, or whose signature it revokes, is the issuer's own or
+one the receiver has authorized the issuer to revoke.  Signature
+revocations without a key are not exported.
+"""
+
+import base64
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+from typing import AbstractSet, Any, Callable, Dict, Iterable, List, Mapping, Optional, Set, Tuple, Union
+
+from .adapter_base import B64, CryptoAdapter
+
+# Format identifier carried in every revocation delta
+FORMAT = "dao-revocations/2"
+
+KIND_SIGNATURE = "signature"
+KIND_KEY = "key"
+
+# Fingerprints are the first 16 bytes of SHA-256, written as 32 hex digits
+FINGERPRINT_BYTES = 16
+
+# Key fingerprint of a signature revocation that applies under any key
+UNSCOPED = ""
+
+# Signature verifier: (payload, signature, pubkey) -> bool
+Verifier = Callable[[Dict[str, Any], str, str], bool]
+
+
+class RevocationError(ValueError):
+    """Raised when a revocation delta is malformed or fails verification."""
+    pass
+
+
+def fingerprint(value: str) -> str:
+    """Return the hex fingerprint of a base64 signature or public key."""
+    return hashlib.sha256(value.encode()).hexdigest()[:2 * FINGERPRINT_BYTES]
+
+
+def _pack(fingerprints: Iterable[str]) -> str:
+    return base64.b64encode(b"".join(bytes.fromhex(fp) for fp in fingerprints)).decode()
+
+
+def _unpack(packed: str, width: int = 1) -> List[str]:
+    raw = base64.b64decode(packed, validate=True)
+    if len(raw) % (width * FINGERPRINT_BYTES):
+        raise ValueError("packed fingerprints have a partial entry")
+    return [raw[i:i + FINGERPRINT_BYTES].hex() for i in range(0, len(raw), FINGERPRINT_BYTES)]
+
+
+def _unpack_pairs(packed: str) -> List[Tuple[str, str]]:
+    fingerprints = _unpack(packed, width=2)
+    return list(zip(fingerprints[::2], fingerprints[1::2]))
+
+
+class RevocationIndex:
+    """
+    Hashed sets of revoked signature and key fingerprints backed by an append-only log.
+
+    Listeners registered with on_revoke() are called with (kind, fingerprint)
+    for every new revocation, e.g. to drop verification cache entries.  For
+    signatures the fingerprint is the (key, signature) fingerprint pair.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Load the index.
+
+        Args:
+            path: Log file (None keeps the index in memory only)
+        """
+        self.path = path
+        self.signatures: Set[Tuple[str, str]] = set()  # (key fingerprint or UNSCOPED, signature fingerprint)
+        self.keys: Set[str] = set()
+        self.entries: List[Dict[str, Any]] = []
+        self._offset = 0
+        self._listeners: List[Callable[[str, Union[str, Tuple[str, str]]], None]] = []
+        self._lock = threading.Lock()
+        self.refresh()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def on_revoke(self, listener: Callable[[str, Union[str, Tuple[str, str]]], None]) -> None:
+        """Call ``listener(kind, fingerprint)`` for each revocation added from now on."""
+        self._listeners.append(listener)
+
+    def refresh(self) -> int:
+        """
+        Read log lines appended since the last read.
+
+        Returns:
+            Number of entries loaded
+        """
+        if not self.path or not os.path.exists(self.path):
+            return 0
+        loaded = 0
+        with self._lock, open(self.path, "rb") as f:
+            f.seek(self._offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # partially written; picked up once complete
+                self._offset += len(line)
+                try:
+                    entry = json.loads(line)
+                    member = self._member(entry)
+                except (ValueError, KeyError, TypeError):
+                    continue
+                if self._add(entry["kind"], member, entry):
+                    loaded += 1
+        return loaded
+
+    def _set(self, kind: str) -> Set[str]:
+        if kind == KIND_SIGNATURE:
+            return self.signatures
+        if kind == KIND_KEY:
+            return self.keys
+        raise ValueError(f"Unknown revocation kind {kind!r}")
+
+    @staticmethod
+    def _member(entry: Dict[str, Any]) -> Union[str, Tuple[str, str]]:
+        """Return what a log entry adds to its set: a fingerprint, or a (key, signature) pair."""
+        if entry["kind"] == KIND_SIGNATURE:
+            return entry.get("key") or UNSCOPED, entry["fingerprint"]
+        return entry["fingerprint"]
+
+    def _add(self, kind: str, member: Union[str, Tuple[str, str]], entry: Dict[str, Any]) -> bool:
+        """Add an entry to the in-memory sets. Caller holds the lock."""
+        target = self._set(kind)
+        if member in target:
+            return False
+        target.add(member)
+        self.entries.append(entry)
+        return True
+
+    def _revoke(self, kind: str, fp: str, key: Optional[str] = None, **details: Any) -> bool:
+        """Record a revocation in memory and in the log; returns False if already revoked."""
+        entry = {"kind": kind, "fingerprint": fp, "revoked_at": datetime.utcnow().isoformat(), **details}
+        if key:
+            entry["key"] = key
+        member = self._member(entry)
+        with self._lock:
+            if not self._add(kind, member, entry):
+                return False
+            if self.path:
+                line = (json.dumps(entry, separators=(',', ':')) + "\n").encode()
+                with open(self.path, "ab") as f:
+                    f.write(line)
+                self._offset += len(line)
+        for listener in self._listeners:
+            listener(kind, member)
+        return True
+
+    def revoke_signature(self, signature: B64, pubkey: Optional[B64] = None, **details: Any) -> bool:
+        """
+        Revoke a signature made by a public key.
+
+        Args:
+            signature: The base64 signature
+            pubkey: Key that made it (None revokes it under any key and
+                keeps it out of revocation deltas)
+            details: Extra fields for the log entry, e.g. anon_id
+
+        Returns:
+            True if it was not revoked before
+        """
+        return self._revoke(KIND_SIGNATURE, fingerprint(signature), fingerprint(pubkey) if pubkey else None, **details)
+
+    def revoke_key(self, pubkey: B64, **details: Any) -> bool:
+        """
+        Revoke a public key, and with it every signature it made.
+
+        Returns:
+            True if it was not revoked before
+        """
+        return self._revoke(KIND_KEY, fingerprint(pubkey), **details)
+
+    def is_revoked(self, signature: Optional[B64] = None, pubkey: Optional[B64] = None) -> bool:
+        """Check a signature and/or the key that made it against the index."""
+        key_fp = fingerprint(pubkey) if pubkey else None
+        if key_fp and key_fp in self.keys:
+            return True
+        if not signature:
+            return False
+        sig_fp = fingerprint(signature)
+        return (UNSCOPED, sig_fp) in self.signatures or (key_fp is not None and (key_fp, sig_fp) in self.signatures)
+
+    def import_legacy(self, revoked_links_path: str) -> int:
+        """
+        Add the entries of a legacy revoked_links.json list.
+
+        Returns:
+            Number of revocations that were new
+        """
+        if not os.path.exists(revoked_links_path):
+            return 0
+        with open(revoked_links_path, "r") as f:
+            revoked = json.load(f)
+        added = 0
+        for e in revoked:
+            details = {k: e[k] for k in ("anon_id", "revoked_at") if k in e}
+            if e.get("revoked_link_signature"):
+                key = fingerprint(e["revoked_public_key"]) if e.get("revoked_public_key") else None
+                added += self._revoke(KIND_SIGNATURE, fingerprint(e["revoked_link_signature"]), key, **details)
+            if e.get("revoked_public_key"):
+                added += self._revoke(KIND_KEY, fingerprint(e["revoked_public_key"]), **details)
+        return added
+
+    def export_delta(self, adapter: CryptoAdapter, since: int = 0) -> Dict[str, Any]:
+        """
+        Build a signed delta of the revocations from log position ``since`` on.
+
+        Args:
+            adapter: Adapter signing the delta
+            since: First log position to include (0 for everything)
+
+        Returns:
+            The revocation delta
+        """
+        with self._lock:
+            entries = self.entries[since:]
+            end = len(self.entries)
+        delta = {
+            "type": "revocation_delta",
+            "format": FORMAT,
+            "from": since,
+            "to": end,
+            "signatures": _pack(fp for e in entries if e["kind"] == KIND_SIGNATURE and e.get("key")
+                                for fp in (e["key"], e["fingerprint"])),
+            "keys": _pack(e["fingerprint"] for e in entries if e["kind"] == KIND_KEY),
+            "public_key": adapter.public_key_b64(),
+        }
+        delta["signature"] = adapter.sign(delta)
+        return delta
+
+    def apply_delta(self, delta: Dict[str, Any], verify: Verifier,
+                    issuers: Mapping[B64, AbstractSet[str]]) -> int:
+        """
+        Verify a revocation delta and add its entries.
+
+        Args:
+            delta: Delta from export_delta() on another node
+            verify: Signature verifier, e.g. dao.verify_payload
+            issuers: Public keys allowed to issue revocations, each mapped to
+                the fingerprints of other keys it may revoke, with their
+                signatures, besides its own
+
+        Returns:
+            Number of revocations that were new
+
+        Raises:
+            RevocationError: If the delta is malformed, its signature is invalid,
+                its issuer is unknown or it revokes a key, or a signature by a key,
+                its issuer may not revoke
+        """
+        if delta.get("type") != "revocation_delta" or delta.get("format") != FORMAT:
+            raise RevocationError("Not a revocation delta")
+        payload = {k: v for k, v in delta.items() if k != "signature"}
+        signature, issuer = delta.get("signature"), delta.get("public_key")
+        if not signature or not issuer or not verify(payload, signature, issuer):
+            raise RevocationError("Invalid or missing revocation delta signature")
+        if issuer not in issuers:
+            raise RevocationError("Revocation delta issuer is not a known key")
+        try:
+            signatures = _unpack_pairs(delta["signatures"])
+            keys = _unpack(delta["keys"])
+        except (KeyError, ValueError) as e:
+            raise RevocationError(f"Malformed revocation delta: {e}") from e
+        allowed = {fingerprint(issuer)} | set(issuers[issuer])
+        if any(fp not in allowed for fp in keys):
+            raise RevocationError("Revocation delta revokes keys its issuer may not revoke")
+        if any(key_fp not in allowed for key_fp, _ in signatures):
+            raise RevocationError("Revocation delta revokes signatures by keys its issuer may not revoke")
+        added = 0
+        for key_fp, fp in signatures:
+            added += self._revoke(KIND_SIGNATURE, fp, key_fp, issuer=issuer)
+        for fp in keys:
+            added += self._revoke(KIND_KEY, fp, issuer=issuer)
+        return added
@@ -0,0 +1,54 @@
+"""
+Deterministic stand-in for a CryptoAdapter.
+
+Signatures are keyed digests of the canonical payload, which lets the
+delta tests run without the cryptography dependencies.
+"""
+
+import base64
+import hashlib
+from typing import Any, Dict, List, Sequence, Tuple
+
+from dao_cli.crypto.canonical import as_canonical, hash_message
+
+
+class FakeAdapter:
+    """Minimal CryptoAdapter look-alike for testing."""
+
+    def __init__(self, key: bytes = b"test-key"):
+        self._key = key
+        self.sign_calls = 0
+        self.verify_calls = 0
+        self.batch_calls = 0
+
+    def _digest(self, payload: Dict[str, Any], key: bytes) -> str:
+        return self._mac(as_canonical(payload).bytes, key)
+
+    def _mac(self, message: bytes, key: bytes) -> str:
+        return base64.b64encode(hashlib.sha256(key + message).digest()).decode()
+
+    def sign(self, payload: Dict[str, Any]) -> str:
+        self.sign_calls += 1
+        return self._digest(payload, self._key)
+
+    def verify(self, payload: Dict[str, Any], signature: str, pubkey: str) -> bool:
+        self.verify_calls += 1
+        return self._digest(payload, base64.b64decode(pubkey)) == signature
+
+    def sign_many(self, payloads: Sequence[Dict[str, Any]]) -> List[str]:
+        return [self.sign(payload) for payload in payloads]
+
+    def verify_many(self, items: Sequence[Tuple[Dict[str, Any], str, str]]) -> List[bool]:
+        self.batch_calls += 1
+        return [self.verify(payload, signature, pubkey) for payload, signature, pubkey in items]
+
+    def sign_digest(self, digest: bytes) -> str:
+        self.sign_calls += 1
+        return self._mac(hash_message(digest), self._key)
+
+    def verify_digest(self, digest: bytes, signature: str, pubkey: str) -> bool:
+        self.verify_calls += 1
+        return self._mac(hash_message(digest), base64.b64decode(pubkey)) == signature
+
+    def public_key_b64(self) -> str:
+        return base64.b64encode(self._key).decode()
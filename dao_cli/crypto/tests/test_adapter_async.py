@@ -0,0 +1,101 @@
+"""
+Unit tests for AsyncCryptoAdapter.
+"""
+
+import asyncio
+import threading
+import time
+import unittest
+
+from dao_cli.crypto.adapter_async import AsyncCryptoAdapter
+from dao_cli.crypto.tests.fake_adapter import FakeAdapter
+
+
+class SlowAdapter(FakeAdapter):
+    """FakeAdapter whose sign() blocks like a hardware token."""
+
+    def __init__(self, delay: float = 0.02):
+        super().__init__()
+        self.delay = delay
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def sign(self, payload):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+        return super().sign(payload)
+
+
+class TestAsyncCryptoAdapter(unittest.TestCase):
+    """Tests for AsyncCryptoAdapter."""
+
+    def test_round_trip(self):
+        """Test sign/verify and the batch variants through the wrapper."""
+        adapter = FakeAdapter()
+
+        async def run():
+            async with AsyncCryptoAdapter(adapter) as wrapped:
+                pubkey = await wrapped.public_key_b64()
+                signature = await wrapped.sign({"n": 1})
+                signatures = await wrapped.sign_many([{"n": 1}, {"n": 2}])
+                valid = await wrapped.verify_many([({"n": 1}, signature, pubkey), ({"n": 3}, signature, pubkey)])
+                return signature, signatures, valid, await wrapped.verify({"n": 1}, signature, pubkey)
+
+        signature, signatures, valid, single = asyncio.run(run())
+        self.assertEqual(signatures[0], signature)
+        self.assertEqual(valid, [True, False])
+        self.assertTrue(single)
+
+    def test_event_loop_not_blocked(self):
+        """Test that the loop keeps running while a slow signature is computed."""
+        adapter = SlowAdapter(delay=0.1)
+
+        async def run():
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.01)
+                    ticks += 1
+
+            task = asyncio.ensure_future(ticker())
+            async with AsyncCryptoAdapter(adapter) as wrapped:
+                await wrapped.sign({"n": 1})
+            task.cancel()
+            return ticks
+
+        self.assertGreaterEqual(asyncio.run(run()), 5)
+
+    def test_backpressure(self):
+        """Test that no more than max_pending operations are admitted at once."""
+        adapter = SlowAdapter()
+
+        async def run():
+            async with AsyncCryptoAdapter(adapter, max_workers=8, max_pending=3) as wrapped:
+                return await asyncio.gather(*(wrapped.sign({"n": i}) for i in range(12)))
+
+        signatures = asyncio.run(run())
+        self.assertEqual(len(signatures), 12)
+        self.assertLessEqual(adapter.max_active, 3)
+
+    def test_sign_iter_keeps_order(self):
+        """Test that pipelined signatures come back in input order."""
+        adapter = SlowAdapter(delay=0.005)
+        payloads = [{"n": i} for i in range(10)]
+
+        async def run():
+            async with AsyncCryptoAdapter(adapter, max_workers=4) as wrapped:
+                return [s async for s in wrapped.sign_iter(payloads, window=4)]
+
+        self.assertEqual(asyncio.run(run()), [FakeAdapter().sign(p) for p in payloads])
+        self.assertGreater(adapter.max_active, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,201 @@
+"""
+Unit tests for the key agent and its client adapter.
+"""
+
+import asyncio
+import os
+import socket
+import tempfile
+import threading
+import time
+import unittest
+
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+
+from dao_cli.crypto.adapter_agent import AgentCryptoAdapter
+from dao_cli.crypto.adapter_pycacrypto import PycaCryptoAdapter
+from dao_cli.crypto.agent import AgentError, KeyAgent
+from dao_cli.crypto.canonical import as_canonical
+from dao_cli.crypto.tests.fake_adapter import FakeAdapter
+
+
+class BatchRecordingAdapter(FakeAdapter):
+    """FakeAdapter that records batch sizes and takes a while per batch."""
+
+    def __init__(self, delay: float = 0.0):
+        super().__init__()
+        self.delay = delay
+        self.batch_sizes = []
+
+    def sign_many(self, payloads):
+        self.batch_sizes.append(len(payloads))
+        time.sleep(self.delay)
+        return super().sign_many(payloads)
+
+
+class FailingAdapter(FakeAdapter):
+    """FakeAdapter whose backend refuses to sign."""
+
+    def sign_many(self, payloads):
+        raise RuntimeError("token removed")
+
+
+class RunningAgent:
+    """A KeyAgent serving from its own event loop thread."""
+
+    def __init__(self, adapter, path, **kwargs):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        self.agent = KeyAgent(adapter, path, **kwargs)
+        self._call(self.agent.start())
+
+    def _call(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout=5)
+
+    def stop(self):
+        if self.loop.is_closed():
+            return
+        self._call(self.agent.close())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout=5)
+        self.loop.close()
+
+
+class TestKeyAgent(unittest.TestCase):
+    """Tests for KeyAgent and AgentCryptoAdapter."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.path = os.path.join(self.tmpdir.name, "agent.sock")
+
+    def start(self, adapter, **kwargs):
+        running = RunningAgent(adapter, self.path, **kwargs)
+        self.addCleanup(running.stop)
+        return running
+
+    def client(self):
+        client = AgentCryptoAdapter(self.path, timeout=5)
+        self.addCleanup(client.close)
+        return client
+
+    def test_round_trip_with_software_key(self):
+        """Test that agent signatures verify with the software backend and vice versa."""
+        local = PycaCryptoAdapter.from_private_key(Ed25519PrivateKey.generate())
+        self.start(local)
+        client = self.client()
+        pubkey = client.public_key_b64()
+        self.assertEqual(pubkey, local.public_key_b64())
+
+        payload = {"project_id": "p1", "n": 1}
+        signature = client.sign(payload)
+        self.assertTrue(local.verify(payload, signature, pubkey))
+        self.assertTrue(client.verify(payload, signature, pubkey))
+        self.assertFalse(client.verify({"project_id": "p1", "n": 2}, signature, pubkey))
+
+        digest = as_canonical(payload).digest
+        digest_signature = client.sign_digest(digest)
+        self.assertTrue(local.verify_digest(digest, digest_signature, pubkey))
+        self.assertTrue(client.verify_digest(digest, digest_signature, pubkey))
+        self.assertFalse(client.verify(payload, digest_signature, pubkey))
+
+    def test_batch_calls(self):
+        """Test that sign_many and verify_many keep order over one connection."""
+        backend = FakeAdapter()
+        self.start(backend)
+        client = self.client()
+        payloads = [{"n": i} for i in range(500)]
+        signatures = client.sign_many(payloads)
+        self.assertEqual(signatures, [backend.sign(p) for p in payloads])
+
+        pubkey = client.public_key_b64()
+        items = [(p, s, pubkey) for p, s in zip(payloads, signatures)]
+        items[7] = (payloads[8], signatures[7], pubkey)
+        valid = client.verify_many(items)
+        self.assertEqual(valid.count(False), 1)
+        self.assertFalse(valid[7])
+
+    def test_concurrent_clients_are_batched(self):
+        """Test that requests from many clients reach the backend as batches."""
+        backend = BatchRecordingAdapter(delay=0.02)
+        running = self.start(backend, workers=1)
+        clients = [self.client() for _ in range(8)]
+        results = {}
+
+        def work(index, client):
+            results[index] = [client.sign({"client": index, "n": n}) for n in range(10)]
+
+        threads = [threading.Thread(target=work, args=(i, c)) for i, c in enumerate(clients)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for index in range(len(clients)):
+            self.assertEqual(results[index], [backend.sign({"client": index, "n": n}) for n in range(10)])
+        self.assertEqual(sum(backend.batch_sizes), 80)
+        self.assertEqual(running.agent.requests, 80)
+        self.assertLess(running.agent.batches, 80)
+        self.assertGreater(max(backend.batch_sizes), 1)
+
+    def test_backend_error_reported(self):
+        """Test that a backend failure raises AgentError in the client."""
+        self.start(FailingAdapter())
+        client = self.client()
+        with self.assertRaises(AgentError) as ctx:
+            client.sign({"n": 1})
+        self.assertIn("token removed", str(ctx.exception))
+        # The connection stays usable
+        self.assertTrue(client.public_key_b64())
+
+    def test_bad_request_rejected(self):
+        """Test that malformed lines get an error response, not a dropped connection."""
+        self.start(FakeAdapter())
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(self.path)
+            sock.sendall(b'{"id": 1, "op": "sign", "message": "not base64!"}\n{"id": 2, "op": "public_key"}\n')
+            reader = sock.makefile("rb")
+            self.assertIn(b'"error"', reader.readline())
+            self.assertIn(b'"result"', reader.readline())
+
+    def test_socket_permissions(self):
+        """Test that only the owner can connect to the socket."""
+        self.start(FakeAdapter())
+        self.assertEqual(os.stat(self.path).st_mode & 0o777, 0o600)
+
+    def test_no_agent(self):
+        """Test that a missing agent is reported when the adapter is created."""
+        with self.assertRaises(AgentError):
+            AgentCryptoAdapter(self.path)
+
+    def test_second_agent_refused_and_stale_socket_replaced(self):
+        """Test socket takeover rules."""
+        running = self.start(FakeAdapter())
+        with self.assertRaises(AgentError):
+            asyncio.run(KeyAgent(FakeAdapter(), self.path).start())
+
+        # A socket file nobody listens on is replaced
+        running.stop()
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(self.path)
+        stale.close()
+        self.start(FakeAdapter())
+        self.assertTrue(self.client().sign({"n": 1}))
+
+    def test_reconnect_after_agent_restart(self):
+        """Test that the client reconnects after the agent goes away and comes back."""
+        backend = FakeAdapter()
+        running = RunningAgent(backend, self.path)
+        client = self.client()
+        self.assertEqual(client.sign({"n": 1}), backend.sign({"n": 1}))
+        running.stop()
+
+        with self.assertRaises(AgentError):
+            client.sign({"n": 2})
+        self.start(backend)
+        self.assertEqual(client.sign({"n": 2}), backend.sign({"n": 2}))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+"""
+Unit tests for batch signing and verification.
+"""
+
+import unittest
+from unittest import mock
+
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+
+from dao_cli.crypto import adapter_pycacrypto
+from dao_cli.crypto.adapter_pycacrypto import PycaCryptoAdapter
+from dao_cli.crypto.tests.fake_adapter import FakeAdapter
+from dao_cli.crypto.verify_cache import VerificationCache
+
+
+class TestPycaBatch(unittest.TestCase):
+    """Tests for PycaCryptoAdapter.sign_many and verify_many."""
+
+    def setUp(self):
+        self.adapters = [PycaCryptoAdapter.from_private_key(Ed25519PrivateKey.generate()) for _ in range(3)]
+        self.payloads = [{"project_id": f"p{i}", "n": i} for i in range(20)]
+
+    def items(self):
+        items = []
+        for i, payload in enumerate(self.payloads):
+            adapter = self.adapters[i % len(self.adapters)]
+            items.append((payload, adapter.sign(payload), adapter.public_key_b64()))
+        return items
+
+    def test_sign_many_matches_sign(self):
+        """Test that batch signatures are the single-payload signatures, in order."""
+        adapter = self.adapters[0]
+        self.assertEqual(adapter.sign_many(self.payloads), [adapter.sign(p) for p in self.payloads])
+        self.assertEqual(adapter.sign_many([]), [])
+
+    def test_verify_many_flags_bad_items(self):
+        """Test that only tampered or malformed items fail."""
+        items = self.items()
+        items[3] = (dict(items[3][0], n=-1), items[3][1], items[3][2])
+        items[5] = (items[5][0], items[5][1], "not-a-key")
+        items[7] = (items[7][0], "AAAA", items[7][2])
+        expected = [i not in (3, 5, 7) for i in range(len(items))]
+        self.assertEqual(self.adapters[0].verify_many(items), expected)
+
+    def test_parallel_path(self):
+        """Test that the thread-pool path returns results in input order."""
+        items = self.items()
+        items[11] = (dict(items[11][0], n=-1), items[11][1], items[11][2])
+        with mock.patch.object(adapter_pycacrypto, "BATCH_MIN_PARALLEL", 1), \
+                mock.patch.object(adapter_pycacrypto, "BATCH_WORKERS", 4):
+            results = self.adapters[0].verify_many(items)
+            signatures = self.adapters[0].sign_many(self.payloads)
+        self.assertEqual(results, [i != 11 for i in range(len(items))])
+        self.assertEqual(signatures, [self.adapters[0].sign(p) for p in self.payloads])
+
+
+class TestCacheBatch(unittest.TestCase):
+    """Tests for VerificationCache.verify_many."""
+
+    def test_only_misses_reach_adapter(self):
+        """Test that cached triples are answered without the adapter."""
+        adapter = FakeAdapter()
+        pubkey = adapter.public_key_b64()
+        payloads = [{"n": i} for i in range(4)]
+        items = [(p, adapter.sign(p), pubkey) for p in payloads]
+        items.append(({"n": 99}, items[0][1], pubkey))
+
+        cache = VerificationCache()
+        cache.verify(adapter, *items[0])
+        self.assertEqual(cache.verify_many(adapter, items), [True, True, True, True, False])
+        self.assertEqual(adapter.batch_calls, 1)
+        self.assertEqual(adapter.verify_calls, 1 + 4)
+
+        self.assertEqual(cache.verify_many(adapter, items[:4]), [True] * 4)
+        self.assertEqual(adapter.batch_calls, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+"""
+Unit tests for canonical JSON encoding and hash-then-sign.
+"""
+
+import json
+import unittest
+from unittest import mock
+
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+
+from dao_cli.crypto import canonical
+from dao_cli.crypto.adapter_pycacrypto import PycaCryptoAdapter
+from dao_cli.crypto.canonical import Canonical, canonical_bytes, jcs_bytes
+from dao_cli.crypto.tests.fake_adapter import FakeAdapter
+from dao_cli.crypto.verify_cache import VerificationCache
+
+PAYLOADS = [
+    {"project_id": "p1", "tasks": [{"id": 1, "status": "open", "deps": []}], "public_key": None},
+    {"z": 1, "a": {"y": False, "b": True}},
+    {"text": "café ☃ \x7f \x00\n\t\"\\/"},
+    {"floats": [2.5, 1e16, 1e-7, 0.1, -0.0, 1.0]},
+    {"big": 2 ** 70},
+    {1: "int key", 2: "another"},
+]
+
+
+def legacy(payload):
+    return json.dumps(payload, separators=(',', ':'), sort_keys=True).encode()
+
+
+class TestCanonicalBytes(unittest.TestCase):
+    """Tests for the legacy-compatible encoding."""
+
+    def test_matches_json_dumps(self):
+        """Test byte-identical output to the historical encoding."""
+        for payload in PAYLOADS:
+            self.assertEqual(canonical_bytes(payload), legacy(payload), payload)
+
+    def test_matches_without_orjson(self):
+        """Test the pure-Python path."""
+        with mock.patch.object(canonical, "orjson", None):
+            for payload in PAYLOADS:
+                self.assertEqual(canonical_bytes(payload), legacy(payload), payload)
+
+    def test_non_finite_floats_do_not_collide_with_null(self):
+        """Test that NaN and Infinity encode as json.dumps does on both paths, never as null."""
+        for payload in (json.loads('{"x":NaN}'), {"x": float("inf")}, {"x": [1, float("-inf")]}):
+            expected = legacy(payload)
+            self.assertNotIn(b"null", expected)
+            self.assertEqual(canonical_bytes(payload), expected, payload)
+            with mock.patch.object(canonical, "orjson", None):
+                self.assertEqual(canonical_bytes(payload), expected, payload)
+        self.assertNotEqual(canonical_bytes(json.loads('{"x":NaN}')), canonical_bytes({"x": None}))
+
+    def test_canonical_caches_encoding_and_digest(self):
+        """Test that a Canonical serializes and hashes only once."""
+        wrapped = Canonical(PAYLOADS[0])
+        with mock.patch.object(canonical, "canonical_bytes", wraps=canonical_bytes) as encode:
+            first = wrapped.digest
+            self.assertEqual(wrapped.bytes, legacy(PAYLOADS[0]))
+            self.assertIs(wrapped.digest, first)
+            self.assertEqual(encode.call_count, 1)
+
+
+class TestJcs(unittest.TestCase):
+    """Tests for RFC 8785 canonicalization."""
+
+    def test_rfc8785_numbers(self):
+        """Test the number serialization sample from RFC 8785 section 3.2.2.3."""
+        numbers = [333333333.33333329, 1E30, 4.50, 2e-3, 0.000000000000000000000000001]
+        self.assertEqual(jcs_bytes({"numbers": numbers}),
+                         b'{"numbers":[333333333.3333333,1e+30,4.5,0.002,1e-27]}')
+
+    def test_rfc8785_key_order(self):
+        """Test UTF-16 code unit key ordering from RFC 8785 section 3.2.3."""
+        keys = ["€", "\r", "דּ", "1", "\U0001f600", "\u0080", "ö"]
+        encoded = jcs_bytes({k: i for i, k in enumerate(keys)}).decode("utf-8")
+        order = [k for k in sorted(keys, key=lambda k: encoded.index(json.dumps(k, ensure_ascii=False)))]
+        self.assertEqual(order, ["\r", "1", "\u0080", "ö", "€", "\U0001f600", "דּ"])
+
+    def test_strings_and_literals(self):
+        """Test minimal escaping and UTF-8 output."""
+        self.assertEqual(jcs_bytes(["€\x1f\n\"", None, True, 10 ** 15]),
+                         '["€\\u001f\\n\\"",null,true,1000000000000000]'.encode("utf-8"))
+
+    def test_matches_legacy_for_ascii_integers(self):
+        """Test that both encodings agree when no floats or non-ASCII are involved."""
+        self.assertEqual(jcs_bytes(PAYLOADS[0]), canonical_bytes(PAYLOADS[0]))
+
+    def test_rejects_unrepresentable(self):
+        """Test that NaN, huge integers and non-string keys are refused."""
+        for payload in ({"x": float("nan")}, {"x": 2 ** 60}):
+            with self.assertRaises(ValueError):
+                jcs_bytes(payload)
+        with self.assertRaises(TypeError):
+            jcs_bytes({1: "x"})
+
+
+class TestHashThenSign(unittest.TestCase):
+    """Tests for sign_digest/verify_digest."""
+
+    def test_pyca_round_trip(self):
+        """Test that digest signatures verify and are distinct from payload signatures."""
+        adapter = PycaCryptoAdapter.from_private_key(Ed25519PrivateKey.generate())
+        wrapped = Canonical(PAYLOADS[0])
+        signature = adapter.sign_digest(wrapped.digest)
+        pubkey = adapter.public_key_b64()
+        self.assertTrue(adapter.verify_digest(wrapped.digest, signature, pubkey))
+        self.assertFalse(adapter.verify(wrapped, signature, pubkey))
+        self.assertFalse(adapter.verify_digest(Canonical(PAYLOADS[1]).digest, signature, pubkey))
+
+    def test_cache_keeps_schemes_apart(self):
+        """Test that cached digest verifications are keyed separately."""
+        adapter = FakeAdapter()
+        pubkey = adapter.public_key_b64()
+        wrapped = Canonical(PAYLOADS[1])
+        cache = VerificationCache()
+        signature = adapter.sign_digest(wrapped.digest)
+        self.assertTrue(cache.verify_digest(adapter, wrapped.digest, signature, pubkey))
+        self.assertTrue(cache.verify_digest(adapter, wrapped.digest, signature, pubkey))
+        self.assertFalse(cache.verify(adapter, wrapped, signature, pubkey))
+        self.assertEqual(cache.hits, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
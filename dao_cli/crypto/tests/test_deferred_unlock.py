@@ -0,0 +1,120 @@
+"""
+Unit tests for deferred key unlocking in PycaCryptoAdapter.
+"""
+
+import asyncio
+import os
+import secrets
+import tempfile
+import unittest
+from unittest import mock
+
+from dao_cli import crypto
+from dao_cli.crypto.adapter_pycacrypto import PycaCryptoAdapter
+from dao_cli.crypto.constants import DAO_KEY_PASSPHRASE
+from dao_cli.crypto.unlock_cache import KeyringUnlockCache
+
+
+class MemoryUnlockCache:
+    """In-memory stand-in for the kernel keyring cache."""
+
+    def __init__(self):
+        self.secrets = {}
+
+    def get(self, name):
+        return self.secrets.get(name)
+
+    def put(self, name, secret):
+        self.secrets[name] = secret
+        return True
+
+    def clear(self, name):
+        self.secrets.pop(name, None)
+
+
+class TestDeferredUnlock(unittest.TestCase):
+    """Tests for lazy private key loading and the unlock cache."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.key_path = os.path.join(self.tmpdir.name, "ed25519", "priv.pem")
+        self.cache = MemoryUnlockCache()
+        env = mock.patch.dict(os.environ, {DAO_KEY_PASSPHRASE: "correct horse"})
+        env.start()
+        self.addCleanup(env.stop)
+        # Create the key store (passphrase from the environment, no prompt)
+        with mock.patch("getpass.getpass", side_effect=AssertionError("prompted")):
+            self.signer = PycaCryptoAdapter(self.key_path, unlock_cache=MemoryUnlockCache())
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_verify_without_unlock(self):
+        """Test that verification never decrypts the private key."""
+        payload = {"n": 1}
+        signature = self.signer.sign(payload)
+        with mock.patch.dict(os.environ, {DAO_KEY_PASSPHRASE: "wrong"}):
+            adapter = PycaCryptoAdapter(self.key_path, unlock_cache=self.cache)
+            self.assertFalse(adapter.unlocked)
+            self.assertEqual(adapter.public_key_b64(), self.signer.public_key_b64())
+            self.assertTrue(adapter.verify(payload, signature, adapter.public_key_b64()))
+            self.assertFalse(adapter.unlocked)
+            with self.assertRaises(ValueError):
+                adapter.sign(payload)
+
+    def test_unlock_on_first_sign_and_cache(self):
+        """Test that the first signature unlocks and later adapters reuse the cached key."""
+        adapter = PycaCryptoAdapter(self.key_path, unlock_cache=self.cache)
+        self.assertTrue(adapter.verify({"n": 2}, adapter.sign({"n": 2}), adapter.public_key_b64()))
+        self.assertTrue(adapter.unlocked)
+        self.assertEqual(len(self.cache.secrets), 1)
+
+        with mock.patch.dict(os.environ, {DAO_KEY_PASSPHRASE: "wrong"}):
+            second = PycaCryptoAdapter(self.key_path, unlock_cache=self.cache)
+            second.unlock()
+            self.assertTrue(second.unlocked)
+
+    def test_mismatched_cache_entry_ignored(self):
+        """Test that a cached key for a different public key is discarded."""
+        adapter = PycaCryptoAdapter(self.key_path, unlock_cache=self.cache)
+        self.cache.secrets[adapter._cache_name()] = b"\x01" * 32
+        adapter.unlock()
+        self.assertEqual(adapter.sign({"n": 3}), self.signer.sign({"n": 3}))
+        self.assertNotEqual(self.cache.secrets[adapter._cache_name()], b"\x01" * 32)
+
+
+@unittest.skipUnless(KeyringUnlockCache(ttl=5).available, "kernel keyring not available")
+class TestKeyringUnlockCache(unittest.TestCase):
+    """Tests for KeyringUnlockCache against the real user-session keyring."""
+
+    def test_round_trip(self):
+        """Test storing, reading and clearing a secret."""
+        cache = KeyringUnlockCache(ttl=5)
+        name = f"dao-test:{secrets.token_hex(8)}"
+        self.assertTrue(cache.put(name, b"\x00secret"))
+        self.assertEqual(cache.get(name), b"\x00secret")
+        cache.clear(name)
+        self.assertIsNone(cache.get(name))
+
+    def test_disabled(self):
+        """Test that a zero TTL disables the cache."""
+        cache = KeyringUnlockCache(ttl=0)
+        self.assertFalse(cache.available)
+        self.assertFalse(cache.put("dao-test:disabled", b"x"))
+
+
+class TestGetAdapterAsync(unittest.TestCase):
+    """Tests for get_adapter_async."""
+
+    def test_runs_off_loop(self):
+        """Test that the adapter is created in an executor and then reused."""
+        sentinel = object()
+        with mock.patch.object(crypto, "_adapter", None), \
+                mock.patch.object(crypto, "_create_adapter", return_value=sentinel) as create:
+            self.assertIs(asyncio.run(crypto.get_adapter_async()), sentinel)
+            self.assertIs(asyncio.run(crypto.get_adapter_async()), sentinel)
+            self.assertEqual(create.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
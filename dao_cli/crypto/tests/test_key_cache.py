@@ -0,0 +1,75 @@
+"""
+Unit tests for the parsed public-key cache.
+"""
+
+import unittest
+
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+
+from dao_cli.crypto.adapter_pycacrypto import PycaCryptoAdapter
+from dao_cli.crypto.key_cache import PublicKeyCache
+
+
+class TestPublicKeyCache(unittest.TestCase):
+    """Tests for PublicKeyCache."""
+
+    def setUp(self):
+        self.loads = []
+
+        def loader(pubkey):
+            if pubkey == "bad":
+                raise ValueError("malformed key")
+            self.loads.append(pubkey)
+            return object()
+
+        self.cache = PublicKeyCache(loader, max_entries=2)
+
+    def test_hits_and_misses(self):
+        """Test that a key is parsed once and then served from the cache."""
+        first = self.cache.get("a")
+        self.assertIs(self.cache.get("a"), first)
+        self.assertEqual(self.loads, ["a"])
+        self.assertEqual(self.cache.stats(), {"hits": 1, "misses": 1, "size": 1})
+
+    def test_lru_eviction(self):
+        """Test that the least recently used key is evicted first."""
+        self.cache.get("a")
+        self.cache.get("b")
+        self.cache.get("a")
+        self.cache.get("c")  # evicts b
+        self.cache.get("a")
+        self.cache.get("b")
+        self.assertEqual(self.loads, ["a", "b", "c", "b"])
+
+    def test_malformed_keys_not_cached(self):
+        """Test that parse failures raise every time and take no slot."""
+        for _ in range(2):
+            with self.assertRaises(ValueError):
+                self.cache.get("bad")
+        self.assertEqual(len(self.cache), 0)
+
+
+class TestAdapterKeyCache(unittest.TestCase):
+    """Tests for the key cache inside PycaCryptoAdapter."""
+
+    def test_verify_reuses_parsed_key(self):
+        """Test that repeated verifications against one key parse it once."""
+        signer = PycaCryptoAdapter.from_private_key(Ed25519PrivateKey.generate())
+        verifier = PycaCryptoAdapter.from_private_key(Ed25519PrivateKey.generate())
+        pubkey = signer.public_key_b64()
+        for i in range(5):
+            payload = {"n": i}
+            self.assertTrue(verifier.verify(payload, signer.sign(payload), pubkey))
+        self.assertEqual((verifier.key_cache.misses, verifier.key_cache.hits), (1, 4))
+        self.assertFalse(verifier.verify({"n": 0}, signer.sign({"n": 0}), "bad"))
+
+    def test_own_key_preloaded(self):
+        """Test that the adapter's own key never needs parsing."""
+        adapter = PycaCryptoAdapter.from_private_key(Ed25519PrivateKey.generate())
+        payload = {"n": 1}
+        self.assertTrue(adapter.verify(payload, adapter.sign(payload), adapter.public_key_b64()))
+        self.assertEqual(adapter.key_cache.misses, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
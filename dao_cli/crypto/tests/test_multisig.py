@@ -0,0 +1,126 @@
+"""
+Unit tests for threshold verification of cosignatures.
+"""
+
+import unittest
+
+from dao_cli.crypto.canonical import Canonical
+from dao_cli.crypto.multisig import HolderKeyIndex, cosign, verify_threshold
+from dao_cli.crypto.tests.fake_adapter import FakeAdapter
+
+
+class CountingVerifier:
+    """Batch verifier that records each batch it is given."""
+
+    def __init__(self):
+        self.adapter = FakeAdapter()
+        self.batches = []
+
+    def __call__(self, items):
+        self.batches.append(len(items))
+        return self.adapter.verify_many(items)
+
+
+class TestMultisig(unittest.TestCase):
+    """Tests for HolderKeyIndex and verify_threshold."""
+
+    def setUp(self):
+        self.signers = {name: FakeAdapter(key=name.encode()) for name in ("alice", "bob", "carol", "dave")}
+        self.index = HolderKeyIndex(
+            [{"anon_id": name, "public_key": adapter.public_key_b64()} for name, adapter in self.signers.items()]
+            + [{"anon_id": "nokey"}]
+        )
+        self.holders = list(self.signers)
+        self.message = Canonical({"project_id": "p1", "epoch": "first frost"})
+        self.verifier = CountingVerifier()
+
+    def cosignatures(self, *names):
+        return [cosign(self.signers[name], self.message, name) for name in names]
+
+    def check(self, cosignatures, threshold, **kwargs):
+        return verify_threshold(self.message, cosignatures, self.holders, threshold, self.index,
+                                self.verifier, **kwargs)
+
+    def test_index(self):
+        """Test lookups in both directions and skipping of keyless records."""
+        self.assertEqual(len(self.index), 4)
+        self.assertEqual(self.index.key("bob"), self.signers["bob"].public_key_b64())
+        self.assertIsNone(self.index.key("nokey"))
+        self.assertEqual(self.index.record_for_key(self.signers["carol"].public_key_b64())["anon_id"], "carol")
+
+    def test_threshold_met_in_one_batch(self):
+        """Test that k valid cosignatures are verified in a single batch of k, ignoring the rest."""
+        result = self.check(self.cosignatures("alice", "bob", "carol", "dave"), 2)
+        self.assertTrue(result)
+        self.assertEqual(result.approvals, ["alice", "bob"])
+        self.assertEqual(self.verifier.batches, [2])
+        self.assertEqual(result.checked, 2)
+
+    def test_invalid_cosignature_replaced(self):
+        """Test that a bad cosignature is made up for from the remaining ones."""
+        cosignatures = self.cosignatures("alice", "bob", "carol")
+        cosignatures[0]["signature"] = cosignatures[1]["signature"]
+        result = self.check(cosignatures, 2)
+        self.assertTrue(result)
+        self.assertEqual(result.approvals, ["bob", "carol"])
+        self.assertEqual(self.verifier.batches, [2, 1])
+
+    def test_short_circuit_when_unreachable(self):
+        """Test that no signatures are verified when too few holders signed."""
+        result = self.check(self.cosignatures("alice"), 3)
+        self.assertFalse(result)
+        self.assertEqual(self.verifier.batches, [])
+
+    def test_ineligible_cosignatures(self):
+        """Test that outsiders, duplicates, unknown keys and substituted keys do not count."""
+        outsider = FakeAdapter(key=b"mallory")
+        cosignatures = self.cosignatures("alice", "alice")
+        cosignatures.append(cosign(outsider, self.message, "mallory"))
+        cosignatures.append(cosign(outsider, self.message, "bob"))  # bob's name, mallory's key
+        cosignatures.append({"signer": "nokey", "signature": "AAAA"})
+        holders = self.holders + ["nokey"]
+        # Only alice is eligible, so two approvals are out of reach without verifying anything
+        self.assertFalse(verify_threshold(self.message, cosignatures, holders, 2, self.index, self.verifier))
+        self.assertEqual(self.verifier.batches, [])
+        result = verify_threshold(self.message, cosignatures, holders, 1, self.index, self.verifier)
+        self.assertEqual(result.approvals, ["alice"])
+        self.assertEqual(self.verifier.batches, [1])
+
+    def test_pre_approved_author(self):
+        """Test that an already verified author counts once towards the threshold."""
+        result = self.check(self.cosignatures("alice", "bob"), 2, approved=["alice"])
+        self.assertTrue(result)
+        self.assertEqual(result.approvals, ["alice", "bob"])
+        self.assertEqual(self.verifier.batches, [1])
+
+    def test_shared_key_approves_once(self):
+        """Test that holder ids backed by one key count as a single approval."""
+        alice_key = self.signers["alice"].public_key_b64()
+        self.index.add({"anon_id": "alias", "public_key": alice_key})
+        holders = ["alice", "alias", "bob"]
+        alias = cosign(self.signers["alice"], self.message, "alias")
+        result = verify_threshold(self.message, [alias], holders, 2, self.index, self.verifier, approved=["alice"])
+        self.assertFalse(result)
+        self.assertEqual(self.verifier.batches, [])
+        both = [cosign(self.signers["alice"], self.message, "alice"), alias]
+        self.assertEqual(verify_threshold(self.message, both, holders, 1, self.index, self.verifier).approvals,
+                         ["alice"])
+        self.assertIsNone(self.index.record_for_key(alice_key))
+        self.assertEqual(self.index.holders_for_key(alice_key), ["alice", "alias"])
+        self.assertEqual(self.index.record("alias")["public_key"], alice_key)
+
+    def test_hash_then_sign_message(self):
+        """Test cosignatures over a hash-then-sign message."""
+        message = Canonical(None, b"dao-sha256-sign/1\x00" + bytes(32))
+        cosignatures = [cosign(self.signers[name], message, name) for name in ("carol", "dave")]
+        self.assertTrue(verify_threshold(message, cosignatures, self.holders, 2, self.index, self.verifier))
+        self.assertFalse(self.check(cosignatures, 2))
+
+    def test_invalid_threshold(self):
+        """Test that a non-positive threshold is rejected."""
+        with self.assertRaises(ValueError):
+            self.check([], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
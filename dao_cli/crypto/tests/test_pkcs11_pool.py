@@ -0,0 +1,150 @@
+"""
+Unit tests for the PKCS#11 session pool.
+
+A small in-memory token stands in for an HSM; it tracks the shared login
+state the way a real PKCS#11 module does.
+"""
+
+import threading
+import unittest
+
+from pkcs11 import ObjectClass
+from pkcs11.exceptions import SessionHandleInvalid, UserAlreadyLoggedIn, UserNotLoggedIn
+
+from dao_cli.crypto.pkcs11_pool import Pkcs11SessionPool, PoolExhausted
+
+
+class FakeSession:
+    def __init__(self, token, logs_in):
+        self.token = token
+        self.logs_in = logs_in
+        self.closed = False
+        self.searches = 0
+
+    def get_objects(self, attrs):
+        self.searches += 1
+        yield ("key", attrs)
+
+    def close(self):
+        self.closed = True
+        if self.logs_in:
+            self.token.logged_in = False
+
+
+class FakeToken:
+    def __init__(self):
+        self.logged_in = False
+        self.sessions = []
+
+    def open(self, user_pin=None):
+        if user_pin is not None:
+            if self.logged_in:
+                raise UserAlreadyLoggedIn()
+            self.logged_in = True
+        session = FakeSession(self, user_pin is not None)
+        self.sessions.append(session)
+        return session
+
+
+class TestPkcs11SessionPool(unittest.TestCase):
+    """Tests for Pkcs11SessionPool."""
+
+    def setUp(self):
+        self.token = FakeToken()
+        self.pool = Pkcs11SessionPool(self.token, "1234", "dao-key", size=2, timeout=0.1)
+
+    def test_sessions_and_keys_are_reused(self):
+        """Test that repeated checkouts reuse one session and one key search."""
+        for _ in range(5):
+            with self.pool.session() as pooled:
+                pooled.key(ObjectClass.PRIVATE_KEY)
+        self.assertEqual(len(self.token.sessions), 1)
+        self.assertEqual(self.token.sessions[0].searches, 1)
+        self.assertEqual((self.pool.opened, self.pool.reused), (1, 4))
+
+    def test_only_first_session_logs_in(self):
+        """Test that concurrent sessions share a single login."""
+        with self.pool.session() as first, self.pool.session() as second:
+            self.assertTrue(first.logged_in)
+            self.assertFalse(second.logged_in)
+        self.assertTrue(self.token.logged_in)
+
+    def test_exhausted_pool_times_out(self):
+        """Test that checkout fails once every session is in use."""
+        with self.pool.session(), self.pool.session():
+            with self.assertRaises(PoolExhausted):
+                with self.pool.session():
+                    pass
+
+    def test_blocked_checkout_gets_released_session(self):
+        """Test that a waiting thread receives a session when one is returned."""
+        pool = Pkcs11SessionPool(self.token, "1234", "dao-key", size=1, timeout=5)
+        got = []
+        with pool.session() as held:
+            waiter = threading.Thread(target=lambda: got.append(pool.run(lambda p: p)))
+            waiter.start()
+            waiter.join(0.05)
+        waiter.join()
+        self.assertIs(got[0], held)
+
+    def test_relogin_after_session_loss(self):
+        """Test that run() resets the pool and retries on a fresh login."""
+        with self.pool.session():
+            pass
+        self.token.logged_in = False  # token reset behind our back
+        calls = []
+
+        def operation(pooled):
+            calls.append(pooled)
+            if len(calls) == 1:
+                raise UserNotLoggedIn()
+            return "signed"
+
+        self.assertEqual(self.pool.run(operation), "signed")
+        self.assertEqual(self.pool.resets, 1)
+        self.assertTrue(calls[0].session.closed)
+        self.assertTrue(calls[1].logged_in)
+        self.assertTrue(self.token.logged_in)
+
+    def test_login_holder_adopted_across_reset(self):
+        """Test that a login holder returned after a reset is kept, not closed under newer sessions."""
+        with self.pool.session() as holder:
+            self.pool.reset()
+            with self.pool.session() as newer:
+                self.assertFalse(newer.logged_in)
+        self.assertFalse(holder.session.closed)
+        self.assertTrue(self.token.logged_in)
+        with self.pool.session() as first, self.pool.session() as second:
+            self.assertEqual({first, second}, {holder, newer})
+        self.pool.close()
+        self.assertFalse(self.token.logged_in)
+
+    def test_stale_session_closed_when_login_renewed(self):
+        """Test that an old session is closed if the new generation logged in itself."""
+        with self.pool.session() as old:
+            self.pool.reset()
+            self.token.logged_in = False  # the reset lost the login
+            with self.pool.session() as newer:
+                self.assertTrue(newer.logged_in)
+        self.assertTrue(old.session.closed)
+
+    def test_second_loss_propagates(self):
+        """Test that run() retries only once."""
+        def operation(pooled):
+            raise SessionHandleInvalid()
+
+        with self.assertRaises(SessionHandleInvalid):
+            self.pool.run(operation)
+        self.assertEqual(self.pool.resets, 2)
+
+    def test_close_logs_out_last(self):
+        """Test that close() closes the logged-in session after the others."""
+        with self.pool.session(), self.pool.session():
+            pass
+        self.pool.close()
+        self.assertTrue(all(s.closed for s in self.token.sessions))
+        self.assertFalse(self.token.logged_in)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,195 @@
+"""
+Unit tests for the revocation index and revocation deltas.
+"""
+
+import json
+import os
+import tempfile
+import unittest
+
+from dao_cli.crypto.revocation import RevocationError, RevocationIndex, fingerprint
+from dao_cli.crypto.tests.fake_adapter import FakeAdapter
+from dao_cli.crypto.verify_cache import VerificationCache
+
+
+class TestRevocationIndex(unittest.TestCase):
+    """Tests for RevocationIndex."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.path = os.path.join(self.tmpdir.name, "revocations.jsonl")
+
+    def test_membership(self):
+        """Test that revoked signatures and keys are found and others are not."""
+        index = RevocationIndex(self.path)
+        self.assertTrue(index.revoke_signature("sig-a", "key-a", anon_id="alice"))
+        self.assertFalse(index.revoke_signature("sig-a", "key-a"))
+        self.assertTrue(index.revoke_key("key-b"))
+
+        self.assertTrue(index.is_revoked(signature="sig-a", pubkey="key-a"))
+        # A signature revocation is scoped to the key that made it
+        self.assertFalse(index.is_revoked(signature="sig-a", pubkey="key-c"))
+        self.assertFalse(index.is_revoked(signature="sig-a"))
+        self.assertTrue(index.is_revoked(signature="sig-x", pubkey="key-b"))
+        self.assertFalse(index.is_revoked(signature="sig-x", pubkey="key-a"))
+        # A signature fingerprint never matches as a key
+        self.assertFalse(index.is_revoked(pubkey="sig-a"))
+        self.assertEqual(len(index), 2)
+
+    def test_log_is_append_only_and_reloads(self):
+        """Test that entries persist, one appended line per revocation."""
+        index = RevocationIndex(self.path)
+        index.revoke_signature("sig-a", "key-a")
+        with open(self.path, "rb") as f:
+            first = f.read()
+        index.revoke_key("key-b")
+        with open(self.path, "rb") as f:
+            content = f.read()
+        self.assertTrue(content.startswith(first))
+        self.assertEqual(content.count(b"\n"), 2)
+
+        reloaded = RevocationIndex(self.path)
+        self.assertTrue(reloaded.is_revoked(signature="sig-a", pubkey="key-a"))
+        self.assertFalse(reloaded.is_revoked(signature="sig-a", pubkey="key-c"))
+        self.assertTrue(reloaded.is_revoked(pubkey="key-b"))
+        self.assertNotIn("sig-a", content.decode())
+
+    def test_refresh_and_partial_lines(self):
+        """Test that appends by another writer are picked up once complete."""
+        reader = RevocationIndex(self.path)
+        writer = RevocationIndex(self.path)
+        writer.revoke_signature("sig-a")
+        line = json.dumps({"kind": "signature", "fingerprint": fingerprint("sig-b")})
+        with open(self.path, "a") as f:
+            f.write(line[:10])
+        self.assertEqual(reader.refresh(), 1)
+        self.assertFalse(reader.is_revoked(signature="sig-b"))
+        with open(self.path, "a") as f:
+            f.write(line[10:] + "\n")
+        self.assertEqual(reader.refresh(), 1)
+        self.assertTrue(reader.is_revoked(signature="sig-b"))
+
+    def test_import_legacy(self):
+        """Test that revoked_links.json entries are imported once."""
+        legacy = os.path.join(self.tmpdir.name, "revoked_links.json")
+        with open(legacy, "w") as f:
+            json.dump([
+                {"anon_id": "alice", "revoked_link_signature": "sig-a", "revoked_at": "2024-01-01"},
+                {"anon_id": "bob", "revoked_link_signature": "", "revoked_public_key": "key-b"},
+            ], f)
+        index = RevocationIndex(self.path)
+        self.assertEqual(index.import_legacy(legacy), 2)
+        self.assertEqual(index.import_legacy(legacy), 0)
+        # Without a key the legacy signature revocation applies under any key
+        self.assertTrue(index.is_revoked(signature="sig-a", pubkey="key-c"))
+        self.assertTrue(index.is_revoked(pubkey="key-b"))
+        self.assertEqual(index.entries[0]["anon_id"], "alice")
+
+    def test_cache_tracks_revocations(self):
+        """Test that revocations drop matching verification cache entries."""
+        adapter = FakeAdapter()
+        pubkey = adapter.public_key_b64()
+        cache = VerificationCache()
+        signatures = [adapter.sign({"n": n}) for n in range(3)]
+        for n, signature in enumerate(signatures):
+            self.assertTrue(cache.verify(adapter, {"n": n}, signature, pubkey))
+
+        index = RevocationIndex()
+        index.revoke_signature(signatures[0], pubkey)
+        index.revoke_signature(signatures[1], "other-key")
+        self.assertEqual(cache.track_revocations(index), 1)
+        self.assertEqual(len(cache), 2)
+        index.revoke_key(pubkey)
+        self.assertEqual(len(cache), 0)
+
+
+class TestRevocationDelta(unittest.TestCase):
+    """Tests for exporting and applying revocation deltas."""
+
+    def setUp(self):
+        self.adapter = FakeAdapter(key=b"issuer")
+        self.source = RevocationIndex()
+        for n in range(5):
+            self.source.revoke_signature(f"sig-{n}", "key-0")
+        self.source.revoke_key("key-0")
+        self.issuers = {self.adapter.public_key_b64(): {fingerprint("key-0")}}
+
+    def apply(self, target, delta, issuers=None):
+        return target.apply_delta(delta, self.adapter.verify, self.issuers if issuers is None else issuers)
+
+    def test_round_trip(self):
+        """Test that a delta carries every revocation from its start position."""
+        target = RevocationIndex()
+        delta = self.source.export_delta(self.adapter)
+        self.assertEqual((delta["from"], delta["to"]), (0, 6))
+        self.assertEqual(self.apply(target, delta), 6)
+        self.assertEqual(self.apply(target, delta), 0)
+        self.assertTrue(target.is_revoked(signature="sig-4", pubkey="key-0"))
+        self.assertTrue(target.is_revoked(pubkey="key-0"))
+        self.assertEqual(target.entries[0]["issuer"], self.adapter.public_key_b64())
+
+        incremental = self.source.export_delta(self.adapter, since=4)
+        self.assertEqual(self.apply(RevocationIndex(), incremental), 2)
+
+    def test_delta_is_compact(self):
+        """Test that fingerprints are packed, not listed as hex strings."""
+        delta = self.source.export_delta(self.adapter)
+        self.assertLessEqual(len(delta["signatures"]), 4 * (5 * 32 + 2) // 3)
+
+    def test_tampered_delta_rejected(self):
+        """Test that modified or unsigned deltas raise RevocationError."""
+        delta = self.source.export_delta(self.adapter)
+        tampered = dict(delta, keys="")
+        with self.assertRaises(RevocationError):
+            self.apply(RevocationIndex(), tampered)
+        with self.assertRaises(RevocationError):
+            self.apply(RevocationIndex(), dict(delta, signature=""))
+        with self.assertRaises(RevocationError):
+            self.apply(RevocationIndex(), {"type": "delta"})
+
+    def test_issuer_must_be_known(self):
+        """Test that a validly self-signed delta from an unknown key is rejected."""
+        outsider = FakeAdapter(key=b"mallory")
+        delta = self.source.export_delta(outsider)
+        target = RevocationIndex()
+        with self.assertRaises(RevocationError):
+            target.apply_delta(delta, outsider.verify, self.issuers)
+        self.assertEqual(len(target), 0)
+
+    def test_key_revocations_need_authority(self):
+        """Test that an issuer revokes only its own key or keys it is authorized for."""
+        delta = self.source.export_delta(self.adapter)
+        target = RevocationIndex()
+        with self.assertRaises(RevocationError):
+            self.apply(target, delta, {self.adapter.public_key_b64(): set()})
+        self.assertEqual(len(target), 0)
+
+        own = RevocationIndex()
+        own.revoke_key(self.adapter.public_key_b64())
+        self.assertEqual(self.apply(target, own.export_delta(self.adapter), {self.adapter.public_key_b64(): set()}), 1)
+
+    def test_signature_revocations_need_authority(self):
+        """Test that a contributor cannot revoke signatures made by another contributor's key."""
+        alice, bob = FakeAdapter(key=b"alice"), FakeAdapter(key=b"bob")
+        issuers = {alice.public_key_b64(): set(), bob.public_key_b64(): set()}
+        source = RevocationIndex()
+        source.revoke_signature("bob-approval", bob.public_key_b64())
+        target = RevocationIndex()
+        with self.assertRaises(RevocationError):
+            target.apply_delta(source.export_delta(alice), alice.verify, issuers)
+        self.assertEqual(len(target), 0)
+
+        self.assertEqual(target.apply_delta(source.export_delta(bob), bob.verify, issuers), 1)
+        self.assertTrue(target.is_revoked(signature="bob-approval", pubkey=bob.public_key_b64()))
+
+    def test_unscoped_signatures_not_exported(self):
+        """Test that signature revocations without a key stay local."""
+        source = RevocationIndex()
+        source.revoke_signature("sig-local")
+        delta = source.export_delta(self.adapter)
+        self.assertEqual(self.apply(RevocationIndex(), delta), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+"""
+Unit tests for the signature verification cache.
+"""
+
+import os
+import tempfile
+import unittest
+
+from dao_cli.crypto.tests.fake_adapter import FakeAdapter
+from dao_cli.crypto.verify_cache import VerificationCache
+
+
+class TestVerificationCache(unittest.TestCase):
+    """Tests for VerificationCache."""
+
+    def setUp(self):
+        self.adapter = FakeAdapter()
+        self.pubkey = self.adapter.public_key_b64()
+        self.payload = {"project_id": "p1", "tasks": [1, 2, 3]}
+        self.signature = self.adapter.sign(self.payload)
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "verify_cache.json")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_repeat_verification_skips_adapter(self):
+        """Test that a second verification of the same triple is a cache hit."""
+        cache = VerificationCache()
+        self.assertTrue(cache.verify(self.adapter, self.payload, self.signature, self.pubkey))
+        self.assertTrue(cache.verify(self.adapter, dict(self.payload), self.signature, self.pubkey))
+        self.assertEqual(self.adapter.verify_calls, 1)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_failures_not_cached(self):
+        """Test that invalid signatures are re-checked every time."""
+        cache = VerificationCache()
+        tampered = dict(self.payload, project_id="p2")
+        self.assertFalse(cache.verify(self.adapter, tampered, self.signature, self.pubkey))
+        self.assertFalse(cache.verify(self.adapter, tampered, self.signature, self.pubkey))
+        self.assertEqual(self.adapter.verify_calls, 2)
+        self.assertEqual(len(cache), 0)
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted first."""
+        cache = VerificationCache(max_entries=2)
+        payloads = [{"n": i} for i in range(3)]
+        sigs = [self.adapter.sign(p) for p in payloads]
+        cache.verify(self.adapter, payloads[0], sigs[0], self.pubkey)
+        cache.verify(self.adapter, payloads[1], sigs[1], self.pubkey)
+        cache.verify(self.adapter, payloads[0], sigs[0], self.pubkey)  # refresh 0
+        cache.verify(self.adapter, payloads[2], sigs[2], self.pubkey)  # evicts 1
+
+        calls = self.adapter.verify_calls
+        cache.verify(self.adapter, payloads[0], sigs[0], self.pubkey)
+        self.assertEqual(self.adapter.verify_calls, calls)
+        cache.verify(self.adapter, payloads[1], sigs[1], self.pubkey)
+        self.assertEqual(self.adapter.verify_calls, calls + 1)
+
+    def test_persistence(self):
+        """Test that entries survive a save and reload."""
+        cache = VerificationCache(self.path)
+        cache.verify(self.adapter, self.payload, self.signature, self.pubkey)
+        cache.save()
+
+        reloaded = VerificationCache(self.path)
+        self.assertTrue(reloaded.verify(self.adapter, self.payload, self.signature, self.pubkey))
+        self.assertEqual(self.adapter.verify_calls, 1)
+
+    def test_invalidate_key_and_signature(self):
+        """Test explicit invalidation by public key and by signature."""
+        cache = VerificationCache()
+        cache.verify(self.adapter, self.payload, self.signature, self.pubkey)
+        self.assertEqual(cache.invalidate_signature(self.signature), 1)
+        cache.verify(self.adapter, self.payload, self.signature, self.pubkey)
+        self.assertEqual(cache.invalidate_key(self.pubkey), 1)
+        self.assertEqual(len(cache), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
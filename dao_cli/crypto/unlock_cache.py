@@ -0,0 +1,135 @@
+"""
+Kernel keyring cache for unlocked private keys.
+
+Decrypting the PEM key store is deliberately slow and needs the
+passphrase.  After a successful unlock the raw private key is parked in the
+Linux user-session keyring with a timeout, so CLI invocations within the
+timeout reuse it without prompting.  The kernel removes the key when the
+timeout expires or the login session ends.
+
+Keys in the user-session keyring are readable by the user's own processes
+only, which is the same trust boundary as ssh-agent.  Set
+DAO_UNLOCK_CACHE_TTL=0 to disable the cache.  On systems without
+libkeyutils (or without keyring support) the cache silently does nothing.
+"""
+
+import ctypes
+import ctypes.util
+import logging
+import os
+from typing import Optional
+
+from .constants import DAO_UNLOCK_CACHE_TTL, DEFAULT_UNLOCK_CACHE_TTL
+
+logger = logging.getLogger(__name__)
+
+# Special keyring id for the calling user's session keyring (keyutils.h)
+KEY_SPEC_USER_SESSION_KEYRING = -5
+
+_KEY_TYPE = b"user"
+
+_keyutils = None
+_libc = None
+
+
+def _load_keyutils():
+    """Load libkeyutils once; returns None where it is unavailable."""
+    global _keyutils, _libc
+    if _keyutils is None:
+        name = ctypes.util.find_library("keyutils")
+        if not name:
+            _keyutils = False
+            return None
+        try:
+            lib = ctypes.CDLL(name, use_errno=True)
+        except OSError:
+            _keyutils = False
+            return None
+        lib.add_key.argtypes = [ctypes.c_char_p, ctypes.c_char_p, ctypes.c_void_p, ctypes.c_size_t, ctypes.c_int32]
+        lib.add_key.restype = ctypes.c_int32
+        lib.keyctl_search.argtypes = [ctypes.c_int32, ctypes.c_char_p, ctypes.c_char_p, ctypes.c_int32]
+        lib.keyctl_search.restype = ctypes.c_long
+        lib.keyctl_read_alloc.argtypes = [ctypes.c_int32, ctypes.POINTER(ctypes.c_void_p)]
+        lib.keyctl_read_alloc.restype = ctypes.c_long
+        lib.keyctl_set_timeout.argtypes = [ctypes.c_int32, ctypes.c_uint]
+        lib.keyctl_set_timeout.restype = ctypes.c_long
+        lib.keyctl_invalidate.argtypes = [ctypes.c_int32]
+        lib.keyctl_invalidate.restype = ctypes.c_long
+        _libc = ctypes.CDLL(None)
+        _libc.free.argtypes = [ctypes.c_void_p]
+        _keyutils = lib
+    return _keyutils or None
+
+
+class KeyringUnlockCache:
+    """Store and fetch secrets in the user-session keyring with a timeout."""
+
+    def __init__(self, ttl: Optional[int] = None):
+        """
+        Initialize the cache.
+
+        Args:
+            ttl: Seconds a cached secret stays valid (default: DAO_UNLOCK_CACHE_TTL
+                or DEFAULT_UNLOCK_CACHE_TTL); 0 disables caching
+        """
+        if ttl is None:
+            ttl = int(os.environ.get(DAO_UNLOCK_CACHE_TTL, DEFAULT_UNLOCK_CACHE_TTL))
+        self.ttl = ttl
+        self._lib = _load_keyutils() if ttl > 0 else None
+
+    @property
+    def available(self) -> bool:
+        """Whether secrets can be cached on this system."""
+        return self._lib is not None
+
+    def _find(self, name: str) -> int:
+        return self._lib.keyctl_search(KEY_SPEC_USER_SESSION_KEYRING, _KEY_TYPE, name.encode(), 0)
+
+    def get(self, name: str) -> Optional[bytes]:
+        """
+        Fetch a cached secret.
+
+        Returns:
+            The secret, or None if it is not cached or has expired
+        """
+        if not self._lib:
+            return None
+        key_id = self._find(name)
+        if key_id < 0:
+            return None
+        buffer = ctypes.c_void_p()
+        length = self._lib.keyctl_read_alloc(key_id, ctypes.byref(buffer))
+        if length < 0:
+            return None
+        try:
+            return ctypes.string_at(buffer, length)
+        finally:
+            ctypes.memset(buffer, 0, length)
+            _libc.free(buffer)
+
+    def put(self, name: str, secret: bytes) -> bool:
+        """
+        Cache a secret for ``ttl`` seconds.
+
+        Returns:
+            True if the secret was stored
+        """
+        if not self._lib:
+            return False
+        key_id = self._lib.add_key(_KEY_TYPE, name.encode(), secret, len(secret), KEY_SPEC_USER_SESSION_KEYRING)
+        if key_id < 0:
+            logger.debug("add_key failed: errno %d", ctypes.get_errno())
+            return False
+        if self._lib.keyctl_set_timeout(key_id, self.ttl) < 0:
+            # Never leave a secret behind without an expiry
+            self._lib.keyctl_invalidate(key_id)
+            return False
+        return True
+
+    def clear(self, name: str) -> None:
+        """Remove a cached secret, if present."""
+        if not self._lib:
+            return
+        key_id = self._find(name)
+        if key_id >= 0:
+            self._lib.keyctl_invalidate(key_id)
@@ -0,0 +1,253 @@
+"""
+Persistent cache of successful signature verifications.
+
+Relaying nodes verify the same signed deltas many times.  Once a
+(payload, public key, signature) triple has verified, the cache records a
+digest of it so that later verifications of the same triple skip the
+public-key operation entirely.
+
+Only successful verifications are cached.  Entries are evicted in LRU order
+and can be invalidated per public key or per signature when a key or link
+signature is revoked.  The cache file is trusted like the rest of the local
+data directory: anyone able to write it could mark a signature as valid.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple
+
+from .adapter_base import CryptoAdapter, B64, VerifyItem
+from .canonical import Payload, as_canonical
+from .constants import DEFAULT_VERIFY_CACHE_SIZE
+from .revocation import KIND_KEY, UNSCOPED, RevocationIndex, fingerprint as _fingerprint
+
+# On-disk format version
+CACHE_VERSION = 1
+
+
+def payload_digest(payload: Payload) -> str:
+    """Return the hex SHA-256 of a payload's canonical JSON form."""
+    return as_canonical(payload).hexdigest
+
+
+class VerificationCache:
+    """
+    LRU cache of verified (payload digest, public key, signature) triples.
+
+    Each entry stores fingerprints of the public key and signature next to
+    the lookup key, which is what invalidate_key() and
+    invalidate_signature() match against.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = DEFAULT_VERIFY_CACHE_SIZE):
+        """
+        Initialize the cache, loading existing entries from ``path`` if given.
+
+        Args:
+            path: File used to persist the cache between runs (None for memory only)
+            max_entries: Maximum number of verified triples to keep
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[str, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._dirty = False
+        if path:
+            self.load()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def cache_key(digest: str, signature: B64, pubkey: B64) -> str:
+        """Return the lookup key for a verified triple."""
+        return hashlib.sha256(f"{digest}|{pubkey}|{signature}".encode()).hexdigest()
+
+    def verify(self, adapter: CryptoAdapter, payload: Payload, signature: B64, pubkey: B64) -> bool:
+        """
+        Verify a signature, consulting the cache first.
+
+        The payload is canonicalized once; the adapter reuses that encoding
+        on a cache miss.
+
+        Args:
+            adapter: Adapter used on a cache miss
+            payload: The dictionary (or Canonical) that was signed
+            signature: Base64-encoded signature
+            pubkey: Base64-encoded public key
+
+        Returns:
+            True if the signature is valid, False otherwise
+        """
+        canonical = as_canonical(payload)
+        return self._verify(self.cache_key(canonical.hexdigest, signature, pubkey),
+                            lambda: adapter.verify(canonical, signature, pubkey), signature, pubkey)
+
+    def verify_digest(self, adapter: CryptoAdapter, digest: bytes, signature: B64, pubkey: B64) -> bool:
+        """
+        Verify a hash-then-sign signature, consulting the cache first.
+
+        Args:
+            adapter: Adapter whose verify_digest() is used on a cache miss
+            digest: SHA-256 digest of the canonical payload
+            signature: Base64-encoded signature
+            pubkey: Base64-encoded public key
+
+        Returns:
+            True if the signature is valid, False otherwise
+        """
+        # Keyed apart from full-payload signatures over the same digest
+        return self._verify(self.cache_key(f"sha256:{digest.hex()}", signature, pubkey),
+                            lambda: adapter.verify_digest(digest, signature, pubkey), signature, pubkey)
+
+    def _verify(self, key: str, check: Callable[[], bool], signature: B64, pubkey: B64) -> bool:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True
+            self.misses += 1
+
+        if not check():
+            return False
+
+        with self._lock:
+            self._store(key, signature, pubkey)
+        return True
+
+    def verify_many(self, adapter: CryptoAdapter, items: Sequence[VerifyItem]) -> List[bool]:
+        """
+        Verify several signatures, sending only the cache misses to the adapter in one batch.
+
+        Args:
+            adapter: Adapter whose verify_many() handles the misses
+            items: (payload, signature, pubkey) triples
+
+        Returns:
+            One result per item, True if that signature is valid
+        """
+        items = [(as_canonical(payload), signature, pubkey) for payload, signature, pubkey in items]
+        keys = [self.cache_key(payload.hexdigest, signature, pubkey) for payload, signature, pubkey in items]
+        results: List[bool] = [False] * len(items)
+        pending = []
+        with self._lock:
+            for i, key in enumerate(keys):
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    results[i] = True
+                else:
+                    self.misses += 1
+                    pending.append(i)
+
+        if not pending:
+            return results
+        verified = adapter.verify_many([items[i] for i in pending])
+
+        with self._lock:
+            for i, ok in zip(pending, verified):
+                if ok:
+                    _, signature, pubkey = items[i]
+                    self._store(keys[i], signature, pubkey)
+                    results[i] = True
+        return results
+
+    def _store(self, key: str, signature: B64, pubkey: B64) -> None:
+        """Record a verified triple and evict down to max_entries. Caller holds the lock."""
+        self._entries[key] = (_fingerprint(pubkey), _fingerprint(signature))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        self._dirty = True
+
+    def invalidate_key(self, pubkey: B64) -> int:
+        """
+        Drop every entry verified with a public key.
+
+        Returns:
+            Number of entries removed
+        """
+        return self._invalidate(0, {_fingerprint(pubkey)})
+
+    def invalidate_signature(self, signature: B64) -> int:
+        """
+        Drop every entry for a signature.
+
+        Returns:
+            Number of entries removed
+        """
+        return self._invalidate(1, {_fingerprint(signature)})
+
+    def track_revocations(self, index: RevocationIndex) -> int:
+        """
+        Drop entries for everything ``index`` revokes, now and as revocations are added.
+
+        Returns:
+            Number of entries removed now
+        """
+        index.on_revoke(lambda kind, fp: self._invalidate(0, {fp}) if kind == KIND_KEY
+                        else self._invalidate_signatures({fp}))
+        return self._invalidate_signatures(index.signatures) + self._invalidate(0, index.keys)
+
+    def _invalidate(self, field: int, fingerprints: Iterable[str]) -> int:
+        """Remove entries whose key (0) or signature (1) fingerprint is listed."""
+        fingerprints = set(fingerprints)
+        if not fingerprints:
+            return 0
+        with self._lock:
+            stale = [k for k, entry in self._entries.items() if entry[field] in fingerprints]
+            for k in stale:
+                del self._entries[k]
+            if stale:
+                self._dirty = True
+        return len(stale)
+
+    def _invalidate_signatures(self, pairs: Iterable[Tuple[str, str]]) -> int:
+        """Remove entries whose (key, signature) fingerprints are listed, or whose signature is listed UNSCOPED."""
+        pairs = set(pairs)
+        if not pairs:
+            return 0
+        with self._lock:
+            stale = [k for k, entry in self._entries.items() if entry in pairs or (UNSCOPED, entry[1]) in pairs]
+            for k in stale:
+                del self._entries[k]
+            if stale:
+                self._dirty = True
+        return len(stale)
+
+    def load(self) -> None:
+        """Load entries from the cache file, ignoring a missing or unreadable file."""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") != CACHE_VERSION:
+            return
+        with self._lock:
+            self._entries = OrderedDict((k, (key_fp, sig_fp)) for k, key_fp, sig_fp in data.get("entries", []))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._dirty = False
+
+    def save(self) -> None:
+        """Write the cache file if entries changed since the last load or save."""
+        if not self.path or not self._dirty:
+            return
+        with self._lock:
+            data = {
+                "version": CACHE_VERSION,
+                "entries": [[k, key_fp, sig_fp] for k, (key_fp, sig_fp) in self._entries.items()],
+            }
+            self._dirty = False
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
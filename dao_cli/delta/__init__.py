@@ -0,0 +1,66 @@
+"""
+Project delta formats.
+
+This module provides the serialization formats used to share signed
+project updates between nodes.
+"""
+
+from .bundle import (
+    FORMAT as BUNDLE_FORMAT,
+    BundleError,
+    build_bundle,
+    extract_bundle,
+    verify_bundle,
+)
+from .hlc import (
+    DeltaLog,
+    HLCIndex,
+    HLCTimestamp,
+    HybridLogicalClock,
+    decode_delta_hlc,
+    delta_hlc,
+    sort_deltas,
+)
+from .pipeline import (
+    iter_delta_chunks,
+    receive_delta,
+    send_delta,
+    send_deltas,
+    sign_delta_stream,
+)
+from .stream import (
+    FORMAT as STREAM_FORMAT,
+    DeltaStreamError,
+    DeltaStreamReader,
+    encode_delta_stream,
+    iter_delta_stream,
+    prepare_delta_stream,
+    read_delta_stream,
+)
+
+__all__ = [
+    'BUNDLE_FORMAT',
+    'BundleError',
+    'build_bundle',
+    'extract_bundle',
+    'verify_bundle',
+    'DeltaLog',
+    'HLCIndex',
+    'HLCTimestamp',
+    'HybridLogicalClock',
+    'decode_delta_hlc',
+    'delta_hlc',
+    'sort_deltas',
+    'iter_delta_chunks',
+    'receive_delta',
+    'send_delta',
+    'send_deltas',
+    'sign_delta_stream',
+    'STREAM_FORMAT',
+    'DeltaStreamError',
+    'DeltaStreamReader',
+    'encode_delta_stream',
+    'iter_delta_stream',
+    'prepare_delta_stream',
+    'read_delta_stream',
+]
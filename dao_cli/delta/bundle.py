@@ -0,0 +1,252 @@
+"""
+Multi-project delta bundles.
+
+A bundle carries the deltas of many projects under a single signature.
+Each delta is a leaf of a Merkle tree and only the root is signed, so the
+public key and signature are sent once per bundle instead of once per
+project:
+
+    {
+        "type": "delta_bundle",
+        "format": "dao-delta-bundle/1",
+        "count": N,
+        "merkle_root": "<sha256>",
+        "public_key": "<b64>",
+        "signature": "<b64>",
+        "entries": [{"index": 0, "delta": {...}, "proof": [["R", "<sha256>"], ...]}, ...]
+    }
+
+Entries may be verified and applied independently: extract_bundle() cuts a
+bundle down to a subset of projects, attaching a Merkle inclusion proof to
+each remaining entry, and the result still verifies against the original
+signature.
+"""
+
+import hashlib
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from dao_cli.crypto.canonical import canonical_bytes
+
+# Format identifier carried in every bundle
+FORMAT = "dao-delta-bundle/1"
+
+# Domain-separation prefixes for leaf and interior nodes
+_LEAF_PREFIX = b"\x00"
+_NODE_PREFIX = b"\x01"
+
+# Signature verifier: (payload, signature, pubkey) -> bool
+Verifier = Callable[[Dict[str, Any], str, str], bool]
+
+
+class BundleError(ValueError):
+    """Raised when a bundle is malformed or fails verification."""
+    pass
+
+
+def leaf_hash(delta: Dict[str, Any]) -> bytes:
+    """Return the Merkle leaf hash of a delta's canonical JSON form."""
+    return hashlib.sha256(_LEAF_PREFIX + canonical_bytes(delta)).digest()
+
+
+def _node_hash(left: bytes, right: bytes) -> bytes:
+    """Return the hash of an interior node."""
+    return hashlib.sha256(_NODE_PREFIX + left + right).digest()
+
+
+def _tree_levels(leaves: List[bytes]) -> List[List[bytes]]:
+    """Build every level of the Merkle tree, leaves first; an unpaired node is carried up."""
+    levels = [leaves]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        parents = [_node_hash(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            parents.append(level[-1])
+        levels.append(parents)
+    return levels
+
+
+def merkle_root(leaves: List[bytes]) -> bytes:
+    """Return the Merkle root of a list of leaf hashes."""
+    if not leaves:
+        return hashlib.sha256(_NODE_PREFIX).digest()
+    return _tree_levels(leaves)[-1][0]
+
+
+def _proof(levels: List[List[bytes]], index: int) -> List[List[str]]:
+    """Return the inclusion proof for the leaf at ``index``."""
+    proof = []
+    for level in levels[:-1]:
+        sibling = index ^ 1
+        if sibling < len(level):
+            proof.append(["L" if sibling < index else "R", level[sibling].hex()])
+        index //= 2
+    return proof
+
+
+def _proof_sides(index: int, count: int) -> List[str]:
+    """Return the sides the proof steps of leaf ``index`` must take in a tree of ``count`` leaves."""
+    sides = []
+    while count > 1:
+        sibling = index ^ 1
+        if sibling < count:
+            sides.append("L" if sibling < index else "R")
+        index //= 2
+        count = (count + 1) // 2
+    return sides
+
+
+def _root_from_proof(leaf: bytes, proof: List[List[str]], index: int, count: int) -> bytes:
+    """
+    Recompute the Merkle root from a leaf and its inclusion proof.
+
+    The proof's left/right path must be the one of position ``index``, so an
+    entry cannot claim a different position than the one it proves.
+
+    Raises:
+        BundleError: If the proof is malformed or its path does not match ``index``
+    """
+    if not isinstance(index, int) or not isinstance(count, int) or not 0 <= index < count:
+        raise BundleError(f"Invalid entry index: {index!r}")
+    try:
+        steps = [(side, bytes.fromhex(sibling_hex)) for side, sibling_hex in proof]
+    except (TypeError, ValueError) as e:
+        raise BundleError(f"Malformed inclusion proof: {e}") from e
+    if [side for side, _ in steps] != _proof_sides(index, count):
+        raise BundleError(f"Inclusion proof does not match entry index {index}")
+    node = leaf
+    for side, sibling in steps:
+        if side == "L":
+            node = _node_hash(sibling, node)
+        else:
+            node = _node_hash(node, sibling)
+    return node
+
+
+def _envelope_payload(bundle: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the part of a bundle covered by its signature."""
+    return {
+        "type": "delta_bundle",
+        "format": bundle["format"],
+        "count": bundle["count"],
+        "merkle_root": bundle["merkle_root"],
+        "public_key": bundle["public_key"],
+    }
+
+
+def build_bundle(deltas: List[Dict[str, Any]], adapter) -> Dict[str, Any]:
+    """
+    Bundle several project deltas under one signature.
+
+    Args:
+        deltas: Unsigned project deltas; any signature or public_key fields are dropped
+        adapter: CryptoAdapter used to sign the Merkle root
+
+    Returns:
+        Dict[str, Any]: The signed bundle
+    """
+    unsigned = [{k: v for k, v in d.items() if k not in ("signature", "public_key")} for d in deltas]
+    root = merkle_root([leaf_hash(d) for d in unsigned])
+    bundle = {
+        "type": "delta_bundle",
+        "format": FORMAT,
+        "count": len(unsigned),
+        "merkle_root": root.hex(),
+        "public_key": adapter.public_key_b64(),
+    }
+    bundle["signature"] = adapter.sign(_envelope_payload(bundle))
+    bundle["entries"] = [{"index": i, "delta": d} for i, d in enumerate(unsigned)]
+    return bundle
+
+
+def extract_bundle(bundle: Dict[str, Any], project_ids: Iterable[str]) -> Dict[str, Any]:
+    """
+    Cut a bundle down to the given projects, keeping it verifiable.
+
+    Args:
+        bundle: A full or partial bundle
+        project_ids: Projects to keep
+
+    Returns:
+        Dict[str, Any]: A bundle holding only the selected entries, each with an inclusion proof
+
+    Raises:
+        BundleError: If the bundle is partial and an entry to keep has no proof
+    """
+    wanted = set(project_ids)
+    entries = bundle.get("entries", [])
+    levels = None
+    if len(entries) == bundle.get("count"):
+        levels = _tree_levels([leaf_hash(e["delta"]) for e in sorted(entries, key=lambda e: e["index"])])
+
+    kept = []
+    for entry in entries:
+        if entry["delta"].get("project_id") not in wanted:
+            continue
+        if levels is not None:
+            proof = _proof(levels, entry["index"])
+        elif "proof" in entry:
+            proof = entry["proof"]
+        else:
+            raise BundleError(f"Entry {entry['index']} has no inclusion proof")
+        kept.append({"index": entry["index"], "delta": entry["delta"], "proof": proof})
+
+    extracted = {k: v for k, v in bundle.items() if k != "entries"}
+    extracted["entries"] = kept
+    return extracted
+
+
+def verify_bundle(bundle: Dict[str, Any], verify: Verifier,
+                  project_ids: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+    """
+    Verify a bundle and return the deltas it authenticates.
+
+    The envelope signature is checked once; each selected entry is then
+    checked against the signed Merkle root, either via its inclusion proof
+    or, for a full bundle, by rebuilding the tree.
+
+    Args:
+        bundle: The bundle to verify
+        verify: Signature verifier for the envelope
+        project_ids: Optional subset of projects to verify and return
+
+    Returns:
+        List[Dict[str, Any]]: Verified deltas, in bundle order
+
+    Raises:
+        BundleError: If the envelope signature or any selected entry fails verification
+    """
+    if bundle.get("type") != "delta_bundle" or bundle.get("format") != FORMAT:
+        raise BundleError("Not a project delta bundle")
+    try:
+        payload = _envelope_payload(bundle)
+        root = bytes.fromhex(bundle["merkle_root"])
+    except (KeyError, ValueError) as e:
+        raise BundleError(f"Malformed bundle envelope: {e}") from e
+    signature = bundle.get("signature")
+    if not signature or not verify(payload, signature, bundle["public_key"]):
+        raise BundleError("Invalid or missing bundle signature")
+
+    entries = bundle.get("entries", [])
+    if project_ids is not None:
+        wanted = set(project_ids)
+        entries = [e for e in entries if e["delta"].get("project_id") in wanted]
+
+    full_root: Optional[bytes] = None
+    if any("proof" not in e for e in entries):
+        all_entries = sorted(bundle.get("entries", []), key=lambda e: e["index"])
+        if len(all_entries) != bundle["count"] or any(e["index"] != i for i, e in enumerate(all_entries)):
+            raise BundleError("Partial bundle entries must carry inclusion proofs")
+        full_root = merkle_root([leaf_hash(e["delta"]) for e in all_entries])
+
+    verified = []
+    for entry in entries:
+        if "proof" in entry:
+            ok = _root_from_proof(leaf_hash(entry["delta"]), entry["proof"], entry.get("index"),
+                                  bundle["count"]) == root
+        else:
+            ok = full_root == root
+        if not ok:
+            raise BundleError(f"Entry {entry['index']} does not match the signed Merkle root")
+        verified.append(entry["delta"])
+    return verified
+
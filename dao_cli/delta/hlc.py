@@ -0,0 +1,309 @@
+"""
+Hybrid logical clocks for ordering epochs and deltas.
+
+Epoch markers are human descriptions ("first frost") and cannot be compared
+by a machine.  Every epoch entry and delta therefore also carries a hybrid
+logical clock (HLC) timestamp: physical milliseconds plus a logical counter
+and the issuing node's id.  HLC timestamps respect causality across nodes,
+stay close to wall-clock time, and encode to fixed-width strings that sort
+lexicographically in timestamp order:
+
+    0001712345678901.00000.3f9c2a1b
+    (wall ms)        (logical) (node)
+"""
+
+import bisect
+import json
+import os
+import secrets
+import threading
+import time
+from typing import Any, Callable, Dict, Generic, Iterator, List, NamedTuple, Optional, Tuple, TypeVar
+
+# Remote timestamps further than this ahead of the local clock are rejected
+MAX_DRIFT_MS = 60 * 60 * 1000
+
+# Largest values that fit the fixed-width encoding; the clock moves on to the
+# next millisecond rather than overflow the logical counter
+MAX_WALL_MS = 10 ** 16 - 1
+MAX_LOGICAL = 10 ** 5 - 1
+
+T = TypeVar("T")
+
+
+class HLCTimestamp(NamedTuple):
+    """A single hybrid logical clock reading; tuples compare in causal order."""
+    wall_ms: int
+    logical: int
+    node: str
+
+    def encode(self) -> str:
+        """Encode as a fixed-width, lexicographically sortable string."""
+        return f"{self.wall_ms:016d}.{self.logical:05d}.{self.node}"
+
+    @classmethod
+    def decode(cls, text: str) -> "HLCTimestamp":
+        """
+        Decode a timestamp produced by encode().
+
+        Only the exact fixed-width form is accepted: a string that parses but
+        does not re-encode to itself (unpadded, signed or out of range) would
+        sort out of timestamp order and is rejected.
+
+        Raises:
+            ValueError: If the string is not a valid HLC timestamp
+        """
+        try:
+            wall, logical, node = text.split(".", 2)
+            stamp = cls(int(wall), int(logical), node)
+        except (AttributeError, ValueError) as e:
+            raise ValueError(f"Invalid HLC timestamp: {text!r}") from e
+        if (not node or not 0 <= stamp.wall_ms <= MAX_WALL_MS or not 0 <= stamp.logical <= MAX_LOGICAL
+                or stamp.encode() != text):
+            raise ValueError(f"Invalid HLC timestamp: {text!r}")
+        return stamp
+
+    def __str__(self) -> str:
+        return self.encode()
+
+
+class HybridLogicalClock:
+    """
+    Hybrid logical clock for one node.
+
+    The last issued timestamp and the node id are persisted so the clock
+    stays monotonic across restarts of the CLI.
+    """
+
+    def __init__(self, state_path: Optional[str] = None, node_id: Optional[str] = None,
+                 clock: Callable[[], float] = time.time):
+        """
+        Initialize the clock.
+
+        Args:
+            state_path: File holding the node id and last issued timestamp (None for memory only)
+            node_id: Node identifier; loaded from state or randomly generated if None
+            clock: Wall-clock source returning seconds
+        """
+        self._state_path = state_path
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._wall_ms = 0
+        self._logical = 0
+        self.node_id = node_id
+
+        if state_path and os.path.exists(state_path):
+            with open(state_path, "r") as f:
+                state = json.load(f)
+            self._wall_ms = state.get("wall_ms", 0)
+            self._logical = state.get("logical", 0)
+            self.node_id = self.node_id or state.get("node")
+        if not self.node_id:
+            self.node_id = secrets.token_hex(4)
+
+    def _physical_ms(self) -> int:
+        return int(self._clock() * 1000)
+
+    def now(self) -> HLCTimestamp:
+        """Issue a timestamp for a local event (creating an epoch or delta)."""
+        with self._lock:
+            physical = self._physical_ms()
+            if physical > self._wall_ms:
+                self._wall_ms, self._logical = physical, 0
+            else:
+                self._logical += 1
+            return self._issue()
+
+    def update(self, remote: HLCTimestamp) -> HLCTimestamp:
+        """
+        Merge a timestamp received from another node and issue a new local one.
+
+        Args:
+            remote: Timestamp carried by a received epoch or delta
+
+        Raises:
+            ValueError: If the remote timestamp is implausibly far in the future
+        """
+        with self._lock:
+            physical = self._physical_ms()
+            if remote.wall_ms - physical > MAX_DRIFT_MS:
+                raise ValueError(f"Remote HLC {remote} is too far ahead of the local clock")
+            wall = max(self._wall_ms, remote.wall_ms, physical)
+            if wall == self._wall_ms and wall == remote.wall_ms:
+                logical = max(self._logical, remote.logical) + 1
+            elif wall == self._wall_ms:
+                logical = self._logical + 1
+            elif wall == remote.wall_ms:
+                logical = remote.logical + 1
+            else:
+                logical = 0
+            self._wall_ms, self._logical = wall, logical
+            return self._issue()
+
+    def _issue(self) -> HLCTimestamp:
+        """Persist and return the current reading. Caller holds the lock."""
+        if self._logical > MAX_LOGICAL:
+            self._wall_ms, self._logical = self._wall_ms + 1, 0
+        if self._state_path:
+            tmp_path = f"{self._state_path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({"node": self.node_id, "wall_ms": self._wall_ms, "logical": self._logical}, f)
+            os.replace(tmp_path, self._state_path)
+        return HLCTimestamp(self._wall_ms, self._logical, self.node_id)
+
+
+class HLCIndex(Generic[T]):
+    """
+    Sorted index of items by encoded HLC timestamp.
+
+    Lookups, duplicate checks and "everything after x" queries are
+    O(log n) bisections over the encoded strings.
+    """
+
+    def __init__(self, items: Optional[List[Tuple[str, T]]] = None):
+        """
+        Initialize the index.
+
+        Args:
+            items: Optional (encoded HLC, item) pairs in any order
+        """
+        pairs = sorted(items or [], key=lambda pair: pair[0])
+        self._keys: List[str] = [k for k, _ in pairs]
+        self._items: List[T] = [v for _, v in pairs]
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, hlc: str) -> bool:
+        i = bisect.bisect_left(self._keys, hlc)
+        return i < len(self._keys) and self._keys[i] == hlc
+
+    def add(self, hlc: str, item: T) -> bool:
+        """
+        Insert an item unless its timestamp is already indexed.
+
+        Returns:
+            True if inserted, False if the timestamp was a duplicate
+        """
+        i = bisect.bisect_left(self._keys, hlc)
+        if i < len(self._keys) and self._keys[i] == hlc:
+            return False
+        self._keys.insert(i, hlc)
+        self._items.insert(i, item)
+        return True
+
+    def latest(self) -> Optional[str]:
+        """Return the highest indexed timestamp, if any."""
+        return self._keys[-1] if self._keys else None
+
+    def since(self, hlc: Optional[str]) -> Iterator[Tuple[str, T]]:
+        """Yield (timestamp, item) pairs strictly after ``hlc`` (all items if None), in order."""
+        start = 0 if hlc is None else bisect.bisect_right(self._keys, hlc)
+        for i in range(start, len(self._keys)):
+            yield self._keys[i], self._items[i]
+
+
+def delta_hlc(delta: Dict[str, Any]) -> Optional[str]:
+    """Return the encoded HLC timestamp of a delta's epoch, if it carries one."""
+    return (delta.get("epoch") or {}).get("hlc")
+
+
+def decode_delta_hlc(delta: Dict[str, Any]) -> Optional[HLCTimestamp]:
+    """
+    Return the decoded HLC timestamp of a delta's epoch, if it carries one.
+
+    Raises:
+        ValueError: If the delta carries a timestamp that is not a valid encoding
+    """
+    hlc = delta_hlc(delta)
+    return None if hlc is None else HLCTimestamp.decode(hlc)
+
+
+def sort_deltas(deltas: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Order deltas for a bulk merge and drop duplicates.
+
+    Deltas are sorted by HLC timestamp (deltas without one keep their
+    relative order and go first); a second delta with the same project and
+    timestamp as an earlier one is dropped without comparing payloads.
+    """
+    seen = set()
+    ordered = []
+    for delta in sorted(deltas, key=lambda d: delta_hlc(d) or ""):
+        hlc = delta_hlc(delta)
+        if hlc is not None:
+            key = (delta.get("project_id"), hlc)
+            if key in seen:
+                continue
+            seen.add(key)
+        ordered.append(delta)
+    return ordered
+
+
+class DeltaLog:
+    """
+    Record of the latest HLC timestamp merged for each project.
+
+    Deltas are full-project snapshots, so a delta whose timestamp is not
+    newer than the last one merged for its project is stale or a duplicate
+    and can be skipped without looking at its payload.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Initialize the log, loading it from ``path`` if it exists.
+
+        Entries that are not valid HLC encodings are dropped on load, so a
+        bad timestamp recorded by an older version cannot make every later
+        delta for its project look stale.
+
+        Args:
+            path: JSON file mapping project ids to their last merged HLC (None for memory only)
+        """
+        self.path = path
+        self._latest: Dict[str, HLCTimestamp] = {}
+        if path and os.path.exists(path):
+            with open(path, "r") as f:
+                for project_id, hlc in json.load(f).items():
+                    try:
+                        self._latest[project_id] = HLCTimestamp.decode(hlc)
+                    except ValueError:
+                        continue
+
+    def last_merged(self, project_id: str) -> Optional[str]:
+        """Return the timestamp of the last delta merged for a project."""
+        last = self._latest.get(project_id)
+        return None if last is None else last.encode()
+
+    def is_stale(self, delta: Dict[str, Any]) -> bool:
+        """
+        Check whether a delta is older than, or the same as, the last one merged.
+
+        Raises:
+            ValueError: If the delta carries a timestamp that is not a valid encoding
+        """
+        hlc = decode_delta_hlc(delta)
+        last = self._latest.get(delta.get("project_id"))
+        return hlc is not None and last is not None and hlc <= last
+
+    def record(self, delta: Dict[str, Any]) -> None:
+        """
+        Record a merged delta.
+
+        Raises:
+            ValueError: If the delta carries a timestamp that is not a valid encoding
+        """
+        hlc = decode_delta_hlc(delta)
+        if hlc is None:
+            return
+        project_id = delta.get("project_id")
+        last = self._latest.get(project_id)
+        if last is None or hlc > last:
+            self._latest[project_id] = hlc
+
+    def save(self) -> None:
+        """Write the log to disk."""
+        if not self.path:
+            return
+        with open(self.path, "w") as f:
+            json.dump({project_id: hlc.encode() for project_id, hlc in self._latest.items()}, f, indent=2)
@@ -0,0 +1,198 @@
+"""
+Streaming delta pipeline over the micro-channel transports.
+
+send_delta() serializes, signs and pushes a streamed delta (see stream.py)
+straight into a dao_cli.transport Transport, one transport-sized chunk at a
+time, and receive_delta() feeds whatever the peer's transport delivers into
+a DeltaStreamReader, yielding verified tasks as they arrive.  Neither side
+writes an intermediate file or holds the whole delta in memory.
+
+Chunks are sized to the transport MTU so each one travels as a single
+packet.  With an AsyncCryptoAdapter the header signature is computed off
+the event loop, and send_deltas() signs upcoming deltas while earlier ones
+are still being transmitted.  The stream itself detects loss, duplication and reordering (any of
+them breaks the hash chain), so a reliable transport such as TcpTransport
+should be used for anything but loss-free links.
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from dao_cli.crypto.adapter_async import AsyncCryptoAdapter
+
+from .stream import (
+    DeltaStreamError, DeltaStreamReader, encode_delta_stream, iter_delta_stream, prepare_delta_stream
+)
+
+# Delay between polls of an idle channel while receiving
+POLL_INTERVAL = 0.05
+
+# Give up on a stream after this long without receiving anything
+IDLE_TIMEOUT = 60.0
+
+
+def iter_delta_chunks(header: Dict[str, Any], tasks: Sequence[Dict[str, Any]], adapter,
+                      chunk_size: int) -> Iterator[bytes]:
+    """
+    Serialize and sign a delta as a sequence of fixed-size chunks.
+
+    Args:
+        header: Delta fields other than the task list
+        tasks: Task updates to stream, in application order
+        adapter: CryptoAdapter used to sign the stream header
+        chunk_size: Maximum size of each chunk in bytes
+
+    Yields:
+        bytes: Consecutive chunks of the encoded stream
+    """
+    return _chunk(iter_delta_stream(header, tasks, adapter), chunk_size)
+
+
+def _chunk(records: Iterable[bytes], chunk_size: int) -> Iterator[bytes]:
+    """Regroup encoded records into chunks of exactly ``chunk_size`` bytes (the last may be shorter)."""
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive")
+    buffer = bytearray()
+    for record in records:
+        buffer.extend(record)
+        while len(buffer) >= chunk_size:
+            yield bytes(buffer[:chunk_size])
+            del buffer[:chunk_size]
+    if buffer:
+        yield bytes(buffer)
+
+
+async def sign_delta_stream(header: Dict[str, Any], tasks: Sequence[Dict[str, Any]],
+                            adapter) -> Tuple[Dict[str, Any], List[Optional[str]]]:
+    """
+    Prepare and sign a streamed delta's header.
+
+    Args:
+        header: Delta fields other than the task list
+        tasks: Task updates to stream, in application order
+        adapter: CryptoAdapter, or AsyncCryptoAdapter to sign off the event loop
+
+    Returns:
+        The signed stream header and the task hash chain (see prepare_delta_stream())
+    """
+    if isinstance(adapter, AsyncCryptoAdapter):
+        signed_header, next_hashes = prepare_delta_stream(header, tasks, await adapter.public_key_b64())
+        signed_header["signature"] = await adapter.sign(signed_header)
+    else:
+        signed_header, next_hashes = prepare_delta_stream(header, tasks, adapter.public_key_b64())
+        signed_header["signature"] = adapter.sign(signed_header)
+    return signed_header, next_hashes
+
+
+async def _send_signed(transport, chan, signed_header: Dict[str, Any], tasks: Sequence[Dict[str, Any]],
+                       next_hashes: Sequence[Optional[str]], channel_id: int, chunk_size: Optional[int]) -> int:
+    sent = 0
+    records = encode_delta_stream(signed_header, tasks, next_hashes)
+    for chunk in _chunk(records, chunk_size or transport.MTU):
+        await transport.send(chunk, chan, channel_id)
+        sent += len(chunk)
+    return sent
+
+
+async def send_delta(transport, chan, header: Dict[str, Any], tasks: Sequence[Dict[str, Any]],
+                     adapter, channel_id: int = 0, chunk_size: Optional[int] = None) -> int:
+    """
+    Stream a signed delta into a transport.
+
+    Args:
+        transport: Transport to send through (TcpTransport or UdpTransport)
+        chan: Channel to send on
+        header: Delta fields other than the task list
+        tasks: Task updates to stream, in application order
+        adapter: CryptoAdapter, or AsyncCryptoAdapter to sign off the event loop
+        channel_id: Channel identifier (default: 0)
+        chunk_size: Bytes per transport send (default: the transport MTU)
+
+    Returns:
+        int: Total number of bytes sent
+    """
+    signed_header, next_hashes = await sign_delta_stream(header, tasks, adapter)
+    return await _send_signed(transport, chan, signed_header, tasks, next_hashes, channel_id, chunk_size)
+
+
+async def send_deltas(transport, chan, deltas: Iterable[Tuple[Dict[str, Any], Sequence[Dict[str, Any]]]],
+                      adapter: AsyncCryptoAdapter, channel_id: int = 0, chunk_size: Optional[int] = None,
+                      window: int = 4) -> int:
+    """
+    Stream several signed deltas back to back, signing ahead of transmission.
+
+    Up to ``window`` deltas are prepared and signed concurrently while the
+    earliest is being sent; deltas go out in their original order.
+
+    Args:
+        transport: Transport to send through
+        chan: Channel to send on
+        deltas: (header, tasks) pairs
+        adapter: AsyncCryptoAdapter used to sign each stream header
+        channel_id: Channel identifier (default: 0)
+        chunk_size: Bytes per transport send (default: the transport MTU)
+        window: Deltas signed ahead of the one being sent
+
+    Returns:
+        int: Total number of bytes sent
+    """
+    pending: "deque[Tuple[asyncio.Task, Sequence[Dict[str, Any]]]]" = deque()
+    remaining = iter(deltas)
+
+    def schedule() -> None:
+        for header, tasks in remaining:
+            pending.append((asyncio.ensure_future(sign_delta_stream(header, tasks, adapter)), tasks))
+            return
+
+    sent = 0
+    try:
+        for _ in range(max(1, window)):
+            schedule()
+        while pending:
+            signing, tasks = pending.popleft()
+            signed_header, next_hashes = await signing
+            schedule()
+            sent += await _send_signed(transport, chan, signed_header, tasks, next_hashes, channel_id, chunk_size)
+    finally:
+        for signing, _ in pending:
+            signing.cancel()
+    return sent
+
+
+async def receive_delta(transport, chan, reader: DeltaStreamReader, channel_id: int = 0,
+                        poll_interval: float = POLL_INTERVAL,
+                        idle_timeout: float = IDLE_TIMEOUT) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Receive a streamed delta from a transport, yielding verified tasks.
+
+    Iteration ends once every task announced in the stream header has
+    arrived; reader.header then holds the verified header.
+
+    Args:
+        transport: Transport to receive from
+        chan: Channel to receive on
+        reader: Reader that verifies the stream
+        channel_id: Channel identifier (default: 0)
+        poll_interval: Delay between polls while the channel is idle
+        idle_timeout: Seconds without data before giving up
+
+    Yields:
+        Dict[str, Any]: Verified task updates, in stream order
+
+    Raises:
+        DeltaStreamError: If the stream fails verification or the channel goes idle
+    """
+    last_data = time.monotonic()
+    while not reader.complete:
+        data = await transport.recv(chan, channel_id)
+        if data:
+            last_data = time.monotonic()
+            for task in reader.feed(data):
+                yield task
+            continue
+        if time.monotonic() - last_data > idle_timeout:
+            raise DeltaStreamError(f"No delta data received for {idle_timeout:.0f}s")
+        await asyncio.sleep(poll_interval)
+    reader.close()
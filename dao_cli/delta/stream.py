@@ -0,0 +1,264 @@
+"""
+Streaming project delta format (.diff.jsonl).
+
+A streamed delta is a sequence of newline-delimited JSON records:
+
+    {"type": "header", "project_id": ..., "count": N, "first": "<sha256>", "signature": ...}
+    {"type": "task", "task": {...}, "next": "<sha256 of the following record>"}
+    ...
+    {"type": "task", "task": {...}, "next": null}
+
+Every task record carries the SHA-256 of the record that follows it and the
+signed header carries the hash of the first record, so a single signature
+authenticates the whole chain.  A receiver that has verified the header can
+check and apply each task as soon as its line arrives, holding at most one
+record in memory, instead of loading and canonicalizing the whole delta.
+"""
+
+import hashlib
+import json
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from dao_cli.crypto.canonical import canonical_bytes
+
+# Format identifier carried in every stream header
+FORMAT = "dao-delta-stream/1"
+
+# Largest single record (header or task line) a reader will buffer
+MAX_RECORD_BYTES = 1 << 20
+
+# Read size used when streaming from a file
+READ_CHUNK_SIZE = 64 * 1024
+
+# Signature verifier: (payload, signature, pubkey) -> bool
+Verifier = Callable[[Dict[str, Any], str, str], bool]
+
+
+class DeltaStreamError(ValueError):
+    """Raised when a streamed delta is malformed, truncated or fails verification."""
+    pass
+
+
+def _encode_record(record: Dict[str, Any]) -> bytes:
+    """Serialize a record deterministically so sender and receiver hash the same bytes."""
+    return canonical_bytes(record)
+
+
+def _digest(line: bytes) -> str:
+    """Return the hex SHA-256 of a serialized record."""
+    return hashlib.sha256(line).hexdigest()
+
+
+def prepare_delta_stream(header: Dict[str, Any], tasks: Sequence[Dict[str, Any]],
+                         public_key: str) -> Tuple[Dict[str, Any], List[Optional[str]]]:
+    """
+    Build the unsigned stream header and the hash chain for a delta.
+
+    The hash chain is built in one pass over ``tasks`` (last to first),
+    keeping only one digest per task.
+
+    Args:
+        header: Delta fields other than the task list (project_id, epoch, metadata, ...)
+        tasks: Task updates to stream, in application order
+        public_key: Base64 public key of the signer
+
+    Returns:
+        The header to sign, and the "next" hash of each task record
+    """
+    next_hashes: List[Optional[str]] = [None] * len(tasks)
+    following: Optional[str] = None
+    for i in range(len(tasks) - 1, -1, -1):
+        next_hashes[i] = following
+        following = _digest(_encode_record({"type": "task", "task": tasks[i], "next": following}))
+
+    stream_header = dict(header)
+    stream_header.update({
+        "type": "header",
+        "format": FORMAT,
+        "count": len(tasks),
+        "first": following,
+        "public_key": public_key,
+    })
+    stream_header.pop("signature", None)
+    return stream_header, next_hashes
+
+
+def encode_delta_stream(signed_header: Dict[str, Any], tasks: Sequence[Dict[str, Any]],
+                        next_hashes: Sequence[Optional[str]]) -> Iterator[bytes]:
+    """
+    Serialize a prepared and signed delta as newline-terminated records.
+
+    Args:
+        signed_header: Header from prepare_delta_stream() with its "signature" added
+        tasks: The same tasks passed to prepare_delta_stream()
+        next_hashes: The hash chain returned by prepare_delta_stream()
+
+    Yields:
+        bytes: One encoded record per item, terminated by a newline
+    """
+    yield _encode_record(signed_header) + b"\n"
+    for task, next_hash in zip(tasks, next_hashes):
+        yield _encode_record({"type": "task", "task": task, "next": next_hash}) + b"\n"
+
+
+def iter_delta_stream(header: Dict[str, Any], tasks: Sequence[Dict[str, Any]], adapter) -> Iterator[bytes]:
+    """
+    Serialize and sign a delta as a stream of newline-terminated records.
+
+    Records are re-serialized in order as they are yielded, so only one
+    digest per task is held in memory.
+
+    Args:
+        header: Delta fields other than the task list (project_id, epoch, metadata, ...)
+        tasks: Task updates to stream, in application order
+        adapter: CryptoAdapter used to sign the header
+
+    Yields:
+        bytes: One encoded record per item, terminated by a newline
+    """
+    signed_header, next_hashes = prepare_delta_stream(header, tasks, adapter.public_key_b64())
+    signed_header["signature"] = adapter.sign(signed_header)
+    yield from encode_delta_stream(signed_header, tasks, next_hashes)
+
+
+class DeltaStreamReader:
+    """
+    Incremental reader for streamed deltas.
+
+    Bytes are pushed in with feed() in chunks of any size; each task is
+    yielded only after its record has been matched against the hash chain
+    anchored in the signed header.
+    """
+
+    def __init__(self, verify: Verifier, max_record_bytes: int = MAX_RECORD_BYTES):
+        """
+        Initialize the reader.
+
+        Args:
+            verify: Signature verifier used for the stream header
+            max_record_bytes: Upper bound on the size of a single record
+        """
+        self._verify = verify
+        self._max_record_bytes = max_record_bytes
+        self._buffer = bytearray()
+        self._expected: Optional[str] = None
+        self.header: Optional[Dict[str, Any]] = None
+        self.received = 0
+
+    @property
+    def complete(self) -> bool:
+        """Check whether the header and every announced task have been read."""
+        return self.header is not None and self.received == self.header["count"]
+
+    def feed(self, data: bytes) -> Iterator[Dict[str, Any]]:
+        """
+        Consume a chunk of the stream.
+
+        Args:
+            data: Next chunk of raw stream bytes
+
+        Yields:
+            Dict[str, Any]: Verified task updates, in stream order
+
+        Raises:
+            DeltaStreamError: If a record is malformed, oversized or fails verification
+        """
+        self._buffer.extend(data)
+        while True:
+            end = self._buffer.find(b"\n")
+            if end < 0:
+                break
+            line = bytes(self._buffer[:end])
+            del self._buffer[:end + 1]
+            if not line.strip():
+                continue
+            task = self._process(line)
+            if task is not None:
+                yield task
+        if len(self._buffer) > self._max_record_bytes:
+            raise DeltaStreamError(f"Record exceeds {self._max_record_bytes} bytes")
+
+    def close(self) -> None:
+        """
+        Signal the end of input.
+
+        Raises:
+            DeltaStreamError: If the stream ended before every announced record arrived
+        """
+        if self._buffer.strip():
+            raise DeltaStreamError("Stream ended in the middle of a record")
+        if self.header is None:
+            raise DeltaStreamError("Stream ended before the header")
+        if not self.complete:
+            raise DeltaStreamError(
+                f"Stream truncated: {self.received} of {self.header['count']} tasks received"
+            )
+
+    def _process(self, line: bytes) -> Optional[Dict[str, Any]]:
+        """Verify one record and return its task, if any."""
+        if self.header is None:
+            self._read_header(line)
+            return None
+
+        if self.complete:
+            raise DeltaStreamError("Unexpected record after end of stream")
+        if _digest(line) != self._expected:
+            raise DeltaStreamError(f"Hash chain mismatch at task {self.received}")
+
+        record = json.loads(line)
+        if record.get("type") != "task":
+            raise DeltaStreamError(f"Unexpected record type: {record.get('type')}")
+        self._expected = record.get("next")
+        self.received += 1
+        if self.complete and self._expected is not None:
+            raise DeltaStreamError("Last task record points past the end of the stream")
+        return record["task"]
+
+    def _read_header(self, line: bytes) -> None:
+        """Parse and verify the stream header."""
+        try:
+            header = json.loads(line)
+        except ValueError as e:
+            raise DeltaStreamError(f"Malformed stream header: {e}") from e
+
+        if header.get("type") != "header" or header.get("format") != FORMAT:
+            raise DeltaStreamError("Not a streamed project delta")
+        if not isinstance(header.get("count"), int) or header["count"] < 0:
+            raise DeltaStreamError("Stream header has no valid task count")
+
+        signature = header.get("signature")
+        pubkey = header.get("public_key")
+        if not signature or not pubkey:
+            raise DeltaStreamError("Invalid or missing signature")
+        payload = {k: v for k, v in header.items() if k != "signature"}
+        if not self._verify(payload, signature, pubkey):
+            raise DeltaStreamError("Invalid or missing signature")
+
+        if (header["count"] == 0) != (header.get("first") is None):
+            raise DeltaStreamError("Stream header task count does not match its hash chain")
+        self.header = header
+        self._expected = header.get("first")
+
+
+def read_delta_stream(fp: BinaryIO, reader: DeltaStreamReader,
+                      chunk_size: int = READ_CHUNK_SIZE) -> Iterator[Dict[str, Any]]:
+    """
+    Read a streamed delta from a binary file object.
+
+    Args:
+        fp: File object opened in binary mode
+        reader: Reader that verifies the stream
+        chunk_size: Number of bytes read per iteration
+
+    Yields:
+        Dict[str, Any]: Verified task updates, in stream order
+
+    Raises:
+        DeltaStreamError: If the stream is malformed, truncated or fails verification
+    """
+    while True:
+        chunk = fp.read(chunk_size)
+        if not chunk:
+            break
+        yield from reader.feed(chunk)
+    reader.close()
@@ -0,0 +1,113 @@
+"""
+Unit tests for multi-project delta bundles.
+"""
+
+import copy
+import unittest
+
+from dao_cli.crypto.tests.fake_adapter import FakeAdapter
+from dao_cli.delta.bundle import (
+    BundleError, build_bundle, extract_bundle, verify_bundle
+)
+
+
+def make_delta(project_id):
+    return {
+        "project_id": project_id,
+        "epoch": {"marker": "full moon"},
+        "updated_tasks": [{"id": f"{project_id}-t1", "title": "Task", "status": "open"}],
+        "metadata": {"status": "active"},
+    }
+
+
+class TestDeltaBundle(unittest.TestCase):
+    """Tests for building, verifying and extracting bundles."""
+
+    def setUp(self):
+        self.adapter = FakeAdapter()
+        self.deltas = [make_delta(f"p{i}") for i in range(7)]
+        self.bundle = build_bundle(self.deltas, self.adapter)
+
+    def test_single_signature(self):
+        """Test that a bundle is signed once regardless of project count."""
+        self.assertEqual(self.adapter.sign_calls, 1)
+        self.assertEqual(self.bundle["count"], 7)
+        self.assertNotIn("signature", self.bundle["entries"][0]["delta"])
+
+    def test_verify_full_bundle(self):
+        """Test verifying every entry of a full bundle."""
+        verified = verify_bundle(self.bundle, self.adapter.verify)
+        self.assertEqual([d["project_id"] for d in verified], [f"p{i}" for i in range(7)])
+
+    def test_verify_subset(self):
+        """Test verifying only selected projects of a full bundle."""
+        verified = verify_bundle(self.bundle, self.adapter.verify, project_ids=["p2", "p5"])
+        self.assertEqual([d["project_id"] for d in verified], ["p2", "p5"])
+
+    def test_extracted_subset_verifies(self):
+        """Test that each extracted entry verifies with its inclusion proof alone."""
+        for i in range(7):
+            subset = extract_bundle(self.bundle, [f"p{i}"])
+            self.assertEqual(len(subset["entries"]), 1)
+            verified = verify_bundle(subset, self.adapter.verify)
+            self.assertEqual(verified[0]["project_id"], f"p{i}")
+
+    def test_extract_from_extracted(self):
+        """Test that a sub-bundle can be cut down again."""
+        subset = extract_bundle(self.bundle, ["p1", "p3", "p6"])
+        smaller = extract_bundle(subset, ["p3"])
+        self.assertEqual([d["project_id"] for d in verify_bundle(smaller, self.adapter.verify)], ["p3"])
+
+    def test_tampered_entry(self):
+        """Test that a modified delta fails against the signed root."""
+        tampered = copy.deepcopy(self.bundle)
+        tampered["entries"][3]["delta"]["metadata"]["status"] = "archived"
+        with self.assertRaises(BundleError):
+            verify_bundle(tampered, self.adapter.verify)
+
+    def test_tampered_entry_in_subset(self):
+        """Test that a tampered entry in a sub-bundle does not affect its neighbours."""
+        subset = extract_bundle(self.bundle, ["p3", "p4"])
+        subset["entries"][0]["delta"]["metadata"]["status"] = "archived"
+        with self.assertRaises(BundleError):
+            verify_bundle(subset, self.adapter.verify, project_ids=["p3"])
+        verified = verify_bundle(subset, self.adapter.verify, project_ids=["p4"])
+        self.assertEqual(verified[0]["project_id"], "p4")
+
+    def test_tampered_root(self):
+        """Test that a modified Merkle root fails the envelope signature."""
+        tampered = copy.deepcopy(self.bundle)
+        tampered["merkle_root"] = "00" * 32
+        with self.assertRaises(BundleError):
+            verify_bundle(tampered, self.adapter.verify)
+
+    def test_partial_bundle_without_proofs(self):
+        """Test that dropping entries without proofs is rejected."""
+        partial = copy.deepcopy(self.bundle)
+        del partial["entries"][0]
+        with self.assertRaises(BundleError):
+            verify_bundle(partial, self.adapter.verify)
+
+
+    def test_malformed_proof(self):
+        """Test that a proof that does not decode is rejected as a bundle error."""
+        subset = extract_bundle(self.bundle, ["p2"])
+        subset["entries"][0]["proof"][0][1] = "not hex"
+        with self.assertRaises(BundleError):
+            verify_bundle(subset, self.adapter.verify)
+        subset["entries"][0]["proof"] = [["R"]]
+        with self.assertRaises(BundleError):
+            verify_bundle(subset, self.adapter.verify)
+
+    def test_entry_index_bound_to_proof(self):
+        """Test that an entry cannot claim a position other than the one its proof covers."""
+        subset = extract_bundle(self.bundle, ["p2"])
+        for index in (0, 3, 7, "2"):
+            moved = copy.deepcopy(subset)
+            moved["entries"][0]["index"] = index
+            with self.assertRaises(BundleError):
+                verify_bundle(moved, self.adapter.verify)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,155 @@
+"""
+Unit tests for hybrid logical clocks and delta ordering.
+"""
+
+import json
+import os
+import tempfile
+import unittest
+
+from dao_cli.delta.hlc import (
+    MAX_LOGICAL, DeltaLog, HLCIndex, HLCTimestamp, HybridLogicalClock, sort_deltas
+)
+
+
+class FakeClock:
+    """Settable wall clock."""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def delta(project_id, hlc):
+    return {"project_id": project_id, "epoch": {"marker": "dusk", "hlc": hlc}}
+
+
+def stamp(logical):
+    return HLCTimestamp(1000, logical, "a").encode()
+
+
+class TestHybridLogicalClock(unittest.TestCase):
+    """Tests for HybridLogicalClock."""
+
+    def test_monotonic_with_stalled_clock(self):
+        """Test that timestamps increase even when wall time does not."""
+        clock = HybridLogicalClock(node_id="a", clock=FakeClock())
+        readings = [clock.now() for _ in range(5)]
+        self.assertEqual(readings, sorted(readings))
+        self.assertEqual(len(set(readings)), 5)
+        self.assertEqual(readings[-1].logical, 4)
+
+    def test_wall_clock_advance_resets_logical(self):
+        """Test that a newer physical time resets the logical counter."""
+        wall = FakeClock()
+        clock = HybridLogicalClock(node_id="a", clock=wall)
+        clock.now()
+        clock.now()
+        wall.now += 1
+        self.assertEqual(clock.now(), HLCTimestamp(1001000, 0, "a"))
+
+    def test_update_orders_after_remote(self):
+        """Test that a received timestamp from a faster clock is respected."""
+        local = HybridLogicalClock(node_id="a", clock=FakeClock(1000.0))
+        remote = HLCTimestamp(1005000, 3, "b")
+        merged = local.update(remote)
+        self.assertGreater(merged, remote)
+        self.assertGreater(local.now(), merged)
+
+    def test_rejects_far_future(self):
+        """Test that a remote timestamp far ahead of local time is rejected."""
+        local = HybridLogicalClock(node_id="a", clock=FakeClock(1000.0))
+        with self.assertRaises(ValueError):
+            local.update(HLCTimestamp(10 ** 12, 0, "b"))
+
+    def test_encoding_sorts_like_tuples(self):
+        """Test that encoded strings sort in timestamp order."""
+        stamps = [HLCTimestamp(5, 10, "a"), HLCTimestamp(40, 0, "a"), HLCTimestamp(5, 2, "b")]
+        encoded = sorted(s.encode() for s in stamps)
+        self.assertEqual([HLCTimestamp.decode(e) for e in encoded], sorted(stamps))
+
+    def test_decode_rejects_non_canonical(self):
+        """Test that only the exact fixed-width encoding decodes."""
+        self.assertEqual(HLCTimestamp.decode(stamp(7)), HLCTimestamp(1000, 7, "a"))
+        for text in ("99.0.x", "0000000000001000.7.a", "+000000000001000.00007.a",
+                     "-000000000001000.00007.a", "0000000000001000.00007.", "0000000000001000.-0007.a"):
+            with self.assertRaises(ValueError):
+                HLCTimestamp.decode(text)
+
+    def test_logical_overflow_moves_to_next_millisecond(self):
+        """Test that the logical counter never outgrows its encoded width."""
+        clock = HybridLogicalClock(node_id="a", clock=FakeClock())
+        merged = clock.update(HLCTimestamp(1000000, MAX_LOGICAL, "b"))
+        self.assertEqual(merged, HLCTimestamp(1000001, 0, "a"))
+        self.assertEqual(HLCTimestamp.decode(merged.encode()), merged)
+
+    def test_state_persists(self):
+        """Test that a restarted clock keeps its node id and never goes backwards."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "hlc_state.json")
+            wall = FakeClock()
+            first = HybridLogicalClock(path, clock=wall)
+            last = first.now()
+
+            wall.now -= 10  # clock stepped backwards across the restart
+            second = HybridLogicalClock(path, clock=wall)
+            self.assertEqual(second.node_id, first.node_id)
+            self.assertGreater(second.now(), last)
+
+
+class TestDeltaOrdering(unittest.TestCase):
+    """Tests for HLCIndex, sort_deltas and DeltaLog."""
+
+    def test_index_since(self):
+        """Test querying everything after a timestamp."""
+        index = HLCIndex([("0003", "c"), ("0001", "a"), ("0002", "b")])
+        self.assertEqual([item for _, item in index.since("0001")], ["b", "c"])
+        self.assertEqual([item for _, item in index.since(None)], ["a", "b", "c"])
+        self.assertFalse(index.add("0002", "dup"))
+        self.assertIn("0002", index)
+        self.assertEqual(index.latest(), "0003")
+
+    def test_sort_and_dedupe(self):
+        """Test that bulk merges are ordered and duplicates dropped."""
+        deltas = [delta("p", "0003"), delta("p", "0001"), delta("q", "0001"), delta("p", "0003")]
+        ordered = sort_deltas(deltas)
+        self.assertEqual([(d["project_id"], d["epoch"]["hlc"]) for d in ordered],
+                         [("p", "0001"), ("q", "0001"), ("p", "0003")])
+
+    def test_stale_detection(self):
+        """Test that older or repeated deltas for a project are stale."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "merged_deltas.json")
+            log = DeltaLog(path)
+            log.record(delta("p", stamp(5)))
+            log.save()
+
+            reloaded = DeltaLog(path)
+            self.assertTrue(reloaded.is_stale(delta("p", stamp(4))))
+            self.assertTrue(reloaded.is_stale(delta("p", stamp(5))))
+            self.assertFalse(reloaded.is_stale(delta("p", stamp(6))))
+            self.assertFalse(reloaded.is_stale(delta("q", stamp(1))))
+            self.assertFalse(reloaded.is_stale({"project_id": "p", "epoch": {}}))
+
+    def test_invalid_timestamps_not_recorded(self):
+        """Test that an unpadded timestamp is rejected and a poisoned log recovers."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "merged_deltas.json")
+            log = DeltaLog(path)
+            with self.assertRaises(ValueError):
+                log.is_stale(delta("p", "99.0.x"))
+            with self.assertRaises(ValueError):
+                log.record(delta("p", "99.0.x"))
+
+            with open(path, "w") as f:
+                json.dump({"p": "99.0.x", "q": stamp(3)}, f)
+            reloaded = DeltaLog(path)
+            self.assertIsNone(reloaded.last_merged("p"))
+            self.assertFalse(reloaded.is_stale(delta("p", stamp(1))))
+            self.assertTrue(reloaded.is_stale(delta("q", stamp(3))))
+
+
+if __name__ == "__main__":
+    unittest.main()
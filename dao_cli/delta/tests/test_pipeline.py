@@ -0,0 +1,100 @@
+"""
+Unit tests for streaming deltas through a transport.
+"""
+
+import asyncio
+import unittest
+from typing import List, Optional
+
+from dao_cli.crypto.adapter_async import AsyncCryptoAdapter
+from dao_cli.crypto.tests.fake_adapter import FakeAdapter
+from dao_cli.delta.pipeline import iter_delta_chunks, receive_delta, send_delta, send_deltas
+from dao_cli.delta.stream import DeltaStreamError, DeltaStreamReader
+from dao_cli.transport.header import PacketHeader
+from dao_cli.transport.udp import UdpTransport
+
+
+class LoopbackChannel:
+    """In-memory channel delivering packets in order."""
+
+    def __init__(self):
+        self._queue: List[bytes] = []
+        self.sent: List[bytes] = []
+
+    def send(self, payload: bytes) -> None:
+        self.sent.append(payload)
+        self._queue.append(payload)
+
+    def receive(self) -> Optional[bytes]:
+        return self._queue.pop(0) if self._queue else None
+
+
+def make_tasks(count):
+    return [{"id": f"task-{i}", "title": f"Task {i}", "status": "open"} for i in range(count)]
+
+
+class TestDeltaPipeline(unittest.TestCase):
+    """Tests for send_delta and receive_delta."""
+
+    def setUp(self):
+        self.adapter = FakeAdapter()
+        self.header = {"project_id": "p1", "epoch": {"marker": "dawn"}, "metadata": {}}
+
+    def test_chunks_respect_size(self):
+        """Test that chunks never exceed the requested size and reassemble the stream."""
+        chunks = list(iter_delta_chunks(self.header, make_tasks(20), self.adapter, 100))
+        self.assertTrue(all(len(c) <= 100 for c in chunks))
+        self.assertTrue(b"".join(chunks).endswith(b"\n"))
+
+    def test_round_trip_over_udp(self):
+        """Test streaming a delta through UdpTransport without fragmentation."""
+        tasks = make_tasks(40)
+        transport = UdpTransport()
+        chan = LoopbackChannel()
+
+        async def run():
+            await send_delta(transport, chan, self.header, tasks, self.adapter)
+            reader = DeltaStreamReader(self.adapter.verify)
+            received = [t async for t in receive_delta(transport, chan, reader, poll_interval=0)]
+            return reader, received
+
+        reader, received = asyncio.run(run())
+        self.assertEqual(received, tasks)
+        self.assertEqual(reader.header["project_id"], "p1")
+        self.assertFalse(any(PacketHeader.decode(p)[0].is_frag for p in chan.sent))
+
+    def test_lost_chunk_detected(self):
+        """Test that a dropped chunk fails verification instead of merging bad data."""
+        transport = UdpTransport()
+        chan = LoopbackChannel()
+
+        async def run():
+            await send_delta(transport, chan, self.header, make_tasks(40), self.adapter, chunk_size=64)
+            del chan._queue[5]
+            reader = DeltaStreamReader(self.adapter.verify)
+            return [t async for t in receive_delta(transport, chan, reader, poll_interval=0, idle_timeout=0.05)]
+
+        with self.assertRaises(DeltaStreamError):
+            asyncio.run(run())
+
+    def test_pipelined_deltas_with_async_adapter(self):
+        """Test that several deltas signed off the loop arrive intact and in order."""
+        transport = UdpTransport()
+        chan = LoopbackChannel()
+        deltas = [(dict(self.header, project_id=f"p{i}"), make_tasks(5 + i)) for i in range(4)]
+
+        async def run():
+            async with AsyncCryptoAdapter(self.adapter, max_pending=2) as signer:
+                await send_deltas(transport, chan, deltas, signer, window=2)
+            results = []
+            for _ in deltas:
+                reader = DeltaStreamReader(self.adapter.verify)
+                tasks = [t async for t in receive_delta(transport, chan, reader, poll_interval=0)]
+                results.append((reader.header["project_id"], tasks))
+            return results
+
+        self.assertEqual(asyncio.run(run()), [(h["project_id"], t) for h, t in deltas])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+"""
+Unit tests for the streamed delta format.
+"""
+
+import io
+import json
+import unittest
+
+from dao_cli.crypto.tests.fake_adapter import FakeAdapter
+from dao_cli.delta.stream import (
+    DeltaStreamError, DeltaStreamReader, iter_delta_stream, read_delta_stream
+)
+
+
+def make_tasks(count):
+    return [{"id": f"task-{i}", "title": f"Task {i}", "status": "open"} for i in range(count)]
+
+
+class TestDeltaStream(unittest.TestCase):
+    """Tests for writing and reading streamed deltas."""
+
+    def setUp(self):
+        self.adapter = FakeAdapter()
+        self.header = {"project_id": "p1", "epoch": {"marker": "first frost"}, "metadata": {"status": "active"}}
+
+    def _stream(self, tasks):
+        return b"".join(iter_delta_stream(self.header, tasks, self.adapter))
+
+    def test_round_trip(self):
+        """Test that every task comes back in order after verification."""
+        tasks = make_tasks(50)
+        reader = DeltaStreamReader(self.adapter.verify)
+        received = list(read_delta_stream(io.BytesIO(self._stream(tasks)), reader, chunk_size=7))
+
+        self.assertEqual(received, tasks)
+        self.assertEqual(reader.header["project_id"], "p1")
+        self.assertEqual(reader.header["metadata"], {"status": "active"})
+        self.assertTrue(reader.complete)
+
+    def test_empty_delta(self):
+        """Test a delta with no tasks."""
+        reader = DeltaStreamReader(self.adapter.verify)
+        received = list(read_delta_stream(io.BytesIO(self._stream([])), reader))
+
+        self.assertEqual(received, [])
+        self.assertTrue(reader.complete)
+
+    def test_header_signed_once(self):
+        """Test that only the header is signed and verified, not each task."""
+        reader = DeltaStreamReader(self.adapter.verify)
+        list(read_delta_stream(io.BytesIO(self._stream(make_tasks(20))), reader))
+
+        self.assertEqual(self.adapter.sign_calls, 1)
+        self.assertEqual(self.adapter.verify_calls, 1)
+
+    def test_bad_signature(self):
+        """Test that a forged header is rejected before any task is yielded."""
+        lines = self._stream(make_tasks(3)).splitlines(keepends=True)
+        header = json.loads(lines[0])
+        header["metadata"]["status"] = "archived"
+        lines[0] = json.dumps(header).encode() + b"\n"
+
+        reader = DeltaStreamReader(self.adapter.verify)
+        with self.assertRaises(DeltaStreamError):
+            list(reader.feed(b"".join(lines)))
+
+    def test_tampered_task(self):
+        """Test that a modified task breaks the hash chain at that task."""
+        lines = self._stream(make_tasks(3)).splitlines(keepends=True)
+        lines[2] = lines[2].replace(b"Task 1", b"Task X")
+
+        reader = DeltaStreamReader(self.adapter.verify)
+        received = []
+        with self.assertRaises(DeltaStreamError):
+            for task in reader.feed(b"".join(lines)):
+                received.append(task)
+        self.assertEqual([t["id"] for t in received], ["task-0"])
+
+    def test_truncated_stream(self):
+        """Test that a stream missing its last records is rejected on close."""
+        lines = self._stream(make_tasks(3)).splitlines(keepends=True)
+
+        reader = DeltaStreamReader(self.adapter.verify)
+        with self.assertRaises(DeltaStreamError):
+            list(read_delta_stream(io.BytesIO(b"".join(lines[:-1])), reader))
+
+    def test_extra_record(self):
+        """Test that records after the announced count are rejected."""
+        lines = self._stream(make_tasks(2)).splitlines(keepends=True)
+
+        reader = DeltaStreamReader(self.adapter.verify)
+        with self.assertRaises(DeltaStreamError):
+            list(reader.feed(b"".join(lines + [lines[-1]])))
+
+    def test_oversized_record(self):
+        """Test that a record larger than the limit is rejected."""
+        reader = DeltaStreamReader(self.adapter.verify, max_record_bytes=64)
+        with self.assertRaises(DeltaStreamError):
+            list(reader.feed(b"x" * 100))
+
+
+if __name__ == "__main__":
+    unittest.main()
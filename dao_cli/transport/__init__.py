@@ -13,6 +13,12 @@ from .constants import (
     FLAG_SYN_ACK, FLAG_FIN_ACK, HEADER_SIZE, FRAG_HEADER_SIZE,
     MTU, INITIAL_TIMEOUT, BACKOFF_FACTOR, MAX_RETRIES
 )
+from .congestion import CongestionController
+from .dtn import DtnError, DtnTransport
+from .fec import FecError, FecTransport
+from .medium import MediumProfile
+from .mux import MuxSession
+from .rto import RttEstimator
 from .tcp import TcpTransport
 from .udp import UdpTransport
 
@@ -22,6 +28,14 @@ __all__ = [
     'ConnectionError',
     'FragmentationError',
     'PacketHeader',
+    'CongestionController',
+    'DtnError',
+    'DtnTransport',
+    'FecError',
+    'FecTransport',
+    'MediumProfile',
+    'MuxSession',
+    'RttEstimator',
     'TcpTransport',
     'UdpTransport',
 ]
\ No newline at end of file
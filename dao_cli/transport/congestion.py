@@ -0,0 +1,169 @@
+"""
+Rate and congestion control per MicroChannel.
+
+Two things limit how fast a carrier can be driven:
+
+- Vendor rate limits (e.g. one AirTag rename per >10 s).  These are hard
+  limits: every frame, data or control, takes a token from a TokenBucket
+  filled at the medium's rate, so the transport never exceeds it.
+- Congestion.  The send window (window.py) grows additively and halves on
+  loss (AIMD), but on carriers that drop frames at random
+  (the mempool loses 10-30%) halving on every loss would starve the link.
+  The controller compares the observed loss rate with the medium's
+  expected loss and reports only excess loss as congestion; the rest is
+  repaired by retransmission without backing off.
+
+The window is also capped at the bandwidth-delay product: with a rate
+limit of r frames/s and a round trip of 2 * latency, more than
+r * RTT + 1 packets in flight would only queue behind the bucket.
+"""
+
+import asyncio
+import math
+import threading
+import time
+import weakref
+from typing import Any, Dict, Optional
+
+from .constants import LOSS_EWMA_WEIGHT, LOSS_MARGIN, MIN_WINDOW
+from .medium import MediumProfile, medium_profile
+
+
+class TokenBucket:
+    """Tokens refilled at ``rate`` per second, holding at most ``burst``."""
+
+    def __init__(self, rate: float, burst: float = 1.0):
+        """
+        Create a full bucket.
+
+        Args:
+            rate: Tokens added per second
+            burst: Bucket capacity
+        """
+        if rate <= 0:
+            raise ValueError("Token bucket rate must be positive")
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._stamp = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    def delay(self, now: Optional[float] = None) -> float:
+        """Return the seconds until a token is available (0 if one is now)."""
+        self._refill(time.monotonic() if now is None else now)
+        return max(0.0, (1.0 - self._tokens) / self.rate)
+
+    def consume(self, now: Optional[float] = None) -> bool:
+        """Take a token if one is available."""
+        self._refill(time.monotonic() if now is None else now)
+        if self._tokens < 1.0:
+            return False
+        self._tokens -= 1.0
+        return True
+
+
+class CongestionController:
+    """
+    Pacing and loss classification for one channel.
+
+    Attributes:
+        profile: The channel's medium, if known
+        loss_rate: Observed loss rate (exponentially weighted)
+        frames: Frames let through
+        paced_s: Total seconds senders waited for tokens
+        congestion_events: Losses reported as congestion
+        random_losses: Losses attributed to the medium
+    """
+
+    def __init__(self, profile: Optional[MediumProfile] = None):
+        """
+        Configure the controller from a medium profile.
+
+        Args:
+            profile: Medium profile (None: no rate limit, every loss is congestion)
+        """
+        self.profile = profile
+        rate = profile.max_rate if profile else None
+        self.bucket = TokenBucket(rate) if rate else None
+        self.expected_loss = profile.expected_loss if profile else 0.0
+        self.loss_rate = self.expected_loss
+        self.frames = 0
+        self.paced_s = 0.0
+        self.congestion_events = 0
+        self.random_losses = 0
+        self._lock = threading.Lock()
+
+    @property
+    def max_window(self) -> Optional[int]:
+        """Packets in flight worth allowing under the rate limit, or None if unbounded."""
+        if self.bucket is None or not self.profile.typical_latency_s:
+            return None
+        return max(MIN_WINDOW, math.ceil(self.bucket.rate * 2 * self.profile.typical_latency_s) + 1)
+
+    def ready_in(self) -> float:
+        """Return the seconds until the next frame may be sent."""
+        return self.bucket.delay() if self.bucket else 0.0
+
+    def try_send(self) -> bool:
+        """Take a frame's token without waiting; False if the sender must wait."""
+        if self.bucket is not None and not self.bucket.consume():
+            return False
+        self.frames += 1
+        return True
+
+    async def pace(self) -> None:
+        """Wait until the rate limit allows another frame and take its token."""
+        while not self.try_send():
+            delay = self.bucket.delay()
+            self.paced_s += delay
+            await asyncio.sleep(delay)
+
+    def on_ack(self, packets: int = 1) -> None:
+        """Record packets that were delivered."""
+        with self._lock:
+            self.loss_rate *= (1 - LOSS_EWMA_WEIGHT) ** packets
+
+    def on_loss(self) -> bool:
+        """
+        Record a lost packet.
+
+        Returns:
+            True if the loss indicates congestion and the window should back off
+        """
+        with self._lock:
+            self.loss_rate = (1 - LOSS_EWMA_WEIGHT) * self.loss_rate + LOSS_EWMA_WEIGHT
+            if self.profile is None or self.loss_rate > self.expected_loss + LOSS_MARGIN:
+                self.congestion_events += 1
+                return True
+            self.random_losses += 1
+            return False
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the controller state for monitoring."""
+        return {
+            "medium": self.profile.medium_id if self.profile else None,
+            "max_rate": self.bucket.rate if self.bucket else None,
+            "loss_rate": self.loss_rate,
+            "expected_loss": self.expected_loss,
+            "frames": self.frames,
+            "paced_s": self.paced_s,
+            "congestion_events": self.congestion_events,
+            "random_losses": self.random_losses,
+        }
+
+
+_controllers: "weakref.WeakKeyDictionary[Any, CongestionController]" = weakref.WeakKeyDictionary()
+_controllers_lock = threading.Lock()
+
+
+def congestion_for(chan: Any) -> CongestionController:
+    """Return the controller shared by everything sending over ``chan``, configured from its medium."""
+    with _controllers_lock:
+        controller = _controllers.get(chan)
+        if controller is None:
+            controller = CongestionController(medium_profile(chan))
+            _controllers[chan] = controller
+        return controller
@@ -13,6 +13,9 @@ FLAG_ACK = 0x02  # Acknowledgement
 FLAG_FIN = 0x04  # Connection teardown
 FLAG_RST = 0x08  # Connection reset
 FLAG_FRAG = 0x10  # Fragmented payload
+FLAG_LEN = 0x20  # Fragment header carries the total message length (first fragment)
+FLAG_SACK = 0x40  # ACK payload carries selective acknowledgment ranges
+FLAG_ACK_NO = 0x80  # Data packet header carries a cumulative ACK number (piggybacked ACK)
 
 # Flag combinations
 FLAG_SYN_ACK = FLAG_SYN | FLAG_ACK
@@ -21,18 +24,80 @@ FLAG_FIN_ACK = FLAG_FIN | FLAG_ACK
 # Header sizes
 HEADER_SIZE = 8  # Fixed 8-byte header
 FRAG_HEADER_SIZE = 6  # Additional 6-byte fragmentation header (4-byte ID + 2-byte offset)
+TOTAL_LEN_SIZE = 2  # Additional 2-byte total message length when FLAG_LEN is set
+ACK_NO_SIZE = 2  # Additional 2-byte ACK number when FLAG_ACK_NO is set
 
 # Size limits
 MTU = 248  # Default maximum payload size per packet
+MAX_MESSAGE_SIZE = 0xFFFF  # Largest fragmented message (16-bit offsets and total length)
+
+# Fragment reassembly
+MAX_REASSEMBLY_BYTES = 1 << 20  # Memory for partial messages per transport
+REASSEMBLY_HISTORY = 256  # Completed messages remembered to drop late duplicates
 
 # Timeouts (in seconds)
-INITIAL_TIMEOUT = 5.0  # Initial wait for ACK
+INITIAL_TIMEOUT = 5.0  # Initial wait for ACK, until the RTT has been measured
 BACKOFF_FACTOR = 2.0  # Exponential backoff multiplier
 MAX_RETRIES = 5  # Maximum retransmission attempts
 FRAGMENT_TIMEOUT = 30.0  # Time to wait for complete fragments before dropping
 
-# Window size for flow control (currently just stop-and-wait)
-WINDOW_SIZE = 1  # Stop-and-wait protocol
+# Adaptive retransmission timeout (RFC 6298)
+MIN_RTO = 0.2  # Lower bound; fast links such as Wi-Fi SSID beacons
+MAX_RTO = 120.0  # Upper bound; multi-second carriers after backoff
+RTT_ALPHA = 0.125  # SRTT gain
+RTT_BETA = 0.25  # RTTVAR gain
+RTO_K = 4  # RTTVAR multiplier
+CLOCK_GRANULARITY = 0.01  # Smallest variance term, in seconds
+
+# Sliding window for flow control (packets in flight per channel)
+WINDOW_SIZE = 8  # Initial window
+MIN_WINDOW = 1  # Window never shrinks below stop-and-wait
+MAX_WINDOW = 64  # Largest window; also the receiver's reorder buffer limit
+MAX_SACK_BLOCKS = 4  # Selective ACK ranges per ACK packet
+FAST_RETRANSMIT_THRESHOLD = 3  # Later packets SACKed before a hole is resent early
+
+# Delayed acknowledgments
+ACK_DELAY = 0.05  # Seconds an ACK may wait for more data or for an outgoing packet to ride on
+ACK_EVERY = 2  # Packets received in order before an ACK is sent without waiting
+
+# Congestion and rate control
+MEDIA_FILE = "transmission_medium_nodes.json"  # Transmission-medium metadata, at the repository root
+DAO_MEDIA_FILE = "DAO_MEDIA_FILE"  # Environment override for its path
+# Vendor rate limits (minimum seconds between frames) not recorded in the metadata
+MEDIUM_MIN_INTERVAL_S = {
+    "tm.airtag-rename": 10.0,  # Find My rename endpoint, once per >10 s
+}
+LOSS_LOW = 0.01  # Expected loss for a "low loss" profile
+LOSS_HIGH = 0.2  # Expected loss for a "high ..." profile
+LOSS_DEFAULT = 0.05  # Expected loss for other described profiles
+LOSS_MARGIN = 0.05  # Observed loss above expected + margin counts as congestion
+LOSS_EWMA_WEIGHT = 0.05  # Weight of each packet outcome in the observed loss rate
+
+# Stream multiplexing (one connection per MicroChannel, see mux.py)
+MUX_HEADER_SIZE = 7  # Frame type (1), stream id (2), stream offset or credit limit (4)
+MUX_FRAME_DATA = 0x00  # Stream data
+MUX_FRAME_END = 0x01  # Stream data ending a message
+MUX_FRAME_WINDOW = 0x02  # Flow control credit: the stream offset the sender may send up to
+STREAM_WINDOW = 8192  # Bytes a stream may send beyond what the peer has put in order
+DEFAULT_PRIORITY = 3  # Stream priority; lower is sent first
+
+# Forward error correction (see fec.py)
+FEC_BLOCK_SHARDS = 128  # Data shards per Reed-Solomon block, so data and parity shards fit GF(256)
+FEC_REDUNDANCY = 0.25  # Parity shards per data shard when neither config nor medium says otherwise
+FEC_LOSS_FACTOR = 2.0  # Redundancy per unit of the channel medium's expected loss
+
+# Delay-tolerant store-and-forward bundles (see dtn.py)
+DTN_TTL = 86400  # Bundle lifetime in seconds when the config gives none
+DTN_MIN_TTL = 60  # Shortest lifetime transport.schema.json allows
+DTN_BUNDLE_SIZE_LIMIT = 60000  # Largest bundle payload, leaving the bundle header room in MAX_MESSAGE_SIZE
+DTN_STORAGE_QUOTA = 64 * 1024 * 1024  # Bytes of bundle payloads a node stores
+DTN_MAX_HOPS = 16  # Forwards before a bundle is dropped, against routing loops
+DTN_CUSTODY_RETRY = 30.0  # Seconds before a bundle not yet taken into custody is offered again
+DTN_SEEN_HISTORY = 4096  # Bundle ids remembered so copies arriving by other paths are delivered once
+DTN_COMPACT_MIN = 64 * 1024  # Dead bytes in the bundle data file before it is compacted
+
+# Session resumption (TcpTransport state_dir)
+RESUME_TOKEN_SIZE = 16  # Random token naming a session, carried in the SYN
 
 # Seq/ACK number limits
 MAX_SEQ_NUM = 65535  # 16-bit sequence number space
\ No newline at end of file
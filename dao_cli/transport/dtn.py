@@ -0,0 +1,576 @@
+"""
+Delay-tolerant store-and-forward transport.
+
+Some carriers retain data for a long time but never offer an end-to-end
+path.  DtnTransport (transport.schema.json kind ``dtn``) wraps each message
+in a bundle, keeps it in an on-disk BundleStore and hands it hop by hop to
+whichever MicroChannels are in contact at the time, until it reaches its
+destination or its TTL runs out.
+
+With custody transfer a node keeps a bundle, and offers it again every
+DTN_CUSTODY_RETRY seconds, until the next node signals that it has stored
+it.  Without custody a bundle is dropped once it has been handed to the
+contacts available.  Nodes remember recent bundle ids, so a bundle that
+arrives by several paths is stored and delivered once.
+
+Bundles travel over a convergence-layer transport, FecTransport by default
+so that a bundle survives frame loss on one-way carriers, as::
+
+    kind (1) | flags (1) | bundle id (8) | destination (8) | created (4) | lifetime (4) | hops (1) | payload
+
+A custody signal has the same header, kind _KIND_CUSTODY and no payload.
+Destinations are node ids hashed to 8 bytes; 0 addresses whichever node
+receives the bundle.
+
+BundleStore appends payloads to a data file and bundle metadata to an
+index log of fixed-size records.  In memory each bundle is one
+_RECORD-sized slot of a bytearray and a dict entry from bundle id to slot,
+so a node can hold 100k bundles in a few MB.  Compaction writes the live
+bundles to the next generation's data file and a new index naming it, and
+replacing the index is the commit point: a crash leaves either the old or
+the new generation intact.
+"""
+
+import hashlib
+import os
+import struct
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+try:
+    from ..channels.backchannel_encode import MicroChannel
+except ImportError:
+    # Use mock for testing
+    from .tests.mock_channel import MicroChannel
+
+from .base import FragmentationError, Transport, TransportError
+from .constants import (
+    DTN_TTL, DTN_MIN_TTL, DTN_BUNDLE_SIZE_LIMIT, DTN_STORAGE_QUOTA, DTN_MAX_HOPS,
+    DTN_CUSTODY_RETRY, DTN_SEEN_HISTORY, DTN_COMPACT_MIN
+)
+from .fec import FecTransport
+
+BUNDLE_CUSTODY = 0x01  # Bundle flag: the sender keeps the bundle until the next hop takes custody
+
+_WIRE = struct.Struct(">BBQQIIB")
+_KIND_BUNDLE, _KIND_CUSTODY = 0, 1
+
+# Bundle id, destination, data file offset, length, created, lifetime, flags, hops
+_RECORD = struct.Struct(">QQQIIIBB")
+_LOG_SIZE = 1 + _RECORD.size
+_GENERATION, _ADD, _REMOVE = 0, 1, 2
+
+_ID_MASK = (1 << 64) - 1
+
+
+class DtnError(TransportError):
+    """Exception raised for bundle storage errors."""
+    pass
+
+
+def node_hash(node_id: str) -> int:
+    """Return the 8-byte destination identifier of a node id."""
+    return int.from_bytes(hashlib.sha256(node_id.encode()).digest()[:8], "big")
+
+
+class Bundle(NamedTuple):
+    """Metadata of a stored bundle."""
+
+    bundle_id: int
+    destination: int
+    created: int
+    lifetime: int
+    flags: int = 0
+    hops: int = 0
+    length: int = 0
+
+    @property
+    def expires(self) -> int:
+        """Unix time at which the bundle expires."""
+        return self.created + self.lifetime
+
+    @property
+    def custody(self) -> bool:
+        return bool(self.flags & BUNDLE_CUSTODY)
+
+
+class BundleStore:
+    """
+    Persistent bundle queue in a directory.
+
+    Attributes:
+        quota: Bytes of payload the store may hold
+        bytes: Bytes of payload held
+    """
+
+    def __init__(self, directory: str, quota: int = DTN_STORAGE_QUOTA):
+        """
+        Open or create the store.
+
+        Args:
+            directory: Directory for the data and index files
+            quota: Bytes of payload the store may hold
+        """
+        self.directory = directory
+        self.quota = quota
+        self.bytes = 0
+        os.makedirs(directory, exist_ok=True)
+        self._index_path = os.path.join(directory, "bundles.idx")
+        self._records = bytearray()
+        self._slots: Dict[int, int] = {}
+        self._free: List[int] = []
+        clean = self._load()
+        self._data = open(self._data_path(self.generation), "a+b")
+        self._data_size = self._data.seek(0, os.SEEK_END)
+        self._log = open(self._index_path, "ab")
+        if not clean:
+            self.compact()
+        for name in os.listdir(directory):
+            if name.startswith("bundles.") and name.endswith(".dat") and \
+                    name != os.path.basename(self._data_path(self.generation)):
+                os.remove(os.path.join(directory, name))
+
+    def _data_path(self, generation: int) -> str:
+        return os.path.join(self.directory, f"bundles.{generation}.dat")
+
+    def _load(self) -> bool:
+        """Replay the index log; returns False if it is missing or ends in a torn record."""
+        self.generation = 0
+        if not os.path.exists(self._index_path):
+            return False
+        with open(self._index_path, "rb") as f:
+            log = f.read()
+        usable = len(log) - len(log) % _LOG_SIZE
+        if not usable or log[0] != _GENERATION:
+            return False
+        self.generation = _RECORD.unpack_from(log, 1)[0]
+        data_path = self._data_path(self.generation)
+        data_size = os.path.getsize(data_path) if os.path.exists(data_path) else 0
+        for start in range(_LOG_SIZE, usable, _LOG_SIZE):
+            record = log[start + 1:start + _LOG_SIZE]
+            bundle_id, _, offset, length = _RECORD.unpack(record)[:4]
+            if log[start] == _ADD and offset + length <= data_size:
+                self._insert(bundle_id, record)
+            elif log[start] == _REMOVE:
+                self._delete(bundle_id)
+        return usable == len(log)
+
+    def _insert(self, bundle_id: int, record: bytes) -> None:
+        self._delete(bundle_id)
+        if self._free:
+            slot = self._free.pop()
+            self._records[slot * _RECORD.size:(slot + 1) * _RECORD.size] = record
+        else:
+            slot = len(self._records) // _RECORD.size
+            self._records += record
+        self._slots[bundle_id] = slot
+        self.bytes += _RECORD.unpack(record)[3]
+
+    def _delete(self, bundle_id: int) -> bool:
+        slot = self._slots.pop(bundle_id, None)
+        if slot is None:
+            return False
+        self.bytes -= _RECORD.unpack_from(self._records, slot * _RECORD.size)[3]
+        self._free.append(slot)
+        return True
+
+    def _record(self, bundle_id: int) -> Optional[Tuple]:
+        slot = self._slots.get(bundle_id)
+        if slot is None:
+            return None
+        return _RECORD.unpack_from(self._records, slot * _RECORD.size)
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, bundle_id: int) -> bool:
+        return bundle_id in self._slots
+
+    def __iter__(self) -> Iterator[Bundle]:
+        for bundle_id in list(self._slots):
+            bundle = self.get(bundle_id)
+            if bundle is not None:
+                yield bundle
+
+    def get(self, bundle_id: int) -> Optional[Bundle]:
+        """Return a bundle's metadata, or None if it is not stored."""
+        record = self._record(bundle_id)
+        if record is None:
+            return None
+        _, destination, _, length, created, lifetime, flags, hops = record
+        return Bundle(bundle_id, destination, created, lifetime, flags, hops, length)
+
+    def payload(self, bundle_id: int) -> bytes:
+        """
+        Read a bundle's payload.
+
+        Raises:
+            KeyError: If the bundle is not stored
+        """
+        record = self._record(bundle_id)
+        if record is None:
+            raise KeyError(bundle_id)
+        self._data.seek(record[2])
+        return self._data.read(record[3])
+
+    def put(self, bundle: Bundle, payload: bytes) -> bool:
+        """
+        Store a bundle.
+
+        Returns:
+            False if it was already stored
+
+        Raises:
+            DtnError: If it would exceed the storage quota
+        """
+        if bundle.bundle_id in self._slots:
+            return False
+        if self.bytes + len(payload) > self.quota:
+            raise DtnError(f"Bundle store full ({self.bytes} of {self.quota} bytes)")
+        self._data.write(payload)
+        self._data.flush()
+        record = _RECORD.pack(
+            bundle.bundle_id, bundle.destination, self._data_size, len(payload),
+            bundle.created, bundle.lifetime, bundle.flags, bundle.hops,
+        )
+        self._data_size += len(payload)
+        self._log.write(bytes([_ADD]) + record)
+        self._log.flush()
+        self._insert(bundle.bundle_id, record)
+        return True
+
+    def remove(self, bundle_id: int) -> bool:
+        """
+        Remove a bundle.
+
+        Returns:
+            False if it was not stored
+        """
+        if not self._delete(bundle_id):
+            return False
+        self._log.write(bytes([_REMOVE]) + _RECORD.pack(bundle_id, 0, 0, 0, 0, 0, 0, 0))
+        self._log.flush()
+        dead = self._data_size - self.bytes
+        if dead > self.bytes and dead >= DTN_COMPACT_MIN:
+            self.compact()
+        return True
+
+    def expire(self, now: Optional[float] = None) -> List[int]:
+        """
+        Remove bundles whose lifetime has run out.
+
+        Args:
+            now: Unix time (default: time.time())
+
+        Returns:
+            Ids of the bundles removed
+        """
+        now = time.time() if now is None else now
+        expired = [b.bundle_id for b in self if b.expires <= now]
+        for bundle_id in expired:
+            self.remove(bundle_id)
+        return expired
+
+    def compact(self) -> None:
+        """Rewrite the live bundles into the next generation's data file and index."""
+        generation = self.generation + 1
+        data_path, index_tmp = self._data_path(generation), self._index_path + ".tmp"
+        offset = 0
+        with open(data_path, "wb") as data, open(index_tmp, "wb") as log:
+            log.write(bytes([_GENERATION]) + _RECORD.pack(generation, 0, 0, 0, 0, 0, 0, 0))
+            for bundle_id, slot in self._slots.items():
+                fields = list(_RECORD.unpack_from(self._records, slot * _RECORD.size))
+                self._data.seek(fields[2])
+                data.write(self._data.read(fields[3]))
+                fields[2] = offset
+                offset += fields[3]
+                record = _RECORD.pack(*fields)
+                self._records[slot * _RECORD.size:(slot + 1) * _RECORD.size] = record
+                log.write(bytes([_ADD]) + record)
+        self._data.close()
+        self._log.close()
+        os.replace(index_tmp, self._index_path)
+        os.remove(self._data_path(self.generation))
+        self.generation = generation
+        self._data = open(data_path, "a+b")
+        self._data_size = offset
+        self._log = open(self._index_path, "ab")
+
+    def close(self) -> None:
+        self._data.close()
+        self._log.close()
+
+
+class DtnTransport(Transport):
+    """
+    Store-and-forward bundle transport for carriers without an end-to-end path.
+
+    Call recv() for each channel in contact and forward() whenever contacts
+    change or periodically; send() stores the bundle and forwards at once.
+
+    Attributes:
+        delivered: Bundles delivered to this node
+        forwarded: Bundles handed to contacts
+        custody_transfers: Bundles another node took custody of
+        refused: Bundles dropped for lack of space or hops
+    """
+
+    def __init__(
+        self,
+        node_id: str,
+        store_dir: str,
+        ttl_s: int = DTN_TTL,
+        custody_required: bool = False,
+        bundle_size_limit: int = DTN_BUNDLE_SIZE_LIMIT,
+        storage_quota: int = DTN_STORAGE_QUOTA,
+        convergence: Optional[Transport] = None,
+    ):
+        """
+        Initialize the DTN transport.
+
+        Args:
+            node_id: This node's id, which senders address bundles to
+            store_dir: Directory of the persistent bundle store
+            ttl_s: Lifetime of bundles sent from this node
+            custody_required: Keep sent bundles until the next hop takes custody
+            bundle_size_limit: Largest payload a bundle may carry
+            storage_quota: Bytes of bundles this node stores
+            convergence: Transport carrying bundles over each hop (default: FecTransport)
+
+        Raises:
+            ValueError: If ttl_s is shorter than DTN_MIN_TTL
+        """
+        super().__init__()
+        if ttl_s < DTN_MIN_TTL:
+            raise ValueError(f"ttl_s must be at least {DTN_MIN_TTL}")
+        self.node_id = node_id
+        self.ttl_s = ttl_s
+        self.custody_required = custody_required
+        self.bundle_size_limit = bundle_size_limit
+        self.store = BundleStore(store_dir, storage_quota)
+        self.convergence = convergence or FecTransport()
+        self.delivered = 0
+        self.forwarded = 0
+        self.custody_transfers = 0
+        self.refused = 0
+        self._node = node_hash(node_id)
+        self._contacts: List[Tuple[MicroChannel, int]] = []
+        # Only for bundles in flight: when custody was last offered, where a bundle came from
+        self._offered: Dict[int, float] = {}
+        self._arrived: Dict[int, Tuple[MicroChannel, int]] = {}
+        self._seen: "OrderedDict[int, None]" = OrderedDict()
+
+    @classmethod
+    def from_config(
+        cls,
+        node: Dict[str, Any],
+        node_id: str,
+        store_dir: str,
+        convergence: Optional[Transport] = None,
+    ) -> "DtnTransport":
+        """
+        Create a transport from a transport.schema.json node of kind ``dtn``.
+
+        Raises:
+            ValueError: If the node is not a DTN transport
+        """
+        if node.get("kind") != "dtn" or "dtn" not in node:
+            raise ValueError(f"Transport {node.get('id')} is not of kind 'dtn'")
+        options = {k: v for k, v in node["dtn"].items()
+                   if k in ("ttl_s", "custody_required", "bundle_size_limit", "storage_quota")}
+        transport = cls(node_id, store_dir, convergence=convergence, **options)
+        if "max_payload_b" in node:
+            transport.convergence.MTU = node["max_payload_b"]
+        return transport
+
+    def add_contact(self, chan: MicroChannel, channel_id: int = 0) -> None:
+        """Mark a channel as available for forwarding."""
+        if (chan, channel_id) not in self._contacts:
+            self._contacts.append((chan, channel_id))
+
+    def remove_contact(self, chan: MicroChannel, channel_id: int = 0) -> None:
+        """Mark a channel as no longer available."""
+        if (chan, channel_id) in self._contacts:
+            self._contacts.remove((chan, channel_id))
+
+    def _remember(self, bundle_id: int) -> None:
+        self._seen[bundle_id] = None
+        if len(self._seen) > DTN_SEEN_HISTORY:
+            self._seen.popitem(last=False)
+
+    def _drop(self, bundle_id: int) -> None:
+        self.store.remove(bundle_id)
+        self._offered.pop(bundle_id, None)
+        self._arrived.pop(bundle_id, None)
+
+    async def send(
+        self,
+        data: bytes,
+        chan: Optional[MicroChannel] = None,
+        channel_id: int = 0,
+        destination: Optional[str] = None,
+    ) -> None:
+        """
+        Store a message as a bundle and forward it to the contacts available.
+
+        Args:
+            data: The data to send
+            chan: A channel now in contact, added to the contacts (optional)
+            channel_id: Channel identifier (default: 0)
+            destination: Node id to deliver to (default: the first node to receive it)
+
+        Raises:
+            FragmentationError: If the data exceeds bundle_size_limit
+            DtnError: If the bundle store is full
+        """
+        if not data:
+            self.logger.debug("No data to send")
+            return
+        if len(data) > self.bundle_size_limit:
+            raise FragmentationError(f"Bundle of {len(data)} bytes exceeds limit {self.bundle_size_limit}")
+        bundle = Bundle(
+            bundle_id=uuid.uuid4().int & _ID_MASK,
+            destination=node_hash(destination) if destination else 0,
+            created=int(time.time()),
+            lifetime=self.ttl_s,
+            flags=BUNDLE_CUSTODY if self.custody_required else 0,
+            length=len(data),
+        )
+        self.store.put(bundle, data)
+        self._remember(bundle.bundle_id)
+        self.logger.debug(f"Stored bundle {bundle.bundle_id:016x} for {destination or 'any node'}")
+        if chan is not None:
+            self.add_contact(chan, channel_id)
+        await self.forward()
+
+    async def forward(self, now: Optional[float] = None) -> int:
+        """
+        Expire old bundles and offer the others to the contacts available.
+
+        Args:
+            now: time.monotonic() to judge custody retries by (default: now)
+
+        Returns:
+            Number of bundles handed to at least one contact
+        """
+        now = time.monotonic() if now is None else now
+        for bundle_id in self.store.expire():
+            self._offered.pop(bundle_id, None)
+            self._arrived.pop(bundle_id, None)
+        if not self._contacts:
+            return 0
+        sent = 0
+        for bundle in self.store:
+            last = self._offered.get(bundle.bundle_id)
+            if last is not None and now - last < DTN_CUSTODY_RETRY:
+                continue
+            # Not back where it came from
+            targets = [c for c in self._contacts if c != self._arrived.get(bundle.bundle_id)]
+            if not targets:
+                continue
+            packet = _WIRE.pack(
+                _KIND_BUNDLE, bundle.flags, bundle.bundle_id, bundle.destination,
+                bundle.created, bundle.lifetime, bundle.hops + 1,
+            ) + self.store.payload(bundle.bundle_id)
+            handed = False
+            for chan, channel_id in targets:
+                try:
+                    await self.convergence.send(packet, chan, channel_id)
+                    handed = True
+                except TransportError as e:
+                    self.logger.warning(f"Failed to forward bundle {bundle.bundle_id:016x}: {e}")
+            if not handed:
+                continue
+            sent += 1
+            if bundle.custody:
+                self._offered[bundle.bundle_id] = now
+            else:
+                self._drop(bundle.bundle_id)
+        self.forwarded += sent
+        return sent
+
+    async def _signal_custody(self, bundle_id: int, chan: MicroChannel, channel_id: int) -> None:
+        try:
+            await self.convergence.send(_WIRE.pack(_KIND_CUSTODY, 0, bundle_id, 0, 0, 0, 0), chan, channel_id)
+        except TransportError as e:
+            self.logger.warning(f"Failed to signal custody of bundle {bundle_id:016x}: {e}")
+
+    async def recv(
+        self,
+        chan: MicroChannel,
+        channel_id: int = 0,
+    ) -> bytes:
+        """
+        Receive a bundle, storing it for forwarding unless it is addressed here.
+
+        Returns:
+            bytes: The payload of a bundle delivered to this node, or empty bytes
+        """
+        packet = await self.convergence.recv(chan, channel_id)
+        if len(packet) < _WIRE.size:
+            return b""
+        kind, flags, bundle_id, destination, created, lifetime, hops = _WIRE.unpack_from(packet)
+        if kind == _KIND_CUSTODY:
+            if bundle_id in self._offered:
+                self._drop(bundle_id)
+                self.custody_transfers += 1
+            return b""
+
+        payload = packet[_WIRE.size:]
+        bundle = Bundle(bundle_id, destination, created, lifetime, flags, hops, len(payload))
+        custody = bundle.custody
+        if bundle.expires <= time.time():
+            return b""
+        if destination in (self._node, 0):
+            if custody:
+                await self._signal_custody(bundle_id, chan, channel_id)
+            if bundle_id in self._seen:
+                return b""
+            self._remember(bundle_id)
+            self.delivered += 1
+            return payload
+
+        if bundle_id in self._seen:
+            # Another copy; custody is only ours to confirm while we hold it
+            if custody and bundle_id in self.store:
+                await self._signal_custody(bundle_id, chan, channel_id)
+            return b""
+        if hops >= DTN_MAX_HOPS:
+            self.refused += 1
+            self.logger.debug(f"Dropping bundle {bundle_id:016x} after {hops} hops")
+            return b""
+        try:
+            self.store.put(bundle, payload)
+        except DtnError as e:
+            self.refused += 1
+            self.logger.warning(f"Refusing bundle {bundle_id:016x}: {e}")
+            return b""
+        self._remember(bundle_id)
+        self._arrived[bundle_id] = (chan, channel_id)
+        if custody:
+            await self._signal_custody(bundle_id, chan, channel_id)
+        return b""
+
+    def stats(self) -> Dict[str, int]:
+        """Return bundle counters for monitoring."""
+        return {
+            "stored": len(self.store),
+            "stored_bytes": self.store.bytes,
+            "delivered": self.delivered,
+            "forwarded": self.forwarded,
+            "custody_transfers": self.custody_transfers,
+            "refused": self.refused,
+        }
+
+    def close(self) -> None:
+        """Close the bundle store."""
+        self.store.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
@@ -0,0 +1,525 @@
+"""
+Forward error correction transport.
+
+Carriers such as Wi-Fi SSID beacons and the Bitcoin mempool are one-way
+and lossy: nothing can be acknowledged, so nothing can be retransmitted.
+FecTransport (transport.schema.json kind ``fec``) instead sends each
+message as shards of a systematic Reed-Solomon erasure code over GF(256):
+k data shards plus ceil(k * redundancy_ratio) parity shards, any k of
+which rebuild the message.
+
+The code uses a Cauchy matrix, whose every square submatrix is
+invertible, so the decoder only solves for the data shards that are
+missing.  Field arithmetic works on whole shards at once: multiplying a
+shard by a constant is one ``bytes.translate`` through that constant's
+multiplication table, and adding shards is an XOR of two big integers,
+both done in C.
+
+Framing reuses PacketHeader with FLAG_FRAG | FLAG_LEN on every shard:
+
+- frag_id: message id
+- frag_offset: block number (high byte) and shard index in the block
+  (low byte); indices from k up are parity shards
+- total_length: message length, from which the receiver derives the
+  shard size (payload_length) and every block's k
+
+Messages are split into blocks of at most FEC_BLOCK_SHARDS data shards so
+that a block and its parity fit in the 256 elements of GF(256).
+"""
+
+import asyncio
+import functools
+import math
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Sequence
+
+try:
+    from ..channels.backchannel_encode import MicroChannel
+except ImportError:
+    # Use mock for testing
+    from .tests.mock_channel import MicroChannel
+
+from .base import FragmentationError, Transport, TransportError
+from .congestion import congestion_for
+from .constants import (
+    VERSION, FLAG_FRAG, FLAG_LEN, FRAG_HEADER_SIZE, TOTAL_LEN_SIZE, MAX_MESSAGE_SIZE,
+    FRAGMENT_TIMEOUT, MAX_REASSEMBLY_BYTES, REASSEMBLY_HISTORY,
+    FEC_BLOCK_SHARDS, FEC_REDUNDANCY, FEC_LOSS_FACTOR
+)
+from .header import PacketHeader
+from .medium import medium_profile
+
+_GF_POLY = 0x11D  # x^8 + x^4 + x^3 + x^2 + 1, generator 2
+
+
+def _build_tables():
+    exp = [0] * 512
+    log = [0] * 256
+    x = 1
+    for i in range(255):
+        exp[i] = x
+        log[x] = i
+        x <<= 1
+        if x & 0x100:
+            x ^= _GF_POLY
+    for i in range(255, 512):
+        exp[i] = exp[i - 255]
+    return exp, log
+
+
+_EXP, _LOG = _build_tables()
+
+
+def gf_mul(a: int, b: int) -> int:
+    """Multiply two elements of GF(256)."""
+    if a == 0 or b == 0:
+        return 0
+    return _EXP[_LOG[a] + _LOG[b]]
+
+
+def gf_inv(a: int) -> int:
+    """Return the multiplicative inverse of a nonzero element of GF(256)."""
+    if a == 0:
+        raise ZeroDivisionError("0 has no inverse in GF(256)")
+    return _EXP[255 - _LOG[a]]
+
+
+@functools.lru_cache(maxsize=256)
+def _mul_table(c: int) -> bytes:
+    return bytes(gf_mul(c, v) for v in range(256))
+
+
+def gf_scale(c: int, data: bytes) -> bytes:
+    """Multiply every byte of ``data`` by ``c``."""
+    if c == 1:
+        return data
+    if c == 0:
+        return bytes(len(data))
+    return data.translate(_mul_table(c))
+
+
+def _as_int(data: bytes) -> int:
+    return int.from_bytes(data, "little")
+
+
+def _as_bytes(value: int, size: int) -> bytes:
+    return value.to_bytes(size, "little")
+
+
+def _invert(matrix: List[List[int]]) -> List[List[int]]:
+    """Invert a square matrix over GF(256) by Gauss-Jordan elimination."""
+    n = len(matrix)
+    rows = [row[:] + [int(i == j) for j in range(n)] for i, row in enumerate(matrix)]
+    for col in range(n):
+        pivot = next((r for r in range(col, n) if rows[r][col]), None)
+        if pivot is None:
+            raise FecError("Singular decoding matrix")
+        rows[col], rows[pivot] = rows[pivot], rows[col]
+        inv = gf_inv(rows[col][col])
+        rows[col] = [gf_mul(inv, v) for v in rows[col]]
+        for r in range(n):
+            factor = rows[r][col]
+            if r != col and factor:
+                rows[r] = [v ^ gf_mul(factor, p) for v, p in zip(rows[r], rows[col])]
+    return [row[n:] for row in rows]
+
+
+class FecError(TransportError):
+    """Exception raised for forward error correction errors."""
+    pass
+
+
+class ReedSolomon:
+    """
+    Systematic Reed-Solomon erasure code with ``k`` data and ``m`` parity shards.
+
+    Parity shard i is sum_j C[i][j] * data_j with the Cauchy matrix
+    C[i][j] = 1 / ((k + i) + j), addition being XOR.
+    """
+
+    def __init__(self, k: int, m: int):
+        """
+        Create the code.
+
+        Args:
+            k: Data shards
+            m: Parity shards
+
+        Raises:
+            FecError: If k + m exceeds the 256 elements of GF(256)
+        """
+        if k < 1 or m < 0 or k + m > 256:
+            raise FecError(f"Unsupported Reed-Solomon code ({k} data, {m} parity shards)")
+        self.k = k
+        self.m = m
+        self.matrix = [[gf_inv((k + i) ^ j) for j in range(k)] for i in range(m)]
+
+    def encode(self, data: Sequence[bytes]) -> List[bytes]:
+        """
+        Compute the parity shards.
+
+        Args:
+            data: ``k`` data shards of equal length
+
+        Returns:
+            ``m`` parity shards
+        """
+        if len(data) != self.k:
+            raise FecError(f"Expected {self.k} data shards, got {len(data)}")
+        size = len(data[0])
+        parity = []
+        for row in self.matrix:
+            acc = 0
+            for c, shard in zip(row, data):
+                acc ^= _as_int(gf_scale(c, shard))
+            parity.append(_as_bytes(acc, size))
+        return parity
+
+    def decode(self, shards: Dict[int, bytes]) -> List[bytes]:
+        """
+        Rebuild the data shards from any ``k`` shards.
+
+        Args:
+            shards: Received shards by index (data 0..k-1, parity k..k+m-1)
+
+        Returns:
+            The ``k`` data shards
+
+        Raises:
+            FecError: If fewer than ``k`` shards were received
+        """
+        missing = [j for j in range(self.k) if j not in shards]
+        if not missing:
+            return [shards[j] for j in range(self.k)]
+        parity = [i for i in sorted(shards) if i >= self.k][:len(missing)]
+        if len(parity) < len(missing):
+            raise FecError(f"Need {self.k} shards, have {len(shards)}")
+        size = len(shards[parity[0]])
+
+        # Move the known data shards' contribution to the parity side...
+        residues = []
+        for index in parity:
+            row = self.matrix[index - self.k]
+            acc = _as_int(shards[index])
+            for j in range(self.k):
+                if j in shards:
+                    acc ^= _as_int(gf_scale(row[j], shards[j]))
+            residues.append(_as_bytes(acc, size))
+
+        # ...and solve for the missing ones
+        inverse = _invert([[self.matrix[index - self.k][j] for j in missing] for index in parity])
+        recovered = {}
+        for j, coefficients in zip(missing, inverse):
+            acc = 0
+            for c, residue in zip(coefficients, residues):
+                acc ^= _as_int(gf_scale(c, residue))
+            recovered[j] = _as_bytes(acc, size)
+        return [shards[j] if j in shards else recovered[j] for j in range(self.k)]
+
+
+@functools.lru_cache(maxsize=64)
+def _code(k: int, m: int) -> ReedSolomon:
+    return ReedSolomon(k, m)
+
+
+def block_layout(total: int, symbol_size: int) -> List[int]:
+    """Return the number of data shards of each block of a ``total``-byte message."""
+    shards = max(1, math.ceil(total / symbol_size))
+    return [min(FEC_BLOCK_SHARDS, shards - start) for start in range(0, shards, FEC_BLOCK_SHARDS)]
+
+
+class _PartialMessage:
+    """Shards received for one message, by block."""
+
+    def __init__(self, total: int, symbol_size: int, deadline: float):
+        self.total = total
+        self.symbol_size = symbol_size
+        self.deadline = deadline
+        self.layout = block_layout(total, symbol_size)
+        self.shards: Dict[int, Dict[int, bytes]] = {}
+        self.decoded: Dict[int, bytes] = {}
+        self.size = 0
+
+    def add(self, block: int, index: int, shard: bytes) -> int:
+        """Store a shard, decoding its block once it has enough; return the change in memory held."""
+        if block in self.decoded:
+            return 0
+        shards = self.shards.setdefault(block, {})
+        if index in shards:
+            return 0
+        shards[index] = shard
+        k = self.layout[block]
+        if len(shards) < k:
+            self.size += len(shard)
+            return len(shard)
+        freed = sum(len(s) for i, s in shards.items() if i != index)
+        # Parity row i depends only on k, so the widest code decodes any m
+        self.decoded[block] = b"".join(_code(k, 256 - k).decode(shards))
+        del self.shards[block]
+        self.size += len(self.decoded[block]) - freed
+        return len(self.decoded[block]) - freed
+
+    @property
+    def complete(self) -> bool:
+        return len(self.decoded) == len(self.layout)
+
+    def message(self) -> bytes:
+        return b"".join(self.decoded[b] for b in range(len(self.layout)))[:self.total]
+
+
+class FecDecoder:
+    """
+    Messages being decoded, keyed by e.g. ``(channel_id, frag_id)``.
+
+    Memory, expiry and duplicate handling follow Reassembler: partial
+    messages share a byte budget and a timeout, and completed message ids
+    are remembered so the surplus shards of a decoded message are ignored.
+
+    Attributes:
+        completed: Messages decoded
+        dropped: Messages discarded (expired or over budget)
+        recovered_blocks: Blocks that needed parity shards
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = MAX_REASSEMBLY_BYTES,
+        timeout: float = FRAGMENT_TIMEOUT,
+        history: int = REASSEMBLY_HISTORY,
+    ):
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.history = history
+        self.completed = 0
+        self.dropped = 0
+        self._partial: "OrderedDict[Hashable, _PartialMessage]" = OrderedDict()
+        self._done: "OrderedDict[Hashable, None]" = OrderedDict()
+        self._bytes = 0
+
+    @property
+    def buffered(self) -> int:
+        """Bytes held for partial messages."""
+        return self._bytes
+
+    def add(
+        self,
+        key: Hashable,
+        block: int,
+        index: int,
+        shard: bytes,
+        total: int,
+        now: Optional[float] = None,
+    ) -> Optional[bytes]:
+        """
+        Add a shard.
+
+        Returns:
+            The whole message when this shard completes it, otherwise None
+
+        Raises:
+            FecError: If the shard does not fit the message or the memory budget
+        """
+        now = time.monotonic() if now is None else now
+        self._expire(now)
+        if key in self._done:
+            return None
+        message = self._partial.get(key)
+        if message is None:
+            if not shard:
+                raise FecError("Empty shard")
+            message = _PartialMessage(total, len(shard), now + self.timeout)
+            self._partial[key] = message
+        if message.total != total or len(shard) != message.symbol_size or block >= len(message.layout):
+            raise FecError(f"Shard {block}/{index} does not match message {key}")
+        if self._bytes + len(shard) > self.max_bytes:
+            self._discard(key)
+            raise FecError("Decoder buffer full, dropping message")
+        self._bytes += message.add(block, index, shard)
+        if not message.complete:
+            return None
+        del self._partial[key]
+        self._bytes -= message.size
+        self._done[key] = None
+        if len(self._done) > self.history:
+            self._done.popitem(last=False)
+        self.completed += 1
+        return message.message()
+
+    def _expire(self, now: float) -> None:
+        while self._partial:
+            key, message = next(iter(self._partial.items()))
+            if message.deadline > now:
+                break
+            self._discard(key)
+
+    def _discard(self, key: Hashable) -> None:
+        message = self._partial.pop(key, None)
+        if message is not None:
+            self._bytes -= message.size
+            self.dropped += 1
+
+
+class FecTransport(Transport):
+    """
+    Forward-error-corrected datagram transport for one-way, lossy channels.
+
+    Each message is sent once, as Reed-Solomon shards, and delivered if
+    enough of them arrive; there are no acknowledgments or retransmissions.
+    """
+
+    def __init__(
+        self,
+        symbol_size: Optional[int] = None,
+        redundancy_ratio: Optional[float] = None,
+        rate_control: bool = True,
+    ):
+        """
+        Initialize the FEC transport.
+
+        Args:
+            symbol_size: Bytes per shard (default: what fits one packet at MTU)
+            redundancy_ratio: Parity shards per data shard (default: from the
+                channel medium's expected loss, or FEC_REDUNDANCY)
+            rate_control: Pace shards to the channel medium's rate limit
+        """
+        super().__init__()
+        if redundancy_ratio is not None and not 0 <= redundancy_ratio <= 1:
+            raise ValueError("redundancy_ratio must be between 0 and 1")
+        self.symbol_size = symbol_size
+        self.redundancy_ratio = redundancy_ratio
+        self.rate_control = rate_control
+        self._decoder = FecDecoder()
+
+    @classmethod
+    def from_config(cls, node: Dict[str, Any]) -> "FecTransport":
+        """
+        Create a transport from a transport.schema.json node of kind ``fec``.
+
+        Raises:
+            ValueError: If the node is not an FEC transport
+        """
+        if node.get("kind") != "fec" or "fec" not in node:
+            raise ValueError(f"Transport {node.get('id')} is not of kind 'fec'")
+        fec = node["fec"]
+        transport = cls(symbol_size=fec["symbol_size"], redundancy_ratio=fec["redundancy_ratio"])
+        if "max_payload_b" in node:
+            transport.MTU = node["max_payload_b"]
+        return transport
+
+    def _symbol_size(self) -> int:
+        return self.symbol_size or self.MTU - FRAG_HEADER_SIZE - TOTAL_LEN_SIZE
+
+    def _redundancy(self, chan: MicroChannel) -> float:
+        if self.redundancy_ratio is not None:
+            return self.redundancy_ratio
+        profile = medium_profile(chan)
+        if profile is not None and profile.expected_loss:
+            return min(1.0, FEC_LOSS_FACTOR * profile.expected_loss)
+        return FEC_REDUNDANCY
+
+    async def send(
+        self,
+        data: bytes,
+        chan: MicroChannel,
+        channel_id: int = 0,
+    ) -> None:
+        """
+        Send a message as data and parity shards.
+
+        Args:
+            data: The data to send
+            chan: The channel to send through
+            channel_id: Channel identifier (default: 0)
+
+        Raises:
+            FragmentationError: If the data exceeds MAX_MESSAGE_SIZE
+            TransportError: If a shard cannot be written
+        """
+        if not data:
+            self.logger.debug("No data to send")
+            return
+        if len(data) > MAX_MESSAGE_SIZE:
+            raise FragmentationError(f"Message of {len(data)} bytes exceeds {MAX_MESSAGE_SIZE}")
+
+        size = self._symbol_size()
+        ratio = self._redundancy(chan)
+        frag_id = uuid.uuid4().int & 0xFFFFFFFF
+        start = 0
+        for block, k in enumerate(block_layout(len(data), size)):
+            chunk = data[start:start + k * size].ljust(k * size, b"\0")
+            start += k * size
+            shards = [chunk[i:i + size] for i in range(0, len(chunk), size)]
+            m = math.ceil(k * ratio)
+            shards += _code(k, m).encode(shards) if m else []
+            for index, shard in enumerate(shards):
+                header = PacketHeader(
+                    version=VERSION,
+                    flags=FLAG_FRAG | FLAG_LEN,
+                    channel_id=channel_id,
+                    seq_no=0,  # Not used: shards are never acknowledged
+                    payload_length=len(shard),
+                    frag_id=frag_id,
+                    frag_offset=(block << 8) | index,
+                    total_length=len(data),
+                )
+                try:
+                    if self.rate_control:
+                        await congestion_for(chan).pace()
+                    chan.send(header.encode() + shard)
+                except Exception as e:
+                    self.logger.error(f"Error sending FEC shard: {e}")
+                    raise TransportError(f"Failed to send FEC shard: {e}") from e
+            self.logger.debug(
+                f"Sent block {block} of message {frag_id} as {k} data + {m} parity shards to channel {channel_id}"
+            )
+
+    async def recv(
+        self,
+        chan: MicroChannel,
+        channel_id: int = 0,
+    ) -> bytes:
+        """
+        Receive a shard and return the message once enough shards have arrived.
+
+        Returns:
+            bytes: A whole message, or empty bytes if none was completed
+
+        Raises:
+            TransportError: If the packet cannot be decoded
+        """
+        raw_packet = chan.receive()
+        if raw_packet is None:
+            return b""
+        try:
+            header, consumed = PacketHeader.decode(raw_packet)
+        except ValueError as e:
+            raise TransportError(f"Failed to receive FEC shard: {e}") from e
+        if not header.has_total_length:
+            self.logger.debug(f"Ignoring non-FEC packet on channel {channel_id}")
+            return b""
+        shard = raw_packet[consumed:consumed + header.payload_length]
+        try:
+            message = self._decoder.add(
+                (channel_id, header.frag_id), header.frag_offset >> 8, header.frag_offset & 0xFF,
+                shard, header.total_length,
+            )
+        except FecError as e:
+            self.logger.warning(f"Dropping FEC shard of message {header.frag_id}: {e}")
+            return b""
+        return message or b""
+
+    def stats(self) -> Dict[str, int]:
+        """Return decoder counters for monitoring."""
+        return {
+            "completed": self._decoder.completed,
+            "dropped": self._decoder.dropped,
+            "buffered": self._decoder.buffered,
+        }
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        return False
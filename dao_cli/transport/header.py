@@ -10,8 +10,8 @@ import struct
 from typing import Optional, Tuple, Any
 
 from .constants import (
-    VERSION, FLAG_SYN, FLAG_ACK, FLAG_FIN, FLAG_RST, FLAG_FRAG, 
-    HEADER_SIZE, FRAG_HEADER_SIZE
+    VERSION, FLAG_SYN, FLAG_ACK, FLAG_FIN, FLAG_RST, FLAG_FRAG, FLAG_LEN, FLAG_ACK_NO,
+    HEADER_SIZE, FRAG_HEADER_SIZE, TOTAL_LEN_SIZE, ACK_NO_SIZE
 )
 
 
@@ -29,6 +29,8 @@ class PacketHeader:
         frag_id: Fragment identifier (32-bit) - only if FLAG_FRAG is set
         frag_offset: Fragment offset in bytes (16-bit) - only if FLAG_FRAG is set
         channel: Reference to the channel for retransmissions (not serialized)
+        total_length: Length of the whole message (16-bit) - only if FLAG_FRAG and FLAG_LEN are set
+        ack_no: Cumulative acknowledgment piggybacked on data (16-bit) - only if FLAG_ACK_NO is set
     """
     version: int = VERSION
     flags: int = 0
@@ -38,6 +40,8 @@ class PacketHeader:
     frag_id: Optional[int] = None
     frag_offset: Optional[int] = None
     channel: Any = None  # Reference to the original channel for retransmissions
+    total_length: Optional[int] = None
+    ack_no: Optional[int] = None
     
     @property
     def is_syn(self) -> bool:
@@ -64,6 +68,16 @@ class PacketHeader:
         """Check if FRAG flag is set."""
         return bool(self.flags & FLAG_FRAG)
     
+    @property
+    def has_total_length(self) -> bool:
+        """Check if the fragment header carries the total message length."""
+        return self.is_frag and bool(self.flags & FLAG_LEN)
+    
+    @property
+    def has_ack_no(self) -> bool:
+        """Check if the header carries a piggybacked ACK number."""
+        return bool(self.flags & FLAG_ACK_NO)
+    
     def encode(self) -> bytes:
         """
         Encode the packet header to bytes.
@@ -79,10 +93,17 @@ class PacketHeader:
                            self.seq_no, 
                            self.payload_length)
         
+        # Piggybacked ACK number (2 bytes) if FLAG_ACK_NO is set
+        if self.has_ack_no and self.ack_no is not None:
+            header += struct.pack(">H", self.ack_no)
+        
         # Add fragment header if FLAG_FRAG is set
         if self.is_frag and self.frag_id is not None and self.frag_offset is not None:
             # Fragment header (6 bytes): frag_id (4), frag_offset (2)
             header += struct.pack(">IH", self.frag_id, self.frag_offset)
+            if self.has_total_length and self.total_length is not None:
+                # Total length (2 bytes), so the receiver can allocate the message up front
+                header += struct.pack(">H", self.total_length)
             
         return header
     
@@ -116,14 +137,27 @@ class PacketHeader:
         
         bytes_consumed = HEADER_SIZE
         
+        # Decode piggybacked ACK number if present
+        if header.has_ack_no:
+            if len(data) < bytes_consumed + ACK_NO_SIZE:
+                raise ValueError(f"Data too short for ACK number: {len(data)} bytes")
+            header.ack_no, = struct.unpack_from(">H", data, bytes_consumed)
+            bytes_consumed += ACK_NO_SIZE
+        
         # Decode fragment header if present
         if header.is_frag:
-            if len(data) < HEADER_SIZE + FRAG_HEADER_SIZE:
+            if len(data) < bytes_consumed + FRAG_HEADER_SIZE:
                 raise ValueError(f"Data too short for fragment header: {len(data)} bytes")
             
-            frag_id, frag_offset = struct.unpack(">IH", data[HEADER_SIZE:HEADER_SIZE + FRAG_HEADER_SIZE])
+            frag_id, frag_offset = struct.unpack_from(">IH", data, bytes_consumed)
             header.frag_id = frag_id
             header.frag_offset = frag_offset
             bytes_consumed += FRAG_HEADER_SIZE
             
+            if header.has_total_length:
+                if len(data) < bytes_consumed + TOTAL_LEN_SIZE:
+                    raise ValueError(f"Data too short for total length: {len(data)} bytes")
+                header.total_length, = struct.unpack_from(">H", data, bytes_consumed)
+                bytes_consumed += TOTAL_LEN_SIZE
+            
         return header, bytes_consumed
\ No newline at end of file
@@ -0,0 +1,120 @@
+"""
+Transmission-medium profiles for transport tuning.
+
+transmission_medium_nodes.json describes each carrier's payload size,
+typical latency and loss profile.  MediumProfile turns one node into the
+numbers the transport needs, adding vendor rate limits the metadata does
+not record (MEDIUM_MIN_INTERVAL_S).
+
+A channel declares its medium with a ``medium`` attribute: either a
+MediumProfile or a medium id such as "tm.airtag-rename".
+"""
+
+import dataclasses
+import functools
+import json
+import os
+import re
+from typing import Any, Dict, Optional
+
+from .constants import (
+    DAO_MEDIA_FILE, LOSS_DEFAULT, LOSS_HIGH, LOSS_LOW, MEDIA_FILE, MEDIUM_MIN_INTERVAL_S
+)
+
+_PERCENT = re.compile(r"(\d+(?:\.\d+)?)\s*(?:-\s*(\d+(?:\.\d+)?))?\s*%")
+
+
+def parse_loss(profile: Optional[str]) -> float:
+    """
+    Turn a loss profile description into an expected loss rate.
+
+    "10-30% random drop" gives the middle of the range (0.2); descriptions
+    without numbers map to LOSS_LOW, LOSS_HIGH or LOSS_DEFAULT.
+    """
+    if not profile:
+        return 0.0
+    match = _PERCENT.search(profile)
+    if match:
+        low = float(match.group(1))
+        high = float(match.group(2) or low)
+        return (low + high) / 200
+    text = profile.lower()
+    if "low" in text:
+        return LOSS_LOW
+    if "high" in text:
+        return LOSS_HIGH
+    return LOSS_DEFAULT
+
+
+@dataclasses.dataclass(frozen=True)
+class MediumProfile:
+    """
+    What the transport needs to know about a carrier.
+
+    Attributes:
+        medium_id: Node id, e.g. "tm.bitcoin-mempool"
+        max_payload_b: Largest frame payload
+        typical_latency_s: One-way latency
+        expected_loss: Random loss rate inherent to the medium
+        min_interval_s: Minimum seconds between frames (None: no vendor limit)
+    """
+    medium_id: str
+    max_payload_b: Optional[int] = None
+    typical_latency_s: Optional[float] = None
+    expected_loss: float = 0.0
+    min_interval_s: Optional[float] = None
+
+    @property
+    def max_rate(self) -> Optional[float]:
+        """Frames per second the vendor allows, or None if unlimited."""
+        return 1.0 / self.min_interval_s if self.min_interval_s else None
+
+    @classmethod
+    def from_node(cls, node: Dict[str, Any]) -> "MediumProfile":
+        """Build a profile from a TransmissionMedium node."""
+        props = node.get("properties", {})
+        medium_id = node["id"]
+        return cls(
+            medium_id=medium_id,
+            max_payload_b=props.get("max_payload_b"),
+            typical_latency_s=props.get("typical_latency_s"),
+            expected_loss=parse_loss(props.get("loss_profile")),
+            min_interval_s=props.get("min_interval_s", MEDIUM_MIN_INTERVAL_S.get(medium_id)),
+        )
+
+
+def _default_media_file() -> str:
+    return os.environ.get(DAO_MEDIA_FILE) or os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "..", "..", MEDIA_FILE
+    )
+
+
+@functools.lru_cache(maxsize=4)
+def load_media(path: Optional[str] = None) -> Dict[str, MediumProfile]:
+    """
+    Load every TransmissionMedium node of a metadata file.
+
+    Args:
+        path: JSON file (default: DAO_MEDIA_FILE or the repository's transmission_medium_nodes.json)
+
+    Returns:
+        Profiles by medium id; empty if the file does not exist
+    """
+    path = path or _default_media_file()
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as f:
+        nodes = json.load(f)
+    return {
+        node["id"]: MediumProfile.from_node(node)
+        for node in nodes
+        if node.get("type", "TransmissionMedium") == "TransmissionMedium" and "id" in node
+    }
+
+
+def medium_profile(chan: Any) -> Optional[MediumProfile]:
+    """Return the profile of the medium a channel declares, or None."""
+    medium = getattr(chan, "medium", None)
+    if medium is None or isinstance(medium, MediumProfile):
+        return medium
+    return load_media().get(medium)
@@ -0,0 +1,348 @@
+"""
+Stream multiplexing over one TcpTransport connection.
+
+A MuxSession carries any number of logical streams (a delta, a telemetry
+batch, ...) over a single connection per MicroChannel, so there is one
+handshake and one send window for the link instead of one per flow.
+Each packet holds one frame:
+
+    type (1) | stream id (2) | offset or limit (4) | data
+
+- MUX_FRAME_DATA / MUX_FRAME_END carry stream bytes at a stream offset;
+  END marks the last frame of a message.
+- MUX_FRAME_WINDOW grants credit: the peer may send the stream's bytes up
+  to the given offset.
+
+Sending: stream.send() queues its message in frames that fit one packet.
+One scheduler per session feeds the connection's window, taking frames
+from the most urgent stream that has credit (lowest priority value,
+round-robin between equals), so a small high-priority message overtakes
+a large transfer already under way instead of queueing behind it.
+
+Receiving: the connection hands over packets as they arrive
+(TcpTransport.deliver_unordered) and each stream puts its own frames in
+order, so a lost packet holds back only the stream it belongs to.  A
+stream may buffer at most STREAM_WINDOW bytes ahead of the data it has
+put in order; credit is granted again as the gap closes.
+
+Stream ids are chosen by the application, like channel ids: both ends
+use the same id for the same flow, and a stream is created on either end
+when it is first used.
+"""
+
+import asyncio
+import dataclasses
+import logging
+import struct
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from .base import TransportError
+from .constants import (
+    DEFAULT_PRIORITY, MUX_FRAME_DATA, MUX_FRAME_END, MUX_FRAME_WINDOW, MUX_HEADER_SIZE, STREAM_WINDOW
+)
+from .tcp import TcpTransport
+
+logger = logging.getLogger(__name__)
+
+_FRAME = struct.Struct(">BHI")
+
+
+class MuxError(TransportError):
+    """Exception raised for stream multiplexing errors."""
+    pass
+
+
+@dataclasses.dataclass
+class _Frame:
+    """A data frame waiting for the scheduler."""
+    offset: int
+    data: bytes
+    end: bool
+    sent: asyncio.Future  # InFlight entry once handed to the connection
+
+    def encode(self, stream_id: int) -> bytes:
+        kind = MUX_FRAME_END if self.end else MUX_FRAME_DATA
+        return _FRAME.pack(kind, stream_id, self.offset) + self.data
+
+
+class Stream:
+    """
+    One logical flow of messages in a MuxSession.
+
+    Attributes:
+        stream_id: Stream identifier (16-bit)
+        priority: Scheduling priority; lower values are sent first
+        send_offset: Stream bytes queued for sending so far
+        peer_limit: Stream offset the peer allows us to send up to
+        recv_offset: Stream bytes received in order so far
+    """
+
+    def __init__(self, session: "MuxSession", stream_id: int, priority: int = DEFAULT_PRIORITY):
+        self.session = session
+        self.stream_id = stream_id
+        self.priority = priority
+        self.send_offset = 0
+        self.peer_limit = STREAM_WINDOW
+        self.recv_offset = 0
+        self._outbox: Deque[_Frame] = deque()
+        self._early: Dict[int, Tuple[bytes, bool]] = {}  # offset -> (data, end) beyond a gap
+        self._message = bytearray()
+        self._advertised = STREAM_WINDOW
+
+    @property
+    def sendable(self) -> bool:
+        """Whether the next queued frame may be sent under the peer's credit."""
+        if not self._outbox:
+            return False
+        frame = self._outbox[0]
+        return frame.offset + len(frame.data) <= self.peer_limit
+
+    @property
+    def buffered(self) -> int:
+        """Bytes received beyond a gap, waiting for it to be filled."""
+        return sum(len(data) for data, _ in self._early.values())
+
+    async def send(self, data: bytes) -> None:
+        """
+        Send a message on this stream and wait until the peer has all of it.
+
+        Args:
+            data: The message
+
+        Raises:
+            TransportError: If a frame cannot be delivered
+        """
+        if not data:
+            return
+        size = self.session.transport.payload_size - MUX_HEADER_SIZE
+        loop = asyncio.get_running_loop()
+        frames = []
+        for start in range(0, len(data), size):
+            chunk = data[start:start + size]
+            frames.append(_Frame(self.send_offset, chunk, start + size >= len(data), loop.create_future()))
+            self.send_offset += len(chunk)
+        self._outbox.extend(frames)
+        self.session._schedule()
+        try:
+            for frame in frames:
+                entry = await frame.sent
+                await self.session.transport.wait_acked(entry, self.session.channel_id)
+        finally:
+            # On failure, do not send the rest of the message
+            for frame in frames:
+                if not frame.sent.done():
+                    frame.sent.cancel()
+            self._outbox = deque(frame for frame in self._outbox if not frame.sent.done())
+
+    def _pop_frame(self) -> _Frame:
+        return self._outbox.popleft()
+
+    def _fail(self, error: Exception) -> None:
+        """Fail every queued frame, e.g. when the session closes."""
+        while self._outbox:
+            frame = self._outbox.popleft()
+            if not frame.sent.done():
+                frame.sent.set_exception(error)
+
+    def _on_data(self, offset: int, data: bytes, end: bool) -> List[bytes]:
+        """
+        Take in a data frame.
+
+        Returns:
+            Messages completed by it, in order
+        """
+        if offset < self.recv_offset or offset in self._early:
+            return []
+        if offset + len(data) > self._advertised:
+            raise MuxError(
+                f"Stream {self.stream_id} frame at {offset}+{len(data)} exceeds credit {self._advertised}"
+            )
+        self._early[offset] = (data, end)
+        messages = []
+        while self.recv_offset in self._early:
+            data, end = self._early.pop(self.recv_offset)
+            self._message.extend(data)
+            self.recv_offset += len(data)
+            if end:
+                messages.append(bytes(self._message))
+                self._message = bytearray()
+        if self.recv_offset + STREAM_WINDOW - self._advertised >= STREAM_WINDOW // 2:
+            self._advertised = self.recv_offset + STREAM_WINDOW
+            self.session._grant(self.stream_id, self._advertised)
+        return messages
+
+
+class MuxSession:
+    """
+    Streams multiplexed over one TcpTransport connection on a MicroChannel.
+
+    Both ends create a session on their transport and channel.  Call recv()
+    regularly on both: it reads the channel, which also processes the
+    acknowledgments and credit that senders wait for.
+
+    Attributes:
+        transport: The underlying TcpTransport
+        chan: The MicroChannel
+        channel_id: Channel identifier of the connection
+        frames_sent: Frames handed to the connection
+    """
+
+    def __init__(self, transport: TcpTransport, chan, channel_id: int = 0):
+        """
+        Create a session.
+
+        Args:
+            transport: Transport carrying the connection
+            chan: The channel to multiplex
+            channel_id: Channel identifier of the connection (default: 0)
+        """
+        self.transport = transport
+        self.chan = chan
+        self.channel_id = channel_id
+        self.frames_sent = 0
+        self._streams: Dict[int, Stream] = {}
+        self._order: List[Stream] = []  # scheduling order; served streams move to the back
+        self._grants: Dict[int, int] = {}  # stream_id -> credit limit to announce
+        self._inbox: Deque[Tuple[int, bytes]] = deque()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        transport.deliver_unordered(channel_id)
+
+    def stream(self, stream_id: int, priority: Optional[int] = None) -> Stream:
+        """
+        Return a stream, creating it on first use.
+
+        Args:
+            stream_id: Stream identifier (16-bit)
+            priority: New scheduling priority, if given
+
+        Raises:
+            MuxError: If the stream id is out of range
+        """
+        if not 0 <= stream_id <= 0xFFFF:
+            raise MuxError(f"Stream id {stream_id} out of range")
+        stream = self._streams.get(stream_id)
+        if stream is None:
+            stream = self._streams[stream_id] = Stream(self, stream_id)
+            self._order.append(stream)
+        if priority is not None:
+            stream.priority = priority
+        return stream
+
+    async def send(self, stream_id: int, data: bytes) -> None:
+        """Send a message on a stream; see Stream.send()."""
+        await self.stream(stream_id).send(data)
+
+    async def recv(self) -> Optional[Tuple[int, bytes]]:
+        """
+        Read one packet from the channel and return a completed message, if any.
+
+        Returns:
+            (stream_id, message), or None if no message is complete yet
+
+        Raises:
+            TransportError: If the underlying transport fails
+        """
+        if not self._inbox:
+            payload = await self.transport.recv(self.chan, self.channel_id)
+            if payload:
+                self._on_frame(payload)
+        return self._inbox.popleft() if self._inbox else None
+
+    def _on_frame(self, payload: bytes) -> None:
+        if len(payload) < MUX_HEADER_SIZE:
+            logger.warning(f"Dropping {len(payload)}-byte frame on channel {self.channel_id}")
+            return
+        kind, stream_id, value = _FRAME.unpack_from(payload)
+        stream = self.stream(stream_id)
+        if kind == MUX_FRAME_WINDOW:
+            if value > stream.peer_limit:
+                stream.peer_limit = value
+                self._schedule()
+        elif kind in (MUX_FRAME_DATA, MUX_FRAME_END):
+            try:
+                messages = stream._on_data(value, payload[MUX_HEADER_SIZE:], kind == MUX_FRAME_END)
+            except MuxError as e:
+                logger.warning(f"Dropping frame: {e}")
+                return
+            self._inbox.extend((stream_id, message) for message in messages)
+        else:
+            logger.warning(f"Dropping frame of unknown type {kind:#x} on stream {stream_id}")
+
+    def _grant(self, stream_id: int, limit: int) -> None:
+        """Queue a credit announcement; a later one for the same stream replaces it."""
+        self._grants[stream_id] = limit
+        self._schedule()
+
+    def _schedule(self) -> None:
+        """Wake the scheduler, starting it on first use."""
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.ensure_future(self._run())
+        self._wakeup.set()
+
+    def _next_frame(self) -> Optional[Tuple[bytes, Optional[asyncio.Future]]]:
+        """Pick the next frame: credit first, then the most urgent stream with credit."""
+        if self._grants:
+            stream_id = next(iter(self._grants))
+            return _FRAME.pack(MUX_FRAME_WINDOW, stream_id, self._grants.pop(stream_id)), None
+        best = None
+        for stream in self._order:
+            if stream.sendable and (best is None or stream.priority < best.priority):
+                best = stream
+        if best is None:
+            return None
+        # Move it behind the other streams of its priority
+        self._order.remove(best)
+        self._order.append(best)
+        frame = best._pop_frame()
+        return frame.encode(best.stream_id), frame.sent
+
+    async def _run(self) -> None:
+        """Feed frames to the connection as its window admits them."""
+        while True:
+            picked = self._next_frame()
+            if picked is None:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            packet, sent = picked
+            try:
+                await self.transport.connect(self.chan, self.channel_id)
+                entry = await self.transport.transmit(packet, self.chan, self.channel_id)
+            except TransportError as e:
+                if sent is not None and not sent.done():
+                    sent.set_exception(e)
+                elif sent is None:
+                    logger.warning(f"Failed to send credit on channel {self.channel_id}: {e}")
+                continue
+            except asyncio.CancelledError:
+                if sent is not None and not sent.done():
+                    sent.set_exception(MuxError("Session closed"))
+                raise
+            if sent is None:
+                continue
+            self.frames_sent += 1
+            if sent.done():
+                continue  # The sender gave up on its message meanwhile
+            sent.set_result(entry)
+
+    async def close(self) -> None:
+        """Stop the scheduler and fail messages still queued."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for stream in self._streams.values():
+            stream._fail(MuxError("Session closed"))
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+        return False
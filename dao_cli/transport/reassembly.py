@@ -0,0 +1,275 @@
+"""
+Message reassembly from fragments.
+
+The first fragment of a message carries its total length (FLAG_LEN), so
+the receiver allocates one bytearray for the whole message and copies
+each fragment into it at its offset through a memoryview.  Nothing is
+concatenated and no per-fragment buffers are kept, except for fragments
+that arrive before the length is known; those are held until it is.
+
+All partial messages of a transport share a memory budget
+(MAX_REASSEMBLY_BYTES) and expire after FRAGMENT_TIMEOUT, unless the
+timeout is None: a reliable transport has acknowledged every fragment it
+holds and must not drop them by wall-clock time.  Such a transport claims
+the memory with reserve() before it acknowledges a fragment, and refuses
+the fragment unacknowledged when it does not fit.  Completed message ids
+are remembered for a while, so a late duplicate fragment cannot start the
+message over and deliver it a second time.
+"""
+
+import time
+from collections import OrderedDict
+import math
+from typing import Dict, Hashable, Optional
+
+from .base import FragmentationError
+from .constants import FRAGMENT_TIMEOUT, MAX_MESSAGE_SIZE, MAX_REASSEMBLY_BYTES, REASSEMBLY_HISTORY
+
+
+class PartialMessage:
+    """
+    A message being reassembled.
+
+    Attributes:
+        total: Message length, once known
+        received: Bytes written so far
+        deadline: Monotonic time after which the message is dropped
+    """
+
+    def __init__(self, deadline: float):
+        self.total: Optional[int] = None
+        self.received = 0
+        self.deadline = deadline
+        self._buffer: Optional[bytearray] = None
+        self._view: Optional[memoryview] = None
+        self._offsets = set()
+        self._early: Dict[int, bytes] = {}  # offset -> fragment that arrived before the length
+
+    @property
+    def size(self) -> int:
+        """Memory held, in bytes."""
+        if self._buffer is not None:
+            return len(self._buffer)
+        return sum(len(fragment) for fragment in self._early.values())
+
+    @property
+    def complete(self) -> bool:
+        """Whether every byte of the message has been written."""
+        return self.total is not None and self.received == self.total
+
+    def allocate(self, total: int) -> None:
+        """Allocate the message buffer and move early fragments into it."""
+        self.total = total
+        self._buffer = bytearray(total)
+        self._view = memoryview(self._buffer)
+        early, self._early = self._early, {}
+        for offset, fragment in early.items():
+            self._offsets.discard(offset)
+            self.write(offset, fragment)
+
+    def write(self, offset: int, fragment: bytes) -> None:
+        """
+        Store a fragment, ignoring one already received.
+
+        Raises:
+            FragmentationError: If the fragment does not fit the message
+        """
+        if offset in self._offsets:
+            return
+        if self._view is None:
+            self._early[offset] = bytes(fragment)
+        else:
+            end = offset + len(fragment)
+            if end > self.total:
+                raise FragmentationError(f"Fragment {offset}-{end} exceeds message length {self.total}")
+            self._view[offset:end] = fragment
+            self.received += len(fragment)
+        self._offsets.add(offset)
+
+    def release(self) -> bytes:
+        """Return the message and free the buffer."""
+        self._view.release()
+        message = bytes(self._buffer)
+        self._buffer = self._view = None
+        return message
+
+
+class Reassembler:
+    """
+    Partial messages of one transport, keyed by e.g. ``(channel_id, frag_id)``.
+
+    Attributes:
+        max_bytes: Memory budget for all partial messages
+        timeout: Seconds a message may take to complete (None: no limit)
+        completed: Messages returned
+        dropped: Messages discarded (expired, over budget or malformed)
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = MAX_REASSEMBLY_BYTES,
+        timeout: Optional[float] = FRAGMENT_TIMEOUT,
+        history: int = REASSEMBLY_HISTORY,
+    ):
+        """
+        Initialize the reassembler.
+
+        Args:
+            max_bytes: Memory budget for all partial messages
+            timeout: Seconds a message may take to complete; None never expires messages
+            history: Completed message keys remembered to drop late duplicates
+        """
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.history = history
+        self.completed = 0
+        self.dropped = 0
+        self._partial: "OrderedDict[Hashable, PartialMessage]" = OrderedDict()
+        self._done: "OrderedDict[Hashable, None]" = OrderedDict()
+        self._bytes = 0
+
+    @property
+    def buffered(self) -> int:
+        """Bytes held for partial messages."""
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._partial)
+
+    def __contains__(self, key: Hashable) -> bool:
+        """Whether a message is partially received."""
+        return key in self._partial
+
+    def reserve(self, key: Hashable, total: Optional[int] = None, size: int = 0,
+                now: Optional[float] = None) -> bool:
+        """
+        Claim the memory a fragment will need before it is accepted.
+
+        A length-carrying fragment allocates its message now, so add() cannot
+        run out of budget for it later.  A message that could never fit is let
+        through for add() to reject.
+
+        Args:
+            key: Message identifier
+            total: Message length, if the fragment carries it
+            size: Fragment length, for a fragment arriving before the length
+            now: Current monotonic time (default: time.monotonic())
+
+        Returns:
+            False if the fragment does not fit the memory budget at present
+        """
+        message = self._partial.get(key)
+        if key in self._done or (message is not None and message.total is not None):
+            return True
+        held = message.size if message is not None else 0
+        if total is None:
+            return self._bytes + size <= self.max_bytes
+        if total > min(MAX_MESSAGE_SIZE, self.max_bytes):
+            return True
+        if self._bytes - held + total > self.max_bytes:
+            return False
+        if message is None:
+            now = time.monotonic() if now is None else now
+            deadline = math.inf if self.timeout is None else now + self.timeout
+            message = self._partial[key] = PartialMessage(deadline)
+        try:
+            message.allocate(total)
+        except FragmentationError:
+            # Early fragments past the length; the message is malformed
+            self._partial.pop(key)
+            self._bytes -= held
+            self.dropped += 1
+            return True
+        self._bytes += message.size - held
+        return True
+
+    def add(
+        self,
+        key: Hashable,
+        offset: int,
+        fragment: bytes,
+        total: Optional[int] = None,
+        now: Optional[float] = None,
+    ) -> Optional[bytes]:
+        """
+        Add a fragment.
+
+        Args:
+            key: Message identifier
+            offset: Fragment offset in the message
+            fragment: Fragment payload
+            total: Message length, if this fragment carries it
+            now: Current monotonic time (default: time.monotonic())
+
+        Returns:
+            The whole message when this fragment completes it, otherwise None
+
+        Raises:
+            FragmentationError: If the fragment is malformed or the message does
+                not fit the memory budget; the message is dropped
+        """
+        now = time.monotonic() if now is None else now
+        self.expire(now)
+        if key in self._done:
+            return None
+
+        message = self._partial.get(key)
+        if message is None:
+            deadline = math.inf if self.timeout is None else now + self.timeout
+            message = self._partial[key] = PartialMessage(deadline)
+        before = message.size
+        try:
+            if total is not None and message.total is None:
+                if total > MAX_MESSAGE_SIZE:
+                    raise FragmentationError(f"Message length {total} exceeds {MAX_MESSAGE_SIZE}")
+                if self._bytes - before + total > self.max_bytes:
+                    raise FragmentationError(f"Reassembly buffer full, dropping {total}-byte message")
+                message.allocate(total)
+            if message.total is None and self._bytes + len(fragment) > self.max_bytes:
+                raise FragmentationError("Reassembly buffer full, dropping early fragment")
+            message.write(offset, fragment)
+        except FragmentationError:
+            del self._partial[key]
+            self._bytes -= before
+            self.dropped += 1
+            raise
+        self._bytes += message.size - before
+
+        if not message.complete:
+            return None
+        del self._partial[key]
+        self._bytes -= message.size
+        self._done[key] = None
+        if len(self._done) > self.history:
+            self._done.popitem(last=False)
+        self.completed += 1
+        return message.release()
+
+    def expire(self, now: Optional[float] = None) -> int:
+        """
+        Drop partial messages past their deadline.
+
+        Returns:
+            Number of messages dropped
+        """
+        now = time.monotonic() if now is None else now
+        expired = 0
+        # Messages are kept in arrival order, so deadlines are ascending
+        while self._partial:
+            key, message = next(iter(self._partial.items()))
+            if message.deadline > now:
+                break
+            self._discard(key)
+            expired += 1
+        return expired
+
+    def discard(self, predicate) -> None:
+        """Drop the partial messages whose key satisfies ``predicate``, e.g. on a connection reset."""
+        for key in [key for key in self._partial if predicate(key)]:
+            self._discard(key)
+
+    def _discard(self, key: Hashable) -> None:
+        message = self._partial.pop(key, None)
+        if message is not None:
+            self._bytes -= message.size
+            self.dropped += 1
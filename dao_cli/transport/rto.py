@@ -0,0 +1,133 @@
+"""
+Retransmission timeout estimation from measured round-trip times.
+
+RttEstimator implements the Jacobson/Karels estimator of RFC 6298:
+
+    RTTVAR = (1 - beta) * RTTVAR + beta * |SRTT - R|
+    SRTT   = (1 - alpha) * SRTT + alpha * R
+    RTO    = SRTT + max(G, K * RTTVAR)
+
+clamped to [MIN_RTO, MAX_RTO].  Callers apply Karn's algorithm: a packet
+that was retransmitted gives no sample, since its ACK may answer either
+copy.  A timeout doubles the RTO until the next valid sample.
+
+One estimator is kept per MicroChannel (see estimator_for()), so every
+TcpTransport and channel id carried over the same link shares what was
+learned about it.
+"""
+
+import threading
+import time
+import weakref
+from typing import Any, Dict, Optional
+
+from .constants import (
+    BACKOFF_FACTOR, CLOCK_GRANULARITY, INITIAL_TIMEOUT, MAX_RTO, MIN_RTO, RTO_K, RTT_ALPHA, RTT_BETA
+)
+from .medium import medium_profile
+
+
+class RttEstimator:
+    """
+    Smoothed RTT, RTT variance and the resulting retransmission timeout for one link.
+
+    Attributes:
+        srtt: Smoothed round-trip time in seconds (None before the first sample)
+        rttvar: Round-trip time variation in seconds
+        rto: Current retransmission timeout in seconds
+        samples: Number of RTT samples taken
+        timeouts: Number of times the RTO was backed off
+    """
+
+    def __init__(self, initial_rto: float = INITIAL_TIMEOUT, min_rto: float = MIN_RTO, max_rto: float = MAX_RTO):
+        """
+        Initialize the estimator.
+
+        Args:
+            initial_rto: Timeout used until the first sample
+            min_rto: Lower bound for the RTO
+            max_rto: Upper bound for the RTO
+        """
+        self.min_rto = min_rto
+        self.max_rto = max_rto
+        self.srtt: Optional[float] = None
+        self.rttvar = 0.0
+        self.rto = self._clamp(initial_rto)
+        self.samples = 0
+        self.timeouts = 0
+        self._last_backoff = float("-inf")
+        self._lock = threading.Lock()
+
+    def _clamp(self, rto: float) -> float:
+        return min(self.max_rto, max(self.min_rto, rto))
+
+    def sample(self, rtt: float) -> float:
+        """
+        Update the estimate with a round-trip time measured on a packet sent once.
+
+        Args:
+            rtt: Seconds from sending the packet to receiving its ACK
+
+        Returns:
+            The new RTO
+        """
+        with self._lock:
+            if self.srtt is None:
+                self.srtt = rtt
+                self.rttvar = rtt / 2
+            else:
+                self.rttvar = (1 - RTT_BETA) * self.rttvar + RTT_BETA * abs(self.srtt - rtt)
+                self.srtt = (1 - RTT_ALPHA) * self.srtt + RTT_ALPHA * rtt
+            self.rto = self._clamp(self.srtt + max(CLOCK_GRANULARITY, RTO_K * self.rttvar))
+            self.samples += 1
+            return self.rto
+
+    def on_timeout(self) -> float:
+        """
+        Back off after a retransmission timeout.
+
+        Packets in flight together tend to time out together; the RTO is
+        doubled at most once per RTO interval so a burst of them counts once.
+
+        Returns:
+            The new RTO
+        """
+        with self._lock:
+            now = time.monotonic()
+            if now - self._last_backoff >= self.rto:
+                self.rto = self._clamp(self.rto * BACKOFF_FACTOR)
+                self.timeouts += 1
+                self._last_backoff = now
+            return self.rto
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the estimator state for monitoring."""
+        return {
+            "srtt": self.srtt,
+            "rttvar": self.rttvar,
+            "rto": self.rto,
+            "samples": self.samples,
+            "timeouts": self.timeouts,
+        }
+
+
+_estimators: "weakref.WeakKeyDictionary[Any, RttEstimator]" = weakref.WeakKeyDictionary()
+_estimators_lock = threading.Lock()
+
+
+def estimator_for(chan: Any) -> RttEstimator:
+    """
+    Return the estimator shared by everything sending over ``chan``.
+
+    A channel with a ``typical_latency_s`` attribute, or a ``medium`` whose
+    profile has one (one-way latency), starts from a timeout of twice its
+    expected round trip instead of INITIAL_TIMEOUT.
+    """
+    with _estimators_lock:
+        estimator = _estimators.get(chan)
+        if estimator is None:
+            profile = medium_profile(chan)
+            latency = getattr(chan, "typical_latency_s", None) or (profile and profile.typical_latency_s)
+            estimator = RttEstimator(4 * latency) if latency else RttEstimator()
+            _estimators[chan] = estimator
+        return estimator
@@ -7,11 +7,14 @@ guaranteed delivery through acknowledgments, and automatic retransmissions.
 """
 
 import asyncio
+import json
 import logging
+import os
 import struct
 import time
 import uuid
-from typing import Dict, Optional, Set, Tuple
+from collections import deque
+from typing import Deque, Dict, List, Optional, Sequence, Set, Tuple
 
 try:
     from ..channels.backchannel_encode import MicroChannel
@@ -19,13 +22,24 @@ except ImportError:
     # Use mock for testing
     from .tests.mock_channel import MicroChannel
 
-from .base import Transport, ConnectionError, TransportError
+from dao_cli.channels.session_keys import HELLO_BYTES, SessionError, SessionHandshake
+
+from .base import Transport, ConnectionError, FragmentationError, TransportError
+from .congestion import congestion_for
 from .constants import (
-    VERSION, FLAG_SYN, FLAG_ACK, FLAG_FIN, FLAG_RST, FLAG_FRAG,
-    FLAG_SYN_ACK, FLAG_FIN_ACK, MTU, INITIAL_TIMEOUT,
-    BACKOFF_FACTOR, MAX_RETRIES, MAX_SEQ_NUM
+    VERSION, FLAG_SYN, FLAG_ACK, FLAG_FIN, FLAG_RST, FLAG_FRAG, FLAG_LEN, FLAG_SACK, FLAG_ACK_NO,
+    FLAG_SYN_ACK, FLAG_FIN_ACK, MTU, MAX_MESSAGE_SIZE, FRAG_HEADER_SIZE, TOTAL_LEN_SIZE, ACK_NO_SIZE,
+    INITIAL_TIMEOUT, BACKOFF_FACTOR, MAX_RETRIES, MAX_SEQ_NUM, MAX_RTO, WINDOW_SIZE, FAST_RETRANSMIT_THRESHOLD,
+    ACK_DELAY, ACK_EVERY, RESUME_TOKEN_SIZE
 )
 from .header import PacketHeader
+from .reassembly import Reassembler
+from .rto import estimator_for
+from .timers import TimerQueue
+from .window import InFlight, ReceiveWindow, SendWindow, decode_sack, encode_sack, seq_add
+
+# Timer key sequence number of a channel's delayed ACK; retransmission timers use real ones
+_ACK_TIMER = -1
 
 
 class RetransmitHandler:
@@ -35,7 +49,7 @@ class RetransmitHandler:
         """Initialize the retransmission handler.
         
         Args:
-            timeout: Initial timeout in seconds
+            timeout: Initial timeout in seconds, normally the channel's current RTO
             max_retries: Maximum number of retransmission attempts
         """
         self.initial_timeout = timeout
@@ -54,6 +68,12 @@ class RetransmitHandler:
         """Record that a packet was sent."""
         self.last_send_time = time.monotonic()
     
+    def rtt_sample(self) -> Optional[float]:
+        """Return the round trip so far, or None if the packet was retransmitted (Karn's algorithm)."""
+        if self.retries or not self.last_send_time:
+            return None
+        return time.monotonic() - self.last_send_time
+    
     def should_retransmit(self) -> bool:
         """Check if the packet should be retransmitted."""
         elapsed = time.monotonic() - self.last_send_time
@@ -62,7 +82,7 @@ class RetransmitHandler:
     def retransmit(self) -> None:
         """Mark a retransmission attempt."""
         self.retries += 1
-        self.current_timeout *= BACKOFF_FACTOR
+        self.current_timeout = min(self.current_timeout * BACKOFF_FACTOR, MAX_RTO)
         self.last_send_time = time.monotonic()
     
     @property
@@ -77,14 +97,74 @@ class TcpTransport(Transport):
     
     Provides reliable, ordered data transmission over micro-channels using:
     - Three-way handshake for connection setup
-    - Stop-and-wait flow control with acknowledgments
-    - Automatic retransmission of unacknowledged packets
+    - Sliding-window flow control with cumulative and selective acknowledgments
+      (see window.py)
+    - Automatic retransmission of unacknowledged packets, each on its own
+      timer (selective repeat), and early retransmission of SACK-revealed gaps
+    - In-order delivery, with duplicates dropped
     - Connection teardown
+    
+    The window is ``window_size`` packets, or the channel's own
+    ``window_size`` attribute if it has one, and adapts to the channel: it
+    halves on loss and grows back while whole windows are acknowledged.
+    
+    With rate_control enabled, every frame is paced to the channel medium's
+    vendor rate limit, the window is capped at the medium's bandwidth-delay
+    product, and only loss beyond the medium's expected random loss shrinks
+    the window (see congestion.py and medium.py).
+    
+    With secure_sessions enabled, the SYN and SYN-ACK carry session hellos
+    (see channels/session_keys.py) and both sides switch their channel to
+    the negotiated per-session keys once the handshake completes.  By
+    default this happens on every channel that has a key, so only the
+    handshake is sent under the long-term channel key.
+    
+    Data received in order is acknowledged after up to ``ack_delay`` seconds
+    or every ACK_EVERY packets, whichever comes first, and the ACK rides on
+    an outgoing data packet (FLAG_ACK_NO) when there is one.  Data packets
+    keep ACK_NO_SIZE bytes of the MTU free for it.  Out-of-order packets,
+    duplicates and packets filling a gap are acknowledged at once, so loss
+    recovery is not slowed down.
+    
+    With a ``state_dir``, each channel's session survives a restart.  Its
+    state is written to ``tcp-<channel_id>.json`` and flushed to disk before
+    every packet is sent and before every ACK: the resumption token, the
+    sequence numbers, unacknowledged packets, how far fragmented messages
+    have been sent, and received packets not yet returned.  The state is
+    bounded by the window.  A fragmented message being sent is saved once,
+    to ``tcp-<channel_id>.out-<frag_id>``, and the fragments of one being
+    received are appended to ``tcp-<channel_id>.in-<frag_id>``; both are
+    removed when the message completes.  A restarted node reloads it on
+    first use of the channel, and resume() or the next send() opens a SYN
+    with FLAG_ACK_NO that carries the token and our cumulative ACK.  A peer
+    holding the same token answers with its own cumulative ACK, and both
+    sides resend only what the other is missing.  Otherwise the peer
+    answers a fresh handshake and interrupted messages are sent again whole.
     """
     
-    def __init__(self):
-        """Initialize the TCP transport."""
+    def __init__(self, secure_sessions: Optional[bool] = None, window_size: int = WINDOW_SIZE,
+                 rate_control: bool = True, ack_delay: float = ACK_DELAY,
+                 state_dir: Optional[str] = None):
+        """
+        Initialize the TCP transport.
+        
+        Args:
+            secure_sessions: Negotiate per-session AEAD keys during the handshake;
+                True requires channels with a ``key`` and ``install_session()``,
+                False keeps the channel key (default: negotiate on channels that
+                have them)
+            window_size: Maximum number of unacknowledged packets per channel
+                (1 gives stop-and-wait)
+            rate_control: Pace frames and classify losses per channel medium
+            ack_delay: Seconds an ACK may be delayed (0 acknowledges every packet at once)
+            state_dir: Directory to persist session state in for resumption
+                after a restart (default: sessions are kept in memory only)
+        """
         super().__init__()
+        self.secure_sessions = secure_sessions
+        self.window_size = window_size
+        self.rate_control = rate_control
+        self.ack_delay = ack_delay
         
         # Sequence number tracking
         self._next_seq: Dict[int, int] = {}  # channel_id -> next seq number to use
@@ -92,65 +172,176 @@ class TcpTransport(Transport):
         # Acknowledgment tracking
         self._expected_acks: Dict[Tuple[int, int], asyncio.Event] = {}  # (channel_id, seq) -> ack event
         self._received_acks: Dict[int, int] = {}  # channel_id -> highest ack received
+        self._unacked: Dict[int, Tuple[MicroChannel, int]] = {}  # channel_id -> (channel, packets awaiting our ACK)
+        self.acks_sent = 0  # Standalone ACK packets sent, for monitoring
+        self.acks_piggybacked = 0  # ACKs carried by data packets instead
         
         # Pending retransmissions
         self._pending_packets: Dict[Tuple[int, int], Tuple[bytes, RetransmitHandler, MicroChannel]] = {}  # (channel, seq) -> (packet, handler, channel)
+        self._timers: TimerQueue[Tuple[int, int]] = TimerQueue()  # (channel, seq) -> retransmission deadline
+        self.timer_wakeups = 0  # Times the ticker woke up, for monitoring
+        
+        # Sliding windows
+        self._send_windows: Dict[int, SendWindow] = {}  # channel_id -> data packets in flight
+        self._recv_windows: Dict[int, ReceiveWindow] = {}  # channel_id -> reorder buffer
+        self._ready: Dict[int, Deque[Tuple[PacketHeader, bytes]]] = {}  # channel_id -> in-order packets not yet returned
+        # (channel_id, frag_id) -> partially received message.  Its fragments are
+        # acknowledged already, so they are never expired by time; the window
+        # bounds how many arrive for messages that do not complete.
+        self._reassembly = Reassembler(timeout=None)
+        self._unordered: Set[int] = set()  # channel_ids whose packets are returned as they arrive
         
         # Connection state
         self._connections: Set[int] = set()  # Set of channels with established connections
         
+        # Session key exchange state
+        self._handshakes: Dict[int, SessionHandshake] = {}  # channel_id -> our side of a pending exchange
+        self._accepted_hellos: Dict[int, Tuple[bytes, bytes]] = {}  # channel_id -> (peer hello, our SYN-ACK)
+        
+        # Session resumption state, kept only with a state_dir
+        self.state_dir = state_dir
+        self.sessions_resumed = 0  # Sessions continued after a restart, for monitoring
+        self._tokens: Dict[int, bytes] = {}  # channel_id -> resumption token of the session
+        self._restored: Set[int] = set()  # channel_ids whose saved state has been loaded
+        self._unconfirmed: Set[int] = set()  # Restored channels not yet heard from the peer
+        self._resume_accepted: Dict[int, bool] = {}  # channel_id -> whether the peer resumed our session
+        self._outbox: Dict[int, Dict[int, List]] = {}  # channel_id -> frag_id -> [message, offset of next fragment]
+        self._partials: Dict[int, Set[int]] = {}  # channel_id -> frag_ids of incomplete messages saved
+        self._dirty: Set[int] = set()  # channel_ids whose state changed since it was saved
+        self._obsolete: Dict[int, List[str]] = {}  # channel_id -> files to remove once the state is saved
+        if state_dir:
+            os.makedirs(state_dir, exist_ok=True)
+        
         # Defer creating asyncio event objects until an event loop exists
         self._stop_ticker = None
+        self._timer_wakeup = None
         self._ticker_task = None
     
     async def _start_ticker(self):
         """Start the background task for managing retransmissions."""
-        # Create the Event in an asyncio context
+        # Create the Events in an asyncio context
         if self._stop_ticker is None:
             self._stop_ticker = asyncio.Event()
+            self._timer_wakeup = asyncio.Event()
             
         if self._ticker_task is None:
             self._ticker_task = asyncio.create_task(self._ticker())
     
+    def _schedule(self, key: Tuple[int, int], deadline: float) -> None:
+        """Set a timer, waking the ticker if it is now the earliest."""
+        if self._timers.schedule(key, deadline):
+            if self._timer_wakeup is not None:
+                self._timer_wakeup.set()
+    
+    def _arm(self, key: Tuple[int, int]) -> None:
+        """(Re)start the retransmission timer of a pending packet from its last send."""
+        _, handler, _ = self._pending_packets[key]
+        self._schedule(key, handler.last_send_time + handler.current_timeout)
+    
+    def _untrack(self, channel_id: int, seq: int) -> None:
+        """Forget a pending packet and stop its timer."""
+        self._pending_packets.pop((channel_id, seq), None)
+        self._timers.cancel((channel_id, seq))
+    
     async def _ticker(self):
-        """Background task that checks for packets that need retransmission."""
+        """Background task that sleeps until the next retransmission deadline and handles expired timers."""
         while not self._stop_ticker.is_set():
             try:
-                await asyncio.sleep(0.1)  # Check 10 times per second
+                # Sleep until the earliest deadline, or until an earlier one is scheduled
+                deadline = self._timers.next_deadline()
+                self._timer_wakeup.clear()
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                try:
+                    await asyncio.wait_for(self._timer_wakeup.wait(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    pass
+                self.timer_wakeups += 1
                 
-                # Check each pending packet
-                for (channel_id, seq), (packet, handler, chan) in list(self._pending_packets.items()):
+                for key in self._timers.pop_due(time.monotonic()):
                     try:
-                        # Check if we've exceeded max retries
-                        if handler.has_failed:
-                            self.logger.warning(
-                                f"Failed to receive ACK for packet on channel {channel_id}, "
-                                f"seq {seq} after {handler.retries} retries"
-                            )
-                            # Fail the pending ACK wait and remove the packet
-                            if (channel_id, seq) in self._expected_acks:
-                                self._expected_acks[channel_id, seq].set()
-                            del self._pending_packets[channel_id, seq]
-                            continue
-                        
-                        # Check if it's time to retransmit
-                        if handler.should_retransmit():
-                            self.logger.debug(
-                                f"Retransmitting packet on channel {channel_id}, "
-                                f"seq {seq}, attempt {handler.retries + 1}/{handler.max_retries}"
-                            )
-                            # Send the packet again
-                            chan.send(packet)
-                            handler.retransmit()
+                        self._on_timer(key)
                     except Exception as e:
                         self.logger.error(f"Error in retransmission ticker: {e}")
-                        continue
                 
             except asyncio.CancelledError:
                 break
             except Exception as e:
                 self.logger.error(f"Unexpected error in retransmission ticker: {e}")
     
+    def _on_timer(self, key: Tuple[int, int]) -> None:
+        """Retransmit a packet whose timer expired, or give up on it after MAX_RETRIES."""
+        if key[1] == _ACK_TIMER:
+            self._on_ack_timer(key[0])
+            return
+        pending = self._pending_packets.get(key)
+        if pending is None:
+            return
+        channel_id, seq = key
+        packet, handler, chan = pending
+        
+        # Check if we've exceeded max retries
+        if handler.has_failed:
+            self.logger.warning(
+                f"Failed to receive ACK for packet on channel {channel_id}, "
+                f"seq {seq} after {handler.retries} retries"
+            )
+            # Fail the pending ACK wait and remove the packet
+            if key in self._expected_acks:
+                self._expected_acks[key].set()
+            if channel_id in self._send_windows:
+                self._send_windows[channel_id].fail(seq)
+            self._untrack(channel_id, seq)
+            return
+        
+        # A retransmission waits for the rate limit like any other frame
+        if self.rate_control and not congestion_for(chan).try_send():
+            self._timers.schedule(key, time.monotonic() + congestion_for(chan).ready_in())
+            return
+        
+        self.logger.debug(
+            f"Retransmitting packet on channel {channel_id}, "
+            f"seq {seq}, attempt {handler.retries + 1}/{handler.max_retries}"
+        )
+        # Send the packet again
+        chan.send(packet)
+        handler.retransmit()
+        self._arm(key)
+        estimator_for(chan).on_timeout()
+        window = self._send_windows.get(channel_id)
+        if window is not None and seq in window.in_flight and self._is_congestion(chan):
+            window.on_loss()
+    
+    def _on_ack_timer(self, channel_id: int) -> None:
+        """Send a delayed ACK that found no data packet to ride on."""
+        pending = self._unacked.get(channel_id)
+        if pending is None:
+            return
+        chan, _ = pending
+        if self.rate_control and not congestion_for(chan).try_send():
+            self._timers.schedule((channel_id, _ACK_TIMER), time.monotonic() + congestion_for(chan).ready_in())
+            return
+        chan.send(self._ack_packet(chan, channel_id))
+    
+    async def _emit(self, chan: MicroChannel, packet: bytes) -> None:
+        """Write a frame to the channel once its rate limit allows."""
+        if self.rate_control:
+            await congestion_for(chan).pace()
+        chan.send(packet)
+    
+    def _is_congestion(self, chan: MicroChannel) -> bool:
+        """Record a lost packet; True if the window should back off."""
+        return congestion_for(chan).on_loss() if self.rate_control else True
+    
+    def _secure(self, chan: MicroChannel) -> bool:
+        """Whether connections on a channel negotiate session keys."""
+        if self.secure_sessions is None:
+            return getattr(chan, "key", None) is not None and hasattr(chan, "install_session")
+        return self.secure_sessions
+    
+    def congestion_stats(self, chan: MicroChannel) -> Dict[str, object]:
+        """Return the rate and congestion controller state of a channel."""
+        return congestion_for(chan).snapshot()
+    
     async def send(
         self,
         data: bytes,
@@ -171,10 +362,15 @@ class TcpTransport(Transport):
             
         Raises:
             ConnectionError: If connection establishment fails
+            FragmentationError: If the data exceeds MAX_MESSAGE_SIZE
             TransportError: If data transmission fails
         """
+        if len(data) > MAX_MESSAGE_SIZE:
+            raise FragmentationError(f"Message of {len(data)} bytes exceeds {MAX_MESSAGE_SIZE}")
+        
         if not self._ticker_task:
             await self._start_ticker()
+        await self._restore(chan, channel_id)
             
         # Ensure we have an established connection
         if channel_id not in self._connections:
@@ -186,13 +382,300 @@ class TcpTransport(Transport):
             return
         
         # Determine if we need fragmentation
-        if len(data) <= self.MTU:
+        if len(data) <= self.payload_size:
             # Small enough for a single packet
             await self._send_with_ack(data, chan, channel_id)
         else:
             # Fragment and send each piece
             await self._send_fragmented(data, chan, channel_id)
     
+    async def connect(self, chan: MicroChannel, channel_id: int = 0) -> None:
+        """
+        Establish the connection on a channel if it is not already.
+        
+        Raises:
+            ConnectionError: If connection establishment fails
+        """
+        if not self._ticker_task:
+            await self._start_ticker()
+        await self._restore(chan, channel_id)
+        if channel_id not in self._connections:
+            await self._establish_connection(chan, channel_id)
+    
+    async def resume(self, chan: MicroChannel, channel_id: int = 0) -> None:
+        """
+        Continue a session saved in ``state_dir`` after a restart.
+        
+        Reconnects, resuming the session if the peer still holds it, then
+        sends the rest of any interrupted fragmented messages and waits until
+        everything in flight is acknowledged.
+        
+        Raises:
+            ConnectionError: If connection establishment fails
+            TransportError: If a packet is not acknowledged
+        """
+        await self.connect(chan, channel_id)
+        for frag_id, (data, offset) in list(self._outbox.get(channel_id, {}).items()):
+            await self._send_fragmented(data, chan, channel_id, frag_id, offset)
+        window = self._send_windows.get(channel_id)
+        for entry in list(window.in_flight.values()) if window is not None else []:
+            await self._wait_acked(entry, channel_id)
+    
+    @property
+    def payload_size(self) -> int:
+        """Largest payload of a data packet: the MTU less room for a piggybacked ACK."""
+        return self.MTU - ACK_NO_SIZE
+    
+    async def transmit(self, data: bytes, chan: MicroChannel, channel_id: int = 0) -> InFlight:
+        """
+        Send one packet through the window without waiting for its acknowledgment.
+        
+        For session layers that keep several packets of their own in flight
+        (see mux.py); await wait_acked() with the returned entry.
+        
+        Args:
+            data: Payload, at most payload_size bytes
+            chan: The channel to send through
+            channel_id: Channel identifier of an established connection
+            
+        Raises:
+            FragmentationError: If the payload does not fit one packet
+        """
+        if len(data) > self.payload_size:
+            raise FragmentationError(f"Payload of {len(data)} bytes exceeds {self.payload_size} bytes")
+        return await self._transmit(data, chan, channel_id)
+    
+    async def wait_acked(self, entry: InFlight, channel_id: int = 0) -> None:
+        """
+        Wait for a packet sent with transmit() to be acknowledged.
+        
+        Raises:
+            TransportError: If the packet was given up on
+        """
+        await self._wait_acked(entry, channel_id)
+    
+    def deliver_unordered(self, channel_id: int = 0, enabled: bool = True) -> None:
+        """
+        Return packets of a channel from recv() as soon as they arrive.
+        
+        Packets are still acknowledged, deduplicated and retransmitted as
+        usual, but one that arrives after a gap is returned at once instead of
+        waiting for the gap to be filled.  For session layers that order their
+        own data (see mux.py); fragmented messages are still reassembled.
+        """
+        if enabled:
+            self._unordered.add(channel_id)
+        else:
+            self._unordered.discard(channel_id)
+    
+    def _state_path(self, channel_id: int) -> str:
+        return os.path.join(self.state_dir, f"tcp-{channel_id}.json")
+    
+    def _message_path(self, channel_id: int, direction: str, frag_id: int) -> str:
+        return os.path.join(self.state_dir, f"tcp-{channel_id}.{direction}-{frag_id}")
+    
+    def _sync_dir(self) -> None:
+        """Flush a file created or renamed in the state directory to disk."""
+        if os.name != "posix":
+            return
+        fd = os.open(self.state_dir, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+    
+    def _write_file(self, path: str, data: bytes) -> None:
+        """Replace a file in the state directory atomically and durably."""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        self._sync_dir()
+    
+    def _remove_file(self, path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+    
+    def _save_outgoing(self, channel_id: int, frag_id: int, data: bytes) -> None:
+        """Save a fragmented message being sent; progress through it is kept in the channel state."""
+        self._write_file(self._message_path(channel_id, "out", frag_id), data)
+    
+    def _save_fragment(self, channel_id: int, frag_id: int, packet: bytes) -> None:
+        """Append a received fragment of an incomplete message to its file."""
+        partials = self._partials.setdefault(channel_id, set())
+        with open(self._message_path(channel_id, "in", frag_id), "ab") as f:
+            f.write(struct.pack(">I", len(packet)) + packet)
+            f.flush()
+            os.fsync(f.fileno())
+        if frag_id not in partials:
+            partials.add(frag_id)
+            self._sync_dir()
+    
+    def _load_fragments(self, path: str) -> List[bytes]:
+        """Read the fragments appended to a file, ignoring one cut short by a crash."""
+        with open(path, "rb") as f:
+            raw = f.read()
+        fragments = []
+        offset = 0
+        while offset + 4 <= len(raw):
+            (length,) = struct.unpack_from(">I", raw, offset)
+            if offset + 4 + length > len(raw):
+                break
+            fragments.append(raw[offset + 4:offset + 4 + length])
+            offset += 4 + length
+        return fragments
+    
+    def _drop_partials(self, channel_id: int) -> None:
+        """Forget the incomplete messages received on a channel."""
+        for frag_id in self._partials.pop(channel_id, ()):
+            self._remove_file(self._message_path(channel_id, "in", frag_id))
+    
+    @staticmethod
+    def _pack(header: PacketHeader, payload: bytes) -> str:
+        return (header.encode() + payload).hex()
+    
+    @staticmethod
+    def _unpack(packet: str) -> Tuple[PacketHeader, bytes]:
+        raw = bytes.fromhex(packet)
+        header, consumed = PacketHeader.decode(raw)
+        return header, raw[consumed:]
+    
+    def _reserved(self, packet: Tuple[PacketHeader, bytes]) -> Tuple[PacketHeader, bytes]:
+        """Claim reassembly memory again for an acknowledged fragment restored from a saved session."""
+        header, payload = packet
+        if header.is_frag and header.total_length is not None:
+            self._reassembly.reserve((header.channel_id, header.frag_id), header.total_length)
+        return packet
+    
+    def _persist(self, channel_id: int) -> None:
+        """Save a channel's session state, if it has a resumable session."""
+        self._dirty.discard(channel_id)
+        if not self.state_dir:
+            return
+        if channel_id not in self._tokens:
+            for path in self._obsolete.pop(channel_id, ()):
+                self._remove_file(path)
+            return
+        window = self._send_windows.get(channel_id)
+        recv_window = self._recv_windows.get(channel_id)
+        pending = []
+        if window is not None:
+            for seq, entry in window.in_flight.items():
+                if not entry.acked and (channel_id, seq) in self._pending_packets:
+                    pending.append([seq, self._pending_packets[channel_id, seq][0].hex()])
+        state = {
+            "token": self._tokens[channel_id].hex(),
+            "next_seq": self._next_seq.get(channel_id, 0),
+            "recv_next": recv_window.next_seq if recv_window is not None else None,
+            "pending": pending,
+            "outbox": [[frag_id, offset] for frag_id, (_, offset) in self._outbox.get(channel_id, {}).items()],
+            "buffered": [[seq, self._pack(*item)] for seq, item in recv_window.held()] if recv_window else [],
+            "ready": [self._pack(*item) for item in self._ready.get(channel_id, ())],
+        }
+        self._write_file(self._state_path(channel_id), json.dumps(state).encode())
+        for path in self._obsolete.pop(channel_id, ()):
+            self._remove_file(path)
+    
+    def _flush(self, channel_id: int) -> None:
+        """Save a channel's state if it changed since it was last saved."""
+        if channel_id in self._dirty:
+            self._persist(channel_id)
+    
+    async def _restore(self, chan: MicroChannel, channel_id: int) -> None:
+        """Load a channel's saved session on first use; it stays unconfirmed until the peer is heard from."""
+        if not self.state_dir or channel_id in self._restored:
+            return
+        self._restored.add(channel_id)
+        try:
+            with open(self._state_path(channel_id), "r") as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Ignoring unreadable session state for channel {channel_id}: {e}")
+            return
+        
+        self._tokens[channel_id] = bytes.fromhex(state["token"])
+        self._next_seq[channel_id] = state["next_seq"]
+        if state["recv_next"] is not None:
+            recv_window = ReceiveWindow(state["recv_next"])
+            for seq, packet in state["buffered"]:
+                recv_window.accept(seq, self._reserved(self._unpack(packet)))
+            self._recv_windows[channel_id] = recv_window
+            self._received_acks[channel_id] = recv_window.cumulative
+        if state["ready"]:
+            self._ready[channel_id] = deque(self._reserved(self._unpack(packet)) for packet in state["ready"])
+        prefix = f"tcp-{channel_id}.in-"
+        for name in sorted(os.listdir(self.state_dir)):
+            if name.startswith(prefix):
+                for packet in self._load_fragments(os.path.join(self.state_dir, name)):
+                    header, consumed = PacketHeader.decode(packet)
+                    await self._handle_fragment(header, packet[consumed:], save=False)
+        outbox = {}
+        for frag_id, offset in state["outbox"]:
+            try:
+                with open(self._message_path(channel_id, "out", frag_id), "rb") as f:
+                    outbox[frag_id] = [f.read(), offset]
+            except OSError as e:
+                self.logger.warning(f"Cannot finish message {frag_id} on channel {channel_id}: {e}")
+        if outbox:
+            self._outbox[channel_id] = outbox
+        
+        # Unacknowledged packets wait for the session to be confirmed before they are resent
+        window = self._window(chan, channel_id)
+        for seq, packet in state["pending"]:
+            handler = RetransmitHandler(estimator_for(chan).rto)
+            self._pending_packets[channel_id, seq] = (bytes.fromhex(packet), handler, chan)
+            window.add(InFlight(seq, handler, asyncio.Event()))
+        self._unconfirmed.add(channel_id)
+        self.logger.info(
+            f"Restored session on channel {channel_id}: {len(state['pending'])} packets to resend, "
+            f"{len(state['outbox'])} messages to finish"
+        )
+    
+    def _resumed(self, channel_id: int) -> None:
+        """Continue a restored or resumed session: the peer holds it too."""
+        self._unconfirmed.discard(channel_id)
+        self._connections.add(channel_id)
+        self.sessions_resumed += 1
+        for key in [key for key in self._pending_packets if key[0] == channel_id]:
+            self._arm(key)
+    
+    def _reset_session(self, channel_id: int) -> None:
+        """Give up on packets a peer that lost the session cannot acknowledge; interrupted messages restart whole."""
+        window = self._send_windows.get(channel_id)
+        if window is not None:
+            for seq in list(window.in_flight):
+                self._untrack(channel_id, seq)
+                window.fail(seq)
+        outbox = self._outbox.get(channel_id)
+        if outbox:
+            self._outbox[channel_id] = {}
+            for old_id, (data, _) in outbox.items():
+                frag_id = uuid.uuid4().int & 0xFFFFFFFF
+                self._save_outgoing(channel_id, frag_id, data)
+                self._remove_file(self._message_path(channel_id, "out", old_id))
+                self._outbox[channel_id][frag_id] = [data, 0]
+    
+    def _forget_session(self, channel_id: int) -> None:
+        """Delete the saved state of a session that has ended."""
+        if not self.state_dir:
+            return
+        self._tokens.pop(channel_id, None)
+        self._unconfirmed.discard(channel_id)
+        self._dirty.discard(channel_id)
+        self._obsolete.pop(channel_id, None)
+        self._outbox.pop(channel_id, None)
+        self._partials.pop(channel_id, None)
+        prefix = f"tcp-{channel_id}."
+        for name in os.listdir(self.state_dir):
+            if name.startswith(prefix):
+                self._remove_file(os.path.join(self.state_dir, name))
+    
     async def _establish_connection(self, chan: MicroChannel, channel_id: int) -> None:
         """Establish a TCP-like connection using three-way handshake."""
         # Initialize sequence numbers if not already done
@@ -202,19 +685,37 @@ class TcpTransport(Transport):
         # Sequence number for SYN packet
         seq = self._next_seq[channel_id]
         
+        # Offer a session key exchange in the SYN payload
+        hello = b""
+        if self._secure(chan):
+            handshake = SessionHandshake(chan.key, initiator=True)
+            self._handshakes[channel_id] = handshake
+            hello = handshake.hello()
+        
+        # A restored session asks to resume with its token and what it has received;
+        # a new one names itself with a fresh token
+        recv_window = self._recv_windows.get(channel_id)
+        resuming = channel_id in self._unconfirmed and recv_window is not None
+        token = b""
+        if self.state_dir:
+            if not resuming:
+                self._tokens[channel_id] = os.urandom(RESUME_TOKEN_SIZE)
+            token = self._tokens[channel_id]
+        
         # Create SYN packet
         syn_header = PacketHeader(
             version=VERSION,
-            flags=FLAG_SYN,
+            flags=FLAG_SYN | (FLAG_ACK_NO if resuming else 0),
             channel_id=channel_id,
             seq_no=seq,
-            payload_length=0,
-            channel=chan  # Store the channel reference
+            payload_length=len(hello) + len(token),
+            channel=chan,  # Store the channel reference
+            ack_no=recv_window.cumulative if resuming else None
         )
-        syn_packet = syn_header.encode()
+        syn_packet = syn_header.encode() + hello + token
         
         # Create handler for SYN retransmission
-        handler = RetransmitHandler()
+        handler = RetransmitHandler(estimator_for(chan).rto)
         self._pending_packets[channel_id, seq] = (syn_packet, handler, chan)
         
         # Set up acknowledgment tracking
@@ -224,152 +725,197 @@ class TcpTransport(Transport):
         try:
             # Send SYN packet
             self.logger.debug(f"Sending SYN packet to channel {channel_id}, seq {seq}")
-            chan.send(syn_packet)
+            await self._emit(chan, syn_packet)
             handler.record_send()
+            self._arm((channel_id, seq))
             
             # Wait for SYN-ACK
             self.logger.debug(f"Waiting for SYN-ACK on channel {channel_id}")
             await asyncio.wait_for(ack_event.wait(), timeout=INITIAL_TIMEOUT * 2)
             
+            # The handshake gives the link's first RTT sample
+            rtt = handler.rtt_sample()
+            if rtt is not None:
+                estimator_for(chan).sample(rtt)
+            
             # Clean up after receiving ACK
             del self._expected_acks[channel_id, seq]
-            del self._pending_packets[channel_id, seq]
+            self._untrack(channel_id, seq)
             
             # Connection is established
             self._connections.add(channel_id)
             
-            # Increment sequence number
-            self._next_seq[channel_id] = (seq + 1) % MAX_SEQ_NUM
-            self.logger.info(f"Connection established on channel {channel_id}")
+            if resuming and self._resume_accepted.pop(channel_id, False):
+                # The SYN of a resumed session takes no sequence number
+                self._resumed(channel_id)
+                self.logger.info(f"Session resumed on channel {channel_id}")
+            else:
+                if channel_id in self._unconfirmed:
+                    # The peer no longer knows the session: start over
+                    self._unconfirmed.discard(channel_id)
+                    self._reset_session(channel_id)
+                # Increment sequence number
+                self._next_seq[channel_id] = (seq + 1) % MAX_SEQ_NUM
+                self.logger.info(f"Connection established on channel {channel_id}")
+            self._persist(channel_id)
             
         except asyncio.TimeoutError:
             self.logger.error(f"Timeout waiting for SYN-ACK on channel {channel_id}")
             # Clean up
             if (channel_id, seq) in self._expected_acks:
                 del self._expected_acks[channel_id, seq]
-            if (channel_id, seq) in self._pending_packets:
-                del self._pending_packets[channel_id, seq]
+            self._untrack(channel_id, seq)
             raise ConnectionError(f"Failed to establish connection on channel {channel_id}")
+        finally:
+            self._handshakes.pop(channel_id, None)
     
-    async def _send_with_ack(self, data: bytes, chan: MicroChannel, channel_id: int) -> None:
-        """Send data with reliable acknowledgment."""
+    def rtt_stats(self, chan: MicroChannel) -> Dict[str, object]:
+        """Return the RTT estimator state of a channel (srtt, rttvar, rto, samples, timeouts)."""
+        return estimator_for(chan).snapshot()
+    
+    def _window(self, chan: MicroChannel, channel_id: int) -> SendWindow:
+        """Return the send window of a channel, creating it on first use."""
+        window = self._send_windows.get(channel_id)
+        if window is None:
+            size = getattr(chan, "window_size", None) or self.window_size
+            cap = congestion_for(chan).max_window if self.rate_control else None
+            window = SendWindow(min(size, cap) if cap else size)
+            self._send_windows[channel_id] = window
+        return window
+    
+    async def _transmit(
+        self,
+        data: bytes,
+        chan: MicroChannel,
+        channel_id: int,
+        flags: int = 0,
+        frag_id: Optional[int] = None,
+        frag_offset: Optional[int] = None,
+        total_length: Optional[int] = None,
+    ) -> InFlight:
+        """Send one data packet as soon as the window has room, without waiting for its ACK."""
+        window = self._window(chan, channel_id)
+        while window.full:
+            await self._wait_acked(window.oldest, channel_id)
+        
         # Get next sequence number
         seq = self._next_seq[channel_id]
         
-        # Create packet header
+        # Create packet header, carrying a pending ACK if there is one
+        ack_no = self._piggyback(channel_id)
         header = PacketHeader(
             version=VERSION,
-            flags=0,  # Regular data packet
+            flags=flags | (FLAG_ACK_NO if ack_no is not None else 0),
             channel_id=channel_id,
             seq_no=seq,
             payload_length=len(data),
-            channel=chan  # Store the channel reference
+            frag_id=frag_id,
+            frag_offset=frag_offset,
+            channel=chan,  # Store the channel reference
+            total_length=total_length,
+            ack_no=ack_no
         )
         packet = header.encode() + data
         
         # Create handler for retransmission
-        handler = RetransmitHandler()
+        handler = RetransmitHandler(estimator_for(chan).rto)
         self._pending_packets[channel_id, seq] = (packet, handler, chan)
+        entry = InFlight(seq, handler, asyncio.Event())
+        window.add(entry)
         
-        # Set up acknowledgment tracking
-        ack_event = asyncio.Event()
-        self._expected_acks[channel_id, seq] = ack_event
+        # Increment sequence number
+        self._next_seq[channel_id] = seq_add(seq, 1)
+        self._persist(channel_id)
+        
+        # Send the packet
+        self.logger.debug(f"Sending data packet to channel {channel_id}, seq {seq}, size {len(data)}")
+        await self._emit(chan, packet)
+        handler.record_send()
+        self._arm((channel_id, seq))
+        return entry
+    
+    async def _wait_acked(self, entry: InFlight, channel_id: int) -> None:
+        """
+        Wait until a packet in flight is acknowledged.
         
+        Raises:
+            TransportError: If it is given up on or no ACK arrives in time
+        """
+        # The ticker gives up after MAX_RETRIES; the timeout only guards against a stopped ticker
         try:
-            # Send the packet
-            self.logger.debug(f"Sending data packet to channel {channel_id}, seq {seq}, size {len(data)}")
-            chan.send(packet)
-            handler.record_send()
-            
-            # Wait for ACK
-            self.logger.debug(f"Waiting for ACK on channel {channel_id}, seq {seq}")
-            await asyncio.wait_for(ack_event.wait(), timeout=INITIAL_TIMEOUT * 4)
-            
-            # Clean up after receiving ACK
-            del self._expected_acks[channel_id, seq]
-            del self._pending_packets[channel_id, seq]
-            
-            # Increment sequence number
-            self._next_seq[channel_id] = (seq + 1) % MAX_SEQ_NUM
-            
+            await asyncio.wait_for(entry.event.wait(), timeout=MAX_RTO * MAX_RETRIES)
         except asyncio.TimeoutError:
-            self.logger.error(f"Timeout waiting for ACK on channel {channel_id}, seq {seq}")
+            self.logger.error(f"Timeout waiting for ACK on channel {channel_id}, seq {entry.seq}")
+        if not entry.acked:
             # Clean up
-            if (channel_id, seq) in self._expected_acks:
-                del self._expected_acks[channel_id, seq]
-            if (channel_id, seq) in self._pending_packets:
-                del self._pending_packets[channel_id, seq]
-            raise TransportError(f"Failed to get acknowledgment for data on channel {channel_id}")
+            self._untrack(channel_id, entry.seq)
+            if channel_id in self._send_windows:
+                self._send_windows[channel_id].fail(entry.seq)
+            raise TransportError(f"Failed to get acknowledgment for seq {entry.seq} on channel {channel_id}")
+    
+    async def _send_with_ack(self, data: bytes, chan: MicroChannel, channel_id: int) -> None:
+        """Send data with reliable acknowledgment."""
+        entry = await self._transmit(data, chan, channel_id)
+        await self._wait_acked(entry, channel_id)
     
-    async def _send_fragmented(self, data: bytes, chan: MicroChannel, channel_id: int) -> None:
-        """Send fragmented data with reliable acknowledgment."""
+    async def _send_fragmented(
+        self,
+        data: bytes,
+        chan: MicroChannel,
+        channel_id: int,
+        frag_id: Optional[int] = None,
+        offset: int = 0,
+    ) -> None:
+        """Send fragmented data from ``offset`` on with reliable acknowledgment, keeping the window full."""
         # Generate a unique fragment ID
-        frag_id = uuid.uuid4().int & 0xFFFFFFFF
+        if frag_id is None:
+            frag_id = uuid.uuid4().int & 0xFFFFFFFF
         
         # Calculate max payload per fragment (accounting for fragment header)
-        max_payload = self.MTU - 6  # Subtract 6 bytes for frag_id and offset
+        max_payload = self.payload_size - FRAG_HEADER_SIZE  # Subtract 6 bytes for frag_id and offset
         
-        # Split the data into fragments and send each one
-        offset = 0
-        while offset < len(data):
-            # Get the current fragment
-            fragment = data[offset:offset + max_payload]
-            
-            # Get next sequence number
-            seq = self._next_seq[channel_id]
-            
-            # Create fragment header
-            header = PacketHeader(
-                version=VERSION,
-                flags=FLAG_FRAG,
-                channel_id=channel_id,
-                seq_no=seq,
-                payload_length=len(fragment),
-                frag_id=frag_id,
-                frag_offset=offset,
-                channel=chan  # Store the channel reference
-            )
-            packet = header.encode() + fragment
-            
-            # Create handler for retransmission
-            handler = RetransmitHandler()
-            self._pending_packets[channel_id, seq] = (packet, handler, chan)
-            
-            # Set up acknowledgment tracking
-            ack_event = asyncio.Event()
-            self._expected_acks[channel_id, seq] = ack_event
-            
-            try:
-                # Send the fragment
-                self.logger.debug(
-                    f"Sending fragment {offset}/{len(data)} to channel {channel_id}, "
-                    f"seq {seq}, size {len(fragment)}"
-                )
-                chan.send(packet)
-                handler.record_send()
-                
-                # Wait for ACK
-                self.logger.debug(f"Waiting for ACK on channel {channel_id}, seq {seq}")
-                await asyncio.wait_for(ack_event.wait(), timeout=INITIAL_TIMEOUT * 4)
-                
-                # Clean up after receiving ACK
-                del self._expected_acks[channel_id, seq]
-                del self._pending_packets[channel_id, seq]
-                
-                # Increment sequence number
-                self._next_seq[channel_id] = (seq + 1) % MAX_SEQ_NUM
-                
-                # Move to next fragment
+        # With a state_dir the message is saved until it is acknowledged; the
+        # channel state records how far it has been sent
+        outbox = None
+        if self.state_dir:
+            outboxes = self._outbox.setdefault(channel_id, {})
+            if frag_id not in outboxes:
+                self._save_outgoing(channel_id, frag_id, data)
+            outbox = outboxes.setdefault(frag_id, [data, offset])
+        
+        # Send every fragment the window admits, then wait for the rest of the ACKs.
+        # The first fragment carries the message length so the receiver can allocate it.
+        window = self._window(chan, channel_id)
+        entries: List[InFlight] = []
+        try:
+            while offset < len(data):
+                first = offset == 0
+                fragment = data[offset:offset + max_payload - (TOTAL_LEN_SIZE if first else 0)]
+                while window.full:
+                    await self._wait_acked(window.oldest, channel_id)
+                if outbox is not None:
+                    outbox[1] = offset + len(fragment)
+                self.logger.debug(f"Sending fragment {offset}/{len(data)} to channel {channel_id}")
+                entries.append(await self._transmit(
+                    fragment, chan, channel_id,
+                    flags=FLAG_FRAG | (FLAG_LEN if first else 0),
+                    frag_id=frag_id,
+                    frag_offset=offset,
+                    total_length=len(data) if first else None,
+                ))
                 offset += len(fragment)
-                
-            except asyncio.TimeoutError:
-                self.logger.error(f"Timeout waiting for ACK on channel {channel_id}, seq {seq}")
-                # Clean up
-                if (channel_id, seq) in self._expected_acks:
-                    del self._expected_acks[channel_id, seq]
-                if (channel_id, seq) in self._pending_packets:
-                    del self._pending_packets[channel_id, seq]
-                raise TransportError(f"Failed to get acknowledgment for fragment on channel {channel_id}")
+            for entry in entries:
+                await self._wait_acked(entry, channel_id)
+        except TransportError:
+            # The caller learns of the failure; only a crash leaves the message to resume()
+            if self._outbox.get(channel_id, {}).pop(frag_id, None) is not None:
+                self._persist(channel_id)
+                self._remove_file(self._message_path(channel_id, "out", frag_id))
+            raise
+        if outbox is not None:
+            self._outbox[channel_id].pop(frag_id, None)
+            self._persist(channel_id)
+            self._remove_file(self._message_path(channel_id, "out", frag_id))
     
     async def _close_connection(self, chan: MicroChannel, channel_id: int) -> None:
         """Close a TCP-like connection using FIN/ACK exchange."""
@@ -393,7 +939,7 @@ class TcpTransport(Transport):
         fin_packet = fin_header.encode()
         
         # Create handler for FIN retransmission
-        handler = RetransmitHandler()
+        handler = RetransmitHandler(estimator_for(chan).rto)
         self._pending_packets[channel_id, seq] = (fin_packet, handler, chan)
         
         # Set up acknowledgment tracking
@@ -403,8 +949,9 @@ class TcpTransport(Transport):
         try:
             # Send FIN packet
             self.logger.debug(f"Sending FIN packet to channel {channel_id}, seq {seq}")
-            chan.send(fin_packet)
+            await self._emit(chan, fin_packet)
             handler.record_send()
+            self._arm((channel_id, seq))
             
             # Wait for FIN-ACK
             self.logger.debug(f"Waiting for FIN-ACK on channel {channel_id}")
@@ -412,10 +959,11 @@ class TcpTransport(Transport):
             
             # Clean up after receiving ACK
             del self._expected_acks[channel_id, seq]
-            del self._pending_packets[channel_id, seq]
+            self._untrack(channel_id, seq)
             
             # Connection is closed
             self._connections.remove(channel_id)
+            self._forget_session(channel_id)
             
             # Increment sequence number
             self._next_seq[channel_id] = (seq + 1) % MAX_SEQ_NUM
@@ -426,8 +974,7 @@ class TcpTransport(Transport):
             # Clean up
             if (channel_id, seq) in self._expected_acks:
                 del self._expected_acks[channel_id, seq]
-            if (channel_id, seq) in self._pending_packets:
-                del self._pending_packets[channel_id, seq]
+            self._untrack(channel_id, seq)
             raise ConnectionError(f"Failed to close connection on channel {channel_id}")
     
     async def recv(
@@ -454,10 +1001,15 @@ class TcpTransport(Transport):
         """
         if not self._ticker_task:
             await self._start_ticker()
+        await self._restore(chan, channel_id)
             
         # Initialize sequence tracking if not done already
         if channel_id not in self._received_acks:
             self._received_acks[channel_id] = -1
+        
+        # Packets that arrived ahead of a gap are returned once it is filled
+        if self._ready.get(channel_id):
+            return await self._deliver_ready(channel_id)
             
         # Read from the channel
         raw_packet = chan.receive()
@@ -468,38 +1020,78 @@ class TcpTransport(Transport):
             # Decode header
             header, bytes_consumed = PacketHeader.decode(raw_packet)
             
+            # Anything but a SYN shows the peer still holds a session we restored,
+            # unless we are asking to resume it ourselves
+            if channel_id in self._unconfirmed and not header.is_syn and \
+                    (channel_id, self._next_seq.get(channel_id)) not in self._expected_acks:
+                self._resumed(channel_id)
+            
             # For connection management
-            if header.is_syn:
-                return await self._handle_syn(header, chan, channel_id)
+            if header.is_syn and header.is_ack:
+                return await self._handle_syn_ack(header, raw_packet[bytes_consumed:], chan, channel_id)
+            elif header.is_syn:
+                return await self._handle_syn(header, chan, channel_id, raw_packet[bytes_consumed:])
+            elif header.is_fin and header.is_ack:
+                return await self._handle_fin_ack(header, channel_id)
             elif header.is_fin:
                 return await self._handle_fin(header, chan, channel_id)
             elif header.is_rst:
                 return await self._handle_rst(header, chan, channel_id)
             
-            # For regular data packets
-            if header.is_ack:
-                await self._handle_ack(header, channel_id)
-                
             # Extract payload
             payload = raw_packet[bytes_consumed:]
             
-            # Send acknowledgment for the received packet
-            await self._send_ack(header.seq_no, chan, channel_id)
+            # ACKs are processed but never acknowledged themselves
+            if header.is_ack:
+                await self._handle_ack(header, payload, chan, channel_id)
+                return b""
             
-            # Update highest received ack
-            self._received_acks[channel_id] = header.seq_no
+            # An ACK riding on the data
+            if header.has_ack_no and header.ack_no is not None:
+                await self._process_ack(chan, channel_id, header.ack_no)
+            
+            # Put the packet in order, dropping duplicates of delivered ones
+            window = self._recv_windows.setdefault(channel_id, ReceiveWindow())
+            fresh = window.is_new(header.seq_no)
+            unordered = channel_id in self._unordered
             
-            # If no payload, just return empty
-            if not payload:
+            # Reassembly memory is claimed before a fragment is acknowledged.  One
+            # that does not fit is refused without an ACK, so the sender keeps it
+            # and retransmits once partial messages have completed.
+            if fresh and header.is_frag and payload and not self._reassembly.reserve(
+                    (header.channel_id, header.frag_id), header.total_length, len(payload) if unordered else 0):
+                self.logger.debug(f"Reassembly buffer full, refusing packet {header.seq_no} on channel {channel_id}")
                 return b""
             
-            # Check if this is a fragment
-            if header.is_frag:
-                # Handle fragments similar to UDP but with reliability
-                return await self._handle_fragment(header, payload)
-            else:
-                # Regular data packet
-                return payload
+            in_order = window.accept(header.seq_no, (header, payload))
+            if not unordered:
+                self._ready.setdefault(channel_id, deque()).extend(in_order)
+            
+            # Saved before the ACK goes out (see _ack_packet), so nothing
+            # acknowledged is lost in a restart
+            if fresh:
+                self._dirty.add(channel_id)
+            
+            # Returned as soon as it arrives, whether or not it is in order; a
+            # fragment goes into its message before the ACK, within the memory
+            # reserved above
+            message = b""
+            if unordered and fresh:
+                message = await self._deliver(header, payload)
+                self._delivered(channel_id, message)
+            
+            # Acknowledge everything received so far.  Duplicates (their ACK was
+            # lost), packets beyond a gap and packets filling one are acknowledged
+            # at once; in-order data may wait for more.
+            ordinary = fresh and len(in_order) == 1 and not window.buffered
+            await self._acknowledge(chan, channel_id, immediate=not ordinary)
+            
+            # Update highest received ack
+            self._received_acks[channel_id] = window.cumulative
+            
+            if unordered:
+                return message
+            return await self._deliver_ready(channel_id)
             
         except Exception as e:
             self.logger.error(f"Error receiving TCP packet: {e}")
@@ -510,31 +1102,80 @@ class TcpTransport(Transport):
         header: PacketHeader,
         chan: MicroChannel,
         channel_id: int,
+        hello: bytes = b"",
     ) -> bytes:
-        """Handle a SYN packet (connection request)."""
+        """Handle a SYN packet (connection request), answering a session hello if it carries one."""
         self.logger.debug(f"Received SYN packet on channel {channel_id}, seq {header.seq_no}")
         
-        # Send SYN-ACK
-        syn_ack_header = PacketHeader(
-            version=VERSION,
-            flags=FLAG_SYN_ACK,
-            channel_id=channel_id,
-            seq_no=0,  # First sequence from our side
-            payload_length=0,
-            channel=chan  # Store the channel reference
+        # The payload is a session hello, a resumption token, or both
+        token = b""
+        if len(hello) in (RESUME_TOKEN_SIZE, HELLO_BYTES + RESUME_TOKEN_SIZE):
+            hello, token = hello[:-RESUME_TOKEN_SIZE], hello[-RESUME_TOKEN_SIZE:]
+        recv_window = self._recv_windows.get(channel_id)
+        resume = (
+            header.has_ack_no and bool(token) and token == self._tokens.get(channel_id)
+            and recv_window is not None
         )
-        syn_ack_packet = syn_ack_header.encode()
+        
+        keys = None
+        reply = b""
+        if hello and self._secure(chan):
+            accepted = self._accepted_hellos.get(channel_id)
+            if accepted is not None and accepted[0] == hello:
+                # Retransmitted SYN: our SYN-ACK was lost, repeat it without rekeying
+                reply = accepted[1]
+            else:
+                handshake = SessionHandshake(chan.key, initiator=False)
+                try:
+                    keys = handshake.derive(hello)
+                except SessionError as e:
+                    raise ConnectionError(f"Rejected session hello on channel {channel_id}: {e}") from e
+                reply = handshake.hello()
+                self._accepted_hellos[channel_id] = (hello, reply)
         
         # Initialize sequence tracking if not done yet
         if channel_id not in self._next_seq:
             self._next_seq[channel_id] = 0
-            
-        # Update received ack
-        self._received_acks[channel_id] = header.seq_no
+        
+        # Send SYN-ACK; resuming, it tells the peer what we have received
+        syn_ack_header = PacketHeader(
+            version=VERSION,
+            flags=FLAG_SYN_ACK | (FLAG_ACK_NO if resume else 0),
+            channel_id=channel_id,
+            seq_no=self._next_seq[channel_id],  # First sequence from our side
+            payload_length=len(reply),
+            channel=chan,  # Store the channel reference
+            ack_no=recv_window.cumulative if resume else None
+        )
+        syn_ack_packet = syn_ack_header.encode() + reply
+        
+        if resume:
+            # Keep what we received; the peer's ACK settles what we sent
+            if header.ack_no is not None:
+                await self._process_ack(chan, channel_id, header.ack_no)
+            self._resumed(channel_id)
+        else:
+            # Update received ack; data from the peer starts after its SYN
+            self._received_acks[channel_id] = header.seq_no
+            self._recv_windows[channel_id] = ReceiveWindow(seq_add(header.seq_no, 1))
+            self._cancel_ack(channel_id)
+            self._ready.pop(channel_id, None)
+            if self.state_dir and token:
+                if channel_id in self._unconfirmed or self._tokens.get(channel_id, token) != token:
+                    # The peer started a new session: ours can no longer be resumed
+                    self._unconfirmed.discard(channel_id)
+                    self._reset_session(channel_id)
+                self._tokens[channel_id] = token
+                self._drop_partials(channel_id)
+        self._persist(channel_id)
             
         # Send SYN-ACK
         self.logger.debug(f"Sending SYN-ACK to channel {channel_id}")
-        chan.send(syn_ack_packet)
+        await self._emit(chan, syn_ack_packet)
+        
+        # The SYN-ACK went out under the channel key; everything after it uses the session
+        if keys is not None:
+            chan.install_session(keys)
         
         # Connection is now established
         self._connections.add(channel_id)
@@ -542,6 +1183,55 @@ class TcpTransport(Transport):
         # We don't have any data to return yet
         return b""
     
+    async def _handle_syn_ack(
+        self,
+        header: PacketHeader,
+        hello: bytes,
+        chan: MicroChannel,
+        channel_id: int,
+    ) -> bytes:
+        """Handle a SYN-ACK, completing our connection attempt (and session key exchange)."""
+        self.logger.debug(f"Received SYN-ACK on channel {channel_id}")
+        seq = self._next_seq.get(channel_id, 0)
+        ack_event = self._expected_acks.get((channel_id, seq))
+        if ack_event is None or channel_id in self._connections:
+            self.logger.debug(f"Ignoring SYN-ACK on channel {channel_id}: no connection attempt pending")
+            return b""
+        
+        if self._secure(chan):
+            handshake = self._handshakes.get(channel_id)
+            if not hello or handshake is None:
+                self.logger.warning(f"Peer on channel {channel_id} did not answer the session key exchange")
+                return b""
+            try:
+                keys = handshake.derive(hello)
+            except SessionError as e:
+                self.logger.warning(f"Invalid session hello on channel {channel_id}: {e}")
+                return b""
+            chan.install_session(keys)
+        
+        if header.has_ack_no and header.ack_no is not None:
+            # Our session was resumed: settle what the peer received before we restarted
+            self._resume_accepted[channel_id] = True
+            await self._process_ack(chan, channel_id, header.ack_no)
+        elif self.state_dir:
+            # A new session: the peer's data starts at the SYN-ACK's sequence number
+            self._recv_windows[channel_id] = ReceiveWindow(header.seq_no)
+            self._cancel_ack(channel_id)
+            self._ready.pop(channel_id, None)
+            self._drop_partials(channel_id)
+        
+        ack_event.set()
+        return b""
+    
+    async def _handle_fin_ack(self, header: PacketHeader, channel_id: int) -> bytes:
+        """Handle a FIN-ACK, completing our connection close."""
+        ack_event = self._expected_acks.get((channel_id, self._next_seq.get(channel_id, 0)))
+        if ack_event is not None:
+            self.logger.debug(f"Received FIN-ACK on channel {channel_id}")
+            ack_event.set()
+        return b""
+    
     async def _handle_fin(
         self,
         header: PacketHeader,
@@ -567,11 +1257,12 @@ class TcpTransport(Transport):
             
         # Send FIN-ACK
         self.logger.debug(f"Sending FIN-ACK to channel {channel_id}")
-        chan.send(fin_ack_packet)
+        await self._emit(chan, fin_ack_packet)
         
         # Remove connection
         if channel_id in self._connections:
             self._connections.remove(channel_id)
+        self._forget_session(channel_id)
         
         # We don't have any data to return
         return b""
@@ -592,6 +1283,14 @@ class TcpTransport(Transport):
             self._next_seq[channel_id] = 0
         if channel_id in self._received_acks:
             self._received_acks[channel_id] = -1
+        self._recv_windows.pop(channel_id, None)
+        self._cancel_ack(channel_id)
+        self._ready.pop(channel_id, None)
+        self._reassembly.discard(lambda key: key[0] == channel_id)
+        window = self._send_windows.pop(channel_id, None)
+        if window is not None:
+            for seq in list(window.in_flight):
+                window.fail(seq)
             
         # Clean up any pending packets for this channel
         for key in list(self._expected_acks.keys()):
@@ -601,45 +1300,173 @@ class TcpTransport(Transport):
         
         for key in list(self._pending_packets.keys()):
             if key[0] == channel_id:
-                del self._pending_packets[key]
+                self._untrack(*key)
+        self._forget_session(channel_id)
                 
         # We don't have any data to return
         return b""
     
-    async def _handle_ack(self, header: PacketHeader, channel_id: int) -> None:
-        """Process an acknowledgment packet."""
-        seq = header.seq_no
-        ack_key = (channel_id, seq)
+    async def _handle_ack(
+        self,
+        header: PacketHeader,
+        payload: bytes,
+        chan: MicroChannel,
+        channel_id: int,
+    ) -> None:
+        """Process an ACK packet."""
+        blocks = decode_sack(payload) if header.flags & FLAG_SACK else []
+        await self._process_ack(chan, channel_id, header.seq_no, blocks)
+    
+    async def _process_ack(
+        self,
+        chan: MicroChannel,
+        channel_id: int,
+        cumulative: int,
+        blocks: Sequence[Tuple[int, int]] = (),
+    ) -> None:
+        """Process a cumulative acknowledgment and its selective ranges."""
+        window = self._send_windows.get(channel_id)
+        if window is None:
+            self.logger.debug(f"Received unexpected ACK for seq {cumulative} on channel {channel_id}")
+            return
         
-        # Check if we're waiting for this ACK
-        if ack_key in self._expected_acks:
-            self.logger.debug(f"Received ACK for seq {seq} on channel {channel_id}")
-            # Signal that the ACK was received
-            self._expected_acks[ack_key].set()
-        else:
-            self.logger.debug(f"Received unexpected ACK for seq {seq} on channel {channel_id}")
+        estimator = estimator_for(chan)
+        acked = window.acknowledge(cumulative, blocks)
+        if acked and self.rate_control:
+            congestion_for(chan).on_ack(len(acked))
+        for entry in acked:
+            self.logger.debug(f"Received ACK for seq {entry.seq} on channel {channel_id}")
+            rtt = entry.handler.rtt_sample()
+            if rtt is not None:
+                estimator.sample(rtt)
+            self._untrack(channel_id, entry.seq)
+            entry.event.set()
+        if acked:
+            # Saved with the next packet or ACK; after a crash these are resent, and the peer drops them
+            self._dirty.add(channel_id)
+        
+        # Resend gaps the peer reported around instead of waiting for their timers
+        lost = False
+        for entry in window.holes(FAST_RETRANSMIT_THRESHOLD):
+            pending = self._pending_packets.get((channel_id, entry.seq))
+            if entry.fast_retransmitted or pending is None:
+                continue
+            self.logger.debug(f"Fast retransmit of seq {entry.seq} on channel {channel_id}")
+            packet, handler, _ = pending
+            await self._emit(chan, packet)
+            handler.retransmit()
+            self._arm((channel_id, entry.seq))
+            entry.fast_retransmitted = True
+            lost = self._is_congestion(chan) or lost
+        if lost:
+            window.on_loss()
+    
+    async def _acknowledge(self, chan: MicroChannel, channel_id: int, immediate: bool) -> None:
+        """Acknowledge a received packet now, or note it for a delayed or piggybacked ACK."""
+        _, count = self._unacked.get(channel_id, (chan, 0))
+        count += 1
+        if immediate or not self.ack_delay or count >= ACK_EVERY:
+            await self._send_ack(chan, channel_id)
+            return
+        self._unacked[channel_id] = (chan, count)
+        if count == 1:
+            self._schedule((channel_id, _ACK_TIMER), time.monotonic() + self.ack_delay)
     
-    async def _send_ack(self, seq: int, chan: MicroChannel, channel_id: int) -> None:
-        """Send an acknowledgment for a received packet."""
+    def _cancel_ack(self, channel_id: int) -> None:
+        """Forget a pending delayed ACK."""
+        self._unacked.pop(channel_id, None)
+        self._timers.cancel((channel_id, _ACK_TIMER))
+    
+    def _piggyback(self, channel_id: int) -> Optional[int]:
+        """Take a pending ACK for an outgoing data packet; None if there is none or it needs SACK ranges."""
+        window = self._recv_windows.get(channel_id)
+        if channel_id not in self._unacked or window is None or window.buffered:
+            return None
+        self._cancel_ack(channel_id)
+        self.acks_piggybacked += 1
+        return window.cumulative
+    
+    async def _send_ack(self, chan: MicroChannel, channel_id: int) -> None:
+        """Send a cumulative acknowledgment, with selective ranges for packets beyond a gap."""
+        await self._emit(chan, self._ack_packet(chan, channel_id))
+    
+    def _ack_packet(self, chan: MicroChannel, channel_id: int) -> bytes:
+        """Build an ACK packet for everything received so far, settling any delayed ACK."""
+        self._flush(channel_id)
+        self._cancel_ack(channel_id)
+        self.acks_sent += 1
+        window = self._recv_windows[channel_id]
+        blocks = window.sack_blocks()
+        sack = encode_sack(blocks)
         ack_header = PacketHeader(
             version=VERSION,
-            flags=FLAG_ACK,
+            flags=FLAG_ACK | (FLAG_SACK if blocks else 0),
             channel_id=channel_id,
-            seq_no=seq,  # ACK the sequence we received
-            payload_length=0,
+            seq_no=window.cumulative,  # Last sequence received in order
+            payload_length=len(sack),
             channel=chan  # Store the channel reference
         )
-        ack_packet = ack_header.encode()
         
-        # Send ACK (no retransmission for ACKs)
-        self.logger.debug(f"Sending ACK for seq {seq} on channel {channel_id}")
-        chan.send(ack_packet)
+        # ACKs are not retransmitted
+        self.logger.debug(f"Sending ACK for seq {window.cumulative} on channel {channel_id}")
+        return ack_header.encode() + sack
+    
+    async def _deliver_ready(self, channel_id: int) -> bytes:
+        """Return the next in-order packet waiting for the caller."""
+        ready = self._ready.get(channel_id)
+        if not ready:
+            return b""
+        message = await self._deliver(*ready.popleft())
+        self._delivered(channel_id, message)
+        return message
+    
+    def _delivered(self, channel_id: int, message: bytes) -> None:
+        """Record that a packet was taken; returning a message is saved at once so a restart does not repeat it."""
+        if message:
+            self._persist(channel_id)
+        else:
+            # A fragment is in its message's file already
+            self._dirty.add(channel_id)
     
-    async def _handle_fragment(self, header: PacketHeader, payload: bytes) -> bytes:
-        """Handle a received fragment."""
-        # Basic implementation - just return the fragment payload
-        # In a more robust implementation, we would track and reassemble
+    async def _deliver(self, header: PacketHeader, payload: bytes) -> bytes:
+        """Return the payload of an in-order packet to the caller."""
+        if not payload:
+            return b""
+        if header.is_frag:
+            # Handle fragments similar to UDP but with reliability
+            return await self._handle_fragment(header, payload)
         return payload
+    
+    async def _handle_fragment(self, header: PacketHeader, payload: bytes, save: bool = True) -> bytes:
+        """Write a received fragment into its message; return the message once complete."""
+        key = (header.channel_id, header.frag_id)
+        if header.total_length is None and key not in self._reassembly and header.channel_id not in self._unordered:
+            # In order the length-carrying first fragment comes first, so this message was dropped
+            self.logger.debug(f"Ignoring fragment of dropped message {header.frag_id} on channel {header.channel_id}")
+            return b""
+        try:
+            message = self._reassembly.add(key, header.frag_offset, payload, header.total_length)
+        except FragmentationError as e:
+            self.logger.warning(f"Dropping message {header.frag_id} on channel {header.channel_id}: {e}")
+            self._forget_message(header.channel_id, header.frag_id)
+            return b""
+        if self.state_dir:
+            # Fragments of incomplete messages are acknowledged, so they are saved too
+            if message is None:
+                if save:
+                    self._save_fragment(header.channel_id, header.frag_id, header.encode() + payload)
+                else:
+                    self._partials.setdefault(header.channel_id, set()).add(header.frag_id)
+            else:
+                self._forget_message(header.channel_id, header.frag_id)
+        return message or b""
+    
+    def _forget_message(self, channel_id: int, frag_id: int) -> None:
+        """Remove the saved fragments of a message that completed or was dropped, once the state no longer holds it."""
+        partials = self._partials.get(channel_id)
+        if partials is not None and frag_id in partials:
+            partials.discard(frag_id)
+            self._obsolete.setdefault(channel_id, []).append(self._message_path(channel_id, "in", frag_id))
         
     async def __aenter__(self):
         """Start the background tasks when used as a context manager."""
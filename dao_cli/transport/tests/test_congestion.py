@@ -0,0 +1,138 @@
+"""
+Unit tests for medium profiles, pacing and loss classification.
+"""
+
+import asyncio
+import json
+import os
+import tempfile
+import time
+import unittest
+
+from dao_cli.transport.congestion import CongestionController, TokenBucket, congestion_for
+from dao_cli.transport.medium import MediumProfile, load_media, medium_profile, parse_loss
+from dao_cli.transport.rto import estimator_for
+from dao_cli.transport.tcp import TcpTransport
+from dao_cli.transport.tests.test_window import LinkedChannel
+
+
+class TimedChannel(LinkedChannel):
+    """LinkedChannel that records when each frame was sent."""
+
+    def __init__(self, medium):
+        super().__init__()
+        self.medium = medium
+        self.times = []
+
+    def send(self, payload: bytes) -> None:
+        self.times.append(time.monotonic())
+        super().send(payload)
+
+
+class TestMediumProfiles(unittest.TestCase):
+    """Tests for MediumProfile and load_media."""
+
+    def test_parse_loss(self):
+        """Test loss profile descriptions."""
+        self.assertAlmostEqual(parse_loss("10-30% random drop"), 0.2)
+        self.assertAlmostEqual(parse_loss("5% drop"), 0.05)
+        self.assertEqual(parse_loss("low loss owner-only"), 0.01)
+        self.assertEqual(parse_loss("high collision"), 0.2)
+        self.assertEqual(parse_loss(None), 0.0)
+
+    def test_repository_media(self):
+        """Test the profiles built from transmission_medium_nodes.json."""
+        media = load_media()
+        airtag = media["tm.airtag-rename"]
+        self.assertEqual(airtag.min_interval_s, 10.0)
+        self.assertEqual(airtag.max_payload_b, 26)
+        self.assertAlmostEqual(media["tm.bitcoin-mempool"].expected_loss, 0.2)
+        self.assertIsNone(media["tm.bitcoin-mempool"].max_rate)
+
+    def test_metadata_rate_limit_and_channel_lookup(self):
+        """Test that min_interval_s in the metadata overrides the built-in table."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "media.json")
+            with open(path, "w") as f:
+                json.dump([{"id": "tm.airtag-rename", "type": "TransmissionMedium",
+                            "properties": {"min_interval_s": 30}}], f)
+            self.assertEqual(load_media(path)["tm.airtag-rename"].min_interval_s, 30)
+
+        chan = LinkedChannel()
+        self.assertIsNone(medium_profile(chan))
+        chan.medium = "tm.airtag-rename"
+        self.assertEqual(medium_profile(chan).medium_id, "tm.airtag-rename")
+        self.assertEqual(estimator_for(chan).rto, 32.0)
+
+
+class TestCongestionController(unittest.TestCase):
+    """Tests for TokenBucket and CongestionController."""
+
+    def test_token_bucket(self):
+        """Test refill timing."""
+        bucket = TokenBucket(rate=2.0)
+        now = time.monotonic()
+        self.assertTrue(bucket.consume(now))
+        self.assertFalse(bucket.consume(now))
+        self.assertAlmostEqual(bucket.delay(now), 0.5)
+        self.assertTrue(bucket.consume(now + 0.5))
+
+    def test_window_capped_at_bandwidth_delay_product(self):
+        """Test the window cap for a rate-limited, high-latency medium."""
+        airtag = CongestionController(load_media()["tm.airtag-rename"])
+        self.assertEqual(airtag.max_window, 3)
+        self.assertIsNone(CongestionController(load_media()["tm.bitcoin-mempool"]).max_window)
+
+    def test_random_loss_is_not_congestion(self):
+        """Test that loss within the medium's profile does not back off the window."""
+        mempool = CongestionController(load_media()["tm.bitcoin-mempool"])
+        backoffs = 0
+        for n in range(100):
+            if n % 5 == 0:
+                backoffs += mempool.on_loss()
+            else:
+                mempool.on_ack()
+        self.assertEqual(backoffs, 0)
+        self.assertEqual(mempool.random_losses, 20)
+
+        # A burst of losses well above the profile is congestion
+        self.assertTrue(any(mempool.on_loss() for _ in range(10)))
+        # Without a profile every loss is congestion
+        self.assertTrue(CongestionController().on_loss())
+
+    def test_transfer_is_paced(self):
+        """Test that no channel sends frames faster than its medium allows."""
+        profile = MediumProfile("tm.test", typical_latency_s=0.005, min_interval_s=0.02)
+        client_chan, server_chan = TimedChannel(profile), TimedChannel(profile)
+        client_chan.peer, server_chan.peer = server_chan, client_chan
+        client, server = TcpTransport(), TcpTransport()
+        client.MTU = 40
+
+        async def run():
+            async def pump():
+                while True:
+                    await client.recv(client_chan)
+                    await server.recv(server_chan)
+                    await asyncio.sleep(0.001)
+
+            pump_task = asyncio.ensure_future(pump())
+            try:
+                await client.send(b"y" * 150, client_chan)
+            finally:
+                pump_task.cancel()
+                for transport in (client, server):
+                    await transport.__aexit__(None, None, None)
+
+        asyncio.run(run())
+        for chan in (client_chan, server_chan):
+            self.assertGreater(len(chan.times), 2)
+            gaps = [b - a for a, b in zip(chan.times, chan.times[1:])]
+            self.assertGreaterEqual(min(gaps), 0.02 - 0.002)
+        stats = client.congestion_stats(client_chan)
+        self.assertEqual(stats["frames"], len(client_chan.times))
+        self.assertGreater(stats["paced_s"], 0)
+        self.assertEqual(congestion_for(client_chan).max_window, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+"""
+Unit tests for delayed and piggybacked acknowledgments.
+"""
+
+import asyncio
+import os
+import time
+import unittest
+
+from dao_cli.transport.constants import ACK_DELAY, FLAG_ACK_NO, FLAG_FRAG, FLAG_LEN, HEADER_SIZE
+from dao_cli.transport.header import PacketHeader
+from dao_cli.transport.tcp import TcpTransport
+from dao_cli.transport.tests.test_window import LinkedChannel, headers
+
+
+async def exchange(client_data, server_data=b"", ack_delay=ACK_DELAY, drop=None):
+    """Send ``client_data``, and ``server_data`` in reply to it; return what each side received."""
+    client_chan, server_chan = LinkedChannel(drop), LinkedChannel()
+    client_chan.peer, server_chan.peer = server_chan, client_chan
+    client, server = TcpTransport(ack_delay=ack_delay), TcpTransport(ack_delay=ack_delay)
+    client.MTU = server.MTU = 40
+    received = {client: bytearray(), server: bytearray()}
+
+    async def pump():
+        while True:
+            received[client].extend(await client.recv(client_chan))
+            received[server].extend(await server.recv(server_chan))
+            await asyncio.sleep(0.001)
+
+    pump_task = asyncio.ensure_future(pump())
+    try:
+        async def server_send():
+            while len(received[server]) < len(client_data):
+                await asyncio.sleep(0.001)
+            await server.send(server_data, server_chan)
+
+        sends = [client.send(client_data, client_chan)]
+        if server_data:
+            sends.append(server_send())
+        await asyncio.gather(*sends)
+        await asyncio.sleep(0.01)
+    finally:
+        pump_task.cancel()
+        for transport in (client, server):
+            await transport.__aexit__(None, None, None)
+    return client, server, client_chan, server_chan, received
+
+
+class TestDelayedAcks(unittest.TestCase):
+    """Tests for delayed and piggybacked ACKs in TcpTransport."""
+
+    def test_header_ack_number(self):
+        """Test that a piggybacked ACK number survives encoding alongside fragment fields."""
+        header = PacketHeader(
+            flags=FLAG_FRAG | FLAG_LEN | FLAG_ACK_NO, seq_no=9, frag_id=3, frag_offset=0,
+            total_length=500, ack_no=1234,
+        )
+        decoded, consumed = PacketHeader.decode(header.encode())
+        self.assertEqual((decoded.ack_no, decoded.frag_id, decoded.total_length), (1234, 3, 500))
+        self.assertEqual(consumed, 18)
+
+    def test_fewer_acks(self):
+        """Test that in-order data is acknowledged about every other packet."""
+        data = os.urandom(1000)
+        immediate = asyncio.run(exchange(data, ack_delay=0))
+        delayed = asyncio.run(exchange(data))
+        for client, server, _, _, received in (immediate, delayed):
+            self.assertEqual(bytes(received[server]), data)
+        packets = sum(h.is_frag for h in headers(immediate[2].sent))
+        self.assertEqual(immediate[1].acks_sent, packets)
+        self.assertLessEqual(delayed[1].acks_sent, packets // 2 + 2)
+
+    def test_loss_still_acknowledged_at_once(self):
+        """Test that packets beyond a gap are acknowledged immediately with SACK ranges."""
+        data = os.urandom(600)
+        client, server, client_chan, server_chan, received = asyncio.run(exchange(data, drop={2}))
+        self.assertEqual(bytes(received[server]), data)
+        acks = [h for h in headers(server_chan.sent) if h.is_ack and not h.is_syn]
+        self.assertTrue(any(h.payload_length for h in acks))
+
+    def test_ack_rides_on_reply(self):
+        """Test that a request is acknowledged by the first packet of its reply."""
+        request, reply = b"request", os.urandom(300)
+        client, server, client_chan, server_chan, received = asyncio.run(exchange(request, reply))
+        self.assertEqual(bytes(received[server]), request)
+        self.assertEqual(bytes(received[client]), reply)
+        self.assertEqual((server.acks_sent, server.acks_piggybacked), (0, 1))
+        self.assertTrue(headers(server_chan.sent)[1].has_ack_no)
+
+    def test_piggybacked_ack_fits_mtu(self):
+        """Test that packets carrying a piggybacked ACK stay within the MTU."""
+        for reply in (os.urandom(300), os.urandom(38)):
+            client, server, client_chan, server_chan, received = asyncio.run(exchange(os.urandom(38), reply))
+            self.assertEqual(bytes(received[client]), reply)
+            self.assertTrue(any(h.has_ack_no for h in headers(server_chan.sent)))
+            for packet in client_chan.sent + server_chan.sent:
+                self.assertLessEqual(len(packet) - HEADER_SIZE, server.MTU)
+
+    def test_lone_packet_acknowledged_after_delay(self):
+        """Test that the delayed-ACK timer acknowledges a packet nothing else follows."""
+        start = time.monotonic()
+        client, server, _, server_chan, received = asyncio.run(exchange(b"ping"))
+        self.assertEqual(bytes(received[server]), b"ping")
+        self.assertGreaterEqual(time.monotonic() - start, ACK_DELAY)
+        self.assertEqual(server.acks_sent, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
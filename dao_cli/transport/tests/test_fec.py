@@ -0,0 +1,133 @@
+"""
+Unit tests for Reed-Solomon coding and FecTransport.
+"""
+
+import asyncio
+import os
+import random
+import unittest
+
+from dao_cli.transport.constants import FEC_BLOCK_SHARDS
+from dao_cli.transport.fec import (
+    FecDecoder, FecError, FecTransport, ReedSolomon, block_layout, gf_inv, gf_mul, gf_scale
+)
+from dao_cli.transport.tests.test_window import LinkedChannel, headers
+
+
+class TestGaloisField(unittest.TestCase):
+    """Tests for GF(256) arithmetic."""
+
+    def test_inverse(self):
+        """Test that every nonzero element times its inverse is one."""
+        for a in range(1, 256):
+            self.assertEqual(gf_mul(a, gf_inv(a)), 1)
+        with self.assertRaises(ZeroDivisionError):
+            gf_inv(0)
+
+    def test_scale_matches_scalar_multiply(self):
+        """Test that scaling a whole shard agrees with byte-wise multiplication."""
+        data = bytes(range(256))
+        for c in (0, 1, 2, 0x53, 0xFF):
+            self.assertEqual(gf_scale(c, data), bytes(gf_mul(c, v) for v in data))
+
+
+class TestReedSolomon(unittest.TestCase):
+    """Tests for the erasure code."""
+
+    def test_any_k_shards_decode(self):
+        """Test that random subsets of k shards rebuild the data."""
+        rng = random.Random(7)
+        code = ReedSolomon(10, 4)
+        data = [os.urandom(32) for _ in range(10)]
+        shards = data + code.encode(data)
+        for _ in range(50):
+            keep = rng.sample(range(14), 10)
+            self.assertEqual(code.decode({i: shards[i] for i in keep}), data)
+
+    def test_too_few_shards(self):
+        """Test that decoding fails with fewer than k shards."""
+        code = ReedSolomon(4, 2)
+        data = [os.urandom(8) for _ in range(4)]
+        shards = data + code.encode(data)
+        with self.assertRaises(FecError):
+            code.decode({i: shards[i] for i in (0, 2, 5)})
+
+    def test_code_size_limit(self):
+        """Test that codes beyond the field size are refused."""
+        with self.assertRaises(FecError):
+            ReedSolomon(200, 57)
+
+
+class TestFecDecoder(unittest.TestCase):
+    """Tests for message decoding state."""
+
+    def test_block_layout(self):
+        """Test that messages are split into blocks of at most FEC_BLOCK_SHARDS."""
+        self.assertEqual(block_layout(100, 10), [10])
+        self.assertEqual(block_layout(FEC_BLOCK_SHARDS * 10 + 1, 10), [FEC_BLOCK_SHARDS, 1])
+
+    def test_expiry_and_duplicates(self):
+        """Test that stale messages are dropped and a decoded message is returned once."""
+        decoder = FecDecoder(timeout=1.0)
+        self.assertIsNone(decoder.add("a", 0, 0, b"ab", 4, now=0.0))
+        self.assertIsNone(decoder.add("a", 0, 1, b"cd", 4, now=2.0))
+        self.assertEqual(decoder.dropped, 1)
+        self.assertIsNone(decoder.add("b", 0, 0, b"ab", 4, now=3.0))
+        self.assertEqual(decoder.add("b", 0, 1, b"cd", 4, now=3.0), b"abcd")
+        self.assertIsNone(decoder.add("b", 0, 2, b"ef", 4, now=3.0))
+        self.assertEqual(decoder.buffered, 0)
+
+    def test_mismatched_shard(self):
+        """Test that a shard disagreeing with the message's layout is refused."""
+        decoder = FecDecoder()
+        decoder.add("a", 0, 0, b"ab", 4)
+        with self.assertRaises(FecError):
+            decoder.add("a", 0, 1, b"cde", 4)
+
+
+class TestFecTransport(unittest.TestCase):
+    """End-to-end tests for FecTransport."""
+
+    def transfer(self, data, drop=None, **kwargs):
+        sender_chan, receiver_chan = LinkedChannel(drop), LinkedChannel()
+        sender_chan.peer, receiver_chan.peer = receiver_chan, sender_chan
+        sender, receiver = FecTransport(**kwargs), FecTransport(**kwargs)
+        sender.MTU = receiver.MTU = 40
+
+        async def run():
+            await sender.send(data, sender_chan)
+            messages = []
+            while receiver_chan.inbox:
+                message = await receiver.recv(receiver_chan)
+                if message:
+                    messages.append(message)
+            return messages
+
+        return asyncio.run(run()), sender_chan
+
+    def test_recovers_lost_shards(self):
+        """Test that a message survives losing as many shards as there are parity shards."""
+        data = os.urandom(1000)
+        messages, chan = self.transfer(data, drop={0, 3, 7, 12, 20, 31, 35, 39}, redundancy_ratio=0.25)
+        sent = headers(chan.sent)
+        self.assertEqual(len(sent), 32 + 8)
+        self.assertEqual(messages, [data])
+
+    def test_too_much_loss(self):
+        """Test that nothing is delivered when too few shards arrive."""
+        messages, _ = self.transfer(os.urandom(300), drop={0, 1, 2}, redundancy_ratio=0.2)
+        self.assertEqual(messages, [])
+
+    def test_from_config(self):
+        """Test construction from a transport.schema.json node."""
+        transport = FecTransport.from_config({
+            "id": "tp.ssid-fec", "kind": "fec", "max_payload_b": 32,
+            "fec": {"symbol_size": 16, "redundancy_ratio": 0.5},
+        })
+        self.assertEqual((transport.symbol_size, transport.redundancy_ratio, transport.MTU), (16, 0.5, 32))
+        with self.assertRaises(ValueError):
+            FecTransport.from_config({"id": "tp.tcp", "kind": "reliable", "max_payload_b": 32})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+"""
+Unit tests for stream multiplexing over one connection.
+"""
+
+import asyncio
+import os
+import struct
+import unittest
+from typing import Optional, Set
+
+from dao_cli.transport.constants import MUX_FRAME_WINDOW, MUX_HEADER_SIZE, STREAM_WINDOW
+from dao_cli.transport.header import PacketHeader
+from dao_cli.transport.mux import MuxError, MuxSession, Stream
+from dao_cli.transport.tcp import TcpTransport
+from dao_cli.transport.tests.test_window import LinkedChannel, headers
+
+
+class TestStreamReceive(unittest.TestCase):
+    """Tests for per-stream ordering and flow control."""
+
+    def setUp(self):
+        self.grants = []
+        session = MuxSession.__new__(MuxSession)
+        session._grant = lambda stream_id, limit: self.grants.append((stream_id, limit))
+        self.stream = Stream(session, 5)
+
+    def test_frames_put_in_order(self):
+        """Test that frames beyond a gap wait for it and messages keep their boundaries."""
+        self.assertEqual(self.stream._on_data(3, b"def", True), [])
+        self.assertEqual(self.stream._on_data(6, b"gh", True), [])
+        self.assertEqual(self.stream.buffered, 5)
+        self.assertEqual(self.stream._on_data(0, b"abc", False), [b"abcdef", b"gh"])
+        self.assertEqual(self.stream._on_data(0, b"abc", False), [])
+        self.assertEqual(self.stream.recv_offset, 8)
+
+    def test_credit(self):
+        """Test that data beyond the credit is refused and credit is renewed as data arrives."""
+        with self.assertRaises(MuxError):
+            self.stream._on_data(STREAM_WINDOW - 1, b"xx", True)
+        self.stream._on_data(0, b"x" * (STREAM_WINDOW // 2), True)
+        self.assertEqual(self.grants, [(5, STREAM_WINDOW // 2 + STREAM_WINDOW)])
+
+
+class TestMuxSession(unittest.TestCase):
+    """End-to-end tests for MuxSession."""
+
+    async def exchange(self, sends, drop: Optional[Set[int]] = None, mtu: int = 40):
+        """
+        Run ``sends(client_session)`` while both sessions are pumped.
+
+        Returns:
+            Received (stream_id, message) in arrival order, and the client's channel
+        """
+        client_chan, server_chan = LinkedChannel(drop), LinkedChannel()
+        client_chan.peer, server_chan.peer = server_chan, client_chan
+        client, server = TcpTransport(), TcpTransport()
+        client.MTU = server.MTU = mtu
+        client_session, server_session = MuxSession(client, client_chan), MuxSession(server, server_chan)
+        received = []
+
+        async def pump():
+            while True:
+                await client_session.recv()
+                message = await server_session.recv()
+                if message:
+                    received.append(message)
+                await asyncio.sleep(0.001)
+
+        pump_task = asyncio.ensure_future(pump())
+        try:
+            await sends(client_session)
+            await asyncio.sleep(0.01)
+        finally:
+            pump_task.cancel()
+            for session in (client_session, server_session):
+                await session.close()
+            for transport in (client, server):
+                await transport.__aexit__(None, None, None)
+        return received, client_chan
+
+    def test_concurrent_streams_share_one_connection(self):
+        """Test that concurrent messages on several streams arrive intact after one handshake."""
+        delta, telemetry = os.urandom(700), [os.urandom(50) for _ in range(3)]
+
+        async def sends(session):
+            async def send_telemetry():
+                for batch in telemetry:
+                    await session.send(2, batch)
+
+            await asyncio.gather(session.send(1, delta), send_telemetry())
+
+        received, client_chan = asyncio.run(self.exchange(sends))
+        self.assertEqual([m for s, m in received if s == 1], [delta])
+        self.assertEqual([m for s, m in received if s == 2], telemetry)
+        self.assertEqual(sum(h.is_syn for h in headers(client_chan.sent)), 1)
+
+    def test_priority_overtakes_bulk_transfer(self):
+        """Test that an urgent message is scheduled ahead of a transfer already queued."""
+        bulk, urgent = os.urandom(2000), b"u" * 60
+
+        async def sends(session):
+            session.stream(2, priority=0)
+            bulk_send = asyncio.ensure_future(session.send(1, bulk))
+            await asyncio.sleep(0.005)
+            await session.send(2, urgent)
+            await bulk_send
+
+        received, _ = asyncio.run(self.exchange(sends))
+        self.assertEqual(received, [(2, urgent), (1, bulk)])
+
+    def test_loss_blocks_only_its_stream(self):
+        """Test that a stream is delivered while another waits for a retransmission."""
+        first, second = b"a" * 30, b"b" * 30
+
+        async def sends(session):
+            # Packet 0 is the SYN, packet 1 stream 1's frame
+            await asyncio.gather(session.send(1, first), session.send(2, second))
+
+        received, client_chan = asyncio.run(self.exchange(sends, drop={1}))
+        self.assertEqual(received, [(2, second), (1, first)])
+
+    def test_credit_frames(self):
+        """Test that a large transfer waits for and receives credit from the peer."""
+        data = os.urandom(STREAM_WINDOW * 2)
+
+        async def sends(session):
+            await session.send(1, data)
+
+        received, client_chan = asyncio.run(self.exchange(sends, mtu=248))
+        self.assertEqual(received, [(1, data)])
+        server_frames = []
+        for packet in client_chan.peer.sent:
+            header, consumed = PacketHeader.decode(packet)
+            if not header.is_ack and not header.is_syn and len(packet) - consumed == MUX_HEADER_SIZE:
+                server_frames.append(struct.unpack(">BHI", packet[consumed:]))
+        self.assertTrue(any(kind == MUX_FRAME_WINDOW for kind, _, _ in server_frames))
+
+
+if __name__ == '__main__':
+    unittest.main()
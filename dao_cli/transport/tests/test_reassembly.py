@@ -0,0 +1,223 @@
+"""
+Unit tests for fragment reassembly.
+"""
+
+import asyncio
+import os
+import unittest
+
+from dao_cli.transport.base import FragmentationError
+from dao_cli.transport.constants import FLAG_FRAG, FLAG_LEN, MAX_MESSAGE_SIZE
+from dao_cli.transport.header import PacketHeader
+from dao_cli.transport.reassembly import Reassembler
+from dao_cli.transport.tcp import TcpTransport
+from dao_cli.transport.tests.test_window import LinkedChannel
+
+
+def split(data: bytes, size: int):
+    return [(offset, data[offset:offset + size]) for offset in range(0, len(data), size)]
+
+
+class TestReassembler(unittest.TestCase):
+    """Tests for Reassembler."""
+
+    def test_in_order(self):
+        """Test that a message is returned once, when its last byte arrives."""
+        data = os.urandom(1000)
+        reassembler = Reassembler()
+        results = [reassembler.add("m", offset, fragment, len(data) if offset == 0 else None)
+                   for offset, fragment in split(data, 64)]
+        self.assertEqual(results[:-1], [None] * (len(results) - 1))
+        self.assertEqual(results[-1], data)
+        self.assertEqual(reassembler.buffered, 0)
+        self.assertEqual(len(reassembler), 0)
+
+    def test_out_of_order_and_duplicates(self):
+        """Test fragments arriving before the length, repeated, and after completion."""
+        data = os.urandom(500)
+        fragments = split(data, 50)
+        reassembler = Reassembler()
+        for offset, fragment in reversed(fragments[1:]):
+            self.assertIsNone(reassembler.add("m", offset, fragment))
+            self.assertIsNone(reassembler.add("m", offset, fragment))
+        self.assertEqual(reassembler.buffered, 450)
+        self.assertEqual(reassembler.add("m", 0, fragments[0][1], len(data)), data)
+        # A late duplicate does not start the message over
+        self.assertIsNone(reassembler.add("m", 0, fragments[0][1], len(data)))
+        self.assertEqual(len(reassembler), 0)
+        self.assertEqual(reassembler.completed, 1)
+
+    def test_memory_budget(self):
+        """Test that a message larger than the budget is dropped without affecting others."""
+        reassembler = Reassembler(max_bytes=1000)
+        self.assertIsNone(reassembler.add("a", 0, b"x" * 10, 600))
+        with self.assertRaises(FragmentationError):
+            reassembler.add("b", 0, b"y" * 10, 600)
+        with self.assertRaises(FragmentationError):
+            reassembler.add("c", 0, b"z" * 10, MAX_MESSAGE_SIZE + 1)
+        self.assertEqual(reassembler.buffered, 600)
+        self.assertEqual(reassembler.dropped, 2)
+        self.assertEqual(reassembler.add("a", 10, b"x" * 590), b"x" * 600)
+
+    def test_reserve(self):
+        """Test that reserving allocates a message within the budget, and refuses one over it without dropping it."""
+        reassembler = Reassembler(max_bytes=1000)
+        self.assertTrue(reassembler.reserve("a", 600))
+        self.assertEqual(reassembler.buffered, 600)
+        self.assertTrue(reassembler.reserve("a", 600))
+        self.assertFalse(reassembler.reserve("b", 600))
+        self.assertFalse(reassembler.reserve("c", size=500))
+        self.assertEqual((len(reassembler), reassembler.dropped), (1, 0))
+        # The reserved message needs no more memory as its fragments arrive
+        self.assertIsNone(reassembler.add("a", 0, b"x" * 300, 600))
+        self.assertEqual(reassembler.add("a", 300, b"x" * 300), b"x" * 600)
+        self.assertTrue(reassembler.reserve("b", 600))
+        # One that could never fit is left for add() to reject
+        self.assertTrue(reassembler.reserve("d", 2000))
+        self.assertNotIn("d", reassembler)
+
+    def test_fragment_past_end(self):
+        """Test that a fragment beyond the declared length drops the message."""
+        reassembler = Reassembler()
+        reassembler.add("m", 0, b"a" * 10, 15)
+        with self.assertRaises(FragmentationError):
+            reassembler.add("m", 10, b"b" * 10)
+        self.assertEqual(reassembler.buffered, 0)
+
+    def test_expiry(self):
+        """Test that incomplete messages are dropped after the timeout."""
+        reassembler = Reassembler(timeout=5.0)
+        reassembler.add("old", 0, b"a", 10, now=100.0)
+        reassembler.add("new", 0, b"b", 10, now=103.0)
+        self.assertEqual(reassembler.expire(now=105.0), 1)
+        self.assertEqual(len(reassembler), 1)
+        self.assertEqual(reassembler.buffered, 10)
+
+    def test_no_timeout(self):
+        """Test that a reassembler without a timeout keeps partial messages indefinitely."""
+        reassembler = Reassembler(timeout=None)
+        reassembler.add("m", 0, b"a", 2, now=0.0)
+        self.assertEqual(reassembler.expire(now=1e9), 0)
+        self.assertIn("m", reassembler)
+        self.assertEqual(reassembler.add("m", 1, b"b", now=1e9), b"ab")
+
+
+class TestTcpReassembly(unittest.TestCase):
+    """Tests for message reassembly in TcpTransport."""
+
+    def test_header_total_length(self):
+        """Test that the first fragment's header carries the message length."""
+        header = PacketHeader(flags=FLAG_FRAG | FLAG_LEN, frag_id=7, frag_offset=0, total_length=4000)
+        decoded, consumed = PacketHeader.decode(header.encode() + b"payload")
+        self.assertEqual(decoded.total_length, 4000)
+        self.assertEqual(consumed, 16)
+
+    def test_messages_are_returned_whole(self):
+        """Test that recv() returns each fragmented message exactly once."""
+        messages = [os.urandom(1000), os.urandom(37), os.urandom(2500)]
+        client_chan, server_chan = LinkedChannel(), LinkedChannel()
+        client_chan.peer, server_chan.peer = server_chan, client_chan
+        client, server = TcpTransport(), TcpTransport()
+        client.MTU = 60
+        received = []
+
+        async def run():
+            async def pump():
+                while True:
+                    await client.recv(client_chan)
+                    chunk = await server.recv(server_chan)
+                    if chunk:
+                        received.append(chunk)
+                    await asyncio.sleep(0.001)
+
+            pump_task = asyncio.ensure_future(pump())
+            try:
+                for message in messages:
+                    await client.send(message, client_chan)
+                await asyncio.sleep(0.01)
+            finally:
+                pump_task.cancel()
+                for transport in (client, server):
+                    await transport.__aexit__(None, None, None)
+
+        asyncio.run(run())
+        self.assertEqual(received, messages)
+        self.assertEqual(server._reassembly.buffered, 0)
+
+    def test_full_buffer_refuses_fragments(self):
+        """Test that fragments are not acknowledged while the reassembly budget is full, and the message still arrives."""
+        data = os.urandom(500)
+        client_chan, server_chan = LinkedChannel(), LinkedChannel()
+        client_chan.peer, server_chan.peer = server_chan, client_chan
+        client, server = TcpTransport(), TcpTransport()
+        client.MTU = 60
+        server._reassembly.max_bytes = 1000
+        server._reassembly.reserve("other", 800)
+        received = []
+
+        async def run():
+            async def pump():
+                while True:
+                    await client.recv(client_chan)
+                    chunk = await server.recv(server_chan)
+                    if chunk:
+                        received.append(chunk)
+                    await asyncio.sleep(0.001)
+
+            pump_task = asyncio.ensure_future(pump())
+            try:
+                send = asyncio.ensure_future(client.send(data, client_chan))
+                await asyncio.sleep(0.3)
+                # Unacknowledged, so the sender holds on to the message
+                waiting = send.done(), len(server._reassembly), received[:]
+                server._reassembly.discard(lambda key: key == "other")
+                await asyncio.wait_for(send, 5.0)
+                while not received:
+                    await asyncio.sleep(0.001)
+            finally:
+                pump_task.cancel()
+                for transport in (client, server):
+                    await transport.__aexit__(None, None, None)
+            return waiting
+
+        self.assertEqual(asyncio.run(run()), (False, 1, []))
+        self.assertEqual(received, [data])
+        self.assertEqual(server._reassembly.completed, 1)
+
+    def test_slow_message_not_expired(self):
+        """Test that acknowledged fragments are kept however long the rest takes, e.g. on a paced carrier."""
+        data = os.urandom(300)
+        transport = TcpTransport()
+        fragments = split(data, 100)
+
+        async def run():
+            results = []
+            for offset, fragment in fragments:
+                header = PacketHeader(flags=FLAG_FRAG | (FLAG_LEN if offset == 0 else 0), frag_id=3,
+                                      frag_offset=offset, total_length=len(data) if offset == 0 else None)
+                results.append(await transport._handle_fragment(header, fragment))
+                transport._reassembly.expire(now=1e12)  # far beyond FRAGMENT_TIMEOUT
+            return results
+
+        self.assertEqual(asyncio.run(run()), [b"", b"", data])
+        self.assertEqual(transport._reassembly.dropped, 0)
+
+    def test_fragment_of_unknown_message_ignored(self):
+        """Test that an in-order fragment without a length is not buffered when its message is unknown."""
+        transport = TcpTransport()
+        header = PacketHeader(flags=FLAG_FRAG, frag_id=9, frag_offset=100)
+        self.assertEqual(asyncio.run(transport._handle_fragment(header, b"x" * 50)), b"")
+        self.assertEqual((len(transport._reassembly), transport._reassembly.buffered), (0, 0))
+
+        transport.deliver_unordered(0)
+        asyncio.run(transport._handle_fragment(header, b"x" * 50))
+        self.assertEqual(len(transport._reassembly), 1)
+
+    def test_oversized_message_rejected(self):
+        """Test that send() refuses messages the fragment header cannot describe."""
+        with self.assertRaises(FragmentationError):
+            asyncio.run(TcpTransport().send(b"x" * (MAX_MESSAGE_SIZE + 1), LinkedChannel()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,207 @@
+"""
+Unit tests for TcpTransport session resumption across restarts.
+"""
+
+import asyncio
+import os
+import tempfile
+import unittest
+
+from dao_cli.transport.tcp import TcpTransport
+from dao_cli.transport.tests.test_window import LinkedChannel, headers
+
+
+class Link:
+    """A client and a server transport joined by LinkedChannels, either of which can be restarted."""
+
+    def __init__(self, client_dir=None, server_dir=None):
+        self.client_chan, self.server_chan = LinkedChannel(), LinkedChannel()
+        self.client_chan.peer, self.server_chan.peer = self.server_chan, self.client_chan
+        self.client_dir, self.server_dir = client_dir, server_dir
+        self.client = self.start(client_dir)
+        self.server = self.start(server_dir)
+        self.received = []
+        self._pump = None
+
+    @staticmethod
+    def start(state_dir):
+        transport = TcpTransport(state_dir=state_dir)
+        transport.MTU = 40
+        return transport
+
+    async def pump(self):
+        while True:
+            await self.client.recv(self.client_chan)
+            message = await self.server.recv(self.server_chan)
+            if message:
+                self.received.append(message)
+            await asyncio.sleep(0.001)
+
+    async def delivered(self, timeout=2.0):
+        """Wait until the server has returned a message; the last fragments may still be queued after the ACKs."""
+        deadline = asyncio.get_running_loop().time() + timeout
+        while not self.received and asyncio.get_running_loop().time() < deadline:
+            await asyncio.sleep(0.001)
+
+    def run_pump(self):
+        self._pump = asyncio.ensure_future(self.pump())
+
+    async def crash(self, side, state_dir=None):
+        """Stop a transport as a crash would and start a new one on its state; frames queued for it are lost."""
+        transport = getattr(self, side)
+        await transport.__aexit__(None, None, None)
+        setattr(self, side, self.start(state_dir if state_dir is not None else getattr(self, f"{side}_dir")))
+        getattr(self, f"{side}_chan").inbox.clear()
+
+    async def close(self):
+        self._pump.cancel()
+        for transport in (self.client, self.server):
+            await transport.__aexit__(None, None, None)
+
+
+class TestSessionResumption(unittest.TestCase):
+    """Tests for resuming transfers after a restart."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.client_dir = os.path.join(self._tmp.name, "client")
+        self.server_dir = os.path.join(self._tmp.name, "server")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    async def interrupted_send(self, link, data, acked):
+        """
+        Start sending ``data`` and crash the client once the server has ``acked`` packets in order.
+
+        The link is left stopped, so nothing reaches the restarted client until run_pump().
+        """
+        link.run_pump()
+        send = asyncio.ensure_future(link.client.send(data, link.client_chan))
+        while link.server._recv_windows.get(0) is None or link.server._recv_windows[0].cumulative < acked:
+            await asyncio.sleep(0.001)
+        link._pump.cancel()
+        send.cancel()
+        await asyncio.gather(send, return_exceptions=True)
+        sent_before = len(link.client_chan.sent)
+        await link.crash("client")
+        return sent_before
+
+    def test_client_restart_resumes_transfer(self):
+        """Test that a restarted sender finishes a message without resending acknowledged fragments."""
+        data = os.urandom(1500)
+
+        async def scenario():
+            link = Link(self.client_dir, self.server_dir)
+            try:
+                sent_before = await self.interrupted_send(link, data, acked=12)
+                link.run_pump()
+                await link.client.resume(link.client_chan)
+                await link.delivered()
+            finally:
+                await link.close()
+            return link, sent_before
+
+        link, sent_before = asyncio.run(scenario())
+        self.assertEqual(link.received, [data])
+        self.assertEqual((link.client.sessions_resumed, link.server.sessions_resumed), (1, 1))
+        after = headers(link.client_chan.sent[sent_before:])
+        self.assertEqual(sum(h.is_syn for h in after), 1)
+        resent_offsets = [h.frag_offset for h in after if h.is_frag]
+        first_unacked = min(resent_offsets)
+        self.assertGreater(first_unacked, 0)
+        fragments = -(-len(data) // 32)
+        self.assertLess(len(resent_offsets), fragments - 10)
+
+    def test_server_restart_keeps_received_fragments(self):
+        """Test that a restarted receiver completes a message from the fragments it had acknowledged."""
+        data = os.urandom(1500)
+
+        async def scenario():
+            link = Link(self.client_dir, self.server_dir)
+            link.run_pump()
+            try:
+                send = asyncio.ensure_future(link.client.send(data, link.client_chan))
+                while link.server._recv_windows.get(0) is None or link.server._recv_windows[0].cumulative < 12:
+                    await asyncio.sleep(0.001)
+                await link.crash("server")
+                await send
+                await link.delivered()
+            finally:
+                await link.close()
+            return link
+
+        link = asyncio.run(scenario())
+        self.assertEqual(link.received, [data])
+        self.assertEqual(link.server.sessions_resumed, 1)
+
+    def test_peer_without_state_restarts_message(self):
+        """Test that a message is sent again whole when the peer no longer knows the session."""
+        data = os.urandom(800)
+
+        async def scenario():
+            link = Link(self.client_dir, self.server_dir)
+            try:
+                await self.interrupted_send(link, data, acked=6)
+                await link.crash("server", state_dir=os.path.join(self._tmp.name, "empty"))
+                link.received.clear()
+                link.run_pump()
+                await link.client.resume(link.client_chan)
+                await link.delivered()
+            finally:
+                await link.close()
+            return link
+
+        link = asyncio.run(scenario())
+        self.assertEqual(link.received, [data])
+        self.assertEqual(link.client.sessions_resumed, 0)
+
+    def test_messages_saved_once(self):
+        """Test that a message is saved once, not with every packet, and its files go when it completes."""
+        data = os.urandom(4000)
+        writes = []
+
+        async def scenario():
+            link = Link(self.client_dir, self.server_dir)
+            write_file = link.client._write_file
+            link.client._write_file = lambda path, content: (writes.append((path, content)), write_file(path, content))
+            link.run_pump()
+            try:
+                await link.client.send(data, link.client_chan)
+                await link.delivered()
+                saved = sorted(os.listdir(self.client_dir)), sorted(os.listdir(self.server_dir))
+            finally:
+                await link.close()
+            return link, saved
+
+        link, saved = asyncio.run(scenario())
+        self.assertEqual(link.received, [data])
+        messages = [content for path, content in writes if ".out-" in path]
+        self.assertEqual(messages, [data])
+        states = [content for path, content in writes if path.endswith(".json")]
+        # The state holds the packets in flight, not the message
+        self.assertGreater(len(states), 100)
+        self.assertLess(max(map(len, states)), len(data) // 2)
+        self.assertEqual(saved, (["tcp-0.json"], ["tcp-0.json"]))
+
+    def test_close_forgets_session(self):
+        """Test that closing a connection deletes its saved state."""
+        async def scenario():
+            link = Link(self.client_dir, self.server_dir)
+            link.run_pump()
+            try:
+                await link.client.send(b"hello", link.client_chan)
+                saved = os.listdir(self.client_dir), os.listdir(self.server_dir)
+                await link.client._close_connection(link.client_chan, 0)
+                await asyncio.sleep(0.01)
+            finally:
+                await link.close()
+            return saved
+
+        saved = asyncio.run(scenario())
+        self.assertEqual(saved, (["tcp-0.json"], ["tcp-0.json"]))
+        self.assertEqual((os.listdir(self.client_dir), os.listdir(self.server_dir)), ([], []))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+"""
+Unit tests for RTT estimation and adaptive retransmission timeouts.
+"""
+
+import asyncio
+import time
+import unittest
+
+from dao_cli.transport.constants import MAX_RTO, MIN_RTO
+from dao_cli.transport.rto import RttEstimator, estimator_for
+from dao_cli.transport.tcp import RetransmitHandler, TcpTransport
+from dao_cli.transport.tests.test_window import LinkedChannel
+
+
+class SlowLink(LinkedChannel):
+    """LinkedChannel carrying transmission-medium latency metadata."""
+
+    typical_latency_s = 8.0
+
+
+class TestRttEstimator(unittest.TestCase):
+    """Tests for RttEstimator and estimator_for."""
+
+    def test_first_and_later_samples(self):
+        """Test the RFC 6298 update rules."""
+        estimator = RttEstimator()
+        self.assertEqual(estimator.sample(1.0), 3.0)
+        self.assertEqual((estimator.srtt, estimator.rttvar), (1.0, 0.5))
+        estimator.sample(2.0)
+        self.assertAlmostEqual(estimator.rttvar, 0.625)
+        self.assertAlmostEqual(estimator.srtt, 1.125)
+        self.assertAlmostEqual(estimator.rto, 1.125 + 4 * 0.625)
+        self.assertEqual(estimator.snapshot()["samples"], 2)
+
+    def test_clamped(self):
+        """Test that the RTO stays within its bounds."""
+        estimator = RttEstimator()
+        estimator.sample(0.001)
+        self.assertEqual(estimator.rto, MIN_RTO)
+        estimator.sample(500.0)
+        self.assertEqual(estimator.rto, MAX_RTO)
+        for _ in range(5):
+            estimator._last_backoff = float("-inf")
+            estimator.on_timeout()
+        self.assertEqual(estimator.rto, MAX_RTO)
+
+    def test_backoff_once_per_interval(self):
+        """Test that simultaneous timeouts double the RTO only once."""
+        estimator = RttEstimator(initial_rto=1.0)
+        estimator.on_timeout()
+        estimator.on_timeout()
+        self.assertEqual(estimator.rto, 2.0)
+        self.assertEqual(estimator.timeouts, 1)
+        # A fresh sample replaces the backed-off value
+        estimator.sample(0.5)
+        self.assertEqual(estimator.rto, 1.5)
+
+    def test_karn(self):
+        """Test that retransmitted packets give no RTT sample."""
+        handler = RetransmitHandler(1.0)
+        self.assertIsNone(handler.rtt_sample())
+        handler.record_send()
+        self.assertIsNotNone(handler.rtt_sample())
+        handler.retransmit()
+        self.assertIsNone(handler.rtt_sample())
+
+    def test_shared_per_channel(self):
+        """Test one estimator per channel, seeded from medium latency."""
+        chan, other = LinkedChannel(), LinkedChannel()
+        self.assertIs(estimator_for(chan), estimator_for(chan))
+        self.assertIsNot(estimator_for(chan), estimator_for(other))
+        self.assertEqual(estimator_for(SlowLink()).rto, 32.0)
+
+
+class TestTransportRtt(unittest.TestCase):
+    """Tests for RTT sampling in TcpTransport."""
+
+    def test_transfer_samples_rtt(self):
+        """Test that a transfer lowers the RTO from its initial value on a fast link."""
+        client_chan, server_chan = LinkedChannel(), LinkedChannel()
+        client_chan.peer, server_chan.peer = server_chan, client_chan
+        client, server = TcpTransport(), TcpTransport()
+
+        async def run():
+            async def pump():
+                while True:
+                    await client.recv(client_chan)
+                    await server.recv(server_chan)
+                    await asyncio.sleep(0.001)
+
+            pump_task = asyncio.ensure_future(pump())
+            try:
+                await client.send(b"x" * 1000, client_chan)
+            finally:
+                pump_task.cancel()
+                for transport in (client, server):
+                    await transport.__aexit__(None, None, None)
+
+        start = time.monotonic()
+        asyncio.run(run())
+        stats = client.rtt_stats(client_chan)
+        self.assertGreater(stats["samples"], 1)
+        self.assertLess(stats["srtt"], time.monotonic() - start)
+        self.assertEqual(stats["rto"], MIN_RTO)
+        # A second transport on the same channel starts from what was learned
+        self.assertEqual(TcpTransport().rtt_stats(client_chan)["samples"], stats["samples"])
+
+
+if __name__ == '__main__':
+    unittest.main()
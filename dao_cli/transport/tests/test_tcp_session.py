@@ -0,0 +1,111 @@
+"""
+Unit tests for session key negotiation in the TCP handshake.
+"""
+
+import asyncio
+import os
+import secrets
+import tempfile
+import unittest
+from typing import List, Optional
+from unittest import mock
+
+from dao_cli.channels import backchannel_encode
+from dao_cli.channels.backchannel_encode import MicroChannel
+from dao_cli.transport.base import ConnectionError
+from dao_cli.transport.tcp import TcpTransport
+
+
+class LoopbackChannel(MicroChannel):
+    """MicroChannel whose frames land in the peer's inbox."""
+
+    def __init__(self, key: bytes, counter_path: str):
+        super().__init__(key, counter_path)
+        self.peer: Optional["LoopbackChannel"] = None
+        self.inbox: List[str] = []
+
+    def _write_raw(self, frame: str) -> None:
+        self.peer.inbox.append(frame)
+
+    def _read_raw(self) -> Optional[str]:
+        return self.inbox.pop(0) if self.inbox else None
+
+
+class TestTcpSessionKeys(unittest.TestCase):
+    """Tests for TcpTransport(secure_sessions=True)."""
+
+    def setUp(self):
+        # Transport packets are larger than the 26-byte AirTag frames
+        patcher = mock.patch.object(backchannel_encode, "PAYLOAD_BYTES", 512)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        counters = tempfile.TemporaryDirectory()
+        self.addCleanup(counters.cleanup)
+        key = secrets.token_bytes(32)
+        self.chan_a = LoopbackChannel(key, os.path.join(counters.name, "a.counter"))
+        self.chan_b = LoopbackChannel(key, os.path.join(counters.name, "b.counter"))
+        self.chan_a.peer, self.chan_b.peer = self.chan_b, self.chan_a
+
+    async def exchange(self, client: TcpTransport, server: TcpTransport, data: bytes) -> List[bytes]:
+        """Send data from client to server while pumping both receive paths."""
+        received = []
+
+        async def pump():
+            while True:
+                await client.recv(self.chan_a)
+                chunk = await server.recv(self.chan_b)
+                if chunk:
+                    received.append(chunk)
+                await asyncio.sleep(0.001)
+
+        pump_task = asyncio.ensure_future(pump())
+        try:
+            await client.send(data, self.chan_a)
+            await asyncio.sleep(0.01)
+        finally:
+            pump_task.cancel()
+            for transport in (client, server):
+                await transport.__aexit__(None, None, None)
+        return received
+
+    def test_handshake_installs_session(self):
+        """Test that both sides switch to matching session keys and data still flows."""
+        client, server = TcpTransport(secure_sessions=True), TcpTransport(secure_sessions=True)
+        received = asyncio.run(self.exchange(client, server, b"hello over a session"))
+        self.assertEqual(received, [b"hello over a session"])
+        self.assertIsNotNone(self.chan_a.session)
+        self.assertIsNotNone(self.chan_b.session)
+        self.assertEqual(self.chan_a.session.cipher, self.chan_b.session.cipher)
+        sealed = self.chan_a.session.tx.seal(99, b"check")
+        self.assertEqual(self.chan_b.session.rx.open(99, sealed), b"check")
+
+    def test_sessions_by_default(self):
+        """Test that transports negotiate sessions on keyed channels unless told not to."""
+        received = asyncio.run(self.exchange(TcpTransport(), TcpTransport(), b"default"))
+        self.assertEqual(received, [b"default"])
+        self.assertIsNotNone(self.chan_a.session)
+        self.assertIsNotNone(self.chan_b.session)
+
+    def test_plain_transport_unchanged(self):
+        """Test that the handshake without sessions leaves the channel key in use."""
+        client, server = TcpTransport(secure_sessions=False), TcpTransport(secure_sessions=False)
+        received = asyncio.run(self.exchange(client, server, b"plain"))
+        self.assertEqual(received, [b"plain"])
+        self.assertIsNone(self.chan_a.session)
+        self.assertIsNone(self.chan_b.session)
+
+    def test_secure_client_refuses_plain_server(self):
+        """Test that a client requiring sessions does not connect to a peer without them."""
+        client, server = TcpTransport(secure_sessions=True), TcpTransport(secure_sessions=False)
+
+        async def run():
+            with mock.patch("dao_cli.transport.tcp.INITIAL_TIMEOUT", 0.05):
+                await self.exchange(client, server, b"data")
+
+        with self.assertRaises(ConnectionError):
+            asyncio.run(run())
+        self.assertIsNone(self.chan_a.session)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+"""
+Unit tests for the retransmission timer queue and the deadline-driven ticker.
+"""
+
+import asyncio
+import time
+import unittest
+
+from dao_cli.transport.tcp import RetransmitHandler, TcpTransport
+from dao_cli.transport.timers import TimerQueue
+
+
+class SinkChannel:
+    """Channel that records and discards everything sent."""
+
+    def __init__(self):
+        self.sent = []
+
+    def send(self, payload: bytes) -> None:
+        self.sent.append(payload)
+
+    def receive(self):
+        return None
+
+
+class TestTimerQueue(unittest.TestCase):
+    """Tests for TimerQueue."""
+
+    def test_pop_due_in_order(self):
+        """Test that only expired timers are returned, earliest first."""
+        timers = TimerQueue()
+        for key, deadline in (("c", 3.0), ("a", 1.0), ("b", 2.0), ("d", 9.0)):
+            timers.schedule(key, deadline)
+        self.assertEqual(timers.next_deadline(), 1.0)
+        self.assertEqual(timers.pop_due(2.5), ["a", "b"])
+        self.assertEqual(timers.pop_due(2.5), [])
+        self.assertEqual(len(timers), 2)
+
+    def test_cancel_and_reschedule(self):
+        """Test that cancelled and moved timers leave no stale expiries."""
+        timers = TimerQueue()
+        timers.schedule("a", 1.0)
+        timers.schedule("b", 2.0)
+        self.assertFalse(timers.schedule("a", 5.0))
+        timers.cancel("b")
+        self.assertEqual(timers.next_deadline(), 5.0)
+        self.assertEqual(timers.pop_due(4.0), [])
+        self.assertTrue(timers.schedule("c", 0.5))
+        self.assertEqual(timers.pop_due(10.0), ["c", "a"])
+        self.assertIsNone(timers.next_deadline())
+
+    def test_compaction_bounds_heap(self):
+        """Test that repeated rescheduling does not grow the heap without bound."""
+        timers = TimerQueue()
+        for i in range(10000):
+            timers.schedule(i % 10, float(i))
+        self.assertEqual(len(timers), 10)
+        self.assertLess(len(timers._heap), 200)
+        self.assertEqual(sorted(timers.pop_due(float("inf"))), list(range(10)))
+
+
+class TestDeadlineTicker(unittest.TestCase):
+    """Tests for the TcpTransport ticker."""
+
+    def test_idle_transport_does_not_wake(self):
+        """Test that the ticker sleeps while no packet is pending."""
+        transport = TcpTransport()
+
+        async def run():
+            async with transport:
+                await asyncio.sleep(0.3)
+
+        asyncio.run(run())
+        self.assertEqual(transport.timer_wakeups, 0)
+
+    def test_retransmits_at_deadlines_then_gives_up(self):
+        """Test that a pending packet is resent at each backed-off deadline and then dropped."""
+        transport = TcpTransport()
+        chan = SinkChannel()
+
+        async def run():
+            async with transport:
+                # Far-off timers for other packets must not cause wakeups
+                for seq in range(1, 1001):
+                    far = RetransmitHandler(60.0)
+                    transport._pending_packets[1, seq] = (b"far", far, chan)
+                    far.record_send()
+                    transport._arm((1, seq))
+
+                handler = RetransmitHandler(0.05, max_retries=2)
+                transport._pending_packets[0, 0] = (b"packet", handler, chan)
+                handler.record_send()
+                transport._arm((0, 0))
+                start = time.monotonic()
+                while (0, 0) in transport._pending_packets:
+                    await asyncio.sleep(0.01)
+                return time.monotonic() - start
+
+        elapsed = asyncio.run(run())
+        self.assertEqual(chan.sent, [b"packet", b"packet"])
+        self.assertGreaterEqual(elapsed, 0.05 + 0.1 + 0.2 - 0.02)
+        self.assertLessEqual(transport.timer_wakeups, 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,174 @@
+"""
+Unit tests for sliding-window state and windowed TCP transfers.
+"""
+
+import asyncio
+import unittest
+from typing import List, Optional, Set
+
+from dao_cli.transport.constants import FLAG_ACK, FLAG_SACK, MAX_SEQ_NUM
+from dao_cli.transport.header import PacketHeader
+from dao_cli.transport.tcp import TcpTransport
+from dao_cli.transport.window import (
+    InFlight, ReceiveWindow, SendWindow, decode_sack, encode_sack, seq_add, seq_diff
+)
+
+
+def entry(seq: int) -> InFlight:
+    return InFlight(seq, None, asyncio.Event())
+
+
+class LinkedChannel:
+    """In-memory channel delivering into its peer's inbox, optionally dropping packets."""
+
+    def __init__(self, drop: Optional[Set[int]] = None):
+        self.peer: Optional["LinkedChannel"] = None
+        self.inbox: List[bytes] = []
+        self.sent: List[bytes] = []
+        self.drop = drop or set()
+
+    def send(self, payload: bytes) -> None:
+        index = len(self.sent)
+        self.sent.append(payload)
+        if index not in self.drop:
+            self.peer.inbox.append(payload)
+
+    def receive(self) -> Optional[bytes]:
+        return self.inbox.pop(0) if self.inbox else None
+
+
+def headers(packets: List[bytes]) -> List[PacketHeader]:
+    return [PacketHeader.decode(packet)[0] for packet in packets]
+
+
+class TestWindowState(unittest.TestCase):
+    """Tests for SendWindow, ReceiveWindow and sequence arithmetic."""
+
+    def test_seq_arithmetic_wraps(self):
+        """Test that comparisons hold across the wrap of the sequence space."""
+        self.assertEqual(seq_add(MAX_SEQ_NUM - 1, 2), 1)
+        self.assertEqual(seq_diff(1, MAX_SEQ_NUM - 1), 2)
+        self.assertEqual(seq_diff(MAX_SEQ_NUM - 1, 1), -2)
+
+    def test_sack_encoding(self):
+        """Test SACK range round trip."""
+        blocks = [(3, 5), (9, 9)]
+        self.assertEqual(decode_sack(encode_sack(blocks)), blocks)
+        with self.assertRaises(ValueError):
+            decode_sack(b"\x00\x01\x02")
+
+    def test_receive_reorders_and_dedupes(self):
+        """Test in-order delivery from out-of-order arrivals, each packet once."""
+        window = ReceiveWindow(next_seq=1)
+        self.assertEqual(window.accept(2, "b"), [])
+        self.assertEqual(window.accept(4, "d"), [])
+        self.assertEqual(window.sack_blocks(), [(2, 2), (4, 4)])
+        self.assertEqual(window.accept(2, "b"), [])
+        self.assertEqual(window.cumulative, 0)
+        self.assertEqual(window.accept(1, "a"), ["a", "b"])
+        self.assertEqual(window.accept(3, "c"), ["c", "d"])
+        self.assertEqual(window.accept(1, "a"), [])
+        self.assertEqual(window.cumulative, 4)
+        self.assertEqual(window.duplicates, 2)
+
+    def test_receive_across_wrap(self):
+        """Test that buffering and SACK ranges work across the wrap."""
+        window = ReceiveWindow(next_seq=MAX_SEQ_NUM - 1)
+        window.accept(0, "b")
+        window.accept(1, "c")
+        self.assertEqual(window.sack_blocks(), [(0, 1)])
+        self.assertEqual(window.accept(MAX_SEQ_NUM - 1, "a"), ["a", "b", "c"])
+
+    def test_send_window_slides_on_cumulative_and_selective_acks(self):
+        """Test that SACKed packets keep their slot until the base is acknowledged."""
+        window = SendWindow(size=4, max_size=8)
+        entries = [entry(seq) for seq in range(1, 5)]
+        for e in entries:
+            window.add(e)
+        self.assertTrue(window.full)
+
+        acked = window.acknowledge(0, [(3, 4)])
+        self.assertEqual([e.seq for e in acked], [3, 4])
+        self.assertEqual(len(window), 4)
+
+        acked = window.acknowledge(2)
+        self.assertEqual([e.seq for e in acked], [1, 2])
+        self.assertEqual(len(window), 0)
+        self.assertEqual(window.size, 5)
+
+    def test_holes_and_loss(self):
+        """Test gap detection for fast retransmit and window halving."""
+        window = SendWindow(size=8)
+        for seq in range(1, 6):
+            window.add(entry(seq))
+        window.acknowledge(0, [(2, 3)])
+        self.assertEqual(window.holes(3), [])
+        window.acknowledge(0, [(2, 4)])
+        self.assertEqual([e.seq for e in window.holes(3)], [1])
+        window.on_loss()
+        self.assertEqual(window.size, 4)
+        window.size = 1
+        window.on_loss()
+        self.assertEqual(window.size, 1)
+
+
+class TestWindowedTransfer(unittest.TestCase):
+    """End-to-end windowed transfers between two TcpTransports."""
+
+    async def transfer(self, data: bytes, drop: Optional[Set[int]] = None, window_size: int = 8):
+        client_chan, server_chan = LinkedChannel(drop), LinkedChannel()
+        client_chan.peer, server_chan.peer = server_chan, client_chan
+        client, server = TcpTransport(window_size=window_size), TcpTransport()
+        client.MTU = 40
+        received = []
+
+        async def pump():
+            while True:
+                await client.recv(client_chan)
+                chunk = await server.recv(server_chan)
+                if chunk:
+                    received.append(chunk)
+                await asyncio.sleep(0.001)
+
+        pump_task = asyncio.ensure_future(pump())
+        try:
+            await client.send(data, client_chan)
+            await asyncio.sleep(0.01)
+        finally:
+            pump_task.cancel()
+            for transport in (client, server):
+                await transport.__aexit__(None, None, None)
+        return received, client, client_chan, server_chan
+
+    def test_pipelined_transfer(self):
+        """Test that fragments go out before earlier ACKs arrive and arrive in order."""
+        data = bytes(range(256)) * 2
+        received, client, client_chan, server_chan = asyncio.run(self.transfer(data))
+        # Fragments are reassembled and the message is returned once
+        self.assertEqual(received, [data])
+        # The first window was sent back to back, before any ACK was read
+        self.assertTrue(all(h.is_frag for h in headers(client_chan.sent[1:9])))
+        # Only the server sends ACKs, and the client never acknowledges them
+        self.assertFalse(any(h.is_ack for h in headers(client_chan.sent)))
+
+    def test_loss_is_repaired_selectively(self):
+        """Test that a lost fragment is resent alone and duplicates are not delivered twice."""
+        data = bytes(range(200)) * 3
+        # Packet 0 is the SYN; drop the second fragment
+        received, client, client_chan, server_chan = asyncio.run(self.transfer(data, drop={2}))
+        self.assertEqual(received, [data])
+        sent_seqs = [h.seq_no for h in headers(client_chan.sent) if h.is_frag]
+        self.assertEqual(sent_seqs.count(2), 2)
+        self.assertEqual(len(sent_seqs), len(set(sent_seqs)) + 1)
+        acks = headers(server_chan.sent)
+        self.assertTrue(any(h.flags & FLAG_SACK for h in acks if h.flags & FLAG_ACK))
+
+    def test_stop_and_wait(self):
+        """Test that a window of one still delivers everything."""
+        data = b"x" * 300
+        received, client, client_chan, _ = asyncio.run(self.transfer(data, window_size=1))
+        self.assertEqual(b"".join(received), data)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+"""
+Deadline scheduling for retransmission timers.
+
+TimerQueue is a binary heap of (deadline, key) entries with lazy
+cancellation: cancelling or rescheduling a key only updates a dict, and
+the stale heap entry is discarded when it reaches the top.  The runner
+sleeps until next_deadline() and pop_due() returns only the expired keys,
+so the cost per wakeup is O(k log n) for k expired timers and an idle
+transport does not wake up at all.
+"""
+
+import heapq
+import itertools
+from typing import Dict, Generic, Hashable, List, Optional, Tuple, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+
+# Rebuild the heap when stale entries outnumber live ones by this factor
+_COMPACT_FACTOR = 2
+_COMPACT_MIN = 64
+
+
+class TimerQueue(Generic[K]):
+    """One-shot timers keyed by an arbitrary hashable key; at most one per key."""
+
+    def __init__(self) -> None:
+        self._heap: List[Tuple[float, int, K]] = []
+        self._live: Dict[K, Tuple[float, int]] = {}  # key -> (deadline, entry id)
+        self._ids = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._live)
+
+    def __contains__(self, key: K) -> bool:
+        return key in self._live
+
+    def deadline(self, key: K) -> Optional[float]:
+        """Return the deadline of a key, or None if it has no timer."""
+        entry = self._live.get(key)
+        return entry[0] if entry else None
+
+    def schedule(self, key: K, deadline: float) -> bool:
+        """
+        Set (or move) the timer of a key.
+
+        Args:
+            key: Timer key
+            deadline: time.monotonic() value at which it expires
+
+        Returns:
+            True if this is now the earliest timer, so a sleeping runner must wake up
+        """
+        entry_id = next(self._ids)
+        self._live[key] = (deadline, entry_id)
+        heapq.heappush(self._heap, (deadline, entry_id, key))
+        self._maybe_compact()
+        return self._heap[0][1] == entry_id
+
+    def cancel(self, key: K) -> None:
+        """Remove the timer of a key, if any."""
+        if self._live.pop(key, None) is not None:
+            self._maybe_compact()
+
+    def next_deadline(self) -> Optional[float]:
+        """Return the earliest live deadline, or None when no timers are set."""
+        self._drop_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: float) -> List[K]:
+        """
+        Remove and return the keys whose deadline is at or before ``now``, earliest first.
+
+        Args:
+            now: Current time.monotonic() value
+        """
+        due = []
+        while True:
+            self._drop_stale()
+            if not self._heap or self._heap[0][0] > now:
+                return due
+            _, _, key = heapq.heappop(self._heap)
+            del self._live[key]
+            due.append(key)
+
+    def _drop_stale(self) -> None:
+        heap = self._heap
+        while heap and self._live.get(heap[0][2], (None, None))[1] != heap[0][1]:
+            heapq.heappop(heap)
+
+    def _maybe_compact(self) -> None:
+        if len(self._heap) > _COMPACT_MIN and len(self._heap) > _COMPACT_FACTOR * len(self._live):
+            self._heap = [(deadline, entry_id, key) for key, (deadline, entry_id) in self._live.items()]
+            heapq.heapify(self._heap)
@@ -0,0 +1,268 @@
+"""
+Sliding-window state for the TCP-like transport.
+
+The sender keeps up to ``size`` packets in flight per channel and
+retransmits each one on its own timer (selective repeat).  The receiver
+buffers packets that arrive ahead of a gap, delivers them in order once
+the gap is filled, and acknowledges with:
+
+- the ACK header's seq_no: the last sequence number received in order
+  (cumulative acknowledgment)
+- with FLAG_SACK set, a payload of up to MAX_SACK_BLOCKS inclusive
+  ``(first, last)`` ranges received beyond it, two big-endian uint16 each
+
+Sequence numbers wrap at MAX_SEQ_NUM and are compared with serial number
+arithmetic, so a window may straddle the wrap.
+"""
+
+import asyncio
+import dataclasses
+import struct
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .constants import MAX_SACK_BLOCKS, MAX_SEQ_NUM, MAX_WINDOW, MIN_WINDOW, WINDOW_SIZE
+
+SackBlock = Tuple[int, int]
+
+_HALF_SEQ = MAX_SEQ_NUM // 2
+
+
+def seq_add(seq: int, n: int) -> int:
+    """Return ``seq + n`` in sequence space."""
+    return (seq + n) % MAX_SEQ_NUM
+
+
+def seq_diff(a: int, b: int) -> int:
+    """Return the signed distance from ``b`` to ``a`` in sequence space."""
+    d = (a - b) % MAX_SEQ_NUM
+    return d - MAX_SEQ_NUM if d > _HALF_SEQ else d
+
+
+def encode_sack(blocks: Iterable[SackBlock]) -> bytes:
+    """Encode selective ACK ranges as an ACK payload."""
+    return b"".join(struct.pack(">HH", first, last) for first, last in blocks)
+
+
+def decode_sack(payload: bytes) -> List[SackBlock]:
+    """
+    Decode selective ACK ranges from an ACK payload.
+
+    Raises:
+        ValueError: If the payload is not a whole number of ranges
+    """
+    if len(payload) % 4:
+        raise ValueError(f"SACK payload of {len(payload)} bytes is not a list of ranges")
+    return [struct.unpack_from(">HH", payload, i) for i in range(0, len(payload), 4)]
+
+
+@dataclasses.dataclass
+class InFlight:
+    """
+    A sent packet the sender is waiting on.
+
+    Attributes:
+        seq: Sequence number
+        handler: Its RetransmitHandler
+        event: Set when the packet is acknowledged or given up on
+        acked: Whether it was acknowledged
+        fast_retransmitted: Whether it was already resent because of SACKs
+    """
+    seq: int
+    handler: Any
+    event: asyncio.Event
+    acked: bool = False
+    fast_retransmitted: bool = False
+
+
+class SendWindow:
+    """
+    Packets in flight on one channel, oldest first.
+
+    The window spans from the oldest unacknowledged packet, so a packet
+    acknowledged selectively keeps its slot until everything before it is
+    acknowledged too.  The size halves on loss and grows back by one packet
+    for each full window acknowledged, within [min_size, max_size].
+    """
+
+    def __init__(self, size: int = WINDOW_SIZE, min_size: int = MIN_WINDOW, max_size: Optional[int] = None):
+        """
+        Create an empty window.
+
+        Args:
+            size: Initial window in packets
+            min_size: Smallest window after losses
+            max_size: Largest window after growth (default: ``size``, at most MAX_WINDOW)
+        """
+        self.min_size = min_size
+        self.max_size = min(max_size or size, MAX_WINDOW)
+        self.size = max(min_size, min(size, self.max_size))
+        self.in_flight: "OrderedDict[int, InFlight]" = OrderedDict()
+        self._acked_since_resize = 0
+
+    def __len__(self) -> int:
+        return len(self.in_flight)
+
+    @property
+    def full(self) -> bool:
+        """Whether another packet must wait for the window to slide."""
+        return len(self.in_flight) >= self.size
+
+    @property
+    def oldest(self) -> Optional[InFlight]:
+        """The packet at the window base, if any."""
+        return next(iter(self.in_flight.values()), None)
+
+    def add(self, entry: InFlight) -> None:
+        """Put a newly sent packet in flight."""
+        self.in_flight[entry.seq] = entry
+
+    def acknowledge(self, cumulative: int, blocks: Iterable[SackBlock] = ()) -> List[InFlight]:
+        """
+        Apply an acknowledgment.
+
+        Args:
+            cumulative: Last sequence number the peer received in order
+            blocks: Ranges the peer received beyond ``cumulative``
+
+        Returns:
+            Entries acknowledged by this call
+        """
+        blocks = list(blocks)
+        newly = []
+        for entry in self.in_flight.values():
+            if entry.acked:
+                continue
+            if seq_diff(entry.seq, cumulative) <= 0 or any(
+                seq_diff(entry.seq, first) >= 0 and seq_diff(last, entry.seq) >= 0 for first, last in blocks
+            ):
+                entry.acked = True
+                newly.append(entry)
+        self._acked_since_resize += len(newly)
+        if self._acked_since_resize >= self.size:
+            self.size = min(self.max_size, self.size + 1)
+            self._acked_since_resize = 0
+        self.slide()
+        return newly
+
+    def slide(self) -> None:
+        """Drop acknowledged packets from the window base."""
+        while self.in_flight:
+            entry = self.oldest
+            if not entry.acked:
+                break
+            del self.in_flight[entry.seq]
+
+    def holes(self, threshold: int) -> List[InFlight]:
+        """
+        Return unacknowledged packets with at least ``threshold`` later packets acknowledged.
+
+        These were most likely lost, not just delayed, and are worth resending
+        without waiting for their timers.
+        """
+        holes = []
+        acked_after = 0
+        for entry in reversed(self.in_flight.values()):
+            if entry.acked:
+                acked_after += 1
+            elif acked_after >= threshold:
+                holes.append(entry)
+        holes.reverse()
+        return holes
+
+    def on_loss(self) -> None:
+        """Halve the window after a packet was lost."""
+        self.size = max(self.min_size, self.size // 2)
+        self._acked_since_resize = 0
+
+    def fail(self, seq: int) -> None:
+        """Give up on a packet: wake its waiter and free its slot."""
+        entry = self.in_flight.pop(seq, None)
+        if entry is not None:
+            entry.event.set()
+        self.slide()
+
+
+class ReceiveWindow:
+    """
+    In-order delivery and acknowledgment state for one channel.
+
+    Packets are kept as opaque items; accept() returns the items that are
+    now deliverable in sequence order, each exactly once.
+    """
+
+    def __init__(self, next_seq: Optional[int] = None, max_buffered: int = MAX_WINDOW):
+        """
+        Create the window.
+
+        Args:
+            next_seq: First sequence number expected, or None to start from
+                the first packet seen
+            max_buffered: Furthest ahead of next_seq a packet may be buffered
+        """
+        self.next_seq = next_seq
+        self.max_buffered = max_buffered
+        self._buffer: Dict[int, Any] = {}
+        self.duplicates = 0
+
+    @property
+    def buffered(self) -> int:
+        """Packets held beyond a gap."""
+        return len(self._buffer)
+
+    @property
+    def cumulative(self) -> int:
+        """Last sequence number received in order."""
+        return seq_add(self.next_seq if self.next_seq is not None else 0, -1)
+
+    def is_new(self, seq: int) -> bool:
+        """Whether accept() would buffer ``seq``, i.e. it is neither a duplicate nor too far ahead."""
+        if self.next_seq is None:
+            return True
+        ahead = seq_diff(seq, self.next_seq)
+        return 0 <= ahead < self.max_buffered and seq not in self._buffer
+
+    def accept(self, seq: int, item: Any) -> List[Any]:
+        """
+        Take in a received packet.
+
+        Args:
+            seq: Its sequence number
+            item: What to deliver for it
+
+        Returns:
+            Items now deliverable, in order (empty for duplicates, packets
+            beyond a gap and packets too far ahead to buffer)
+        """
+        if self.next_seq is None:
+            self.next_seq = seq
+        ahead = seq_diff(seq, self.next_seq)
+        if ahead < 0 or seq in self._buffer:
+            self.duplicates += 1
+            return []
+        if ahead >= self.max_buffered:
+            return []
+        self._buffer[seq] = item
+        ready = []
+        while self.next_seq in self._buffer:
+            ready.append(self._buffer.pop(self.next_seq))
+            self.next_seq = seq_add(self.next_seq, 1)
+        return ready
+
+    def held(self) -> List[Tuple[int, Any]]:
+        """Return the packets buffered beyond the gap as (seq, item), nearest first."""
+        return sorted(self._buffer.items(), key=lambda kv: seq_diff(kv[0], self.next_seq))
+
+    def sack_blocks(self, limit: int = MAX_SACK_BLOCKS) -> List[SackBlock]:
+        """Return up to ``limit`` ranges of buffered packets beyond the gap, nearest first."""
+        if not self._buffer:
+            return []
+        blocks: List[SackBlock] = []
+        for seq in sorted(self._buffer, key=lambda s: seq_diff(s, self.next_seq)):
+            if blocks and seq == seq_add(blocks[-1][1], 1):
+                blocks[-1] = (blocks[-1][0], seq)
+            elif len(blocks) < limit:
+                blocks.append((seq, seq))
+            else:
+                break
+        return blocks